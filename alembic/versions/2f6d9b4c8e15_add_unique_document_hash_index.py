@@ -0,0 +1,43 @@
+"""add unique (organization_id, document_hash) index to documents
+
+Revision ID: 2f6d9b4c8e15
+Revises: 8a4c6f2e91d3
+Create Date: 2026-03-27 10:12:48.501377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6d9b4c8e15'
+down_revision: Union[str, Sequence[str], None] = '8a4c6f2e91d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicates that slipped in through concurrent uploads keep their rows, only the later copies lose the hash
+    # (NULL hashes are never equal, so they don't conflict with the index).
+    op.execute(
+        """
+        UPDATE documents SET document_hash = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY organization_id, document_hash ORDER BY created_at, id) AS rn
+                FROM documents
+                WHERE document_hash IS NOT NULL
+            ) ranked
+            WHERE rn > 1
+        )
+        """
+    )
+    op.create_index('uq_documents_organization_id_document_hash', 'documents', ['organization_id', 'document_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_documents_organization_id_document_hash', table_name='documents')
@@ -0,0 +1,31 @@
+"""add (organization_id, created_at) indexes to documents and queries
+
+Revision ID: 5e8b1d03a7f4
+Revises: c3a9e4f17b62
+Create Date: 2026-03-23 09:41:12.730458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b1d03a7f4'
+down_revision: Union[str, Sequence[str], None] = 'c3a9e4f17b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id is the tie-breaker of the keyset (created_at, id), so it is part of the index too.
+    op.create_index('ix_documents_organization_id_created_at', 'documents', ['organization_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_queries_organization_id_created_at', 'queries', ['organization_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_queries_organization_id_created_at', table_name='queries')
+    op.drop_index('ix_documents_organization_id_created_at', table_name='documents')
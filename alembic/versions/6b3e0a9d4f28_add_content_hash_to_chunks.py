@@ -0,0 +1,33 @@
+"""add content_hash and embedding_model to chunks
+
+Revision ID: 6b3e0a9d4f28
+Revises: 2f6d9b4c8e15
+Create Date: 2026-03-30 15:04:37.268190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b3e0a9d4f28'
+down_revision: Union[str, Sequence[str], None] = '2f6d9b4c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing chunks stay NULL: the model that embedded them is unknown, so they are never reused.
+    op.add_column('chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('chunks', sa.Column('embedding_model', sa.String(length=160), nullable=True))
+    op.create_index('ix_chunks_organization_id_content_hash', 'chunks', ['organization_id', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chunks_organization_id_content_hash', table_name='chunks')
+    op.drop_column('chunks', 'embedding_model')
+    op.drop_column('chunks', 'content_hash')
@@ -0,0 +1,60 @@
+"""add usage_daily_rollups
+
+Revision ID: 8a4c6f2e91d3
+Revises: 5e8b1d03a7f4
+Create Date: 2026-03-25 11:27:05.114382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4c6f2e91d3'
+down_revision: Union[str, Sequence[str], None] = '5e8b1d03a7f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('usage_daily_rollups',
+    sa.Column('organization_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('model_name', sa.String(length=128), nullable=False),
+    sa.Column('request_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('cache_hit_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('prompt_tokens', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('completion_tokens', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('total_tokens', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('estimated_cost_usd', sa.Float(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('organization_id', 'day', 'model_name')
+    )
+
+    # Initial fill from history (same query as PostgreSQL_UsageRollupRepository.rebuild).
+    op.execute("""
+        INSERT INTO usage_daily_rollups
+            (organization_id, day, model_name, request_count, cache_hit_count,
+             prompt_tokens, completion_tokens, total_tokens, estimated_cost_usd)
+        SELECT
+            q.organization_id,
+            date(timezone('UTC', q.created_at)),
+            coalesce(u.model_name, ''),
+            count(DISTINCT q.id),
+            count(DISTINCT q.id) FILTER (WHERE q.cache_hit),
+            coalesce(sum(u.prompt_tokens), 0),
+            coalesce(sum(u.completion_tokens), 0),
+            coalesce(sum(u.total_tokens), 0),
+            coalesce(sum(u.estimated_cost_usd), 0.0)
+        FROM queries q
+        LEFT OUTER JOIN llm_usage u ON u.query_id = q.id
+        GROUP BY q.organization_id, date(timezone('UTC', q.created_at)), coalesce(u.model_name, '')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usage_daily_rollups')
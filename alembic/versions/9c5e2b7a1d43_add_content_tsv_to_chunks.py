@@ -0,0 +1,36 @@
+"""add content_tsv to chunks
+
+Revision ID: 9c5e2b7a1d43
+Revises: 6b3e0a9d4f28
+Create Date: 2026-04-02 10:21:48.530614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c5e2b7a1d43'
+down_revision: Union[str, Sequence[str], None] = '6b3e0a9d4f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    #MANUAL: stored generated column, so PostgreSQL computes it for existing rows (table rewrite) and for every new chunk.
+    # The configuration must match TEXT_SEARCH_CONFIG in app/infra/db/ormmodels.py.
+    op.add_column(
+        'chunks',
+        sa.Column('content_tsv', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', content)", persisted=True), nullable=True),
+    )
+    op.create_index('ix_chunks_content_tsv_gin', 'chunks', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chunks_content_tsv_gin', table_name='chunks', postgresql_using='gin')
+    op.drop_column('chunks', 'content_tsv')
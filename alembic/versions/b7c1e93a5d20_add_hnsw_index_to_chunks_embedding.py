@@ -0,0 +1,40 @@
+"""add hnsw index to chunks embedding
+
+Revision ID: b7c1e93a5d20
+Revises: eaad2f43ced3
+Create Date: 2026-03-16 09:42:31.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e93a5d20'
+down_revision: Union[str, Sequence[str], None] = 'eaad2f43ced3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    #MANUAL: approximate nearest neighbour index for cosine distance (ChunkORM.embedding.cosine_distance).
+    # Query time recall is tuned with hnsw.ef_search, set per session in app/infra/db/engine.py.
+    op.create_index(
+        'ix_chunks_embedding_hnsw',
+        'chunks',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+    # IVFFlat alternative (needs data already loaded to build good lists, tune with ivfflat.probes):
+    # op.execute("CREATE INDEX ix_chunks_embedding_ivfflat ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chunks_embedding_hnsw', table_name='chunks', postgresql_using='hnsw')
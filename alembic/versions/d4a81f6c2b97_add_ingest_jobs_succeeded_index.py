@@ -0,0 +1,29 @@
+"""add partial updated_at index on succeeded ingest_jobs
+
+Revision ID: d4a81f6c2b97
+Revises: 9c5e2b7a1d43
+Create Date: 2026-10-17 10:05:42.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a81f6c2b97'
+down_revision: Union[str, Sequence[str], None] = '9c5e2b7a1d43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # API processes look up jobs that succeeded since their last check.
+    op.create_index('ix_ingest_jobs_succeeded_updated_at', 'ingest_jobs', ['updated_at'], unique=False, postgresql_where=sa.text("status = 'succeeded'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingest_jobs_succeeded_updated_at', table_name='ingest_jobs', postgresql_where=sa.text("status = 'succeeded'"))
@@ -1,6 +1,8 @@
 import os
 
 from app.domain.entities import Organization
+from app.domain.types import RetrievalOptions
+from app.domain.interfaces import ChunkerInterface, EmbedderInterface, OrganizationRepositoryInterface, PDFParserInterface, PromptBuilderInterface, TokenCounterInterface
 
 from fastapi import Depends, HTTPException, Header
 from app.infra.db.engine import get_db_session
@@ -12,31 +14,181 @@ from app.application.services.api_key import hash_api_key
 from app.infra.llm.implementations import OpenAILLMClient
 
 from functools import lru_cache
-from app.infra.embedder.implementations import OpenAIEmbedder
+from app.infra.embedder.implementations import CachedEmbedder, OpenAIEmbedder, SQLite_EmbeddingCacheStore, ScheduledEmbedder
+from app.infra.retriever.implementations import InMemory_VectorIndex
+from app.infra.cache.implementations import CachedOrganizationRepository, InMemory_AnswerCache, InMemory_OrganizationCache
+from app.infra.parser.implementations import Parallel_PDFParser, V1_PDFParser
+from app.infra.tokenizer.implementations import Tiktoken_TokenCounter
+from app.application.services.chunker import SentenceChunkingConfig, Sentence_Chunker, V1_Chunker
+from app.application.services.prompt_builder import Budgeted_PromptBuilder, Merging_PromptBuilder, V1_PromptBuilder
 
 def get_current_organization(
         api_key: str = Header(..., alias="X-API-Key"),
         db: Session = Depends(get_db_session)
     ) -> Organization:
     
-    org_repo = PostgreSQL_OrganizationRepository(db)
+    org_repo = get_organization_repository(db)
     api_key_hash = hash_api_key(api_key)
     
-    organization = org_repo.get_by_api_key_hash(api_key_hash=api_key_hash)
+    organization = org_repo.get_by_api_key_hash(api_key_hash=api_key_hash) #no DB round trip on a cache hit.
     
     if organization is None:
         raise HTTPException(status_code=401, detail="Invalid API key")
     return organization
 
+def get_organization_repository(db: Session) -> OrganizationRepositoryInterface:
+    # Use this one wherever organizations are deleted or their API key rotates, so the auth cache is invalidated.
+    org_repo = PostgreSQL_OrganizationRepository(db)
+    cache = get_organization_cache()
+    return org_repo if cache is None else CachedOrganizationRepository(org_repo, cache)
+
+@lru_cache
+def get_organization_cache() -> InMemory_OrganizationCache | None:
+    # One auth cache per process. AUTH_CACHE_TTL_SECONDS=0 disables it.
+    ttl_seconds = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    if ttl_seconds <= 0:
+        return None
+    return InMemory_OrganizationCache(
+        max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+        ttl_seconds=ttl_seconds,
+    )
 
 
 def get_llm_client():
     return OpenAILLMClient()
 
+@lru_cache
+def get_token_counter() -> TokenCounterInterface:
+    # Counts with the encoding of the answering model: chunk token counts and the prompt budget are both about its context window.
+    model_name = os.getenv("OPENAI_MODEL", "").strip() or OpenAILLMClient.DEFAULT_MODEL
+    return Tiktoken_TokenCounter(model_name=model_name)
+
+@lru_cache
+def get_chunker() -> ChunkerInterface:
+    # CHUNKER=sentence packs whole sentences up to CHUNK_MAX_TOKENS, "fixed" keeps the 1200-character windows.
+    # Changing it re-chunks updated documents entirely (no chunk text matches the old boundaries).
+    if os.getenv("CHUNKER", "fixed").strip().lower() != "sentence":
+        return V1_Chunker()
+    return Sentence_Chunker(
+        config=SentenceChunkingConfig(
+            max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "300")),
+            overlap_sentences=int(os.getenv("CHUNK_OVERLAP_SENTENCES", "1")),
+        ),
+        token_counter=get_token_counter(),
+    )
+
+def get_ingest_pipeline_settings() -> dict[str, int]:
+    # Streaming ingestion: chunks per embedding request, and embedding requests running at once per document.
+    return {
+        "embed_batch_size": int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256")),
+        "max_in_flight_batches": int(os.getenv("INGEST_MAX_IN_FLIGHT_BATCHES", "4")),
+    }
+
+@lru_cache
+def get_prompt_builder() -> PromptBuilderInterface:
+    # PROMPT_MAX_CONTEXT_TOKENS=0 disables the budget (every retrieved chunk goes into the prompt).
+    max_context_tokens = int(os.getenv("PROMPT_MAX_CONTEXT_TOKENS", "6000"))
+    if max_context_tokens <= 0:
+        prompt_builder = V1_PromptBuilder()
+    else:
+        prompt_builder = Budgeted_PromptBuilder(token_counter=get_token_counter(), max_context_tokens=max_context_tokens)
+
+    # Adjacent chunks are merged and near-duplicates dropped before the budget is applied. PROMPT_MERGE_CHUNKS=false disables it.
+    if os.getenv("PROMPT_MERGE_CHUNKS", "true").strip().lower() not in ("1", "true", "yes"):
+        return prompt_builder
+    return Merging_PromptBuilder(
+        inner=prompt_builder,
+        duplicate_threshold=float(os.getenv("PROMPT_DUPLICATE_THRESHOLD", "0.8")),
+    )
+
+@lru_cache
+def get_embedding_scheduler() -> ScheduledEmbedder | None:
+    # One scheduler per process: every request and ingest job shares its in-flight limit and rate-limit buckets.
+    # EMBEDDING_MAX_IN_FLIGHT=0 disables it (sequential requests, retries left to the OpenAI client).
+    max_in_flight = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "4"))
+    model_name = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    embedder = OpenAIEmbedder(
+        api_key=os.environ["OPENAI_API_KEY"],
+        model_name=model_name,
+        dimensions=int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS", "384")),
+        max_retries=0 if max_in_flight > 0 else 2,
+    )
+    if max_in_flight <= 0:
+        return None
+    return ScheduledEmbedder(
+        embedder=embedder,
+        max_in_flight=max_in_flight,
+        requests_per_minute=int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000")),
+        tokens_per_minute=int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000")),
+        max_retries=int(os.getenv("EMBEDDING_MAX_RETRIES", "5")),
+        token_counter=Tiktoken_TokenCounter(model_name=model_name),
+    )
+
 @lru_cache 
-def get_embedder() -> OpenAIEmbedder:
-    return OpenAIEmbedder(
+def get_embedder() -> EmbedderInterface:
+    embedder = get_embedding_scheduler() or OpenAIEmbedder(
         api_key=os.environ["OPENAI_API_KEY"],
         model_name=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
         dimensions=int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS", "384")),
-    )
\ No newline at end of file
+    )
+
+    # Question embedding cache. EMBEDDING_CACHE_SIZE=0 disables it.
+    cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    if cache_size <= 0:
+        return embedder
+
+    ttl_seconds = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400")) #both tiers.
+    cache_path = os.getenv("EMBEDDING_CACHE_PATH", "").strip()
+    return CachedEmbedder(
+        embedder=embedder,
+        max_size=cache_size,
+        ttl_seconds=ttl_seconds,
+        store=SQLite_EmbeddingCacheStore(cache_path, ttl_seconds=ttl_seconds) if cache_path else None,
+    )
+
+def get_retriever_backend() -> str:
+    # "sql" (pgvector only), "hybrid" (pgvector + full-text, fused in SQL) or "inmemory" (process-wide vector index).
+    return os.getenv("RETRIEVER_BACKEND", "sql").strip().lower()
+
+@lru_cache
+def get_retrieval_options() -> RetrievalOptions:
+    # Deployment defaults. Each question can override them (AskQuestionRequest).
+    min_similarity = os.getenv("RETRIEVAL_MIN_SIMILARITY", "").strip()
+    max_context_tokens = int(os.getenv("RETRIEVAL_MAX_CONTEXT_TOKENS", "0"))
+    return RetrievalOptions(
+        top_k=int(os.getenv("RETRIEVAL_TOP_K", "5")),
+        min_similarity=float(min_similarity) if min_similarity else None,
+        max_context_tokens=max_context_tokens if max_context_tokens > 0 else None, #0 = no budget.
+    )
+
+@lru_cache
+def get_vector_index() -> InMemory_VectorIndex | None:
+    # One index per process, only when the in-memory retrieval backend is enabled.
+    if get_retriever_backend() != "inmemory":
+        return None
+    return InMemory_VectorIndex(
+        max_organizations=int(os.getenv("INMEMORY_INDEX_MAX_ORGANIZATIONS", "100")),
+    )
+
+@lru_cache
+def get_answer_cache() -> InMemory_AnswerCache | None:
+    # One answer cache per process. ANSWER_CACHE_ENABLED=false disables it.
+    if os.getenv("ANSWER_CACHE_ENABLED", "true").strip().lower() not in ("1", "true", "yes"):
+        return None
+    return InMemory_AnswerCache(
+        embedder=get_embedder(),
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95")),
+        max_entries_per_organization=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES_PER_ORGANIZATION", "1000")),
+        ttl_seconds=int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400")),
+    )
+
+@lru_cache
+def get_pdf_parser() -> PDFParserInterface:
+    # PDF_PARSER=parallel extracts pages of long documents in a process pool.
+    if os.getenv("PDF_PARSER", "serial").strip().lower() != "parallel":
+        return V1_PDFParser()
+    max_workers = int(os.getenv("PDF_PARSER_MAX_WORKERS", "0"))
+    return Parallel_PDFParser(
+        max_workers=max_workers if max_workers > 0 else None, #0 = one per CPU.
+        min_pages_for_pool=int(os.getenv("PDF_PARSER_MIN_PAGES_FOR_POOL", "50")),
+    )
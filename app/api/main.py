@@ -1,11 +1,51 @@
 
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import anyio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.api import router_1_ingest_document
 from app.api import router_2_add_organization
 from app.api import router_3_ask_question
 from app.api import router_4_dashboard
+from app.api import router_5_ingest_jobs
+
+logger = logging.getLogger(__name__)
+
+# Questions commit their query row before the LLM call, so a thread waiting on the LLM holds no DB connection:
+# the number of in-flight questions is bounded by this threadpool, not by the DB connection pool.
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "400"))
+# How often this process looks for documents ingested by the background worker. 0 disables it.
+INGEST_JOB_SYNC_INTERVAL_SECONDS = float(os.getenv("INGEST_JOB_SYNC_INTERVAL_SECONDS", "5"))
+
+
+async def sync_ingest_jobs_forever() -> None:
+    # Answer cache and in-memory index of this process follow the worker's ingestions, polled or not.
+    since = datetime.now(timezone.utc)
+    while True:
+        await anyio.sleep(INGEST_JOB_SYNC_INTERVAL_SECONDS)
+        try:
+            since = await run_in_threadpool(router_5_ingest_jobs.sync_succeeded_jobs, since)
+        except Exception:
+            logger.exception("Failed to sync succeeded ingest jobs")
 
-app = FastAPI(title="AI Knowledge System API", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Use cases are synchronous (SQLAlchemy Session + OpenAI client) and routers run them in the threadpool,
+    # so its size is the number of requests a worker can have in flight. Default from anyio is 40.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    async with anyio.create_task_group() as task_group:
+        if INGEST_JOB_SYNC_INTERVAL_SECONDS > 0:
+            task_group.start_soon(sync_ingest_jobs_forever)
+        yield
+        task_group.cancel_scope.cancel()
+
+
+app = FastAPI(title="AI Knowledge System API", version="1.0", lifespan=lifespan)
 
 @app.get("/")
 def root():
@@ -15,4 +55,4 @@ app.include_router(router_1_ingest_document.router, prefix = "/api", tags = ["in
 app.include_router(router_2_add_organization.router, prefix = "/api", tags = ["new_organization"])
 app.include_router(router_3_ask_question.router, prefix = "/api", tags = ["ask_question"])
 app.include_router(router_4_dashboard.router, prefix="/api", tags=["dashboard"])
-
+app.include_router(router_5_ingest_jobs.router, prefix="/api", tags=["ingest_jobs"])
@@ -1,66 +1,82 @@
 from datetime import datetime
+import os
 import uuid
 
-from app.api.dependencies import get_current_organization, get_embedder
+from app.api.dependencies import get_answer_cache, get_current_organization, get_chunker, get_embedder, get_ingest_pipeline_settings, get_pdf_parser, get_token_counter, get_vector_index
 from app.domain.entities import Organization
-from app.application.exceptions import ChunkPersistenceError, ChunkingError, DocumentAlreadyExistsError, DocumentPersistError, EmptyFileError, OrganizationNotFoundError, ParsingError, StorageDeleteError, StorageWriteError
-from app.domain.interfaces import EmbedderInterface
+from app.application.exceptions import ChunkEmbeddingError, ChunkPersistenceError, ChunkingError, DocumentAlreadyExistsError, DocumentNotFoundError, DocumentPersistError, EmptyFileError, ParsingError, PersistenceError, StorageDeleteError, StorageWriteError
+from app.domain.interfaces import AnswerCacheInterface, DocumentStorageInterface, EmbedderInterface, PDFParserInterface
+from app.domain.types import StagedFile
 from fastapi import File, UploadFile, Depends, HTTPException
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session 
 from app.infra.db.engine import get_db_session
 
-from app.api.schemas import IngestDocumentResponse
+from app.api.schemas import IngestDocumentResponse, UpdateDocumentResponse
 
-from app.infra.db.implementations import PostgreSQL_DocumentRepository, PostgreSQL_OrganizationRepository, PostgreSQL_ChunkRepository
+from app.infra.db.implementations import PostgreSQL_DocumentRepository, PostgreSQL_ChunkRepository
 #from app.infra.embedder.implementations import SentenceTransformerEmbedder
-from app.infra.parser.implementations import V1_PDFParser
 from app.infra.storage.implementations import Local_DocumentStorage 
-from app.application.services.chunker import V1_Chunker
+from app.infra.retriever.implementations import InMemory_VectorIndex
 
-from app.application.use_cases import IngestDocument
+from app.application.dto import UpdateDocumentResult
+from app.application.use_cases import IngestDocument, UpdateDocument
 
 router = APIRouter()
 
-MAX_FILE_SIZE_BYTES = 10 * 1024 * 1024  #TODO: get from config
+# Uploads are streamed to disk, so the limit no longer bounds the memory used per request.
+MAX_FILE_SIZE_BYTES = int(float(os.getenv("MAX_UPLOAD_SIZE_MB", "10")) * 1024 * 1024)
 DEFAULT_STORAGE_PATH = "./storage" #TODO: get from config
 
 
+async def stage_upload(file: UploadFile, storage: DocumentStorageInterface) -> StagedFile:
+    # Streams the upload into a staged file (hashed on the way) instead of reading it into memory.
+    try:
+        upload = await run_in_threadpool(storage.stage, file.file, MAX_FILE_SIZE_BYTES)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File exceeds max size ({MAX_FILE_SIZE_BYTES / (1024 * 1024)} MB).",
+        )
+    if upload.size == 0:
+        storage.discard(upload)
+        raise HTTPException(status_code=400, detail="File is empty.")
+    return upload
+
+
 @router.post("/ingest-document", response_model = IngestDocumentResponse )
 async def ingest_document(
         file: UploadFile = File(...), 
         organization: Organization = Depends(get_current_organization),
         db: Session = Depends(get_db_session),
-        embedder: EmbedderInterface = Depends(get_embedder)
+        embedder: EmbedderInterface = Depends(get_embedder),
+        vector_index: InMemory_VectorIndex | None = Depends(get_vector_index),
+        answer_cache: AnswerCacheInterface | None = Depends(get_answer_cache),
+        parser: PDFParserInterface = Depends(get_pdf_parser)
     ):
     
-    file_bytes = await file.read() 
     filename = file.filename or ("doc-" + datetime.now().strftime("%Y%m%d%H%M%S"))
-    size = len(file_bytes)
-    
-    if size == 0:
-        raise HTTPException(status_code=400, detail="File is empty.")
-    if size > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File exceeds max size ({MAX_FILE_SIZE_BYTES / (1024 * 1024)} MB).",
-        )
-        
     storage = Local_DocumentStorage(DEFAULT_STORAGE_PATH)
+    upload = await stage_upload(file, storage)
     
     use_case = IngestDocument(
-        org_repo = PostgreSQL_OrganizationRepository(db),
         doc_repo = PostgreSQL_DocumentRepository(db),   
         chunk_repo = PostgreSQL_ChunkRepository(db),
         embedder= embedder,
-        storage = Local_DocumentStorage(DEFAULT_STORAGE_PATH),
-        parser = V1_PDFParser(),
-        chunker = V1_Chunker()                              
+        storage = storage,
+        parser = parser,
+        chunker = get_chunker(),
+        token_counter = get_token_counter(),
+        **get_ingest_pipeline_settings(),
     )
     result = None
     try:        
-        result = use_case.execute(organization.id, file_bytes, filename) #organization.id comes from the get_current_organization dependency, which means that if the API key was invalid or the organization didn't exist, it would have already raised an HTTPException and we wouldn't reach this point.
-        db.commit()
+        result = await run_in_threadpool(use_case.execute, organization, upload, filename) #blocking DB/OpenAI work runs off the event loop. organization comes from the get_current_organization dependency, which means that if the API key was invalid or the organization didn't exist, it would have already raised an HTTPException and we wouldn't reach this point.
+        await run_in_threadpool(db.commit)
+        if answer_cache is not None:
+            answer_cache.invalidate(organization.id) #cached answers may be outdated with the new document.
+        await run_in_threadpool(refresh_vector_index, vector_index, db, organization.id, result.document_id)
         return IngestDocumentResponse.from_domain(result)
     
     except DocumentAlreadyExistsError as e:
@@ -69,9 +85,6 @@ async def ingest_document(
     except (EmptyFileError, ParsingError) as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
-    except OrganizationNotFoundError as e:
-        db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
     except (DocumentPersistError, ChunkPersistenceError, StorageWriteError, ChunkingError) as e:
         db.rollback()
         if result is not None:
@@ -91,3 +104,83 @@ async def ingest_document(
             except Exception:
                 pass
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    finally:
+        storage.discard(upload) #no-op if the use case moved it into storage.
+
+
+@router.put("/documents/{document_id}", response_model=UpdateDocumentResponse)
+async def update_document(
+        document_id: uuid.UUID,
+        file: UploadFile = File(...),
+        organization: Organization = Depends(get_current_organization),
+        db: Session = Depends(get_db_session),
+        embedder: EmbedderInterface = Depends(get_embedder),
+        vector_index: InMemory_VectorIndex | None = Depends(get_vector_index),
+        answer_cache: AnswerCacheInterface | None = Depends(get_answer_cache),
+        parser: PDFParserInterface = Depends(get_pdf_parser)
+    ):
+    """
+    Replaces the document with a new version. Only the chunks whose text changed are embedded and written,
+    unchanged chunks (and the query history linked to them) are kept.
+    """
+    storage = Local_DocumentStorage(DEFAULT_STORAGE_PATH)
+    upload = await stage_upload(file, storage)
+
+    use_case = UpdateDocument(
+        doc_repo=PostgreSQL_DocumentRepository(db),
+        chunk_repo=PostgreSQL_ChunkRepository(db),
+        embedder=embedder,
+        storage=storage,
+        parser=parser,
+        chunker=get_chunker(),
+        commit=db.commit, #before the stored file is replaced.
+        token_counter=get_token_counter(),
+    )
+    try:
+        result = await run_in_threadpool(use_case.execute, organization, document_id, upload, file.filename)
+    except DocumentNotFoundError as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except DocumentAlreadyExistsError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except (EmptyFileError, ParsingError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except (PersistenceError, DocumentPersistError, ChunkPersistenceError, ChunkEmbeddingError, StorageWriteError, ChunkingError) as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    finally:
+        storage.discard(upload) #no-op if the use case moved it into storage.
+
+    if result.chunks_added or result.chunks_deleted or result.moved_chunk_ids:
+        if answer_cache is not None:
+            answer_cache.invalidate(organization.id) #cached answers may quote text that is no longer in the document.
+        await run_in_threadpool(refresh_vector_index_after_update, vector_index, db, organization.id, result)
+    return UpdateDocumentResponse.from_domain(result)
+
+
+def refresh_vector_index(vector_index: InMemory_VectorIndex | None, db: Session, organization_id: uuid.UUID, document_id: uuid.UUID) -> None:
+    # Only after commit, so the in-memory index never holds chunks that are not in the database.
+    if vector_index is None or not vector_index.is_loaded(organization_id):
+        return
+    try:
+        chunks = PostgreSQL_ChunkRepository(db).get_by_document(organization_id, document_id)
+        vector_index.add_chunks(organization_id, chunks)
+    except Exception:
+        vector_index.invalidate(organization_id) #next question reloads the organization from the database.
+
+
+def refresh_vector_index_after_update(vector_index: InMemory_VectorIndex | None, db: Session, organization_id: uuid.UUID, result: UpdateDocumentResult) -> None:
+    # Only the rows that changed: deleted and moved chunks are dropped, added and moved ones (re)loaded.
+    if vector_index is None or not vector_index.is_loaded(organization_id):
+        return
+    try:
+        fresh_ids = set(result.added_chunk_ids) | set(result.moved_chunk_ids)
+        chunks = [c for c in PostgreSQL_ChunkRepository(db).get_by_document(organization_id, result.document_id) if c.id in fresh_ids] if fresh_ids else []
+        vector_index.replace_chunks(organization_id, result.deleted_chunk_ids + result.moved_chunk_ids, chunks)
+    except Exception:
+        vector_index.invalidate(organization_id) #next question reloads the organization from the database.
@@ -1,18 +1,25 @@
+from dataclasses import replace
+import itertools
+import json
+import os
 import uuid
 
-from app.domain.interfaces import EmbedderInterface, LLMInterface
+from app.domain.interfaces import AnswerCacheInterface, EmbedderInterface, LLMInterface
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_current_organization, get_embedder
+from app.api.dependencies import get_answer_cache, get_current_organization, get_embedder, get_prompt_builder, get_retrieval_options, get_retriever_backend, get_vector_index
 from app.infra.db.engine import get_db_session
 from app.api.schemas import AskQuestionRequest, AskQuestionResponse
 
 from app.domain.entities import Organization
+from app.domain.types import RetrievalOptions
 from app.application.use_cases import AskQuestion
+from app.application.dto import AskQuestionResult
 from app.application.exceptions import (
     EmptyQuestionError,
-    OrganizationNotFoundError,
     NoRelevantChunksFoundError,
     QueryPersistenceError,
     LLMUsagePersistenceError,
@@ -21,88 +28,163 @@ from app.application.exceptions import (
 )
 
 from app.infra.db.implementations import (
-    PostgreSQL_OrganizationRepository,
     PostgreSQL_QueryRepository,
     PostgreSQL_LLMUsageRepository,
     PostgreSQL_QueryChunkRepository,
     PostgreSQL_ChunkRepository,
+    PostgreSQL_UsageRollupRepository,
 )
 
-from app.infra.retriever.implementations import V1_Retriever
-from app.application.services.prompt_builder import V1_PromptBuilder
+from app.infra.retriever.implementations import Hybrid_Retriever, InMemory_Retriever, InMemory_VectorIndex, V1_Retriever
 #from app.infra.embedder.implementations import SentenceTransformerEmbedder
 
 from app.api.dependencies import get_llm_client
 
 router = APIRouter()
 
-@router.post("/questions", response_model=AskQuestionResponse, status_code=200)
-async def ask_question(
-    payload: AskQuestionRequest,
-    organization: Organization = Depends(get_current_organization),
-    llm_client: LLMInterface = Depends(get_llm_client),
-    db: Session = Depends(get_db_session),
-    embedder: EmbedderInterface = Depends(get_embedder)
-):
+def build_ask_question_use_case(
+    db: Session,
+    llm_client: LLMInterface,
+    embedder: EmbedderInterface,
+    vector_index: InMemory_VectorIndex | None,
+    answer_cache: AnswerCacheInterface | None,
+) -> AskQuestion:
     # repositories
-    org_repo = PostgreSQL_OrganizationRepository(db)
     query_repo = PostgreSQL_QueryRepository(db)
     llm_usage_repo = PostgreSQL_LLMUsageRepository(db)
     query_chunk_repo = PostgreSQL_QueryChunkRepository(db)
     chunk_repo = PostgreSQL_ChunkRepository(db)
+    usage_rollup_repo = PostgreSQL_UsageRollupRepository(db)
 
     # services
-    embedder = embedder
-
-    retriever = V1_Retriever(
-        chunk_repo=chunk_repo,
-        embedder=embedder,
-    )
+    options = get_retrieval_options()
+    if vector_index is not None:
+        retriever = InMemory_Retriever(
+            chunk_repo=chunk_repo,
+            embedder=embedder,
+            index=vector_index,
+            options=options,
+        )
+    elif get_retriever_backend() == "hybrid":
+        retriever = Hybrid_Retriever(
+            chunk_repo=chunk_repo,
+            embedder=embedder,
+            options=options,
+            candidates=int(os.getenv("HYBRID_SEARCH_CANDIDATES", "50")),
+        )
+    else:
+        retriever = V1_Retriever(
+            chunk_repo=chunk_repo,
+            embedder=embedder,
+            options=options,
+        )
 
-    prompt_builder = V1_PromptBuilder()
+    prompt_builder = get_prompt_builder()
     
     # use case
-    use_case = AskQuestion(
-        org_repo=org_repo,
+    return AskQuestion(
         query_repo=query_repo,
         llm_usage_repo=llm_usage_repo,
         query_chunk_repo=query_chunk_repo,
         retriever=retriever,
         prompt_builder=prompt_builder,
         llm_client=llm_client,
+        answer_cache=answer_cache,
+        usage_rollup_repo=usage_rollup_repo,
+        commit=db.commit, #releases the connection during the LLM call.
     )
 
+
+def retrieval_options(payload: AskQuestionRequest) -> RetrievalOptions:
+    # Fields set on the request override the deployment defaults.
+    overrides = payload.model_dump(include={"top_k", "min_similarity", "max_context_tokens"}, exclude_none=True)
+    return replace(get_retrieval_options(), **overrides)
+
+
+def to_http_exception(e: Exception) -> HTTPException:
+    if isinstance(e, EmptyQuestionError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, NoRelevantChunksFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, (QueryPersistenceError, LLMUsagePersistenceError, QueryChunkPersistenceError, UseCaseError)):
+        return HTTPException(status_code=500, detail=str(e))
+    return HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.post("/questions", response_model=AskQuestionResponse, status_code=200)
+async def ask_question(
+    payload: AskQuestionRequest,
+    organization: Organization = Depends(get_current_organization),
+    llm_client: LLMInterface = Depends(get_llm_client),
+    db: Session = Depends(get_db_session),
+    embedder: EmbedderInterface = Depends(get_embedder),
+    vector_index: InMemory_VectorIndex | None = Depends(get_vector_index),
+    answer_cache: AnswerCacheInterface | None = Depends(get_answer_cache),
+):
+    use_case = build_ask_question_use_case(db, llm_client, embedder, vector_index, answer_cache)
+
     try:
-        result = use_case.execute(
-            organization_id=organization.id, #here comes the org id from the auth context returned by the get_current_organization dependency. If the organization didn't exist or the API key was invalid, it would have already raised an HTTPException and we wouldn't reach this point.
+        #blocking DB/OpenAI work runs off the event loop, so a slow LLM call doesn't stall other requests.
+        result = await run_in_threadpool(
+            use_case.execute,
+            organization=organization, #here comes the org from the auth context returned by the get_current_organization dependency. If the organization didn't exist or the API key was invalid, it would have already raised an HTTPException and we wouldn't reach this point.
             question=payload.question,
+            options=retrieval_options(payload),
         )
 
-        db.commit()
+        await run_in_threadpool(db.commit)
 
         return AskQuestionResponse.from_domain(result)
 
-    except EmptyQuestionError as e:
+    except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+        raise to_http_exception(e)
 
-    except OrganizationNotFoundError as e:
-        db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
 
-    except NoRelevantChunksFoundError as e:
-        db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
-    except (QueryPersistenceError, LLMUsagePersistenceError, QueryChunkPersistenceError) as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-
-    except UseCaseError as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/questions/stream", status_code=200)
+async def ask_question_stream(
+    payload: AskQuestionRequest,
+    organization: Organization = Depends(get_current_organization),
+    llm_client: LLMInterface = Depends(get_llm_client),
+    db: Session = Depends(get_db_session),
+    embedder: EmbedderInterface = Depends(get_embedder),
+    vector_index: InMemory_VectorIndex | None = Depends(get_vector_index),
+    answer_cache: AnswerCacheInterface | None = Depends(get_answer_cache),
+):
+    """
+    Server-Sent Events. `token` events carry answer deltas as they are generated,
+    the final `done` event carries the same body as POST /questions.
+    The query row is committed before the LLM call, LLMUsage and QueryChunk rows when the LLM stream ends.
+    """
+    use_case = build_ask_question_use_case(db, llm_client, embedder, vector_index, answer_cache)
+    events = use_case.stream(organization=organization, question=payload.question, options=retrieval_options(payload))
+
+    # Validation, retrieval and prompt building happen before the first item: their errors are still regular HTTP errors.
+    try:
+        first = await run_in_threadpool(next, events, None)
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-        
+        raise to_http_exception(e)
+
+    def event_stream():
+        # Sync generator: Starlette iterates it in the threadpool, so the event loop is never blocked.
+        try:
+            for item in itertools.chain([first], events):
+                if isinstance(item, AskQuestionResult):
+                    db.commit()
+                    yield sse_event("done", AskQuestionResponse.from_domain(item).model_dump(mode="json"))
+                elif item:
+                    yield sse_event("token", {"delta": item})
+        except Exception as e:
+            db.rollback()
+            yield sse_event("error", {"detail": to_http_exception(e).detail})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, #disable proxy buffering (nginx) so tokens are flushed immediately.
+    )
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_organization
@@ -8,14 +10,13 @@ from app.infra.db.engine import get_db_session
 from app.api.schemas import DashboardResponse
 
 from app.application.use_cases import GetOrganizationDashboard
-from app.application.exceptions import OrganizationNotFoundError, UseCaseError
+from app.application.exceptions import InvalidDashboardQueryError, UseCaseError
 
 from app.infra.db.implementations import (
-    PostgreSQL_OrganizationRepository,
     PostgreSQL_DocumentRepository,
-    PostgreSQL_ChunkRepository,
     PostgreSQL_QueryRepository,
     PostgreSQL_LLMUsageRepository,
+    PostgreSQL_UsageRollupRepository,
 )
 
 router = APIRouter()
@@ -25,33 +26,41 @@ router = APIRouter()
 async def get_dashboard(
     organization: Organization = Depends(get_current_organization),
     db: Session = Depends(get_db_session),
+    limit: int = Query(50, ge=1, le=200, description="Page size for documents and queries."),
+    documents_cursor: str | None = Query(None, description="next_documents_cursor from the previous page."),
+    queries_cursor: str | None = Query(None, description="next_queries_cursor from the previous page."),
+    since: datetime | None = Query(None, description="Only rows created at or after this time."),
+    until: datetime | None = Query(None, description="Only rows created before this time."),
 ):
     # repositories
-    org_repo = PostgreSQL_OrganizationRepository(db)
     doc_repo = PostgreSQL_DocumentRepository(db)
-    chunk_repo = PostgreSQL_ChunkRepository(db)
     query_repo = PostgreSQL_QueryRepository(db)
     llm_usage_repo = PostgreSQL_LLMUsageRepository(db)
+    usage_rollup_repo = PostgreSQL_UsageRollupRepository(db)
 
     # use case
     use_case = GetOrganizationDashboard(
-        org_repo=org_repo,
         doc_repo=doc_repo,
-        chunk_repo=chunk_repo,
         query_repo=query_repo,
         llm_usage_repo=llm_usage_repo,
+        usage_rollup_repo=usage_rollup_repo,
     )
 
     try:
         result = use_case.execute(
-            organization_id=organization.id
+            organization=organization,
+            limit=limit,
+            documents_cursor=documents_cursor,
+            queries_cursor=queries_cursor,
+            since=since,
+            until=until,
         )
 
         return DashboardResponse.from_domain(result)
 
-    except OrganizationNotFoundError as e:
+    except InvalidDashboardQueryError as e:
         db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
 
     except UseCaseError as e:
         db.rollback()
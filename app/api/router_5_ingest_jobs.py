@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+import os
+import threading
+import uuid
+
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_answer_cache, get_current_organization, get_vector_index
+from app.api.router_1_ingest_document import DEFAULT_STORAGE_PATH, refresh_vector_index, stage_upload
+from app.api.schemas import IngestJobResponse
+from app.application.exceptions import (
+    EmptyFileError,
+    IngestJobNotFoundError,
+    IngestJobPersistenceError,
+    StorageWriteError,
+)
+from app.application.use_cases import EnqueueIngestJob, GetIngestJob, ListSucceededIngestJobs
+from app.domain.entities import Organization
+from app.domain.interfaces import AnswerCacheInterface
+from app.infra.db.engine import SessionLocal, get_db_session
+from app.infra.db.implementations import PostgreSQL_IngestJobRepository
+from app.infra.retriever.implementations import InMemory_VectorIndex
+from app.infra.storage.implementations import Local_DocumentStorage
+
+router = APIRouter()
+
+# Jobs whose document this process already applied (answer cache invalidated, in-memory index refreshed).
+# The worker can't reach the API process caches: every API process polls for succeeded jobs (sync_succeeded_jobs,
+# started by main.lifespan). A status poll that sees the job finished applies it right away, for the waiting client.
+_refreshed_jobs: TTLCache = TTLCache(maxsize=100_000, ttl=24 * 3600)
+_refreshed_jobs_lock = threading.Lock()
+
+# updated_at is set by the worker before it commits, with its own clock: each sync looks back that far.
+SYNC_LOOKBACK = timedelta(seconds=int(os.getenv("INGEST_JOB_SYNC_LOOKBACK_SECONDS", "120")))
+
+
+def apply_succeeded_job(
+        db: Session,
+        job_id: uuid.UUID,
+        organization_id: uuid.UUID,
+        document_id: uuid.UUID,
+        vector_index: InMemory_VectorIndex | None,
+        answer_cache: AnswerCacheInterface | None,
+    ) -> None:
+    # Once per job and process: refreshing the index twice would add its chunks twice.
+    with _refreshed_jobs_lock:
+        if job_id in _refreshed_jobs:
+            return
+        _refreshed_jobs[job_id] = True
+    if answer_cache is not None:
+        answer_cache.invalidate(organization_id) #cached answers may be outdated with the new document.
+    refresh_vector_index(vector_index, db, organization_id, document_id)
+
+
+def sync_succeeded_jobs(since: datetime) -> datetime:
+    # Applies the jobs that succeeded since the last call, whoever polls them. Returns the next `since`.
+    db = SessionLocal()
+    try:
+        jobs = ListSucceededIngestJobs(job_repo=PostgreSQL_IngestJobRepository(db)).execute(since - SYNC_LOOKBACK)
+        vector_index, answer_cache = get_vector_index(), get_answer_cache()
+        for job in jobs:
+            apply_succeeded_job(db, job.id, job.organization_id, job.document_id, vector_index, answer_cache)
+        return max([since] + [job.updated_at for job in jobs])
+    finally:
+        db.close()
+
+
+@router.post("/ingest-jobs", response_model=IngestJobResponse, status_code=202)
+async def enqueue_ingest_job(
+        file: UploadFile = File(...),
+        organization: Organization = Depends(get_current_organization),
+        db: Session = Depends(get_db_session),
+    ):
+    """
+    Queues the document for background ingestion and returns immediately.
+    Poll GET /ingest-jobs/{job_id} until status is "succeeded" or "failed".
+    """
+    filename = file.filename or ("doc-" + datetime.now().strftime("%Y%m%d%H%M%S"))
+    storage = Local_DocumentStorage(DEFAULT_STORAGE_PATH)
+    upload = await stage_upload(file, storage)
+
+    use_case = EnqueueIngestJob(
+        job_repo=PostgreSQL_IngestJobRepository(db),
+        storage=storage,
+    )
+    try:
+        result = await run_in_threadpool(use_case.execute, organization, upload, filename)
+        await run_in_threadpool(db.commit)
+        return IngestJobResponse.from_domain(result)
+
+    except EmptyFileError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except (StorageWriteError, IngestJobPersistenceError) as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    finally:
+        storage.discard(upload) #no-op once the use case moved it under the job id.
+
+
+@router.get("/ingest-jobs/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(
+        job_id: uuid.UUID,
+        organization: Organization = Depends(get_current_organization),
+        db: Session = Depends(get_db_session),
+        vector_index: InMemory_VectorIndex | None = Depends(get_vector_index),
+        answer_cache: AnswerCacheInterface | None = Depends(get_answer_cache),
+    ):
+    use_case = GetIngestJob(job_repo=PostgreSQL_IngestJobRepository(db))
+    try:
+        result = await run_in_threadpool(use_case.execute, organization.id, job_id)
+    except IngestJobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+    if result.status == "succeeded":
+        await run_in_threadpool(apply_succeeded_job, db, result.job_id, organization.id, result.document_id, vector_index, answer_cache)
+
+    return IngestJobResponse.from_domain(result)
@@ -10,6 +10,8 @@ from app.application.dto import (
     NewOrganizationResult,
     AskQuestionResult,
     DashboardResult,
+    IngestJobResult,
+    UpdateDocumentResult,
 )
 
 
@@ -30,6 +32,56 @@ class IngestDocumentResponse(BaseModel):
             document_id=result.document_id
         )
 
+class UpdateDocumentResponse(BaseModel):
+    organization_id: uuid.UUID
+    document_id: uuid.UUID
+    document_hash: Optional[str] = None
+    chunks_total: int
+    chunks_unchanged: int
+    chunks_added: int
+    chunks_deleted: int
+
+    @classmethod
+    def from_domain(cls, result: UpdateDocumentResult) -> "UpdateDocumentResponse":
+        return cls(
+            organization_id=result.organization_id,
+            document_id=result.document_id,
+            document_hash=result.document_hash,
+            chunks_total=result.chunks_total,
+            chunks_unchanged=result.chunks_unchanged,
+            chunks_added=result.chunks_added,
+            chunks_deleted=result.chunks_deleted,
+        )
+
+class IngestJobResponse(BaseModel):
+    job_id: uuid.UUID
+    organization_id: uuid.UUID
+    filename: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    document_id: Optional[uuid.UUID] = None
+    document_hash: Optional[str] = None
+    chunks_created: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_domain(cls, result: IngestJobResult) -> "IngestJobResponse":
+        return cls(
+            job_id=result.job_id,
+            organization_id=result.organization_id,
+            filename=result.filename,
+            status=result.status,
+            attempts=result.attempts,
+            error=result.error,
+            document_id=result.document_id,
+            document_hash=result.document_hash,
+            chunks_created=result.chunks_created,
+            created_at=result.created_at,
+            updated_at=result.updated_at,
+        )
+
 class NewOrganizationResponse(BaseModel):
     id: uuid.UUID
     name: str
@@ -55,6 +107,7 @@ class AskQuestionResponse(BaseModel):
     answer: Optional[str] = None
     latency_ms: Optional[int] = None
     estimated_cost_usd: Optional[float] = None
+    cache_hit: bool = False
 
     @classmethod
     def from_domain(cls, result: AskQuestionResult) -> "AskQuestionResponse":
@@ -68,6 +121,7 @@ class AskQuestionResponse(BaseModel):
             answer=result.answer,
             latency_ms=result.latency_ms,
             estimated_cost_usd=result.estimated_cost_usd,
+            cache_hit=result.cache_hit,
         )
 
 # --- Request schemas -- #
@@ -77,6 +131,10 @@ class NewOrganizationRequest(BaseModel):
 
 class AskQuestionRequest(BaseModel):
     question: str = Field(min_length=1, max_length=10_000)
+    # Retrieval overrides. Unset fields use the deployment defaults (RETRIEVAL_* settings).
+    top_k: Optional[int] = Field(default=None, ge=1, le=50)
+    min_similarity: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    max_context_tokens: Optional[int] = Field(default=None, ge=1, le=200_000)
     
 
 
@@ -96,6 +154,7 @@ class DashboardQueryResponse(BaseModel):
     model_name: Optional[str] = None
     total_tokens: int
     estimated_cost_usd: float
+    cache_hit: bool = False
 
 
 class DashboardUsageSummaryResponse(BaseModel):
@@ -107,6 +166,14 @@ class DashboardUsageSummaryResponse(BaseModel):
     models_used: list[str]
 
 
+class DashboardDailyUsageResponse(BaseModel):
+    day: str
+    request_count: int
+    cache_hit_count: int
+    total_tokens: int
+    estimated_cost_usd: float
+
+
 class DashboardResponse(BaseModel):
     organization_id: uuid.UUID
     organization_name: str
@@ -117,6 +184,11 @@ class DashboardResponse(BaseModel):
 
     usage_summary: DashboardUsageSummaryResponse
 
+    next_documents_cursor: Optional[str] = None
+    next_queries_cursor: Optional[str] = None
+
+    daily_usage: list[DashboardDailyUsageResponse] = []
+
     @classmethod
     def from_domain(cls, result: DashboardResult):
 
@@ -142,7 +214,8 @@ class DashboardResponse(BaseModel):
                     created_at=q.created_at,
                     model_name=q.model_name,
                     total_tokens=q.total_tokens,
-                    estimated_cost_usd=q.estimated_cost_usd
+                    estimated_cost_usd=q.estimated_cost_usd,
+                    cache_hit=q.cache_hit
                 )
                 for q in result.queries
             ],
@@ -155,4 +228,18 @@ class DashboardResponse(BaseModel):
                 total_estimated_cost_usd=result.usage_summary.total_estimated_cost_usd,
                 models_used=result.usage_summary.models_used,
             ),
+
+            next_documents_cursor=result.next_documents_cursor,
+            next_queries_cursor=result.next_queries_cursor,
+
+            daily_usage=[
+                DashboardDailyUsageResponse(
+                    day=d.day,
+                    request_count=d.request_count,
+                    cache_hit_count=d.cache_hit_count,
+                    total_tokens=d.total_tokens,
+                    estimated_cost_usd=d.estimated_cost_usd,
+                )
+                for d in result.daily_usage
+            ],
         )
\ No newline at end of file
@@ -1,5 +1,5 @@
      
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
 
@@ -12,6 +12,21 @@ class IngestDocumentResult:
     chunks_created: int
     document_hash: str | None
     
+@dataclass(frozen=True)
+class UpdateDocumentResult:
+    organization_id: uuid.UUID
+    document_id: uuid.UUID
+    document_hash: str | None
+    chunks_total: int
+    chunks_unchanged: int
+    chunks_added: int
+    chunks_deleted: int
+
+    # chunk ids touched by the update, for the in-memory vector index (moved = kept but with a new chunk_index).
+    added_chunk_ids: list[uuid.UUID] = field(default_factory=list)
+    deleted_chunk_ids: list[uuid.UUID] = field(default_factory=list)
+    moved_chunk_ids: list[uuid.UUID] = field(default_factory=list)
+
 @dataclass(frozen=True)
 class NewOrganizationResult:
     id: uuid.UUID
@@ -31,7 +46,22 @@ class AskQuestionResult:
     answer: str | None
     latency_ms: int | None
     estimated_cost_usd: float | None
+    cache_hit: bool = False
     
+@dataclass(frozen=True)
+class IngestJobResult:
+    job_id: uuid.UUID
+    organization_id: uuid.UUID
+    filename: str
+    status: str
+    attempts: int
+    error: str | None
+    document_id: uuid.UUID | None
+    document_hash: str | None
+    chunks_created: int | None
+    created_at: datetime
+    updated_at: datetime
+
 
 
 # -- DTOs for Dashboard -- #
@@ -53,6 +83,7 @@ class DashboardQuery:
     model_name: str | None
     total_tokens: int
     estimated_cost_usd: float
+    cache_hit: bool = False
 
 
 @dataclass
@@ -65,6 +96,15 @@ class DashboardUsageSummary:
     models_used: list[str]
 
 
+@dataclass
+class DashboardDailyUsage:
+    day: str
+    request_count: int
+    cache_hit_count: int
+    total_tokens: int
+    estimated_cost_usd: float
+
+
 @dataclass
 class DashboardResult:
     organization_id: uuid.UUID
@@ -74,4 +114,10 @@ class DashboardResult:
     documents: list[DashboardDocument]
     queries: list[DashboardQuery]
 
-    usage_summary: DashboardUsageSummary
\ No newline at end of file
+    usage_summary: DashboardUsageSummary
+
+    # Pass back to get the next page; None when there are no more rows.
+    next_documents_cursor: str | None = None
+    next_queries_cursor: str | None = None
+
+    daily_usage: list[DashboardDailyUsage] = field(default_factory=list) #only when usage rollups are available.
\ No newline at end of file
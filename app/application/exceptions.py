@@ -11,6 +11,12 @@ class NewOrganizationError(UseCaseError):
 class AskQuestionError(UseCaseError):
     """Base class for ask question errors."""    
 
+class IngestJobError(UseCaseError):
+    """Base class for background ingestion job errors."""
+
+class DashboardError(UseCaseError):
+    """Base class for dashboard errors."""
+
 # --- # Specific use-case errors
 
 class EmptyFileError(IngestDocumentError):
@@ -34,6 +40,10 @@ class DocumentAlreadyExistsError(IngestDocumentError):
     pass
 
 
+class DocumentNotFoundError(IngestDocumentError):
+    pass
+
+
 class ParsingError(IngestDocumentError):
     pass
 
@@ -80,3 +90,22 @@ class LLMUsagePersistenceError(AskQuestionError):
 
 class QueryChunkPersistenceError(AskQuestionError):
     pass
+
+class UsageRollupPersistenceError(AskQuestionError):
+    pass
+
+# Background ingestion job related errors
+
+class IngestJobNotFoundError(IngestJobError):
+    pass
+
+class IngestJobPersistenceError(IngestJobError):
+    pass
+
+class IngestJobFileNotFoundError(IngestJobError):
+    pass
+
+# Dashboard related errors
+
+class InvalidDashboardQueryError(DashboardError):
+    pass
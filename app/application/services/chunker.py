@@ -1,10 +1,13 @@
 from dataclasses import dataclass
 from pydoc import text
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import re
 import uuid
 
-from app.domain.interfaces import ChunkerInterface, PromptBuilderInterface
+from app.domain.interfaces import ChunkerInterface, PromptBuilderInterface, TokenCounterInterface
 from app.domain.entities import Chunk
-from typing import List
+from typing import Iterable, Iterator, List
 
 @dataclass(frozen=True, slots=True)
 class ChunkingConfig:
@@ -56,3 +59,184 @@ class V1_Chunker(ChunkerInterface):
             start = max(0, end - self.config.overlap)
 
         return chunks
+
+    def iter_chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        # Same windows as chunk_text("\n".join(pages)), produced while pages arrive. Only the text from the current
+        # window start is kept. A window is emitted once non-blank text follows it, so it can't be the last one
+        # (the last window ends at the end of the stripped text, which is only known after the last page).
+        size, overlap, strip = self.config.chunk_size, self.config.overlap, self.config.strip
+        buffer = ""
+        started = not strip #with strip, the whitespace before the first text is dropped.
+        for i, page in enumerate(pages):
+            piece = page if i == 0 else "\n" + page
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            buffer += piece
+
+            text_end = len(buffer.rstrip()) if strip else len(buffer)
+            start = 0
+            while start + size < text_end:
+                chunk = self._window(buffer[start:start + size])
+                if chunk is not None:
+                    yield chunk
+                start += size - overlap
+            buffer = buffer[start:]
+
+        # Last page read: the rest is chunked like chunk_text does.
+        if strip:
+            buffer = buffer.rstrip()
+        start, n = 0, len(buffer)
+        while start < n:
+            end = min(start + size, n)
+            chunk = self._window(buffer[start:end])
+            if chunk is not None:
+                yield chunk
+            if end >= n:
+                break
+            start = max(0, end - overlap)
+
+    def _window(self, piece: str) -> str | None:
+        if self.config.strip:
+            piece = piece.strip()
+        return piece if piece and len(piece) >= self.config.min_chunk_size else None
+
+
+@dataclass(frozen=True, slots=True)
+class SentenceChunkingConfig:
+    max_tokens: int = 300
+    overlap_sentences: int = 1
+    paragraph_break_ratio: float = 0.5 #a paragraph end closes the chunk once it holds this share of max_tokens.
+
+
+# One pass over the text. A boundary is either sentence punctuation (plus closing quotes/brackets) followed by
+# whitespace, or a blank line. Group 1 = the rest of the punctuation kept in the sentence, group 2/3 = a paragraph break.
+# Every match starts with one of [.!?\n], so the regex engine only tries the pattern at those characters.
+_BOUNDARY = re.compile(r"""[.!?\n](?:(?<=[.!?])([.!?]*["'\u201d\u2019)\]]*)(?=\s)[ \t]*(\n[ \t]*\n)?|(?<=\n)([ \t]*\n))\s*""")
+
+
+class Sentence_Chunker(ChunkerInterface):
+    """
+    Packs whole sentences into chunks of at most max_tokens, never cutting a word or a sentence
+    (a single sentence longer than the budget is split at whitespace).
+    Consecutive chunks share their last/first overlap_sentences sentences, and paragraph ends are preferred cut points.
+
+    Boundaries are found in one regex pass and kept as (start, end) offsets, chunk ends are found by binary search
+    on the token prefix sums. Each chunk is a single slice of the input, already free of surrounding whitespace,
+    so no strip copies are made.
+    Token counts come from token_counter in one batch, or 4 chars per token without one.
+    """
+
+    def __init__(self, config: SentenceChunkingConfig | None = None, token_counter: TokenCounterInterface | None = None):
+        self.config = config or SentenceChunkingConfig()
+        self.token_counter = token_counter
+
+        if self.config.max_tokens <= 0:
+            raise ValueError("max_tokens must be greater than 0.")
+        if self.config.overlap_sentences < 0:
+            raise ValueError("overlap_sentences cannot be negative.")
+        if not 0.0 <= self.config.paragraph_break_ratio <= 1.0:
+            raise ValueError("paragraph_break_ratio must be between 0 and 1.")
+
+    def chunk_text(self, content: str) -> list[str]:
+        if content is None:
+            raise ValueError("Content cannot be None.")
+
+        starts, ends, paragraph_ends = self._sentences(content)
+        if not starts:
+            return []
+
+        if self.token_counter is not None:
+            tokens = self.token_counter.count_many([content[s:e] for s, e in zip(starts, ends)])
+        else:
+            tokens = [(e - s + 3) // 4 for s, e in zip(starts, ends)]
+        starts, ends, paragraph_ends, tokens = self._split_long_sentences(content, starts, ends, paragraph_ends, tokens)
+
+        # Prefix sums turn "how many sentences fit from here" into a binary search: one search per chunk, not one step per sentence.
+        cumulative = list(accumulate(tokens))
+        paragraph_indexes = [i for i, paragraph_end in enumerate(paragraph_ends) if paragraph_end]
+        max_tokens = self.config.max_tokens
+        paragraph_min = self.config.paragraph_break_ratio * max_tokens
+
+        chunks: list[str] = []
+        n = len(starts)
+        first = 0
+        while first < n:
+            before = cumulative[first - 1] if first else 0
+            last = max(first, bisect_right(cumulative, before + max_tokens) - 1)
+
+            # Stop at the first paragraph end once the chunk holds paragraph_min tokens.
+            filled = max(first, bisect_left(cumulative, before + paragraph_min))
+            j = bisect_left(paragraph_indexes, filled)
+            if j < len(paragraph_indexes) and paragraph_indexes[j] < last:
+                last = paragraph_indexes[j]
+
+            chunks.append(content[starts[first]:ends[last]])
+            if last + 1 >= n:
+                break
+            first = max(first + 1, last + 1 - self.config.overlap_sentences) #always moves forward, even with a large overlap.
+
+        return chunks
+
+    @staticmethod
+    def _sentences(content: str) -> tuple[list[int], list[int], list[bool]]:
+        # (start, end) of every sentence without its surrounding whitespace, and whether a paragraph ends with it.
+        starts: list[int] = []
+        ends: list[int] = []
+        paragraph_ends: list[bool] = []
+        first_char = re.search(r"\S", content)
+        if first_char is None:
+            return starts, ends, paragraph_ends
+
+        start = first_char.start()
+        for m in _BOUNDARY.finditer(content, start):
+            end = m.end(1) if m.group(1) is not None else m.start()
+            if end > start:
+                starts.append(start)
+                ends.append(end)
+                paragraph_ends.append(m.group(2) is not None or m.group(3) is not None)
+            start = m.end()
+
+        end = len(content.rstrip()) #the text after the last boundary.
+        if end > start:
+            starts.append(start)
+            ends.append(end)
+            paragraph_ends.append(True)
+        return starts, ends, paragraph_ends
+
+    def _split_long_sentences(self, content, starts, ends, paragraph_ends, tokens):
+        # Rare: sentences over the budget (tables, lists without punctuation) are cut at whitespace into pieces that fit.
+        max_tokens = self.config.max_tokens
+        if all(t <= max_tokens for t in tokens):
+            return starts, ends, paragraph_ends, tokens
+
+        new_starts: list[int] = []
+        new_ends: list[int] = []
+        new_paragraph_ends: list[bool] = []
+        new_tokens: list[int] = []
+        for start, end, paragraph_end, count in zip(starts, ends, paragraph_ends, tokens):
+            if count <= max_tokens:
+                new_starts.append(start)
+                new_ends.append(end)
+                new_paragraph_ends.append(paragraph_end)
+                new_tokens.append(count)
+                continue
+
+            piece_chars = max(1, (end - start) * max_tokens // count) #the sentence's own chars-per-token ratio.
+            piece_tokens = max(1, count * piece_chars // (end - start))
+            while start < end:
+                stop = min(start + piece_chars, end)
+                if stop < end:
+                    space = content.rfind(" ", start + 1, stop)
+                    stop = space if space > start else stop
+                new_starts.append(start)
+                new_ends.append(stop)
+                new_paragraph_ends.append(False)
+                new_tokens.append(piece_tokens)
+                start = stop
+                while start < end and content[start].isspace():
+                    start += 1
+            new_paragraph_ends[-1] = paragraph_end
+        return new_starts, new_ends, new_paragraph_ends, new_tokens
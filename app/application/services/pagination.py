@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+import uuid
+
+from app.domain.types import PageCursor
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    # Opaque for clients: urlsafe base64 of "<iso created_at>|<id>".
+    raw = f"{created_at.isoformat()}|{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> PageCursor:
+    # Raises ValueError on anything that encode_cursor could not have produced.
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, id = raw.split("|", 1)
+        return PageCursor(created_at=datetime.fromisoformat(created_at), id=uuid.UUID(id))
+    except Exception as e:
+        raise ValueError("Invalid cursor.") from e
@@ -1,14 +1,13 @@
-    
 
-from app.domain.interfaces import PromptBuilderInterface
+import uuid
+
+from app.domain.interfaces import PromptBuilderInterface, TokenCounterInterface
 from app.domain.types import RetrievedChunk
 
 
 class V1_PromptBuilder(PromptBuilderInterface):
     def build_prompt(self, question: str, retrieved_chunks: list[RetrievedChunk]) -> str:
-        clean_question = (question or "").strip()
-        if not clean_question:
-            raise ValueError("Question cannot be empty.")
+        clean_question = self._clean_question(question)
 
         if not retrieved_chunks:
             raise ValueError("Retrieved chunks cannot be empty.")
@@ -16,11 +15,23 @@ class V1_PromptBuilder(PromptBuilderInterface):
         context_parts: list[str] = []
 
         for i, chunk in enumerate(retrieved_chunks, start=1):
-            context_parts.append(
-                f"[Chunk {i} | chunk_index={chunk.chunk_index} | score={chunk.similarity_score:.4f}]\n"
-                f"{chunk.content}"
-            )
+            context_parts.append(self._chunk_header(i, chunk) + chunk.content)
+
+        return self._render(clean_question, context_parts)
+
+    @staticmethod
+    def _clean_question(question: str) -> str:
+        clean_question = (question or "").strip()
+        if not clean_question:
+            raise ValueError("Question cannot be empty.")
+        return clean_question
 
+    @staticmethod
+    def _chunk_header(position: int, chunk: RetrievedChunk) -> str:
+        return f"[Chunk {position} | chunk_index={chunk.chunk_index} | score={chunk.similarity_score:.4f}]\n"
+
+    @staticmethod
+    def _render(clean_question: str, context_parts: list[str]) -> str:
         context = "\n\n".join(context_parts)
 
         return (
@@ -30,4 +41,154 @@ class V1_PromptBuilder(PromptBuilderInterface):
             f"Question:\n{clean_question}\n\n"
             f"Context:\n{context}\n\n"
             "Answer:"
-        )
\ No newline at end of file
+        )
+
+
+class Budgeted_PromptBuilder(V1_PromptBuilder):
+    """
+    Same prompt as V1_PromptBuilder, with the context capped at max_context_tokens (chunk headers included).
+    Chunks are packed greedily in retrieval order: the retriever's ranking (the fused order of Hybrid_Retriever)
+    is not the cosine order, so similarity_score is not used to re-sort. The first chunk that does not fit is trimmed to the
+    remaining budget (if at least min_trimmed_tokens are left) and packing stops there.
+    All chunks are counted in one batched tokenizer call.
+    """
+
+    def __init__(self, token_counter: TokenCounterInterface, max_context_tokens: int, min_trimmed_tokens: int = 32):
+        if max_context_tokens <= 0:
+            raise ValueError("max_context_tokens must be greater than 0.")
+        if min_trimmed_tokens <= 0:
+            raise ValueError("min_trimmed_tokens must be greater than 0.")
+        self.token_counter = token_counter
+        self.max_context_tokens = max_context_tokens
+        self.min_trimmed_tokens = min_trimmed_tokens
+
+    def build_prompt(self, question: str, retrieved_chunks: list[RetrievedChunk]) -> str:
+        clean_question = self._clean_question(question)
+
+        if not retrieved_chunks:
+            raise ValueError("Retrieved chunks cannot be empty.")
+
+        ranked = list(retrieved_chunks) #best first, as retrieved.
+        headers = [self._chunk_header(i, chunk) for i, chunk in enumerate(ranked, start=1)]
+        separator = "\n\n"
+        counts = self.token_counter.count_many(headers + [chunk.content for chunk in ranked] + [separator])
+        header_tokens, content_tokens, separator_tokens = counts[:len(ranked)], counts[len(ranked):-1], counts[-1]
+
+        context_parts: list[str] = []
+        remaining = self.max_context_tokens
+        for i, chunk in enumerate(ranked):
+            cost = header_tokens[i] + (separator_tokens if context_parts else 0)
+            if cost + content_tokens[i] <= remaining:
+                context_parts.append(headers[i] + chunk.content)
+                remaining -= cost + content_tokens[i]
+                continue
+
+            # Doesn't fit: trim it, unless what would be left of it is too small to be useful.
+            # The first chunk is always kept (trimmed), so the prompt never loses its context entirely.
+            budget = remaining - cost
+            if budget >= self.min_trimmed_tokens or not context_parts:
+                trimmed = self.token_counter.truncate(chunk.content, max(budget, self.min_trimmed_tokens))
+                if trimmed.strip():
+                    context_parts.append(headers[i] + trimmed)
+            break
+
+        return self._render(clean_question, context_parts)
+
+
+class Merging_PromptBuilder(PromptBuilderInterface):
+    """
+    Prompt-assembly stage in front of another builder.
+    Retrieved chunks of the same document with consecutive chunk_index values are merged into one passage,
+    the text they share (the chunker overlap) appearing once. Passages whose word shingles are already
+    covered by a better-ranked passage are dropped. The inner builder gets the passages in retrieval order,
+    each at the rank of its best-ranked chunk (the retriever's order, not the cosine one, see Budgeted_PromptBuilder).
+    """
+
+    def __init__(self, inner: PromptBuilderInterface, duplicate_threshold: float = 0.8, shingle_size: int = 5, min_overlap_chars: int = 20):
+        if not 0.0 < duplicate_threshold <= 1.0:
+            raise ValueError("duplicate_threshold must be in (0, 1].")
+        if shingle_size <= 0:
+            raise ValueError("shingle_size must be greater than 0.")
+        if min_overlap_chars <= 0:
+            raise ValueError("min_overlap_chars must be greater than 0.")
+        self.inner = inner
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_size = shingle_size
+        self.min_overlap_chars = min_overlap_chars
+
+    def build_prompt(self, question: str, retrieved_chunks: list[RetrievedChunk]) -> str:
+        ranked_passages = self._merge_adjacent(retrieved_chunks)
+        ranked_passages.sort(key=lambda rp: rp[0])
+        return self.inner.build_prompt(question, self._drop_near_duplicates([p for _, p in ranked_passages]))
+
+    def _merge_adjacent(self, retrieved_chunks: list[RetrievedChunk]) -> list[tuple[int, RetrievedChunk]]:
+        # (rank, passage) pairs, rank = position in retrieved_chunks of the passage's best-ranked chunk.
+        by_document: dict[uuid.UUID, list[tuple[int, RetrievedChunk]]] = {}
+        passages: list[tuple[int, RetrievedChunk]] = []
+        for rank, chunk in enumerate(retrieved_chunks):
+            if chunk.document_id is None:
+                passages.append((rank, chunk)) #unknown document: nothing to merge with.
+            else:
+                by_document.setdefault(chunk.document_id, []).append((rank, chunk))
+
+        for ranked in by_document.values():
+            ranked.sort(key=lambda rc: rc[1].chunk_index) #stable: a chunk returned twice keeps its best rank first.
+            run = [ranked[0]]
+            for rank, chunk in ranked[1:]:
+                if chunk.chunk_index == run[-1][1].chunk_index:
+                    continue #same chunk returned twice (e.g. by both sides of a hybrid search).
+                if chunk.chunk_index != run[-1][1].chunk_index + 1:
+                    passages.append(self._passage(run))
+                    run = []
+                run.append((rank, chunk))
+            passages.append(self._passage(run))
+        return passages
+
+    def _passage(self, run: list[tuple[int, RetrievedChunk]]) -> tuple[int, RetrievedChunk]:
+        rank, best = min(run, key=lambda rc: rc[0])
+        if len(run) == 1:
+            return rank, best
+        content = run[0][1].content
+        for _, chunk in run[1:]:
+            overlap = self._overlap_length(content, chunk.content)
+            content += chunk.content[overlap:] if overlap else "\n" + chunk.content
+        return rank, RetrievedChunk(
+            chunk_id=best.chunk_id,
+            content=content,
+            chunk_index=run[0][1].chunk_index,
+            similarity_score=best.similarity_score,
+            token_count=None, #no longer the sum of the parts, recounted by the inner builder if it needs it.
+            document_id=best.document_id,
+        )
+
+    def _overlap_length(self, left: str, right: str) -> int:
+        # Longest suffix of `left` that is a prefix of `right`, at least min_overlap_chars long.
+        # Candidates are the places where right's first characters appear in left's tail: the first one that
+        # matches to the end of `left` is the longest overlap.
+        probe = right[:self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return 0
+        start = left.find(probe, max(0, len(left) - len(right)))
+        while start != -1:
+            if right.startswith(left[start:]):
+                return len(left) - start
+            start = left.find(probe, start + 1)
+        return 0
+
+    def _drop_near_duplicates(self, passages: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        # Best-ranked first: a passage is dropped when most of its shingles already appear in the passages kept before it.
+        seen: set[int] = set()
+        kept: list[RetrievedChunk] = []
+        for passage in passages:
+            shingles = self._shingles(passage.content)
+            if shingles and len(shingles & seen) >= self.duplicate_threshold * len(shingles):
+                continue
+            kept.append(passage)
+            seen |= shingles
+        return kept
+
+    def _shingles(self, text: str) -> set[int]:
+        words = text.lower().split()
+        if len(words) <= self.shingle_size:
+            return {hash(tuple(words))} if words else set()
+        return {hash(tuple(words[i:i + self.shingle_size])) for i in range(len(words) - self.shingle_size + 1)}
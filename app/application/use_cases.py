@@ -1,13 +1,19 @@
 
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timezone
+from itertools import chain
+import time
+from typing import Callable, Iterable, Iterator
+import hashlib
 import uuid
 
-from app.application.dto import AskQuestionResult, DashboardResult, DashboardUsageSummary, DashboardDocument, DashboardQuery, NewOrganizationResult, IngestDocumentResult
-from app.domain.entities import Document,Chunk, LLMUsage, Organization, Query, QueryChunk
-from app.domain.interfaces import ChunkRepositoryInterface, ChunkerInterface, DocumentRepositoryInterface, DocumentStorageInterface, LLMUsageRepositoryInterface, OrganizationRepositoryInterface, PDFParserInterface, QueryChunkRepositoryInterface, QueryRepositoryInterface
+from app.application.dto import AskQuestionResult, IngestJobResult, DashboardDailyUsage, DashboardResult, DashboardUsageSummary, DashboardDocument, DashboardQuery, NewOrganizationResult, IngestDocumentResult, UpdateDocumentResult
+from app.domain.entities import Document,Chunk, IngestJob, LLMUsage, Organization, Query, QueryChunk
+from app.domain.interfaces import ChunkRepositoryInterface, ChunkerInterface, DocumentRepositoryInterface, DocumentStorageInterface, IngestJobRepositoryInterface, LLMUsageRepositoryInterface, UsageRollupRepositoryInterface, OrganizationRepositoryInterface, PDFParserInterface, QueryChunkRepositoryInterface, QueryRepositoryInterface
 
 
-import hashlib
 
 from app.application.exceptions import (
     ChunkEmbeddingError,
@@ -17,6 +23,7 @@ from app.application.exceptions import (
     QueryPersistenceError,
     UseCaseError,
     DocumentAlreadyExistsError,
+    DocumentNotFoundError,
     IngestDocumentError,
     EmptyFileError,
     UnsupportedFileTypeError,
@@ -30,53 +37,84 @@ from app.application.exceptions import (
     ChunkPersistenceError, 
     OrganizationAlreadyExistsError, 
     InvalidOrganizationNameError, 
-    EmptyQuestionError
+    EmptyQuestionError,
+    IngestJobNotFoundError,
+    IngestJobPersistenceError,
+    IngestJobFileNotFoundError,
+    InvalidDashboardQueryError,
+    UsageRollupPersistenceError,
 )
-from app.domain.types import LLMResponse, RetrievedChunk
+from app.domain.types import CachedAnswer, LLMResponse, RetrievalOptions, RetrievedChunk, StagedFile
 
-from app.domain.interfaces import PromptBuilderInterface, RetrieverInterface, EmbedderInterface, LLMInterface
+from app.domain.interfaces import AnswerCacheInterface, PromptBuilderInterface, RetrieverInterface, EmbedderInterface, LLMInterface, TokenCounterInterface
 
 from app.application.services.api_key import generate_api_key, hash_api_key
+from app.application.services.pagination import decode_cursor, encode_cursor
 
 def approx_token_count(text: str) -> int:
-    #we approximate 4 chars per token. Replace later with real tokenizer. 
+    #4 chars per token. Fallback when no tokenizer is configured (see count_chunk_tokens).
     return max(1, (len(text) + 3) // 4)
 
 
+def count_chunk_tokens(token_counter: TokenCounterInterface | None, chunk_texts: list[str]) -> list[int]:
+    # One batched tokenizer call per document. A tokenizer failure only costs precision, not the ingestion.
+    if token_counter is not None:
+        try:
+            counts = token_counter.count_many(chunk_texts)
+            if len(counts) == len(chunk_texts):
+                return [max(1, c) for c in counts]
+        except Exception:
+            pass
+    return [approx_token_count(t) for t in chunk_texts]
+
+
 @dataclass
 class IngestDocument:
-    org_repo: OrganizationRepositoryInterface
+    '''
+    Streaming pipeline: parsed pages feed the chunker lazily, chunks are embedded in batches of `embed_batch_size`
+    with up to `max_in_flight_batches` embedding requests running concurrently, and every embedded batch is written
+    (add_many) as soon as it is ready, in chunk order. Parsing and chunking of the next pages overlap with the
+    embedding requests, and only the in-flight batches are held in memory.
+    Every write goes through the caller's DB session: the endpoint's commit (or rollback) applies to all of them at once.
+    '''
     doc_repo: DocumentRepositoryInterface
     chunk_repo: ChunkRepositoryInterface
     storage: DocumentStorageInterface
     embedder: EmbedderInterface
     parser: PDFParserInterface
     chunker: ChunkerInterface
+    token_counter: TokenCounterInterface | None = None #None = approx_token_count.
+    embed_batch_size: int = 256
+    max_in_flight_batches: int = 4
 
+    def __post_init__(self) -> None:
+        if self.embed_batch_size <= 0:
+            raise ValueError("embed_batch_size must be greater than 0.")
+        if self.max_in_flight_batches <= 0:
+            raise ValueError("max_in_flight_batches must be greater than 0.")
 
-    def execute(self, organization_id: uuid.UUID, file_content: bytes, filename: str) -> IngestDocumentResult: 
+    def execute(self, organization: Organization, upload: StagedFile, filename: str) -> IngestDocumentResult: 
+        # organization is already resolved by the caller (API key auth or the ingest worker).
+        # upload was staged by the caller (storage.stage), which also discards it if it is never saved.
+        organization_id = organization.id
 
-        if not file_content:
+        if upload.size == 0:
             raise EmptyFileError("The provided file is empty.")
         
-        # Organization must exist
-        if self.org_repo.get_by_id(organization_id) is None:
-            raise OrganizationNotFoundError("Organization not found")        
-        
-        # Parse
-        try:
-            parsed_content = self.parser.parse_pdf(file_content) #can return ValueError if type is not pdf. 
-        except Exception as e:
-            raise ParsingError(f"Failed to parse PDF: {str(e)}") from e
-        
-        if not parsed_content or not parsed_content.strip():
-            raise ParsingError("Parsed content is empty.")
-        
-        # Dedup: org + sha256(file bytes)
-        document_hash = hashlib.sha256(file_content).hexdigest()
+        # Dedup first: org + sha256(file bytes), computed while the upload was staged. Retried uploads are rejected without being parsed.
+        document_hash = upload.sha256
         if self.doc_repo.get_by_hash(organization_id, document_hash) is not None:            
             raise DocumentAlreadyExistsError("Document already exists.")
         
+        # Parse lazily, up to the first page with text: the document row is written with it, and completed at the end.
+        page_texts: list[str] = []
+        pages = self._parse_pages(upload.path, page_texts)
+        for page in pages:
+            if page.strip():
+                break
+        else:
+            raise ParsingError("Parsed content is empty.")
+        
         #Persist. DB commit happens in the endpoint.
         file_saved = False
         document: Document | None = None
@@ -85,61 +123,44 @@ class IngestDocument:
                 organization_id=organization_id, 
                 title=filename,
                 source_type="pdf",
-                content=parsed_content,
+                content="\n".join(page_texts),
                 document_hash=document_hash
             )
             
             try:
                 # DB. Add document metadata and content            
-                self.doc_repo.add(document) #save the document metadata + parsed content in the repo (database)
+                inserted = self.doc_repo.add_if_new(document) #save the document metadata + parsed content in the repo (database)
             except Exception as e:
                 raise DocumentPersistError(f"Failed to save document metadata: {str(e)}") from e
+            if not inserted:
+                # a concurrent upload of the same file won the race after the check above.
+                raise DocumentAlreadyExistsError("Document already exists.")
             
             try: 
-                # Storage: Save raw file
-                self.storage.save(organization_id= organization_id, document_id=document.id, content=file_content) #save the original file in the storage with the document id as reference.
+                # Storage: move the staged file under the document id (a rename, not a second write).
+                self.storage.save_staged(organization_id=organization_id, document_id=document.id, staged=upload)
                 file_saved = True
             except Exception as e:
                 raise StorageWriteError(f"Failed to save document file: {str(e)}") from e
             
-            #Chunk text into plain strings
-            try: 
-                chunk_texts: list[str] = self.chunker.chunk_text(content=parsed_content)
-            except Exception as e:
-                raise ChunkingError(f"Failed to chunk document content: {str(e)}") from e
-            
-            if not chunk_texts:
+            # Chunk (the pages read so far, then the rest as they are parsed), embed and persist, batch by batch.
+            chunk_texts = self._chunk_texts(chain(list(page_texts), pages))
+            chunks_created = self._embed_and_persist(organization_id, document.id, chunk_texts)
+            if chunks_created == 0:
                 raise ChunkingError("Chunker produced no chunks")
-            
-            #Build chunk entities (including embeddings)
-            try:
-                chunks: list[Chunk] = [] 
-                for i, chunk_text in enumerate(chunk_texts):
-                    embedding = self.embedder.embed_text(chunk_text)
-                    chunks.append(
-                        Chunk(
-                            document_id=document.id,
-                            organization_id=organization_id,
-                            chunk_index=i,
-                            content=chunk_text,
-                            embedding=embedding,
-                            token_count = approx_token_count(chunk_text)
-                        )
-                    )
-                
-            except Exception as e:
-                raise ChunkEmbeddingError(f"Failed to create chunk entities with embeddings: {str(e)}") from e  
-                
-            #persist chunks:
-            try:             
-                self.chunk_repo.add_many(chunks)
-            except Exception as e:
-                raise ChunkPersistenceError(f"Failed to save document chunks: {str(e)}") from e
+
+            # The full text is known now that the last page was parsed.
+            content = "\n".join(page_texts)
+            if content != document.content:
+                try:
+                    self.doc_repo.update(replace(document, content=content))
+                except Exception as e:
+                    raise DocumentPersistError(f"Failed to save document content: {str(e)}") from e
             
             return IngestDocumentResult(
                 organization_id=organization_id,
                 document_id=document.id,
-                chunks_created=len(chunks),
+                chunks_created=chunks_created,
                 document_hash=document_hash
             )
             
@@ -152,6 +173,524 @@ class IngestDocument:
                     raise StorageDeleteError(f"Failed to delete document file during cleanup: {str(e)}") from e                    
             raise
 
+    def _parse_pages(self, path: str, page_texts: list[str]) -> Iterator[str]:
+        # Yields the parsed pages and keeps them in page_texts (the document content).
+        try:
+            for page in self.parser.iter_pdf_file_pages(path): #can raise ValueError if type is not pdf.
+                page_texts.append(page)
+                yield page
+        except Exception as e:
+            raise ParsingError(f"Failed to parse PDF: {str(e)}") from e
+
+    def _chunk_texts(self, pages: Iterator[str]) -> Iterator[str]:
+        try:
+            yield from self.chunker.iter_chunks(pages)
+        except ParsingError:
+            raise #raised by a page the chunker was waiting for.
+        except Exception as e:
+            raise ChunkingError(f"Failed to chunk document content: {str(e)}") from e
+
+    def _embed_and_persist(self, organization_id: uuid.UUID, document_id: uuid.UUID, chunk_texts: Iterator[str]) -> int:
+        # The main thread reads chunks, looks up reusable embeddings and writes batches (the DB session is not thread safe).
+        # Worker threads only call the embedder (and the tokenizer). Batches are written in submission order.
+        embedding_model = embedding_model_key(self.embedder)
+        in_flight: deque[_EmbeddingBatch] = deque()
+        pending_hashes: dict[str, _EmbeddingBatch] = {} #novel texts of the in-flight batches, reused by the next batches.
+        chunks_created = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight_batches, thread_name_prefix="ingest-embed") as pool:
+            try:
+                chunk_index = 0
+                for texts in _batched(chunk_texts, self.embed_batch_size):
+                    if len(in_flight) >= self.max_in_flight_batches:
+                        chunks_created += self._persist_batch(organization_id, document_id, embedding_model, in_flight.popleft(), pending_hashes)
+                    in_flight.append(self._submit_batch(pool, organization_id, embedding_model, chunk_index, texts, pending_hashes))
+                    chunk_index += len(texts)
+
+                while in_flight:
+                    chunks_created += self._persist_batch(organization_id, document_id, embedding_model, in_flight.popleft(), pending_hashes)
+            except BaseException:
+                for batch in in_flight:
+                    batch.future.cancel() #not started yet: never sent to the embedder.
+                raise
+
+        return chunks_created
+
+    def _submit_batch(
+        self,
+        pool: ThreadPoolExecutor,
+        organization_id: uuid.UUID,
+        embedding_model: str,
+        first_index: int,
+        texts: list[str],
+        pending_hashes: dict[str, "_EmbeddingBatch"],
+    ) -> "_EmbeddingBatch":
+        content_hashes = [chunk_content_hash(t) for t in texts]
+        # Reuse: stored chunks (earlier batches of this document included, they are already written) and in-flight batches.
+        # No fallback on failure, as in embed_chunk_texts: the aborted transaction would fail the next add_many.
+        try:
+            known = self.chunk_repo.get_embeddings_by_content_hash(organization_id, content_hashes, embedding_model)
+        except Exception as e:
+            raise ChunkPersistenceError(f"Failed to look up stored chunk embeddings: {str(e)}") from e
+
+        borrowed: dict[str, _EmbeddingBatch] = {}
+        novel: dict[str, str] = {}
+        for content_hash, text in zip(content_hashes, texts):
+            if content_hash in known or content_hash in novel or content_hash in borrowed:
+                continue
+            if content_hash in pending_hashes:
+                borrowed[content_hash] = pending_hashes[content_hash]
+            else:
+                novel[content_hash] = text
+
+        batch = _EmbeddingBatch(first_index=first_index, texts=texts, content_hashes=content_hashes, known=known, borrowed=borrowed, novel_hashes=list(novel))
+        batch.future = pool.submit(self._embed, list(novel.values()), texts)
+        for content_hash in novel:
+            pending_hashes[content_hash] = batch
+        return batch
+
+    def _embed(self, novel_texts: list[str], texts: list[str]) -> tuple[list[list[float]], list[int]]:
+        # Runs in a worker thread.
+        embeddings = self.embedder.embed_many(novel_texts) if novel_texts else []
+        if len(embeddings) != len(novel_texts):
+            raise ValueError(f"Embedder returned {len(embeddings)} embeddings for {len(novel_texts)} chunks.")
+        return embeddings, count_chunk_tokens(self.token_counter, texts)
+
+    def _persist_batch(
+        self,
+        organization_id: uuid.UUID,
+        document_id: uuid.UUID,
+        embedding_model: str,
+        batch: "_EmbeddingBatch",
+        pending_hashes: dict[str, "_EmbeddingBatch"],
+    ) -> int:
+        try:
+            embeddings, token_counts = batch.future.result()
+            batch.embeddings = dict(zip(batch.novel_hashes, embeddings))
+            chunks = [
+                Chunk(
+                    document_id=document_id,
+                    organization_id=organization_id,
+                    chunk_index=batch.first_index + i,
+                    content=text,
+                    embedding=batch.embedding_for(content_hash),
+                    token_count=token_counts[i],
+                    content_hash=content_hash,
+                    embedding_model=embedding_model,
+                )
+                for i, (text, content_hash) in enumerate(zip(batch.texts, batch.content_hashes))
+            ]
+        except Exception as e:
+            raise ChunkEmbeddingError(f"Failed to create chunk entities with embeddings: {str(e)}") from e
+
+        try:
+            self.chunk_repo.add_many(chunks)
+        except Exception as e:
+            raise ChunkPersistenceError(f"Failed to save document chunks: {str(e)}") from e
+
+        for content_hash in batch.novel_hashes:
+            if pending_hashes.get(content_hash) is batch:
+                del pending_hashes[content_hash] #written: the next lookups find it in the database.
+        return len(chunks)
+
+
+@dataclass
+class _EmbeddingBatch:
+    first_index: int
+    texts: list[str]
+    content_hashes: list[str]
+    known: dict[str, list[float]] #stored embeddings
+    borrowed: dict[str, "_EmbeddingBatch"] #texts embedded by an earlier in-flight batch
+    novel_hashes: list[str] #texts sent to the embedder by this batch
+    future: Future | None = None
+    embeddings: dict[str, list[float]] | None = None #novel hash -> embedding, once the future is done
+
+    def embedding_for(self, content_hash: str) -> list[float]:
+        if content_hash in self.known:
+            return self.known[content_hash]
+        if content_hash in self.borrowed:
+            return self.borrowed[content_hash].embeddings[content_hash] #written before this one, so already resolved.
+        return self.embeddings[content_hash]
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[list[str]]:
+    batch: list[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_chunk_texts(
+    chunk_repo: ChunkRepositoryInterface,
+    embedder: EmbedderInterface,
+    organization_id: uuid.UUID,
+    chunk_texts: list[str],
+    content_hashes: list[str],
+    embedding_model: str,
+) -> list[list[float]]:
+    # Chunks whose exact text is already stored for this organization, embedded by the same model, reuse that embedding.
+    # Only novel texts go to the embedder, each one once even if it repeats inside the document.
+    # No fallback on failure: on Postgres a failed query aborts the transaction, the chunk writes would fail too.
+    try:
+        known = chunk_repo.get_embeddings_by_content_hash(organization_id, content_hashes, embedding_model)
+    except Exception as e:
+        raise ChunkPersistenceError(f"Failed to look up stored chunk embeddings: {str(e)}") from e
+
+    novel: dict[str, str] = {}
+    for content_hash, chunk_text in zip(content_hashes, chunk_texts):
+        if content_hash not in known and content_hash not in novel:
+            novel[content_hash] = chunk_text
+
+    if novel:
+        new_embeddings = embedder.embed_many(list(novel.values()))
+        if len(new_embeddings) != len(novel):
+            raise ValueError(f"Embedder returned {len(new_embeddings)} embeddings for {len(novel)} chunks.")
+        known = {**known, **dict(zip(novel.keys(), new_embeddings))}
+
+    return [known[h] for h in content_hashes]
+
+
+def chunk_content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_model_key(embedder: EmbedderInterface) -> str:
+    # Embeddings are only interchangeable within the same model and dimensions.
+    model_name = getattr(embedder, "model_name", None) or type(embedder).__name__
+    return f"{model_name}:{getattr(embedder, 'dimensions', None)}"
+
+
+@dataclass
+class UpdateDocument:
+    '''
+    Re-ingests a new version of an existing document in place (PUT /documents/{id}).
+    The new version is chunked and diffed against the stored chunks by content hash: only new chunk texts are embedded
+    and inserted, chunks that are gone are deleted, and unchanged ones keep their id, embedding and query links
+    (they only get a new chunk_index if text was added or removed before them).
+    The stored file is overwritten in place, so it is only replaced once `commit` succeeded: a failed commit
+    leaves the previous file next to the previous rows.
+    '''
+    doc_repo: DocumentRepositoryInterface
+    chunk_repo: ChunkRepositoryInterface
+    storage: DocumentStorageInterface
+    embedder: EmbedderInterface
+    parser: PDFParserInterface
+    chunker: ChunkerInterface
+    commit: Callable[[], None] #commits the DB session of the repositories (the endpoint rolls back on errors).
+    token_counter: TokenCounterInterface | None = None #None = approx_token_count.
+
+    def execute(self, organization: Organization, document_id: uuid.UUID, upload: StagedFile, filename: str | None = None) -> UpdateDocumentResult:
+        organization_id = organization.id
+
+        if upload.size == 0:
+            raise EmptyFileError("The provided file is empty.")
+
+        # Locked until the endpoint commits: a concurrent PUT on the same document waits, then diffs against our chunks.
+        document = self.doc_repo.get_by_id_for_update(organization_id, document_id)
+        if document is None:
+            raise DocumentNotFoundError("Document not found.")
+        title = filename or document.title
+
+        try:
+            existing: list[Chunk] = self.chunk_repo.get_by_document(organization_id, document_id) #ordered by chunk_index.
+        except Exception as e:
+            raise PersistenceError(f"Failed to load document chunks: {str(e)}") from e
+
+        if upload.sha256 == document.document_hash:
+            # Same bytes: nothing to parse or re-chunk, at most the title changes.
+            if title != document.title:
+                self._update_document(replace(document, title=title))
+                self._commit()
+            return UpdateDocumentResult(
+                organization_id=organization_id,
+                document_id=document_id,
+                document_hash=document.document_hash,
+                chunks_total=len(existing),
+                chunks_unchanged=len(existing),
+                chunks_added=0,
+                chunks_deleted=0,
+            )
+
+        other = self.doc_repo.get_by_hash(organization_id, upload.sha256)
+        if other is not None and other.id != document_id:
+            raise DocumentAlreadyExistsError("Another document already has the same content.")
+
+        # Parse + chunk the new version
+        try:
+            parsed_content = self.parser.parse_pdf_file(upload.path)
+        except Exception as e:
+            raise ParsingError(f"Failed to parse PDF: {str(e)}") from e
+
+        if not parsed_content or not parsed_content.strip():
+            raise ParsingError("Parsed content is empty.")
+
+        try:
+            chunk_texts: list[str] = self.chunker.chunk_text(content=parsed_content)
+        except Exception as e:
+            raise ChunkingError(f"Failed to chunk document content: {str(e)}") from e
+
+        if not chunk_texts:
+            raise ChunkingError("Chunker produced no chunks")
+
+        # Diff: each new chunk takes the first unused stored chunk with the same text (and embedding model), in order.
+        embedding_model = embedding_model_key(self.embedder)
+        content_hashes = [chunk_content_hash(t) for t in chunk_texts]
+
+        reusable: dict[str, list[Chunk]] = {}
+        for chunk in reversed(existing): #reversed, so pop() hands them out in chunk_index order.
+            if chunk.embedding_model not in (None, embedding_model):
+                continue #embedded by another model: replaced by a fresh chunk.
+            reusable.setdefault(chunk.content_hash or chunk_content_hash(chunk.content), []).append(chunk)
+
+        kept: list[Chunk | None] = []
+        for content_hash in content_hashes:
+            candidates = reusable.get(content_hash)
+            kept.append(candidates.pop() if candidates else None)
+
+        kept_ids = {c.id for c in kept if c is not None}
+        deleted_ids = [c.id for c in existing if c.id not in kept_ids]
+        moved = {c.id: i for i, c in enumerate(kept) if c is not None and c.chunk_index != i}
+        new_positions = [i for i, c in enumerate(kept) if c is None]
+
+        try:
+            embeddings = embed_chunk_texts(
+                self.chunk_repo,
+                self.embedder,
+                organization_id,
+                [chunk_texts[i] for i in new_positions],
+                [content_hashes[i] for i in new_positions],
+                embedding_model,
+            )
+            token_counts = count_chunk_tokens(self.token_counter, [chunk_texts[i] for i in new_positions])
+            added = [
+                Chunk(
+                    document_id=document_id,
+                    organization_id=organization_id,
+                    chunk_index=i,
+                    content=chunk_texts[i],
+                    embedding=embedding,
+                    token_count=token_count,
+                    content_hash=content_hashes[i],
+                    embedding_model=embedding_model,
+                )
+                for i, embedding, token_count in zip(new_positions, embeddings, token_counts)
+            ]
+        except ChunkPersistenceError:
+            raise
+        except Exception as e:
+            raise ChunkEmbeddingError(f"Failed to create chunk entities with embeddings: {str(e)}") from e
+
+        # Persist, then commit.
+        self._update_document(replace(document, title=title, content=parsed_content, document_hash=upload.sha256))
+        try:
+            self.chunk_repo.update_document_chunks(organization_id, document_id, added=added, deleted_ids=deleted_ids, moved=moved)
+        except Exception as e:
+            raise ChunkPersistenceError(f"Failed to update document chunks: {str(e)}") from e
+        self._commit()
+
+        # The stored file is replaced last, once the new version is committed: a failed diff or commit leaves the previous file in place.
+        try:
+            self.storage.save_staged(organization_id=organization_id, document_id=document_id, staged=upload)
+        except Exception as e:
+            raise StorageWriteError(f"Failed to save document file: {str(e)}") from e
+
+        return UpdateDocumentResult(
+            organization_id=organization_id,
+            document_id=document_id,
+            document_hash=upload.sha256,
+            chunks_total=len(chunk_texts),
+            chunks_unchanged=len(kept_ids),
+            chunks_added=len(added),
+            chunks_deleted=len(deleted_ids),
+            added_chunk_ids=[c.id for c in added],
+            deleted_chunk_ids=deleted_ids,
+            moved_chunk_ids=list(moved),
+        )
+
+    def _commit(self) -> None:
+        try:
+            self.commit()
+        except Exception as e:
+            raise DocumentPersistError(f"Failed to commit document update: {str(e)}") from e
+
+    def _update_document(self, document: Document) -> None:
+        try:
+            updated = self.doc_repo.update(document)
+        except Exception as e:
+            raise DocumentPersistError(f"Failed to update document: {str(e)}") from e
+        if not updated:
+            # Lost a race on the hash check above: another document got the same content in the meantime.
+            raise DocumentAlreadyExistsError("Another document already has the same content.")
+
+
+def ingest_job_result(job: IngestJob) -> IngestJobResult:
+    return IngestJobResult(
+        job_id=job.id,
+        organization_id=job.organization_id,
+        filename=job.filename,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        document_id=job.document_id,
+        document_hash=job.document_hash,
+        chunks_created=job.chunks_created,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@dataclass
+class EnqueueIngestJob:
+    '''
+    Stores the raw file and queues it. Parsing, chunking and embedding happen later in the worker (RunIngestJob).
+    '''
+    job_repo: IngestJobRepositoryInterface
+    storage: DocumentStorageInterface
+
+    def execute(self, organization: Organization, upload: StagedFile, filename: str) -> IngestJobResult:
+        organization_id = organization.id
+
+        if upload.size == 0:
+            raise EmptyFileError("The provided file is empty.")
+
+        job = IngestJob(organization_id=organization_id, filename=filename)
+
+        # Raw file is stored under the job id until the worker has ingested it.
+        try:
+            self.storage.save_staged(organization_id=organization_id, document_id=job.id, staged=upload)
+        except Exception as e:
+            raise StorageWriteError(f"Failed to save uploaded file: {str(e)}") from e
+
+        try:
+            self.job_repo.add(job) #DB commit happens in the endpoint.
+        except Exception as e:
+            try:
+                self.storage.delete(organization_id, job.id)
+            except Exception:
+                pass
+            raise IngestJobPersistenceError(f"Failed to enqueue ingest job: {str(e)}") from e
+
+        return ingest_job_result(job)
+
+
+@dataclass
+class GetIngestJob:
+    job_repo: IngestJobRepositoryInterface
+
+    def execute(self, organization_id: uuid.UUID, job_id: uuid.UUID) -> IngestJobResult:
+        job = self.job_repo.get_by_id(organization_id, job_id)
+        if job is None:
+            raise IngestJobNotFoundError("Ingest job not found")
+        return ingest_job_result(job)
+
+
+@dataclass
+class ListSucceededIngestJobs:
+    job_repo: IngestJobRepositoryInterface
+
+    def execute(self, since: datetime) -> list[IngestJob]:
+        # Polled by the API processes: documents ingested by a worker must reach their caches and in-memory index.
+        try:
+            return self.job_repo.list_succeeded_since(since)
+        except Exception as e:
+            raise IngestJobPersistenceError(f"Failed to list succeeded ingest jobs: {str(e)}") from e
+
+
+@dataclass
+class ClaimNextIngestJob:
+    job_repo: IngestJobRepositoryInterface
+    stale_after_seconds: int = 900 #a running job not updated for this long belongs to a dead worker.
+    max_attempts: int = 3 #same limit as RunIngestJob: a job whose worker keeps dying is failed, not reclaimed forever.
+
+    def execute(self) -> IngestJob | None:
+        # The row stays locked (FOR UPDATE SKIP LOCKED) until the worker commits, so two workers never claim the same job.
+        job = self.job_repo.claim_next(stale_after_seconds=self.stale_after_seconds, max_attempts=self.max_attempts)
+        if job is None:
+            return None
+
+        running = job.mark_running()
+        try:
+            self.job_repo.update(running)
+        except Exception as e:
+            raise IngestJobPersistenceError(f"Failed to claim ingest job: {str(e)}") from e
+        return running
+
+
+@dataclass
+class HeartbeatIngestJob:
+    job_repo: IngestJobRepositoryInterface
+
+    def execute(self, job: IngestJob) -> bool:
+        # Called periodically while the job runs: a job still heartbeating is never reclaimed by another worker.
+        try:
+            return self.job_repo.heartbeat(job)
+        except Exception as e:
+            raise IngestJobPersistenceError(f"Failed to record ingest job heartbeat: {str(e)}") from e
+
+
+# Failures that will happen again on retry: the job fails at once instead of going back to the queue.
+PERMANENT_INGEST_ERRORS = (
+    EmptyFileError,
+    ParsingError,
+    ChunkingError,
+    DocumentAlreadyExistsError,
+    OrganizationNotFoundError,
+    IngestJobFileNotFoundError,
+)
+
+
+@dataclass
+class RunIngestJob:
+    org_repo: OrganizationRepositoryInterface
+    job_repo: IngestJobRepositoryInterface
+    storage: DocumentStorageInterface
+    ingest_document: IngestDocument
+    max_attempts: int = 3
+
+    def execute(self, job: IngestJob) -> IngestJobResult:
+        # The worker has no API key: the organization is looked up here, once per job.
+        organization = self.org_repo.get_by_id(job.organization_id)
+        if organization is None:
+            raise OrganizationNotFoundError("Organization not found")
+
+        # Staged copy of the job file: ingestion moves it under the document id, the job file stays for retries.
+        try:
+            upload = self.storage.stage_stored(job.organization_id, job.id)
+        except FileNotFoundError as e:
+            raise IngestJobFileNotFoundError("Uploaded file for this job no longer exists.") from e
+
+        try:
+            result = self.ingest_document.execute(organization, upload, job.filename)
+        finally:
+            self.storage.discard(upload) #no-op once it was saved.
+
+        finished = job.mark_succeeded(
+            document_id=result.document_id,
+            document_hash=result.document_hash,
+            chunks_created=result.chunks_created,
+        )
+        try:
+            self.job_repo.update(finished) #same transaction as the document and its chunks.
+        except Exception as e:
+            raise IngestJobPersistenceError(f"Failed to update ingest job: {str(e)}") from e
+        return ingest_job_result(finished)
+
+    def record_failure(self, job: IngestJob, error: Exception) -> IngestJobResult:
+        # Called by the worker after rolling back the failed attempt.
+        if isinstance(error, PERMANENT_INGEST_ERRORS) or job.attempts >= self.max_attempts:
+            updated = job.mark_failed(str(error))
+        else:
+            updated = job.requeue(str(error))
+        try:
+            self.job_repo.update(updated)
+        except Exception as e:
+            raise IngestJobPersistenceError(f"Failed to update ingest job: {str(e)}") from e
+        return ingest_job_result(updated)
+
 
 @dataclass
 class NewOrganization:
@@ -199,7 +738,6 @@ class AskQuestion:
     ↓
     Return answer
     '''
-    org_repo: OrganizationRepositoryInterface
     query_repo: QueryRepositoryInterface #to persist the question and answer
     llm_usage_repo: LLMUsageRepositoryInterface #to persist the LLM usage data
     query_chunk_repo: QueryChunkRepositoryInterface #to persist the relationship between query and chunks used in the prompt. This is useful for analytics and future features, but not strictly necessary for the basic functionality.
@@ -207,12 +745,14 @@ class AskQuestion:
     retriever: RetrieverInterface
     prompt_builder: PromptBuilderInterface # with the text question + retrieved relevant chunks, composes the final prompt
     llm_client: LLMInterface #Calls the LLM and receives an answer.
+    answer_cache: AnswerCacheInterface | None = None #optional. Identical or very similar questions are answered without calling the LLM.
+    usage_rollup_repo: UsageRollupRepositoryInterface | None = None #optional. Per organization/model/day usage totals for the dashboard.
+    commit: Callable[[], None] | None = None #optional. Commits the query row before the LLM call, so its DB connection goes back to the pool while the LLM answers.
     
     
-    def execute(self, organization_id: uuid.UUID, question: str) -> AskQuestionResult:
-        # 1. Validating the organization exists.
-        if self.org_repo.get_by_id(organization_id) is None:
-            raise OrganizationNotFoundError("Organization not found")
+    def _prepare(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> tuple[Query, list[RetrievedChunk], str] | AskQuestionResult:
+        # Steps 2-5, shared by execute and stream. Returns (query, retrieved_chunks, prompt), or the final result on an answer cache hit.
+        # 1. The organization is resolved by the caller (API key auth), so it is not fetched again here.
         
         # 2. Validate question
         clean_question = (question or "").strip()
@@ -231,9 +771,21 @@ class AskQuestion:
         except Exception as e:
             raise QueryPersistenceError(f"Failed to persist query: {str(e)}") from e 
         
-        #4. Retrieve relevant chunks
+        # 3b. Answer cache: on a hit, skip retrieval and the LLM call. Keyed on the options too: another top_k or cutoff is another context.
+        if self.answer_cache is not None:
+            started_at = time.perf_counter()
+            try:
+                cached = self.answer_cache.get(organization_id, clean_question, options)
+            except Exception:
+                cached = None #the cache must never break a question.
+            if cached is not None:
+                result = self._answer_from_cache(query, cached, latency_ms=int((time.perf_counter() - started_at) * 1000))
+                if result is not None:
+                    return result
+        
+        #4. Retrieve relevant chunks (options = per-request top_k, similarity cutoff and token budget; None = deployment defaults).
         try:
-            retrieved_chunks: list[RetrievedChunk] = self.retriever.retrieve_best_chunks(organization_id=organization_id, question=clean_question)        
+            retrieved_chunks: list[RetrievedChunk] = self.retriever.retrieve_best_chunks(organization_id=organization_id, question=clean_question, options=options)        
         except Exception as e:
             raise UseCaseError(f"Failed to retrieve relevant chunks: {str(e)}") from e
         
@@ -246,12 +798,61 @@ class AskQuestion:
         except Exception as e:
             raise UseCaseError(f"Failed to build prompt: {str(e)}") from e
         
+        # 5b. The LLM call takes seconds: don't hold a DB connection through it. The answer rows are written in a new transaction.
+        if self.commit is not None:
+            try:
+                self.commit()
+            except Exception as e:
+                raise QueryPersistenceError(f"Failed to commit query: {str(e)}") from e
+        
+        return query, retrieved_chunks, prompt
+    
+    def execute(self, organization: Organization, question: str, options: RetrievalOptions | None = None) -> AskQuestionResult:
+        organization_id = organization.id
+        prepared = self._prepare(organization_id, question, options)
+        if isinstance(prepared, AskQuestionResult):
+            return prepared
+        query, retrieved_chunks, prompt = prepared
+        
         # 6. Call the LLM. Test must call Fake LLM but real will call OpenAI or other provider.
         try:
             llm_response: LLMResponse = self.llm_client.call(prompt)
         except Exception as e:
             raise UseCaseError(f"LLM call failed: {str(e)}") from e
         
+        return self._persist_answer(organization_id, query, retrieved_chunks, llm_response, options)
+    
+    def stream(self, organization: Organization, question: str, options: RetrievalOptions | None = None) -> Iterator[str | AskQuestionResult]:
+        """
+        Same flow as execute, but yields the answer text as the LLM generates it.
+        Yields str deltas, then the AskQuestionResult once everything is persisted (always the last item).
+        """
+        organization_id = organization.id
+        prepared = self._prepare(organization_id, question, options)
+        if isinstance(prepared, AskQuestionResult):
+            if prepared.answer:
+                yield prepared.answer
+            yield prepared
+            return
+        query, retrieved_chunks, prompt = prepared
+        
+        # 6. Stream the LLM answer. The last event carries the full response with token usage.
+        llm_response: LLMResponse | None = None
+        try:
+            for event in self.llm_client.stream(prompt):
+                if event.delta:
+                    yield event.delta
+                if event.response is not None:
+                    llm_response = event.response
+        except Exception as e:
+            raise UseCaseError(f"LLM call failed: {str(e)}") from e
+        
+        if llm_response is None:
+            raise UseCaseError("LLM stream ended without a final response.")
+        
+        yield self._persist_answer(organization_id, query, retrieved_chunks, llm_response, options)
+    
+    def _persist_answer(self, organization_id: uuid.UUID, query: Query, retrieved_chunks: list[RetrievedChunk], llm_response: LLMResponse, options: RetrievalOptions | None = None) -> AskQuestionResult:
         # 7. Persist final answer into query
         try:
             answered_query = query.mark_answered(answer=llm_response.generated_answer, latency_ms=llm_response.latency_ms)
@@ -274,6 +875,9 @@ class AskQuestion:
         except Exception as e:
             raise LLMUsagePersistenceError(f"Failed to persist LLM usage: {str(e)}") from e
         
+        # 8b. Update the daily usage rollup, in the same transaction as the LLMUsage row.
+        self._increment_usage_rollup(query, usage.model_name, usage)
+        
         # 9. Persist query-chunk relationships for analytics, auditability, and future features.
         try:
             query_chunks = []
@@ -289,6 +893,12 @@ class AskQuestion:
         except Exception as e:
             raise QueryChunkPersistenceError(f"Failed to persist query-chunk relationships: {str(e)}") from e
         
+        if self.answer_cache is not None:
+            try:
+                self.answer_cache.set(organization_id, query.question, llm_response, retrieved_chunks, options)
+            except Exception:
+                pass
+        
         # 10. Return the answer and relevant metadata.
         return AskQuestionResult(
             query_id=query.id,
@@ -301,106 +911,186 @@ class AskQuestion:
             total_tokens=usage.total_tokens,
             estimated_cost_usd=usage.estimated_cost_usd
         )
+    
+    def _answer_from_cache(self, query: Query, cached: CachedAnswer, latency_ms: int) -> AskQuestionResult | None:
+        # The query is recorded (flagged as cache hit) but no LLMUsage row is written: no tokens were spent.
+        # None = the cached answer quotes chunks that no longer exist (updated or deleted by another process): a miss.
+        try:
+            linked = self.query_chunk_repo.add_links_if_chunks_exist([
+                QueryChunk(query_id=query.id, chunk_id=rchunk.chunk_id, similarity_score=rchunk.similarity_score, rank=i + 1)
+                for i, rchunk in enumerate(cached.retrieved_chunks)
+            ])
+        except Exception as e:
+            raise QueryChunkPersistenceError(f"Failed to persist query-chunk relationships: {str(e)}") from e
+        if not linked:
+            try:
+                self.answer_cache.invalidate(query.organization_id)
+            except Exception:
+                pass
+            return None
+
+        try:
+            answered_query = query.mark_answered(answer=cached.llm_response.generated_answer, latency_ms=latency_ms, cache_hit=True)
+            self.query_repo.update(answered_query)
+            query = answered_query
+        except Exception as e:
+            raise QueryPersistenceError(f"Failed to update query with cached answer: {str(e)}") from e
+        
+        self._increment_usage_rollup(query, "", None) #"" = no model was called.
+        
+        return AskQuestionResult(
+            query_id=query.id,
+            question=query.question,
+            answer=query.answer,
+            model_name=cached.llm_response.model_name,
+            latency_ms=query.latency_ms,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            estimated_cost_usd=0.0,
+            cache_hit=True,
+        )
+
+    def _increment_usage_rollup(self, query: Query, model_name: str, usage: LLMUsage | None) -> None:
+        if self.usage_rollup_repo is None:
+            return
+        try:
+            self.usage_rollup_repo.increment(
+                organization_id=query.organization_id,
+                day=query.created_at.astimezone(timezone.utc).date(), #UTC day, same as the rollup backfill.
+                model_name=model_name,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                total_tokens=usage.total_tokens if usage else 0,
+                estimated_cost_usd=(usage.estimated_cost_usd or 0.0) if usage else 0.0,
+                cache_hit=usage is None,
+            )
+        except Exception as e:
+            raise UsageRollupPersistenceError(f"Failed to update usage rollup: {str(e)}") from e
+
+
+def utc_date(value: datetime) -> date:
+    # Naive datetimes are taken as UTC, like the database session.
+    return (value.astimezone(timezone.utc) if value.tzinfo is not None else value).date()
+
+
+def is_utc_day_boundary(value: datetime | None) -> bool:
+    if value is None:
+        return True
+    value = value.astimezone(timezone.utc) if value.tzinfo is not None else value
+    return (value.hour, value.minute, value.second, value.microsecond) == (0, 0, 0, 0)
 
 
 @dataclass
 class GetOrganizationDashboard:
-    org_repo: OrganizationRepositoryInterface
     doc_repo: DocumentRepositoryInterface
-    chunk_repo: ChunkRepositoryInterface
     query_repo: QueryRepositoryInterface
     llm_usage_repo: LLMUsageRepositoryInterface
+    usage_rollup_repo: UsageRollupRepositoryInterface | None = None #optional. Summary read from daily rollups instead of aggregating every usage row.
 
-    def execute(self, organization_id: uuid.UUID) -> DashboardResult:
-        # -----------------------------
-        # Organization
-        # -----------------------------
-        organization = self.org_repo.get_by_id(organization_id)
+    max_page_size: int = 200
 
-        if not organization:
-            raise OrganizationNotFoundError(
-                f"Organization {organization_id} not found"
-            )
+    def execute(
+        self,
+        organization: Organization,
+        limit: int = 50,
+        documents_cursor: str | None = None,
+        queries_cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> DashboardResult:
+        # Fixed number of DB round trips, whatever the size of the organization: counts, joins and totals are done in SQL.
+        # Documents and queries are keyset-paginated by (created_at, id); the usage summary covers the whole [since, until) window.
+        if limit < 1 or limit > self.max_page_size:
+            raise InvalidDashboardQueryError(f"limit must be between 1 and {self.max_page_size}.")
+        if since is not None and until is not None and since >= until:
+            raise InvalidDashboardQueryError("since must be earlier than until.")
+        try:
+            documents_after = decode_cursor(documents_cursor) if documents_cursor else None
+            queries_after = decode_cursor(queries_cursor) if queries_cursor else None
+        except ValueError as e:
+            raise InvalidDashboardQueryError(str(e)) from e
 
         # -----------------------------
-        # Documents
+        # Organization (already resolved by the caller)
         # -----------------------------
-        documents = self.doc_repo.list_by_organization(organization_id)
-
-        dashboard_documents = []
-
-        for doc in documents:
-            chunk_count = self.chunk_repo.count_by_document_id(
-                organization_id=organization_id,
-                document_id=doc.id,
-            )
-
-            dashboard_documents.append(
-                DashboardDocument(
-                    document_id=str(doc.id),
-                    filename=doc.title,
-                    created_at=str(doc.created_at),
-                    chunks_created=chunk_count,
-                )
-            )
+        organization_id = organization.id
 
         # -----------------------------
-        # Queries
+        # Documents (with chunk counts)
         # -----------------------------
-        queries = self.query_repo.list_by_organization_id(organization_id)
-
-        dashboard_queries = []
-
-        total_prompt_tokens = 0
-        total_completion_tokens = 0
-        total_tokens = 0
-        total_cost = 0.0
-        models_used = set()
+        # One extra row tells whether there is a next page.
+        documents = self.doc_repo.list_summaries_by_organization(
+            organization_id, limit=limit + 1, after=documents_after, since=since, until=until
+        )
+        next_documents_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_documents_cursor = encode_cursor(documents[-1].created_at, documents[-1].document_id)
 
-        for q in queries:
-            usage = self.llm_usage_repo.get_by_query_id(
-                organization_id=organization_id,
-                query_id=q.id,
+        dashboard_documents = [
+            DashboardDocument(
+                document_id=str(doc.document_id),
+                filename=doc.title,
+                created_at=str(doc.created_at),
+                chunks_created=doc.chunk_count,
             )
+            for doc in documents
+        ]
 
-            if usage:
-                total_prompt_tokens += usage.prompt_tokens
-                total_completion_tokens += usage.completion_tokens
-                total_tokens += usage.total_tokens
-                total_cost += usage.estimated_cost_usd or 0.0
-
-                if usage.model_name:
-                    models_used.add(usage.model_name)
+        # -----------------------------
+        # Queries (with usage)
+        # -----------------------------
+        queries = self.query_repo.list_with_usage_by_organization(
+            organization_id, limit=limit + 1, after=queries_after, since=since, until=until
+        )
+        next_queries_cursor = None
+        if len(queries) > limit:
+            queries = queries[:limit]
+            next_queries_cursor = encode_cursor(queries[-1].created_at, queries[-1].query_id)
 
-                model_name = usage.model_name
-                tokens = usage.total_tokens
-                cost = usage.estimated_cost_usd or 0.0
-            else:
-                model_name = None
-                tokens = 0
-                cost = 0.0
-
-            dashboard_queries.append(
-                DashboardQuery(
-                    query_id=str(q.id),
-                    question=q.question,
-                    created_at=str(q.created_at),
-                    model_name=model_name,
-                    total_tokens=tokens,
-                    estimated_cost_usd=cost,
-                )
+        dashboard_queries = [
+            DashboardQuery(
+                query_id=str(q.query_id),
+                question=q.question,
+                created_at=str(q.created_at),
+                model_name=q.model_name,
+                total_tokens=q.total_tokens,
+                estimated_cost_usd=q.estimated_cost_usd,
+                cache_hit=q.cache_hit,
             )
+            for q in queries
+        ]
 
         # -----------------------------
         # Usage summary
         # -----------------------------
+        # Rollups are per UTC day: they answer any window whose bounds fall on midnight (or are open).
+        daily_usage: list[DashboardDailyUsage] = []
+        if self.usage_rollup_repo is not None and is_utc_day_boundary(since) and is_utc_day_boundary(until):
+            since_day = utc_date(since) if since is not None else None
+            until_day = utc_date(until) if until is not None else None
+            totals = self.usage_rollup_repo.get_totals_by_organization(organization_id, since=since_day, until=until_day)
+            daily_usage = [
+                DashboardDailyUsage(
+                    day=d.day.isoformat(),
+                    request_count=d.request_count,
+                    cache_hit_count=d.cache_hit_count,
+                    total_tokens=d.total_tokens,
+                    estimated_cost_usd=d.estimated_cost_usd,
+                )
+                for d in self.usage_rollup_repo.list_daily_by_organization(organization_id, since=since_day, until=until_day)
+            ]
+        else:
+            totals = self.llm_usage_repo.get_totals_by_organization(organization_id, since=since, until=until)
+
         usage_summary = DashboardUsageSummary(
-            request_count=len(dashboard_queries),
-            total_prompt_tokens=total_prompt_tokens,
-            total_completion_tokens=total_completion_tokens,
-            total_tokens=total_tokens,
-            total_estimated_cost_usd=total_cost,
-            models_used=sorted(models_used),
+            request_count=totals.request_count,
+            total_prompt_tokens=totals.prompt_tokens,
+            total_completion_tokens=totals.completion_tokens,
+            total_tokens=totals.total_tokens,
+            total_estimated_cost_usd=totals.estimated_cost_usd,
+            models_used=totals.models_used,
         )
 
         # -----------------------------
@@ -413,4 +1103,7 @@ class GetOrganizationDashboard:
             documents=dashboard_documents,
             queries=dashboard_queries,
             usage_summary=usage_summary,
-        )
\ No newline at end of file
+            next_documents_cursor=next_documents_cursor,
+            next_queries_cursor=next_queries_cursor,
+            daily_usage=daily_usage,
+        )
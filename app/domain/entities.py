@@ -91,6 +91,10 @@ class Chunk:
     id: uuid.UUID = field(default_factory=new_uuid)
     created_at: datetime = field(default_factory=utc_now)
 
+    # Embedding reuse: sha256 of the embedded text, and the model ("name:dimensions") that produced the embedding.
+    content_hash: str | None = None
+    embedding_model: str | None = None
+
     def __post_init__(self) -> None:
         if self.chunk_index < 0:
             raise ValueError("Chunk.chunk_index cannot be negative.")
@@ -120,6 +124,7 @@ class Query:
     
     id: uuid.UUID = field(default_factory=new_uuid)
     created_at: datetime = field(default_factory=utc_now)
+    cache_hit: bool = False #answered from the answer cache, without calling the LLM.
 
     def __post_init__(self) -> None:
         question = (self.question or "").strip()
@@ -139,7 +144,7 @@ class Query:
         object.__setattr__(self, "answer", answer)
 
     # immutable update: return a NEW instance
-    def mark_answered(self, answer: str, latency_ms: Optional[int] = None) -> "Query":
+    def mark_answered(self, answer: str, latency_ms: Optional[int] = None, cache_hit: bool = False) -> "Query":
         answer2 = (answer or "").strip()
         if not answer2:
             raise ValueError("Answer cannot be empty.")
@@ -147,7 +152,7 @@ class Query:
         if latency_ms is not None and latency_ms < 0:
             raise ValueError("Latency_ms cannot be negative.")
 
-        return replace(self, answer=answer2, latency_ms=latency_ms)
+        return replace(self, answer=answer2, latency_ms=latency_ms, cache_hit=cache_hit)
 
 @dataclass(frozen=True, slots=True)
 class QueryChunk:
@@ -200,4 +205,64 @@ class LLMUsage:
         object.__setattr__(self, "model_name", model_name)
         object.__setattr__(self, "total_tokens", final_total)
         
-   
\ No newline at end of file
+   
+
+# -- Background ingestion -- #
+
+INGEST_JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+@dataclass(frozen=True, slots=True)
+class IngestJob:
+    # non-default fields first
+    organization_id: uuid.UUID
+    filename: str
+
+    status: str = "queued"
+    attempts: int = 0 #times a worker has claimed the job.
+    error: str | None = None
+
+    # filled when the job succeeds
+    document_id: uuid.UUID | None = None
+    document_hash: str | None = None
+    chunks_created: int | None = None
+
+    id: uuid.UUID = field(default_factory=new_uuid)
+    created_at: datetime = field(default_factory=utc_now)
+    updated_at: datetime = field(default_factory=utc_now)
+
+    def __post_init__(self) -> None:
+        filename = (self.filename or "").strip()
+        if not filename:
+            raise ValueError("IngestJob.filename cannot be empty.")
+        if len(filename) > 255:
+            raise ValueError("IngestJob.filename cannot exceed 255 characters.")
+
+        if self.status not in INGEST_JOB_STATUSES:
+            raise ValueError(f"IngestJob.status must be one of {INGEST_JOB_STATUSES}.")
+
+        if self.attempts < 0:
+            raise ValueError("IngestJob.attempts cannot be negative.")
+
+        object.__setattr__(self, "filename", filename)
+
+    # immutable updates: return NEW instances
+    def mark_running(self) -> "IngestJob":
+        return replace(self, status="running", attempts=self.attempts + 1, error=None, updated_at=utc_now())
+
+    def mark_succeeded(self, document_id: uuid.UUID, document_hash: str | None, chunks_created: int) -> "IngestJob":
+        return replace(
+            self,
+            status="succeeded",
+            error=None,
+            document_id=document_id,
+            document_hash=document_hash,
+            chunks_created=chunks_created,
+            updated_at=utc_now(),
+        )
+
+    def mark_failed(self, error: str) -> "IngestJob":
+        return replace(self, status="failed", error=(error or "Unknown error")[:2000], updated_at=utc_now())
+
+    def requeue(self, error: str) -> "IngestJob":
+        # transient failure: back to the queue, the error is kept so it can be seen while polling.
+        return replace(self, status="queued", error=(error or "Unknown error")[:2000], updated_at=utc_now())
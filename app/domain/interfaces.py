@@ -32,9 +32,10 @@ abstractmethod means that the method is declared but not implemented in the base
 from abc import ABC, abstractmethod
 
 import uuid
-from typing import List
-from app.domain.types import RetrievedChunk, LLMResponse
-from app.domain.entities import Organization, Document, Query, Chunk, QueryChunk, LLMUsage
+from datetime import date, datetime
+from typing import BinaryIO, Iterable, Iterator, List
+from app.domain.types import CachedAnswer, DailyUsage, DocumentSummary, LLMStreamEvent, PageCursor, QueryUsageSummary, RetrievalOptions, RetrievedChunk, LLMResponse, StagedFile, UsageTotals
+from app.domain.entities import IngestJob, Organization, Document, Query, Chunk, QueryChunk, LLMUsage
 
 class OrganizationRepositoryInterface(ABC):
     @abstractmethod
@@ -52,6 +53,9 @@ class OrganizationRepositoryInterface(ABC):
     @abstractmethod
     def get_by_api_key_hash(self, api_key_hash: str) -> Organization | None:
         ...
+    @abstractmethod
+    def update_api_key_hash(self, id: uuid.UUID, api_key_hash: str) -> None: #API key rotation.
+        ...
 
 
 class DocumentRepositoryInterface(ABC):
@@ -59,15 +63,38 @@ class DocumentRepositoryInterface(ABC):
     def add(self, document: Document) -> None:
         ...    
     @abstractmethod
+    def add_if_new(self, document: Document) -> bool: #False if the organization already has a document with the same hash.
+        ...
+    @abstractmethod
     def get_by_hash(self, organization_id: uuid.UUID, document_hash: str) -> Document | None: #double safety with organization_id as a parameter.
         ...
     @abstractmethod
     def get_by_id(self, organization_id: uuid.UUID, id: uuid.UUID) -> Document | None: #double safety with organization_id as a parameter.
         ...
     @abstractmethod
+    def get_by_id_for_update(self, organization_id: uuid.UUID, id: uuid.UUID) -> Document | None: #same, but the row stays locked until the transaction ends.
+        ...
+    @abstractmethod
     def list_by_organization(self, organization_id:uuid.UUID) -> List[Document]:
         ...
     @abstractmethod
+    def list_summaries_by_organization(
+        self,
+        organization_id: uuid.UUID,
+        limit: int | None = None,
+        after: PageCursor | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> List[DocumentSummary]:
+        """
+        Metadata + chunk count, without the document content. Ordered by (created_at, id),
+        starting after `after`; since is inclusive, until exclusive.
+        """
+        ...
+    @abstractmethod
+    def update(self, document: Document) -> bool: #title, content and hash of a re-ingested document. False if the organization already has another document with the new hash.
+        ...
+    @abstractmethod
     def delete(self, organization_id: uuid.UUID, id: uuid.UUID) -> None: #double safety with organization_id as a parameter.
         ...   
 
@@ -84,6 +111,16 @@ class QueryRepositoryInterface(ABC):
     @abstractmethod
     def update(self, query: Query) -> None:
         ...
+    @abstractmethod
+    def list_with_usage_by_organization(
+        self,
+        organization_id: uuid.UUID,
+        limit: int | None = None,
+        after: PageCursor | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> List[QueryUsageSummary]: #same ordering and filters as DocumentRepositoryInterface.list_summaries_by_organization.
+        ...
 
 class ChunkRepositoryInterface(ABC):
     #Can add 1 or N bulk. 
@@ -95,7 +132,59 @@ class ChunkRepositoryInterface(ABC):
         ...
     
     @abstractmethod
-    def vector_search(self, organization_id: uuid.UUID, embedded_question: list[float], top_k: int = 5) -> list[RetrievedChunk]: #double safety with organization_id as a parameter.
+    def get_by_organization(self, organization_id: uuid.UUID) -> List[Chunk]:
+        ...
+    
+    @abstractmethod
+    def vector_search(
+        self,
+        organization_id: uuid.UUID,
+        embedded_question: list[float],
+        top_k: int = 5,
+        min_similarity: float | None = None,
+        max_context_tokens: int | None = None,
+    ) -> list[RetrievedChunk]:
+        """
+        Closest chunks first, at most top_k. min_similarity and max_context_tokens (see RetrievalOptions)
+        are applied by the search itself, not by the caller.
+        """
+        ...
+    @abstractmethod
+    def lexical_search(self, organization_id: uuid.UUID, question: str, top_k: int = 5) -> list[RetrievedChunk]: #full-text search, best ts_rank first.
+        ...
+    @abstractmethod
+    def hybrid_search(
+        self,
+        organization_id: uuid.UUID,
+        question: str,
+        embedded_question: list[float],
+        top_k: int = 5,
+        candidates: int = 50,
+        min_similarity: float | None = None,
+        max_context_tokens: int | None = None,
+    ) -> list[RetrievedChunk]:
+        """
+        Vector and full-text search (`candidates` results each) fused with reciprocal rank fusion, best first.
+        similarity_score stays the cosine similarity, as in vector_search. min_similarity only filters the vector side:
+        a full-text match is relevant on its own.
+        """
+        ...
+    @abstractmethod
+    def get_embeddings_by_content_hash(self, organization_id: uuid.UUID, content_hashes: List[str], embedding_model: str) -> dict[str, List[float]]: #content_hash -> embedding, only for hashes already stored.
+        ...
+    @abstractmethod
+    def update_document_chunks(
+        self,
+        organization_id: uuid.UUID,
+        document_id: uuid.UUID,
+        added: List[Chunk],
+        deleted_ids: List[uuid.UUID],
+        moved: dict[uuid.UUID, int],
+    ) -> None:
+        """
+        Applies a re-ingestion diff: deletes `deleted_ids`, gives kept chunks their new chunk_index (`moved`: id -> index)
+        and inserts `added`. Chunks not mentioned are left untouched, together with their query links.
+        """
         ...
     #@abstractmethod
     #def get_by_ids_in_order(self, organization_id: uuid.UUID, ids: List[uuid.UUID]) -> List[Chunk]: #double safety with organization_id as a parameter.
@@ -113,6 +202,9 @@ class QueryChunkRepositoryInterface(ABC):
     @abstractmethod
     def add_links(self, links: List[QueryChunk]) -> None:
         ...
+    @abstractmethod
+    def add_links_if_chunks_exist(self, links: List[QueryChunk]) -> bool: #False, and nothing written, if a linked chunk was deleted meanwhile.
+        ...
     #@abstractmethod
     #def get_chunks_for_query(self, organization_id: uuid.UUID, query_id: uuid.UUID) -> List[QueryChunk]: #double safety with organization_id as a parameter.
     #    ...
@@ -124,6 +216,9 @@ class LLMUsageRepositoryInterface(ABC):
     @abstractmethod
     def add(self, usage: LLMUsage) -> None:
         ...    
+    @abstractmethod
+    def get_totals_by_organization(self, organization_id: uuid.UUID, since: datetime | None = None, until: datetime | None = None) -> UsageTotals:
+        ...
     #@abstractmethod
     #def list_by_query(self, organization_id: uuid.UUID, query_id: uuid.UUID) -> List[LLMUsage]: #double safety with organization_id as a parameter.
     #    ...
@@ -134,24 +229,107 @@ class LLMUsageRepositoryInterface(ABC):
     #def sum_cost_by_organization(self, organization_id:uuid.UUID) -> float:
     #    ...
 
+class UsageRollupRepositoryInterface(ABC):
+    """
+    Usage pre-aggregated per organization, model and UTC day, maintained as questions are answered.
+    Requests answered without an LLM call (answer cache hits) are counted under model_name "".
+    """
+    @abstractmethod
+    def increment(
+        self,
+        organization_id: uuid.UUID,
+        day: date,
+        model_name: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        total_tokens: int = 0,
+        estimated_cost_usd: float = 0.0,
+        cache_hit: bool = False,
+    ) -> None: #one request.
+        ...
+    @abstractmethod
+    def get_totals_by_organization(self, organization_id: uuid.UUID, since: date | None = None, until: date | None = None) -> UsageTotals: #since inclusive, until exclusive.
+        ...
+    @abstractmethod
+    def list_daily_by_organization(self, organization_id: uuid.UUID, since: date | None = None, until: date | None = None) -> List[DailyUsage]:
+        ...
+    @abstractmethod
+    def rebuild(self, organization_id: uuid.UUID | None = None) -> int:
+        """Recomputes the rollup from queries + llm_usage (one organization, or all). Returns the number of rows written."""
+        ...
+
+class IngestJobRepositoryInterface(ABC):
+    @abstractmethod
+    def add(self, job: IngestJob) -> None:
+        ...
+    @abstractmethod
+    def get_by_id(self, organization_id: uuid.UUID, id: uuid.UUID) -> IngestJob | None: #double safety with organization_id as a parameter.
+        ...
+    @abstractmethod
+    def update(self, job: IngestJob) -> None:
+        ...
+    @abstractmethod
+    def claim_next(self, stale_after_seconds: int, max_attempts: int) -> IngestJob | None:
+        """
+        Oldest queued job (or running job not updated for stale_after_seconds, i.e. its worker died),
+        locked for the current transaction. Jobs locked by other workers are skipped, not waited for.
+        Stale jobs already claimed max_attempts times are marked failed instead of being claimed again.
+        """
+        ...
+    @abstractmethod
+    def heartbeat(self, job: IngestJob) -> bool:
+        """
+        Touches updated_at of a running job, so claim_next doesn't take it for a dead worker's.
+        False when the job is no longer this worker's run (finished, or claimed again: attempts changed).
+        """
+        ...
+    @abstractmethod
+    def list_succeeded_since(self, since: datetime) -> List[IngestJob]: #jobs of every organization that succeeded at or after `since`, oldest first.
+        ...
+
 # --- #
 
 class DocumentStorageInterface(ABC):
     @abstractmethod
     def save(self, organization_id: uuid.UUID, document_id: uuid.UUID, content: bytes) -> None:
         ...
-    #@abstractmethod
-    #def load(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> bytes:
-    #    ...
+    @abstractmethod
+    def load(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> bytes:
+        ...
     @abstractmethod
     def delete(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> None:
         ...
+    # Streaming path: uploads are written to a staged file in chunks and moved into place, never held in memory.
+    @abstractmethod
+    def stage(self, stream: BinaryIO, max_size: int | None = None) -> StagedFile: #ValueError if the stream is larger than max_size.
+        ...
+    @abstractmethod
+    def stage_stored(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> StagedFile: #FileNotFoundError if it was never saved.
+        ...
+    @abstractmethod
+    def save_staged(self, organization_id: uuid.UUID, document_id: uuid.UUID, staged: StagedFile) -> None:
+        ...
+    @abstractmethod
+    def discard(self, staged: StagedFile) -> None: #no-op if the staged file was already saved.
+        ...
 
 # --- # 
 class PDFParserInterface(ABC):
     @abstractmethod
     def parse_pdf(self, file_content: bytes) -> str:
         ...
+    
+    def parse_pdf_file(self, path: str) -> str:
+        # Default for parsers that only work on bytes. Override to read from the file without loading it whole.
+        with open(path, "rb") as f:
+            return self.parse_pdf(f.read())
+
+    def iter_pdf_file_pages(self, path: str) -> Iterator[str]:
+        # Non-empty page texts in page order, "\n".join(...) == parse_pdf_file(path). Default: the whole text as one page.
+        # Override to yield each page as soon as it is extracted (streaming ingestion).
+        text = self.parse_pdf_file(path)
+        if text:
+            yield text
 
 # --- #
 
@@ -159,6 +337,22 @@ class ChunkerInterface(ABC):
     @abstractmethod
     def chunk_text(self, content: str) -> list[str]:
         ...
+
+    def iter_chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        # Same chunks as chunk_text("\n".join(pages)). Default: joins every page first.
+        # Override to yield chunks while the pages are still being parsed.
+        yield from self.chunk_text("\n".join(pages))
+
+class TokenCounterInterface(ABC): #Counts tokens the way the model reading the text does (chunk token_count, prompt budget).
+    @abstractmethod
+    def count(self, text: str) -> int:
+        ...
+    @abstractmethod
+    def count_many(self, texts: List[str]) -> List[int]: #same order as the input texts, encoded in one batch.
+        ...
+    @abstractmethod
+    def truncate(self, text: str, max_tokens: int) -> str: #keeps the first max_tokens tokens.
+        ...
         
 # --- Ask Question related interfaces --- #
 
@@ -166,10 +360,13 @@ class EmbedderInterface(ABC):
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
         ...
+    @abstractmethod
+    def embed_many(self, texts: List[str]) -> List[List[float]]: #same order as the input texts.
+        ...
 
 class RetrieverInterface(ABC):
     @abstractmethod #ensures the following method is implemented in any concrete class that inherits from this interface.
-    def retrieve_best_chunks(self, question: str, organization_id: uuid.UUID) -> list[RetrievedChunk]:
+    def retrieve_best_chunks(self, question: str, organization_id: uuid.UUID, options: RetrievalOptions | None = None) -> list[RetrievedChunk]: #None = the retriever's defaults.
         ...
 
 class PromptBuilderInterface (ABC):
@@ -181,3 +378,30 @@ class LLMInterface(ABC): #Client to call the LLM service (like OpenAI, Azure, et
     @abstractmethod
     def call(self, prompt: str) -> LLMResponse:
         ...
+    
+    def stream(self, prompt: str) -> Iterator[LLMStreamEvent]:
+        # Default for clients without streaming support: one event with the whole answer.
+        response = self.call(prompt)
+        yield LLMStreamEvent(delta=response.generated_answer, response=response)
+
+class AnswerCacheInterface(ABC): #Answers already generated for an organization, reused for identical or very similar questions.
+    @abstractmethod
+    def get(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> CachedAnswer | None: #only answers built with the same retrieval options.
+        ...
+    @abstractmethod
+    def set(self, organization_id: uuid.UUID, question: str, llm_response: LLMResponse, retrieved_chunks: List[RetrievedChunk], options: RetrievalOptions | None = None) -> None:
+        ...
+    @abstractmethod
+    def invalidate(self, organization_id: uuid.UUID) -> None: #must be called when the organization's documents change.
+        ...
+
+class OrganizationCacheInterface(ABC): #Organizations resolved from an API key hash, so authentication skips the database.
+    @abstractmethod
+    def get(self, api_key_hash: str) -> Organization | None:
+        ...
+    @abstractmethod
+    def set(self, organization: Organization) -> None:
+        ...
+    @abstractmethod
+    def invalidate(self, organization_id: uuid.UUID) -> None: #must be called when the organization is deleted or its API key rotates.
+        ...
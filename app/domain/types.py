@@ -1,6 +1,7 @@
 # -- Intermediate data structures used inside use cases -- #
 
 from dataclasses import dataclass
+from datetime import date, datetime
 import uuid
 
 
@@ -10,6 +11,22 @@ class RetrievedChunk:
     content: str
     chunk_index: int
     similarity_score: float
+    token_count: int | None = None
+    document_id: uuid.UUID | None = None #chunks of the same document can be merged in the prompt (Merging_PromptBuilder).
+
+@dataclass(frozen=True)
+class RetrievalOptions:
+    top_k: int = 5
+    min_similarity: float | None = None #cosine similarity in [0, 1]: closer chunks only.
+    max_context_tokens: int | None = None #token_count summed over the returned chunks, best first. The best chunk is always returned.
+
+    def __post_init__(self) -> None:
+        if self.top_k < 1:
+            raise ValueError("top_k must be greater than 0.")
+        if self.min_similarity is not None and not 0.0 <= self.min_similarity <= 1.0:
+            raise ValueError("min_similarity must be between 0 and 1.")
+        if self.max_context_tokens is not None and self.max_context_tokens < 1:
+            raise ValueError("max_context_tokens must be greater than 0.")
     
 @dataclass(frozen=True)
 class LLMResponse:
@@ -20,5 +37,65 @@ class LLMResponse:
     total_tokens: int
     latency_ms: int | None
     estimated_cost_usd: float | None
-    
-    
\ No newline at end of file
+
+@dataclass(frozen=True)
+class LLMStreamEvent:
+    delta: str = "" #text generated since the previous event.
+    response: LLMResponse | None = None #full response with token usage, only set on the last event.
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    question: str
+    llm_response: LLMResponse
+    retrieved_chunks: list[RetrievedChunk] #chunks the cached answer was generated from.
+
+@dataclass(frozen=True)
+class StagedFile:
+    # An upload written to a temp file inside the storage, not yet attached to a document.
+    path: str
+    size: int
+    sha256: str #computed while the file was written.
+
+# -- Read models for the dashboard (computed in SQL, no entity per row) -- #
+
+@dataclass(frozen=True)
+class PageCursor:
+    # Keyset position: the (created_at, id) of the last row of the previous page.
+    created_at: datetime
+    id: uuid.UUID
+
+@dataclass(frozen=True)
+class DocumentSummary:
+    document_id: uuid.UUID
+    title: str
+    created_at: datetime
+    chunk_count: int
+
+@dataclass(frozen=True)
+class QueryUsageSummary:
+    query_id: uuid.UUID
+    question: str
+    created_at: datetime
+    cache_hit: bool
+    model_name: str | None #None when the query has no usage record.
+    total_tokens: int
+    estimated_cost_usd: float
+
+@dataclass(frozen=True)
+class UsageTotals:
+    request_count: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    estimated_cost_usd: float
+    models_used: list[str]
+
+@dataclass(frozen=True)
+class DailyUsage:
+    day: date #UTC day.
+    request_count: int
+    cache_hit_count: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    estimated_cost_usd: float
@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+import unicodedata
+import uuid
+
+import numpy as np
+from cachetools import TTLCache
+
+from app.domain.entities import Organization
+from app.domain.interfaces import AnswerCacheInterface, EmbedderInterface, OrganizationCacheInterface, OrganizationRepositoryInterface
+from app.domain.types import CachedAnswer, LLMResponse, RetrievalOptions, RetrievedChunk
+
+
+@dataclass
+class _Entry:
+    answer: CachedAnswer
+    embedding: np.ndarray | None #normalized question embedding, None if embedding failed.
+    created_at: float
+    options: RetrievalOptions | None = None #retrieval options the answer was built with.
+
+
+class InMemory_AnswerCache(AnswerCacheInterface):
+    """
+    Per-organization answer cache.
+
+    Lookup order:
+    1. Exact match on the normalized question.
+    2. Semantic match: cosine similarity between question embeddings >= similarity_threshold.
+       Wrap the embedder with CachedEmbedder so the retriever and this cache share one embedding call.
+
+    Answers are only reused for the same retrieval options (top_k, similarity cutoff, token budget):
+    another context would give another answer.
+
+    Entries expire after ttl_seconds and each organization keeps at most max_entries_per_organization (LRU).
+    """
+
+    def __init__(
+        self,
+        embedder: EmbedderInterface | None = None,
+        similarity_threshold: float = 0.95,
+        max_entries_per_organization: int = 1000,
+        ttl_seconds: int = 24 * 3600,
+    ):
+        if not 0.0 < similarity_threshold <= 1.0:
+            raise ValueError("similarity_threshold must be in (0, 1].")
+        if max_entries_per_organization <= 0:
+            raise ValueError("max_entries_per_organization must be greater than 0.")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0.")
+
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_organization = max_entries_per_organization
+        self.ttl_seconds = ttl_seconds
+
+        self._organizations: dict[uuid.UUID, OrderedDict[tuple[RetrievalOptions | None, str], _Entry]] = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", question or "").casefold().split())
+
+    def get(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> CachedAnswer | None:
+        key = (options, self.normalize_question(question))
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._organizations.get(organization_id)
+            if entries:
+                self._evict_expired(entries, now)
+                entry = entries.get(key)
+                if entry is not None:
+                    entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry.answer
+            if not entries or self.embedder is None:
+                self.misses += 1
+                return None
+
+        embedding = self._embed(question)
+        if embedding is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            entries = self._organizations.get(organization_id)
+            candidates = [
+                (k, e) for k, e in (entries or {}).items()
+                if e.options == options and e.embedding is not None and e.embedding.shape == embedding.shape
+            ]
+            if candidates:
+                scores = np.stack([e.embedding for _, e in candidates]) @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    best_key, best_entry = candidates[best]
+                    entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return best_entry.answer
+            self.misses += 1
+            return None
+
+    def set(self, organization_id: uuid.UUID, question: str, llm_response: LLMResponse, retrieved_chunks: list[RetrievedChunk], options: RetrievalOptions | None = None) -> None:
+        key = (options, self.normalize_question(question))
+        embedding = self._embed(question) if self.embedder is not None else None
+        entry = _Entry(
+            answer=CachedAnswer(question=question, llm_response=llm_response, retrieved_chunks=list(retrieved_chunks)),
+            embedding=embedding,
+            created_at=time.monotonic(),
+            options=options,
+        )
+
+        with self._lock:
+            entries = self._organizations.setdefault(organization_id, OrderedDict())
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_organization:
+                entries.popitem(last=False)
+
+    def invalidate(self, organization_id: uuid.UUID) -> None:
+        with self._lock:
+            self._organizations.pop(organization_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "organizations": len(self._organizations),
+            }
+
+    def _embed(self, question: str) -> np.ndarray | None:
+        try:
+            vector = np.asarray(self.embedder.embed_text(question), dtype=np.float32)
+        except Exception:
+            return None #semantic lookup is best effort, exact matching still works.
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _evict_expired(self, entries: OrderedDict[tuple[RetrievalOptions | None, str], _Entry], now: float) -> None:
+        expired = [k for k, e in entries.items() if now - e.created_at > self.ttl_seconds]
+        for k in expired:
+            del entries[k]
+
+
+class InMemory_OrganizationCache(OrganizationCacheInterface):
+    """
+    api_key_hash -> Organization, bounded (LRU) and with a TTL.
+
+    Invalidation only reaches the current process: with several API processes the TTL bounds how long
+    a deleted organization or a rotated key keeps working elsewhere.
+    Unknown keys are not cached, so invalid requests cannot fill the cache.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: int = 60):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0.")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0.")
+
+        self._cache: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, api_key_hash: str) -> Organization | None:
+        with self._lock:
+            organization = self._cache.get(api_key_hash)
+            if organization is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return organization
+
+    def set(self, organization: Organization) -> None:
+        with self._lock:
+            self._cache[organization.api_key_hash] = organization
+
+    def invalidate(self, organization_id: uuid.UUID) -> None:
+        # Looked up by id: after a rotation the caller only knows the new key. Rare, so a scan is fine.
+        with self._lock:
+            stale = [h for h, org in self._cache.items() if org.id == organization_id]
+            for h in stale:
+                self._cache.pop(h, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
+
+
+class CachedOrganizationRepository(OrganizationRepositoryInterface):
+    """
+    Wraps an organization repository: get_by_api_key_hash is served from the cache,
+    delete and update_api_key_hash invalidate it.
+    """
+
+    def __init__(self, repository: OrganizationRepositoryInterface, cache: OrganizationCacheInterface):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, organization: Organization) -> None:
+        self.repository.add(organization)
+
+    def get_by_id(self, id: uuid.UUID) -> Organization | None:
+        return self.repository.get_by_id(id)
+
+    def get_by_name(self, name: str) -> Organization | None:
+        return self.repository.get_by_name(name)
+
+    def get_by_api_key_hash(self, api_key_hash: str) -> Organization | None:
+        organization = self.cache.get(api_key_hash)
+        if organization is not None:
+            return organization
+        organization = self.repository.get_by_api_key_hash(api_key_hash)
+        if organization is not None:
+            self.cache.set(organization)
+        return organization
+
+    def delete(self, id: uuid.UUID) -> None:
+        self.repository.delete(id)
+        self.cache.invalidate(id)
+
+    def update_api_key_hash(self, id: uuid.UUID, api_key_hash: str) -> None:
+        self.repository.update_api_key_hash(id, api_key_hash)
+        self.cache.invalidate(id)
@@ -1,3 +1,4 @@
+import os
 
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
@@ -8,13 +9,39 @@ from app.infra.db.db_url_builder import get_db_url
 
 DATABASE_URL = get_db_url()
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# pgvector ANN search settings (see migration "add hnsw index to chunks embedding").
+# ef_search: size of the HNSW candidate list. Higher = better recall, slower queries. Must be >= top_k.
+# probes: number of IVFFlat lists scanned, only used if an ivfflat index exists.
+# iterative_scan: pgvector >= 0.8 keeps scanning the index when the organization filter discards candidates ("off", "relaxed_order", "strict_order").
+# Without it, an organization filter only sees the ef_search global candidates: small tenants get fewer than top_k chunks, or none.
+# relaxed_order is enough here, every search re-ranks its rows by distance. Empty = leave the server default.
+HNSW_EF_SEARCH = int(os.getenv("PGVECTOR_HNSW_EF_SEARCH", "100"))
+IVFFLAT_PROBES = int(os.getenv("PGVECTOR_IVFFLAT_PROBES", "10"))
+HNSW_ITERATIVE_SCAN = os.getenv("PGVECTOR_HNSW_ITERATIVE_SCAN", "relaxed_order").strip()
+
+# A connection is held per open transaction, not per request: questions commit before the LLM call (see AskQuestion.commit),
+# so the pool only has to cover the DB work in flight (and the uploads being ingested), not API_THREADPOOL_SIZE.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+
+engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 
 
 # Register pgvector type with psycopg
 @event.listens_for(engine, "connect")
 def connect(dbapi_connection, connection_record):
     register_vector(dbapi_connection)
+    apply_vector_search_settings(dbapi_connection)
+
+
+def apply_vector_search_settings(dbapi_connection) -> None:
+    # SET (not SET LOCAL) so the values live for the whole DB session of this pooled connection.
+    with dbapi_connection.cursor() as cursor:
+        cursor.execute(f"SET hnsw.ef_search = {HNSW_EF_SEARCH:d}")
+        cursor.execute(f"SET ivfflat.probes = {IVFFLAT_PROBES:d}")
+        if HNSW_ITERATIVE_SCAN:
+            cursor.execute("SELECT set_config('hnsw.iterative_scan', %s, false)", (HNSW_ITERATIVE_SCAN,))
+    dbapi_connection.commit() #leave the connection idle, outside of a transaction, before handing it to the pool.
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False, future=True)
 
@@ -24,4 +51,4 @@ def get_db_session():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
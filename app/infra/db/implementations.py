@@ -1,15 +1,48 @@
+from datetime import date, datetime, timedelta
 from typing import List
 import uuid
 
-from app.domain.types import RetrievedChunk
+import numpy as np
+import psycopg
+
+from app.domain.types import DailyUsage, DocumentSummary, PageCursor, QueryUsageSummary, RetrievedChunk, UsageTotals
 from app.infra.db.engine import get_db_session
+from sqlalchemy import Text, and_, bindparam, cast, delete, func, insert, literal, literal_column, or_, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import TSQUERY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.domain.interfaces import DocumentRepositoryInterface, OrganizationRepositoryInterface, QueryRepositoryInterface, ChunkRepositoryInterface, LLMUsageRepositoryInterface, QueryChunkRepositoryInterface
+from app.domain.interfaces import DocumentRepositoryInterface, IngestJobRepositoryInterface, UsageRollupRepositoryInterface, OrganizationRepositoryInterface, QueryRepositoryInterface, ChunkRepositoryInterface, LLMUsageRepositoryInterface, QueryChunkRepositoryInterface
 #import orm models as **ORM: 
-from app.infra.db.ormmodels import Organization as OrganizationORM, Document as DocumentORM, Query as QueryORM, Chunk as ChunkORM, LLMUsage as LLMUsageORM, QueryChunk as QueryChunkORM 
+from app.infra.db.ormmodels import Organization as OrganizationORM, Document as DocumentORM, Query as QueryORM, Chunk as ChunkORM, LLMUsage as LLMUsageORM, QueryChunk as QueryChunkORM, IngestJob as IngestJobORM, UsageDailyRollup as UsageDailyRollupORM, TEXT_SEARCH_CONFIG
 #import domain entities
-from app.domain.entities import Organization, Document, Query, Chunk, LLMUsage, QueryChunk
+from app.domain.entities import IngestJob, Organization, Document, Query, Chunk, LLMUsage, QueryChunk
+
+def apply_time_window(query, created_at_column, since: datetime | None, until: datetime | None):
+    if since is not None:
+        query = query.filter(created_at_column >= since)
+    if until is not None:
+        query = query.filter(created_at_column < until)
+    return query
+
+
+def apply_keyset_page(query, created_at_column, id_column, after: PageCursor | None, limit: int | None):
+    # Keyset pagination: (created_at, id) > cursor is a range scan on the (organization_id, created_at, id) index,
+    # so the cost of a page doesn't grow with how far the client has paged (unlike OFFSET).
+    if after is not None:
+        query = query.filter(tuple_(created_at_column, id_column) > tuple_(after.created_at, after.id))
+    query = query.order_by(created_at_column, id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def lexical_tsquery(question: str):
+    # plainto_tsquery ANDs every word, and a question rarely shares all of its words with a chunk:
+    # the terms are ORed instead and ts_rank_cd ranks chunks by how many (and how close) they match.
+    config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+    return cast(func.replace(cast(func.plainto_tsquery(config, question), Text), "&", "|"), TSQUERY)
+
 
 #✅#
 class PostgreSQL_OrganizationRepository(OrganizationRepositoryInterface):
@@ -60,6 +93,12 @@ class PostgreSQL_OrganizationRepository(OrganizationRepositoryInterface):
             self.db_session.delete(orm_obj)
             self.db_session.flush()
 
+    def update_api_key_hash(self, id: uuid.UUID, api_key_hash: str) -> None:
+        orm_obj = self.db_session.get(OrganizationORM, id)
+        if orm_obj is not None:
+            orm_obj.api_key_hash = api_key_hash
+            self.db_session.flush()
+
 #✅#       
 class PostgreSQL_DocumentRepository(DocumentRepositoryInterface):
     def __init__(self, db_session: Session):
@@ -94,6 +133,25 @@ class PostgreSQL_DocumentRepository(DocumentRepositoryInterface):
         self.db_session.add(orm_obj)
         self.db_session.flush()
 
+    def add_if_new(self, document: Document) -> bool:
+        # ON CONFLICT on the (organization_id, document_hash) unique index: two concurrent uploads of the same file
+        # can't both be inserted, and the loser gets False instead of an IntegrityError that would abort the transaction.
+        stmt = (
+            pg_insert(DocumentORM)
+            .values(
+                id=document.id,
+                organization_id=document.organization_id,
+                title=document.title,
+                source_type=document.source_type,
+                document_hash=document.document_hash,
+                content=document.content,
+                created_at=document.created_at,
+            )
+            .on_conflict_do_nothing(index_elements=[DocumentORM.organization_id, DocumentORM.document_hash])
+            .returning(DocumentORM.id)
+        )
+        return self.db_session.execute(stmt).scalar_one_or_none() is not None
+
     
     def get_by_hash(self, organization_id: uuid.UUID, document_hash: str) -> Document | None: #double safety with organization_id as a parameter.
         orm_obj = (
@@ -111,6 +169,16 @@ class PostgreSQL_DocumentRepository(DocumentRepositoryInterface):
             .first()
         )
         return None if orm_obj is None else self._to_entity(orm_obj)
+
+    def get_by_id_for_update(self, organization_id: uuid.UUID, id: uuid.UUID) -> Document | None: #double safety with organization_id as a parameter.
+        # SELECT ... FOR UPDATE: a concurrent re-ingest of the same document waits here until this transaction commits.
+        orm_obj = (
+            self.db_session.query(DocumentORM)
+            .filter_by(id=id, organization_id=organization_id)
+            .with_for_update()
+            .first()
+        )
+        return None if orm_obj is None else self._to_entity(orm_obj)
     
     def list_by_organization(self, organization_id: uuid.UUID)  -> List[Document]:
         #fetch orm list with org filter, then convert to entity list.
@@ -122,6 +190,50 @@ class PostgreSQL_DocumentRepository(DocumentRepositoryInterface):
         
         return [self._to_entity(o) for o in orm_objs]
 
+    def list_summaries_by_organization(
+        self,
+        organization_id: uuid.UUID,
+        limit: int | None = None,
+        after: PageCursor | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> List[DocumentSummary]:
+        # One round trip: the page of documents first, then a GROUP BY chunk count restricted to that page.
+        # The (large) content column is never loaded.
+        documents = self.db_session.query(DocumentORM.id, DocumentORM.title, DocumentORM.created_at).filter(
+            DocumentORM.organization_id == organization_id
+        )
+        documents = apply_time_window(documents, DocumentORM.created_at, since, until)
+        page = apply_keyset_page(documents, DocumentORM.created_at, DocumentORM.id, after, limit).subquery()
+
+        rows = (
+            self.db_session.query(page.c.id, page.c.title, page.c.created_at, func.count(ChunkORM.id))
+            .outerjoin(ChunkORM, ChunkORM.document_id == page.c.id)
+            .group_by(page.c.id, page.c.title, page.c.created_at)
+            .order_by(page.c.created_at, page.c.id)
+            .all()
+        )
+        return [
+            DocumentSummary(document_id=id, title=title, created_at=created_at, chunk_count=chunk_count)
+            for id, title, created_at, chunk_count in rows
+        ]
+
+    def update(self, document: Document) -> bool:
+        # An UPDATE has no ON CONFLICT, so it runs in a savepoint: if another document of the organization got the same
+        # hash concurrently, only the savepoint is rolled back and the caller gets False instead of an aborted transaction.
+        stmt = (
+            update(DocumentORM)
+            .where(DocumentORM.id == document.id, DocumentORM.organization_id == document.organization_id)
+            .values(title=document.title, content=document.content, document_hash=document.document_hash)
+            .execution_options(synchronize_session="fetch")
+        )
+        try:
+            with self.db_session.begin_nested():
+                self.db_session.execute(stmt)
+        except IntegrityError:
+            return False
+        return True
+
     def delete(self, organization_id: uuid.UUID, id: uuid.UUID) -> None: #double safety with organization_id as a parameter.
         orm_obj = (
             self.db_session.query(DocumentORM)
@@ -147,7 +259,9 @@ class PostgreSQL_ChunkRepository(ChunkRepositoryInterface):
             token_count=orm_obj.token_count,
             id=orm_obj.id,
             created_at=orm_obj.created_at, 
-            embedding=[float(x) for x in orm_obj.embedding])
+            embedding=orm_obj.embedding.tolist() if hasattr(orm_obj.embedding, "tolist") else [float(x) for x in orm_obj.embedding], #pgvector returns numpy arrays, tolist() converts in C.
+            content_hash=orm_obj.content_hash,
+            embedding_model=orm_obj.embedding_model)
         
     @staticmethod
     def _to_orm(chunk: Chunk) -> ChunkORM:
@@ -159,14 +273,82 @@ class PostgreSQL_ChunkRepository(ChunkRepositoryInterface):
             token_count=chunk.token_count,
             id=chunk.id,
             created_at=chunk.created_at,
-            embedding=chunk.embedding
+            embedding=chunk.embedding,
+            content_hash=chunk.content_hash,
+            embedding_model=chunk.embedding_model
         )
         
+    RRF_K = 60 #reciprocal rank fusion constant (Cormack et al.): dampens the weight of the very first ranks.
+
+    # COPY column order and the matching PostgreSQL types (binary COPY needs them up front).
+    COPY_COLUMNS = ("id", "document_id", "organization_id", "chunk_index", "content", "embedding", "token_count", "created_at", "content_hash", "embedding_model")
+    COPY_TYPES = ("uuid", "uuid", "uuid", "int4", "text", "vector", "int4", "timestamptz", "varchar", "varchar")
+
+    @staticmethod
+    def _to_row(chunk: Chunk) -> tuple:
+        return (
+            chunk.id,
+            chunk.document_id,
+            chunk.organization_id,
+            chunk.chunk_index,
+            chunk.content,
+            np.asarray(chunk.embedding, dtype=np.float32), #pgvector's binary dumper is registered for ndarrays, not lists.
+            chunk.token_count,
+            chunk.created_at,
+            chunk.content_hash,
+            chunk.embedding_model,
+        )
+
     def add_many(self, chunks: List[Chunk]) -> None:
-        # create orm objects from entities, then bulk save.
-        orm_objs = [self._to_orm(c) for c in chunks]        
-        self.db_session.add_all(orm_objs)
-        self.db_session.flush()
+        # Bulk path: one binary COPY instead of one ORM object and one INSERT per chunk.
+        # It runs on the session's own connection, so it commits or rolls back with the document.
+        if not chunks:
+            return
+        self.db_session.flush() #the document row must be written before its chunks (FK).
+
+        dbapi_connection = self.db_session.connection().connection.driver_connection
+        if not isinstance(dbapi_connection, psycopg.Connection):
+            # other drivers: a single executemany, sent as multi-row INSERTs by SQLAlchemy.
+            self.db_session.execute(insert(ChunkORM), [dict(zip(self.COPY_COLUMNS, self._to_row(c))) for c in chunks])
+            return
+
+        columns = ", ".join(self.COPY_COLUMNS)
+        with dbapi_connection.cursor() as cursor:
+            with cursor.copy(f"COPY chunks ({columns}) FROM STDIN (FORMAT BINARY)") as copy:
+                copy.set_types(self.COPY_TYPES)
+                for chunk in chunks:
+                    copy.write_row(self._to_row(chunk))
+
+    def update_document_chunks(
+        self,
+        organization_id: uuid.UUID,
+        document_id: uuid.UUID,
+        added: List[Chunk],
+        deleted_ids: List[uuid.UUID],
+        moved: dict[uuid.UUID, int],
+    ) -> None:
+        # (document_id, chunk_index) is unique and checked row by row, so kept chunks are parked on negative
+        # indexes (-1 - new index) while the new ones are inserted, then flipped back in a single UPDATE.
+        # Unchanged chunks keep their id, embedding and query links; deleted ones take their links with them (FK cascade).
+        document_chunks = and_(ChunkORM.organization_id == organization_id, ChunkORM.document_id == document_id)
+        if deleted_ids:
+            self.db_session.execute(
+                delete(ChunkORM).where(document_chunks, ChunkORM.id.in_(deleted_ids)),
+                execution_options={"synchronize_session": False},
+            )
+        if moved:
+            # executemany with a WHERE clause goes through the Connection (the ORM only bulk-updates by primary key).
+            self.db_session.connection().execute(
+                update(ChunkORM.__table__).where(document_chunks, ChunkORM.id == bindparam("moved_id")).values(chunk_index=bindparam("parked_index")),
+                [{"moved_id": id, "parked_index": -1 - chunk_index} for id, chunk_index in moved.items()],
+            )
+        self.add_many(added)
+        if moved:
+            self.db_session.execute(
+                update(ChunkORM).where(document_chunks, ChunkORM.chunk_index < 0).values(chunk_index=-1 - ChunkORM.chunk_index),
+                execution_options={"synchronize_session": False},
+            )
+
     def get_by_document(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> List[Chunk]: #double safety with organization_id as a parameter.
         orm_objs = (
             self.db_session.query(ChunkORM)
@@ -175,38 +357,189 @@ class PostgreSQL_ChunkRepository(ChunkRepositoryInterface):
             .all()
         )
         return [self._to_entity(o) for o in orm_objs]
+
+    def get_by_organization(self, organization_id: uuid.UUID) -> List[Chunk]:
+        orm_objs = (
+            self.db_session.query(ChunkORM)
+            .filter_by(organization_id=organization_id)
+            .order_by(ChunkORM.document_id, ChunkORM.chunk_index)
+            .all()
+        )
+        return [self._to_entity(o) for o in orm_objs]
     
-    def vector_search(self, organization_id: uuid.UUID, embedded_question: list[float], top_k: int = 5) -> list[RetrievedChunk]:
-        distance_expression = ChunkORM.embedding.cosine_distance(embedded_question)
-        
-        rows = (
-        self.db_session.query(
-            ChunkORM, 
-            distance_expression.label("distance")
+    def get_embeddings_by_content_hash(self, organization_id: uuid.UUID, content_hashes: List[str], embedding_model: str) -> dict[str, List[float]]:
+        # One query for the whole document. DISTINCT ON: identical text may already be stored in several documents.
+        if not content_hashes:
+            return {}
+        rows = self.db_session.execute(
+            select(ChunkORM.content_hash, ChunkORM.embedding)
+            .where(
+                ChunkORM.organization_id == organization_id,
+                ChunkORM.embedding_model == embedding_model,
+                ChunkORM.content_hash.in_(set(content_hashes)),
             )
-        .filter(ChunkORM.organization_id == organization_id)
-        .order_by(distance_expression)
-        .limit(top_k)
-        .all()
+            .distinct(ChunkORM.content_hash)
+        ).all()
+        return {
+            content_hash: embedding.tolist() if hasattr(embedding, "tolist") else [float(x) for x in embedding]
+            for content_hash, embedding in rows
+        }
+
+    @staticmethod
+    def _token_count():
+        # Chunks ingested without a token count are estimated like approx_token_count (4 chars per token).
+        return func.coalesce(ChunkORM.token_count, (func.length(ChunkORM.content) + 3) // 4)
+
+    @staticmethod
+    def _within_budget(ranked, max_context_tokens: int | None):
+        # `ranked` has a unique `position` (1 = best) and a `token_count`. Rows are kept while the running token
+        # total fits max_context_tokens; the best row is always kept, so one long chunk can't leave the question without context.
+        if max_context_tokens is None:
+            return select(ranked).order_by(ranked.c.position)
+        running_tokens = func.sum(ranked.c.token_count).over(order_by=ranked.c.position)
+        budgeted = select(ranked, running_tokens.label("running_tokens")).subquery("budgeted")
+        return (
+            select(budgeted)
+            .where(or_(budgeted.c.running_tokens <= max_context_tokens, budgeted.c.position == 1))
+            .order_by(budgeted.c.position)
         )
-        
-        #build retrieved chunks with chunk id, content, chunk index and similarity score:
-        retrieved_chunks = []
-
-        for orm_obj, distance in rows:
-            raw_similarity = 1.0 - float(distance)
-            similarity_score = max(0.0, min(1.0, raw_similarity))
-
-            retrieved_chunks.append(
-                RetrievedChunk(
-                    chunk_id=orm_obj.id,
-                    content=orm_obj.content,
-                    chunk_index=orm_obj.chunk_index,
-                    similarity_score=similarity_score,
-                )
+
+    def vector_search(
+        self,
+        organization_id: uuid.UUID,
+        embedded_question: list[float],
+        top_k: int = 5,
+        min_similarity: float | None = None,
+        max_context_tokens: int | None = None,
+    ) -> list[RetrievedChunk]:
+        # The HNSW index returns the top_k closest chunks; the similarity cutoff and the token budget are applied
+        # to those rows by the same statement, so chunks that would be dropped never leave the database.
+        # Only the columns needed for the prompt are selected (no embeddings).
+        distance = ChunkORM.embedding.cosine_distance(embedded_question)
+        nearest = (
+            select(
+                ChunkORM.id,
+                ChunkORM.document_id,
+                ChunkORM.content,
+                ChunkORM.chunk_index,
+                self._token_count().label("token_count"),
+                distance.label("distance"),
             )
+            .where(ChunkORM.organization_id == organization_id)
+            .order_by(distance)
+            .limit(top_k)
+            .subquery("nearest")
+        )
+        ranked = select(nearest, func.row_number().over(order_by=(nearest.c.distance, nearest.c.id)).label("position"))
+        if min_similarity is not None:
+            ranked = ranked.where(nearest.c.distance <= 1.0 - min_similarity)
+
+        rows = self.db_session.execute(self._within_budget(ranked.subquery("ranked"), max_context_tokens)).all()
+        return [
+            RetrievedChunk(
+                chunk_id=row.id,
+                content=row.content,
+                chunk_index=row.chunk_index,
+                similarity_score=max(0.0, min(1.0, 1.0 - float(row.distance))),
+                token_count=row.token_count,
+                document_id=row.document_id,
+            )
+            for row in rows
+        ]
+
+    def lexical_search(self, organization_id: uuid.UUID, question: str, top_k: int = 5) -> list[RetrievedChunk]:
+        tsquery = lexical_tsquery(question)
+        rank = func.ts_rank_cd(ChunkORM.content_tsv, tsquery, 32) #normalization 32: rank / (rank + 1), in [0, 1).
+        rows = self.db_session.execute(
+            select(ChunkORM.id, ChunkORM.document_id, ChunkORM.content, ChunkORM.chunk_index, self._token_count().label("token_count"), rank.label("rank"))
+            .where(ChunkORM.organization_id == organization_id, ChunkORM.content_tsv.bool_op("@@")(tsquery))
+            .order_by(rank.desc(), ChunkORM.id)
+            .limit(top_k)
+        ).all()
+        return [
+            RetrievedChunk(chunk_id=id, content=content, chunk_index=chunk_index, similarity_score=float(rank), token_count=token_count, document_id=document_id)
+            for id, document_id, content, chunk_index, token_count, rank in rows
+        ]
+
+    def hybrid_search(
+        self,
+        organization_id: uuid.UUID,
+        question: str,
+        embedded_question: list[float],
+        top_k: int = 5,
+        candidates: int = 50,
+        min_similarity: float | None = None,
+        max_context_tokens: int | None = None,
+    ) -> list[RetrievedChunk]:
+        # One statement, one round trip: the HNSW and GIN searches are two CTEs of the same query, fused in SQL
+        # with reciprocal rank fusion, score = sum over both lists of 1 / (RRF_K + rank). Chunks found by only one side still count.
+        distance = ChunkORM.embedding.cosine_distance(embedded_question)
+        dense_candidates = (
+            select(ChunkORM.id.label("chunk_id"), distance.label("distance"))
+            .where(ChunkORM.organization_id == organization_id)
+            .order_by(distance)
+            .limit(candidates)
+            .subquery("dense_candidates")
+        )
+        dense = select(
+            dense_candidates.c.chunk_id,
+            func.row_number().over(order_by=dense_candidates.c.distance).label("rank"),
+        )
+        if min_similarity is not None:
+            dense = dense.where(dense_candidates.c.distance <= 1.0 - min_similarity)
+        dense = dense.cte("dense")
 
-        return retrieved_chunks
+        tsquery = lexical_tsquery(question)
+        text_rank = func.ts_rank_cd(ChunkORM.content_tsv, tsquery)
+        lexical_candidates = (
+            select(ChunkORM.id.label("chunk_id"), text_rank.label("text_rank"))
+            .where(ChunkORM.organization_id == organization_id, ChunkORM.content_tsv.bool_op("@@")(tsquery))
+            .order_by(text_rank.desc())
+            .limit(candidates)
+            .subquery("lexical_candidates")
+        )
+        lexical = select(
+            lexical_candidates.c.chunk_id,
+            func.row_number().over(order_by=lexical_candidates.c.text_rank.desc()).label("rank"),
+        ).cte("lexical")
+
+        rrf_score = (
+            func.coalesce(literal(1.0) / (self.RRF_K + dense.c.rank), 0.0)
+            + func.coalesce(literal(1.0) / (self.RRF_K + lexical.c.rank), 0.0)
+        )
+        fused = (
+            select(func.coalesce(dense.c.chunk_id, lexical.c.chunk_id).label("chunk_id"), rrf_score.label("rrf_score"))
+            .select_from(dense.join(lexical, dense.c.chunk_id == lexical.c.chunk_id, full=True))
+            .order_by(rrf_score.desc())
+            .limit(top_k)
+            .cte("fused")
+        )
+
+        ranked = (
+            select(
+                ChunkORM.id,
+                ChunkORM.document_id,
+                ChunkORM.content,
+                ChunkORM.chunk_index,
+                self._token_count().label("token_count"),
+                distance.label("distance"),
+                func.row_number().over(order_by=(fused.c.rrf_score.desc(), ChunkORM.id)).label("position"),
+            )
+            .join(fused, fused.c.chunk_id == ChunkORM.id)
+            .subquery("ranked")
+        )
+        rows = self.db_session.execute(self._within_budget(ranked, max_context_tokens)).all()
+        return [
+            RetrievedChunk(
+                chunk_id=row.id,
+                content=row.content,
+                chunk_index=row.chunk_index,
+                similarity_score=max(0.0, min(1.0, 1.0 - float(row.distance))),
+                token_count=row.token_count,
+                document_id=row.document_id,
+            )
+            for row in rows
+        ]
 
     def count_by_document_id(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> int:
         count = (
@@ -228,6 +561,7 @@ class PostgreSQL_QueryRepository(QueryRepositoryInterface):
             question=orm_obj.question,
             answer=orm_obj.answer,
             latency_ms=orm_obj.latency_ms,
+            cache_hit=orm_obj.cache_hit,
             created_at=orm_obj.created_at
         )
     
@@ -239,6 +573,7 @@ class PostgreSQL_QueryRepository(QueryRepositoryInterface):
             question=query.question,
             answer=query.answer,
             latency_ms=query.latency_ms,
+            cache_hit=query.cache_hit,
             created_at=query.created_at
         )
     
@@ -253,6 +588,7 @@ class PostgreSQL_QueryRepository(QueryRepositoryInterface):
             orm_obj.question = query.question
             orm_obj.answer = query.answer
             orm_obj.latency_ms = query.latency_ms
+            orm_obj.cache_hit = query.cache_hit
             self.db_session.flush()
     
     def get_by_id(self, organization_id: uuid.UUID, id: uuid.UUID) -> Query | None: #double safety with organization_id as a parameter.
@@ -264,6 +600,44 @@ class PostgreSQL_QueryRepository(QueryRepositoryInterface):
     def list_by_organization_id(self, organization_id: uuid.UUID) -> List[Query]:
         orm_objs = self.db_session.query(QueryORM).filter_by(organization_id=organization_id).all()
         return [self._to_entity(o) for o in orm_objs]
+
+    def list_with_usage_by_organization(
+        self,
+        organization_id: uuid.UUID,
+        limit: int | None = None,
+        after: PageCursor | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> List[QueryUsageSummary]:
+        # Queries joined with their usage in one statement. Grouped per query in case a query has several usage rows.
+        query = (
+            self.db_session.query(
+                QueryORM.id,
+                QueryORM.question,
+                QueryORM.created_at,
+                QueryORM.cache_hit,
+                func.max(LLMUsageORM.model_name),
+                func.coalesce(func.sum(LLMUsageORM.total_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.estimated_cost_usd), 0.0),
+            )
+            .outerjoin(LLMUsageORM, LLMUsageORM.query_id == QueryORM.id)
+            .filter(QueryORM.organization_id == organization_id)
+            .group_by(QueryORM.id)
+        )
+        query = apply_time_window(query, QueryORM.created_at, since, until)
+        rows = apply_keyset_page(query, QueryORM.created_at, QueryORM.id, after, limit).all()
+        return [
+            QueryUsageSummary(
+                query_id=id,
+                question=question,
+                created_at=created_at,
+                cache_hit=cache_hit,
+                model_name=model_name,
+                total_tokens=int(total_tokens),
+                estimated_cost_usd=float(cost),
+            )
+            for id, question, created_at, cache_hit, model_name, total_tokens, cost in rows
+        ]
     
 class PostgreSQL_LLMUsageRepository(LLMUsageRepositoryInterface):
     
@@ -310,6 +684,33 @@ class PostgreSQL_LLMUsageRepository(LLMUsageRepositoryInterface):
         )
         return None if orm_obj is None else self._to_entity(orm_obj)
 
+    def get_totals_by_organization(self, organization_id: uuid.UUID, since: datetime | None = None, until: datetime | None = None) -> UsageTotals:
+        # One aggregate statement; request_count counts queries, with or without a usage row.
+        query = (
+            self.db_session.query(
+                func.count(QueryORM.id.distinct()),
+                func.coalesce(func.sum(LLMUsageORM.prompt_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.completion_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.total_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.estimated_cost_usd), 0.0),
+                func.array_agg(LLMUsageORM.model_name.distinct()),
+            )
+            .select_from(QueryORM)
+            .outerjoin(LLMUsageORM, LLMUsageORM.query_id == QueryORM.id)
+            .filter(QueryORM.organization_id == organization_id)
+        )
+        request_count, prompt_tokens, completion_tokens, total_tokens, cost, models_used = (
+            apply_time_window(query, QueryORM.created_at, since, until).one()
+        )
+        return UsageTotals(
+            request_count=int(request_count),
+            prompt_tokens=int(prompt_tokens),
+            completion_tokens=int(completion_tokens),
+            total_tokens=int(total_tokens),
+            estimated_cost_usd=float(cost),
+            models_used=sorted(m for m in (models_used or []) if m is not None), #NULL comes from queries without usage.
+        )
+
 class PostgreSQL_QueryChunkRepository(QueryChunkRepositoryInterface):
     def __init__(self, db_session: Session):
         self.db_session = db_session
@@ -336,6 +737,16 @@ class PostgreSQL_QueryChunkRepository(QueryChunkRepositoryInterface):
         orm_objs = [self._to_orm(qc) for qc in query_chunks]
         self.db_session.add_all(orm_objs)
         self.db_session.flush()
+
+    def add_links_if_chunks_exist(self, query_chunks: List[QueryChunk]) -> bool:
+        # Savepoint: a chunk deleted by another process fails the FK check, only the savepoint is rolled back
+        # and the caller's transaction (the query row) stays usable.
+        try:
+            with self.db_session.begin_nested():
+                self.db_session.add_all([self._to_orm(qc) for qc in query_chunks])
+        except IntegrityError:
+            return False
+        return True
     
     def get_by_query_id(self, organization_id: uuid.UUID, query_id: uuid.UUID) -> List[QueryChunk]:
         orm_objs = (
@@ -345,4 +756,258 @@ class PostgreSQL_QueryChunkRepository(QueryChunkRepositoryInterface):
             .order_by(QueryChunkORM.rank.asc().nulls_last())
             .all()
         )
-        return [self._to_entity(o) for o in orm_objs]   
\ No newline at end of file
+        return [self._to_entity(o) for o in orm_objs]
+
+
+class PostgreSQL_IngestJobRepository(IngestJobRepositoryInterface):
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    @staticmethod
+    def _to_entity(orm_obj: IngestJobORM) -> IngestJob:
+        return IngestJob(
+            id=orm_obj.id,
+            organization_id=orm_obj.organization_id,
+            filename=orm_obj.filename,
+            status=orm_obj.status,
+            attempts=orm_obj.attempts,
+            error=orm_obj.error,
+            document_id=orm_obj.document_id,
+            document_hash=orm_obj.document_hash,
+            chunks_created=orm_obj.chunks_created,
+            created_at=orm_obj.created_at,
+            updated_at=orm_obj.updated_at,
+        )
+
+    @staticmethod
+    def _to_orm(job: IngestJob) -> IngestJobORM:
+        return IngestJobORM(
+            id=job.id,
+            organization_id=job.organization_id,
+            filename=job.filename,
+            status=job.status,
+            attempts=job.attempts,
+            error=job.error,
+            document_id=job.document_id,
+            document_hash=job.document_hash,
+            chunks_created=job.chunks_created,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
+
+    def add(self, job: IngestJob) -> None:
+        orm_obj = self._to_orm(job)
+        self.db_session.add(orm_obj)
+        self.db_session.flush()
+
+    def get_by_id(self, organization_id: uuid.UUID, id: uuid.UUID) -> IngestJob | None: #double safety with organization_id as a parameter.
+        orm_obj = (
+            self.db_session.query(IngestJobORM)
+            .filter_by(id=id, organization_id=organization_id)
+            .first()
+        )
+        return None if orm_obj is None else self._to_entity(orm_obj)
+
+    def update(self, job: IngestJob) -> None:
+        orm_obj = self.db_session.get(IngestJobORM, job.id)
+        if orm_obj is not None:
+            orm_obj.status = job.status
+            orm_obj.attempts = job.attempts
+            orm_obj.error = job.error
+            orm_obj.document_id = job.document_id
+            orm_obj.document_hash = job.document_hash
+            orm_obj.chunks_created = job.chunks_created
+            orm_obj.updated_at = job.updated_at
+            self.db_session.flush()
+
+    def claim_next(self, stale_after_seconds: int, max_attempts: int) -> IngestJob | None:
+        # SELECT ... FOR UPDATE SKIP LOCKED: concurrent workers each get a different row, none of them blocks.
+        stale_before = func.now() - timedelta(seconds=stale_after_seconds)
+        stale = and_(IngestJobORM.status == "running", IngestJobORM.updated_at < stale_before)
+
+        # A stale job out of attempts killed its worker every time (OOM, crashed parser): fail it instead of reclaiming it.
+        exhausted = (
+            select(IngestJobORM.id)
+            .where(stale, IngestJobORM.attempts >= max_attempts)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        self.db_session.execute(
+            update(IngestJobORM)
+            .where(IngestJobORM.id.in_(exhausted))
+            .values(status="failed", error="The worker stopped while processing this job too many times.", updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+        orm_obj = (
+            self.db_session.query(IngestJobORM)
+            .filter(
+                or_(
+                    IngestJobORM.status == "queued",
+                    and_(stale, IngestJobORM.attempts < max_attempts),
+                )
+            )
+            .order_by(IngestJobORM.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        return None if orm_obj is None else self._to_entity(orm_obj)
+
+    def heartbeat(self, job: IngestJob) -> bool:
+        # Single UPDATE, no row lock kept: the caller commits right away.
+        result = self.db_session.execute(
+            update(IngestJobORM)
+            .where(IngestJobORM.id == job.id, IngestJobORM.status == "running", IngestJobORM.attempts == job.attempts)
+            .values(updated_at=func.now())
+        )
+        return result.rowcount > 0
+
+    def list_succeeded_since(self, since: datetime) -> List[IngestJob]:
+        orm_objs = (
+            self.db_session.query(IngestJobORM)
+            .filter(IngestJobORM.status == "succeeded", IngestJobORM.updated_at >= since)
+            .order_by(IngestJobORM.updated_at)
+            .all()
+        )
+        return [self._to_entity(o) for o in orm_objs]
+
+
+class PostgreSQL_UsageRollupRepository(UsageRollupRepositoryInterface):
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    def increment(
+        self,
+        organization_id: uuid.UUID,
+        day: date,
+        model_name: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        total_tokens: int = 0,
+        estimated_cost_usd: float = 0.0,
+        cache_hit: bool = False,
+    ) -> None:
+        # Single upsert: INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x, safe with concurrent requests.
+        table = UsageDailyRollupORM.__table__
+        stmt = pg_insert(table).values(
+            organization_id=organization_id,
+            day=day,
+            model_name=model_name,
+            request_count=1,
+            cache_hit_count=1 if cache_hit else 0,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            estimated_cost_usd=estimated_cost_usd,
+        )
+        counters = ("request_count", "cache_hit_count", "prompt_tokens", "completion_tokens", "total_tokens", "estimated_cost_usd")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.organization_id, table.c.day, table.c.model_name],
+            set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+        )
+        self.db_session.execute(stmt)
+
+    @staticmethod
+    def _apply_day_window(query, since: date | None, until: date | None):
+        if since is not None:
+            query = query.filter(UsageDailyRollupORM.day >= since)
+        if until is not None:
+            query = query.filter(UsageDailyRollupORM.day < until)
+        return query
+
+    def get_totals_by_organization(self, organization_id: uuid.UUID, since: date | None = None, until: date | None = None) -> UsageTotals:
+        query = self.db_session.query(
+            func.coalesce(func.sum(UsageDailyRollupORM.request_count), 0),
+            func.coalesce(func.sum(UsageDailyRollupORM.prompt_tokens), 0),
+            func.coalesce(func.sum(UsageDailyRollupORM.completion_tokens), 0),
+            func.coalesce(func.sum(UsageDailyRollupORM.total_tokens), 0),
+            func.coalesce(func.sum(UsageDailyRollupORM.estimated_cost_usd), 0.0),
+            func.array_agg(UsageDailyRollupORM.model_name.distinct()),
+        ).filter(UsageDailyRollupORM.organization_id == organization_id)
+        request_count, prompt_tokens, completion_tokens, total_tokens, cost, models_used = (
+            self._apply_day_window(query, since, until).one()
+        )
+        return UsageTotals(
+            request_count=int(request_count),
+            prompt_tokens=int(prompt_tokens),
+            completion_tokens=int(completion_tokens),
+            total_tokens=int(total_tokens),
+            estimated_cost_usd=float(cost),
+            models_used=sorted(m for m in (models_used or []) if m), #"" = cache hits, not a model.
+        )
+
+    def list_daily_by_organization(self, organization_id: uuid.UUID, since: date | None = None, until: date | None = None) -> List[DailyUsage]:
+        query = (
+            self.db_session.query(
+                UsageDailyRollupORM.day,
+                func.sum(UsageDailyRollupORM.request_count),
+                func.sum(UsageDailyRollupORM.cache_hit_count),
+                func.sum(UsageDailyRollupORM.prompt_tokens),
+                func.sum(UsageDailyRollupORM.completion_tokens),
+                func.sum(UsageDailyRollupORM.total_tokens),
+                func.sum(UsageDailyRollupORM.estimated_cost_usd),
+            )
+            .filter(UsageDailyRollupORM.organization_id == organization_id)
+            .group_by(UsageDailyRollupORM.day)
+            .order_by(UsageDailyRollupORM.day)
+        )
+        return [
+            DailyUsage(
+                day=day,
+                request_count=int(request_count),
+                cache_hit_count=int(cache_hit_count),
+                prompt_tokens=int(prompt_tokens),
+                completion_tokens=int(completion_tokens),
+                total_tokens=int(total_tokens),
+                estimated_cost_usd=float(cost),
+            )
+            for day, request_count, cache_hit_count, prompt_tokens, completion_tokens, total_tokens, cost
+            in self._apply_day_window(query, since, until).all()
+        ]
+
+    def rebuild(self, organization_id: uuid.UUID | None = None) -> int:
+        # EXCLUSIVE blocks concurrent increments (not reads) until commit. Requests that already incremented are waited for,
+        # so their queries are visible to the INSERT ... SELECT below and nothing is counted twice or lost.
+        self.db_session.execute(text("LOCK TABLE usage_daily_rollups IN EXCLUSIVE MODE"))
+
+        clear = delete(UsageDailyRollupORM)
+        if organization_id is not None:
+            clear = clear.where(UsageDailyRollupORM.organization_id == organization_id)
+        self.db_session.execute(clear)
+
+        # literal_column: inlined, so the SELECT and GROUP BY expressions are identical for PostgreSQL (no bind params).
+        day = func.date(func.timezone(literal_column("'UTC'"), QueryORM.created_at))
+        model_name = func.coalesce(LLMUsageORM.model_name, literal_column("''"))
+        source = (
+            select(
+                QueryORM.organization_id,
+                day,
+                model_name,
+                func.count(QueryORM.id.distinct()),
+                func.count(QueryORM.id.distinct()).filter(QueryORM.cache_hit),
+                func.coalesce(func.sum(LLMUsageORM.prompt_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.completion_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.total_tokens), 0),
+                func.coalesce(func.sum(LLMUsageORM.estimated_cost_usd), 0.0),
+            )
+            .select_from(QueryORM)
+            .outerjoin(LLMUsageORM, LLMUsageORM.query_id == QueryORM.id)
+            .group_by(QueryORM.organization_id, day, model_name)
+        )
+        if organization_id is not None:
+            source = source.where(QueryORM.organization_id == organization_id)
+
+        # The rows are counted by the statement itself: SQLAlchemy reports rowcount -1 for an INSERT ... SELECT.
+        inserted = (
+            insert(UsageDailyRollupORM).from_select(
+                ["organization_id", "day", "model_name", "request_count", "cache_hit_count",
+                 "prompt_tokens", "completion_tokens", "total_tokens", "estimated_cost_usd"],
+                source,
+            )
+            .returning(UsageDailyRollupORM.day)
+            .cte("inserted")
+        )
+        rows = self.db_session.execute(select(func.count()).select_from(inserted)).scalar_one()
+        self.db_session.flush()
+        return rows
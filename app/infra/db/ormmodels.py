@@ -4,16 +4,23 @@ import uuid
 from typing import List, Optional
 
 from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Computed,
+    Date,
     String,
     Text,
     Integer,
     Float,
     DateTime,
     ForeignKey,
+    Index,
     UniqueConstraint,
+    false,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.infra.db.base import MyBase
@@ -21,6 +28,10 @@ from app.infra.db.base import MyBase
 from pgvector.sqlalchemy import Vector
 
 
+# Text search configuration of chunks.content_tsv. Lexical queries must be parsed with the same one.
+TEXT_SEARCH_CONFIG = "english"
+
+
 # =========================================================
 # Organization
 # =========================================================
@@ -64,6 +75,13 @@ class Document(MyBase):
     organization: Mapped["Organization"] = relationship(back_populates="documents")
     chunks: Mapped[List["Chunk"]] = relationship(back_populates="document", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Dashboard keyset pagination and time windows: WHERE organization_id = ? AND (created_at, id) > ? ORDER BY created_at, id
+        Index("ix_documents_organization_id_created_at", "organization_id", "created_at", "id"),
+        # Dedup lookup is an index probe, and concurrent uploads of the same file can't both be inserted.
+        Index("uq_documents_organization_id_document_hash", "organization_id", "document_hash", unique=True),
+    )
+
     def __repr__(self) -> str:
         return f"<Document(id={self.id}, title={self.title})>"
 
@@ -86,12 +104,18 @@ class Query(MyBase):
     question: Mapped[str] = mapped_column(Text, nullable=False)
     answer: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     latency_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    cache_hit: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     organization: Mapped["Organization"] = relationship(back_populates="queries")
     chunk_links: Mapped[List["QueryChunk"]] = relationship(back_populates="query", cascade="all, delete-orphan")
     llm_usages: Mapped[List["LLMUsage"]] = relationship(back_populates="query", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Same access pattern as documents (dashboard pagination and since/until windows).
+        Index("ix_queries_organization_id_created_at", "organization_id", "created_at", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<Query(id={self.id})>"
 
@@ -125,11 +149,34 @@ class Chunk(MyBase):
     token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # Embeddings are reused for identical chunk text embedded with the same model ("name:dimensions").
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    embedding_model: Mapped[Optional[str]] = mapped_column(String(160), nullable=True)
+
+    # Full-text search (hybrid retrieval). Generated by PostgreSQL, never written by the app, and deferred so loading chunks skips it.
+    content_tsv: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
+
     document: Mapped["Document"] = relationship(back_populates="chunks")
     query_links: Mapped[List["QueryChunk"]] = relationship(back_populates="chunk", cascade="all, delete-orphan")
 
     __table_args__ = (
         UniqueConstraint("document_id", "chunk_index", name="uq_chunks_document_chunk_index"),
+        # ANN index for cosine distance searches (pgvector HNSW).
+        Index(
+            "ix_chunks_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        # Embedding reuse lookup: WHERE organization_id = ? AND content_hash = ANY(?)
+        Index("ix_chunks_organization_id_content_hash", "organization_id", "content_hash"),
+        # Lexical search: content_tsv @@ tsquery
+        Index("ix_chunks_content_tsv_gin", "content_tsv", postgresql_using="gin"),
     )
 
     def __repr__(self) -> str:
@@ -191,4 +238,76 @@ class LLMUsage(MyBase):
     query: Mapped["Query"] = relationship(back_populates="llm_usages")
 
     def __repr__(self) -> str:
-        return f"<LLMUsage(id={self.id}, model={self.model_name})>"
\ No newline at end of file
+        return f"<LLMUsage(id={self.id}, model={self.model_name})>"
+
+# =========================================================
+# IngestJob (background ingestion queue)
+# =========================================================
+
+class IngestJob(MyBase):
+    __tablename__ = "ingest_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default="queued")  # queued | running | succeeded | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # No FK: the job outlives the document if it is deleted later.
+    document_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    document_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    chunks_created: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Workers poll for the oldest claimable job; partial index keeps it small once jobs are finished.
+        Index(
+            "ix_ingest_jobs_claimable",
+            "created_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        # API processes poll for jobs finished since their last check (cache invalidation, in-memory index refresh).
+        Index(
+            "ix_ingest_jobs_succeeded_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'succeeded'"),
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<IngestJob(id={self.id}, status={self.status})>"
+
+
+# =========================================================
+# UsageDailyRollup (per organization / model / UTC day)
+# =========================================================
+
+class UsageDailyRollup(MyBase):
+    __tablename__ = "usage_daily_rollups"
+
+    organization_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(128), primary_key=True)  # "" = answered from the answer cache, no LLM call.
+
+    request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    cache_hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    total_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    estimated_cost_usd: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<UsageDailyRollup(organization_id={self.organization_id}, day={self.day}, model={self.model_name})>"
@@ -1,13 +1,33 @@
-from app.domain.interfaces import EmbedderInterface
-from openai import OpenAI
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import random
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from cachetools import TTLCache
+
+from app.domain.interfaces import EmbedderInterface, TokenCounterInterface
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
 #from sentence_transformers import SentenceTransformer
 
+logger = logging.getLogger(__name__)
+
+
 class OpenAIEmbedder(EmbedderInterface):
     def __init__(
         self,
         api_key: str,
         model_name: str = "text-embedding-3-small",
         dimensions: int = 384,
+        max_batch_size: int = 2048,
+        max_batch_tokens: int = 250_000,
+        max_retries: int = 2,
     ):
         if not api_key or not api_key.strip():
             raise ValueError("OpenAI API key is required.")
@@ -15,9 +35,17 @@ class OpenAIEmbedder(EmbedderInterface):
         if dimensions <= 0:
             raise ValueError("Dimensions must be greater than 0.")
 
-        self.client = OpenAI(api_key=api_key) 
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be greater than 0.")
+
+        if max_batch_tokens <= 0:
+            raise ValueError("max_batch_tokens must be greater than 0.")
+
+        self.client = OpenAI(api_key=api_key, max_retries=max_retries) #0 when ScheduledEmbedder does the retrying.
         self.model_name = model_name
         self.dimensions = dimensions
+        self.max_batch_size = max_batch_size #OpenAI accepts up to 2048 inputs per request.
+        self.max_batch_tokens = max_batch_tokens #OpenAI caps a request at 300k tokens, we keep a safety margin.
 
     def embed_text(self, text: str) -> list[float]:
         cleaned_text = (text or "").strip()
@@ -32,6 +60,463 @@ class OpenAIEmbedder(EmbedderInterface):
         #print(f"Embedding response: {response}")
         return response.data[0].embedding
 
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        cleaned_texts = [(text or "").strip() for text in texts]
+        if any(not t for t in cleaned_texts):
+            raise ValueError("Texts cannot contain empty values.")
+
+        embeddings: list[list[float]] = []
+        for batch in self._batches(cleaned_texts):
+            response = self.client.embeddings.create(
+                model=self.model_name,
+                input=batch,
+                dimensions=self.dimensions,
+            )
+            #the API returns one item per input with its position, sort to be safe.
+            ordered = sorted(response.data, key=lambda item: item.index)
+            if len(ordered) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(ordered)}.")
+            embeddings.extend(item.embedding for item in ordered)
+
+        return embeddings
+
+    def _batches(self, texts: list[str]):
+        # Yields consecutive slices bounded by max_batch_size inputs and max_batch_tokens (approx. 4 chars per token).
+        batch: list[str] = []
+        batch_tokens = 0
+        for text in texts:
+            tokens = max(1, (len(text) + 3) // 4)
+            if batch and (len(batch) >= self.max_batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                yield batch
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+
+class EmbeddingCacheStore(ABC):
+    """Second-tier (persistent) storage for CachedEmbedder."""
+    @abstractmethod
+    def get(self, key: str) -> list[float] | None:
+        ...
+    @abstractmethod
+    def set(self, key: str, embedding: list[float]) -> None:
+        ...
+
+
+class SQLite_EmbeddingCacheStore(EmbeddingCacheStore):
+    """
+    File-backed store, shared by every worker process on the host.
+    Embeddings are stored as packed float64 so they round-trip exactly.
+    Expired rows are deleted at startup and on every write, so the file stays bounded by what was written within the TTL.
+    """
+    def __init__(self, path: str, ttl_seconds: int = 24 * 3600):
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0.")
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local() #sqlite connections can't be shared between threads.
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embedding_cache_created_at ON embedding_cache (created_at)")
+            self._prune(conn, time.time())
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> list[float] | None:
+        row = self._connection().execute(
+            "SELECT embedding FROM embedding_cache WHERE key = ? AND created_at >= ?",
+            (key, time.time() - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        values = array("d")
+        values.frombytes(row[0])
+        return values.tolist()
+
+    def set(self, key: str, embedding: list[float]) -> None:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO embedding_cache (key, embedding, created_at) VALUES (?, ?, ?)",
+                (key, array("d", embedding).tobytes(), now),
+            )
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        # Range delete on the created_at index: only touches the rows that just expired.
+        conn.execute("DELETE FROM embedding_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+
+
+class CachedEmbedder(EmbedderInterface):
+    """
+    Wraps another embedder and caches embed_text results (question embeddings).
+
+    - Key: model name + dimensions + normalized text (unicode NFKC, casefolded, whitespace collapsed).
+    - Tier 1: in-process LRU with TTL. Tier 2 (optional): persistent EmbeddingCacheStore.
+    - embed_many (ingestion) goes straight to the wrapped embedder so document chunks don't evict questions.
+    """
+    def __init__(
+        self,
+        embedder: EmbedderInterface,
+        model_name: str | None = None,
+        dimensions: int | None = None,
+        max_size: int = 10_000,
+        ttl_seconds: int = 24 * 3600,
+        store: EmbeddingCacheStore | None = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0.")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0.")
+
+        self.embedder = embedder
+        self.model_name = model_name or getattr(embedder, "model_name", type(embedder).__name__)
+        self.dimensions = dimensions if dimensions is not None else getattr(embedder, "dimensions", None)
+        self.store = store
+
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+    def cache_key(self, text: str) -> str:
+        normalized = self.normalize_text(text)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{self.dimensions}:{digest}"
+
+    def embed_text(self, text: str) -> list[float]:
+        key = self.cache_key(text)
+
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self.hits += 1
+                return list(embedding)
+
+        if self.store is not None:
+            try:
+                embedding = self.store.get(key)
+            except Exception:
+                embedding = None #the persistent tier is an optimization, never a failure point.
+            if embedding is not None:
+                with self._lock:
+                    self.store_hits += 1
+                    self._cache[key] = tuple(embedding)
+                return embedding
+
+        embedding = self.embedder.embed_text(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tuple(embedding) #tuples so callers can't mutate cached values.
+        if self.store is not None:
+            try:
+                self.store.set(key, embedding)
+            except Exception:
+                pass
+        return embedding
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return self.embedder.embed_many(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "hit_rate": (self.hits + self.store_hits) / lookups if lookups else 0.0,
+            }
+
+
+class TokenBucket:
+    """
+    Refills `rate_per_minute` units per minute, up to `capacity` (one minute's worth by default). Thread safe.
+
+    The last `reserved` units are kept for priority requests (questions):
+    - acquire(amount) waits until the bucket holds amount + reserved, so it never borrows into a deficit.
+    - acquire(amount, priority=True) takes the units right away, reserve included, and sleeps off any deficit.
+    A drained bucket then delays the next batch, never a question that arrives behind it.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float | None = None, reserved: float = 0.0, clock=time.monotonic, sleep=time.sleep):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be greater than 0.")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(rate_per_minute)
+        if self.capacity <= 0:
+            raise ValueError("capacity must be greater than 0.")
+        if reserved < 0 or reserved >= self.capacity:
+            raise ValueError("reserved must be between 0 and the capacity.")
+        self.reserved = reserved
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0, priority: bool = False) -> float:
+        # Returns the seconds waited. A request larger than the capacity waits for a full bucket instead of forever.
+        if priority:
+            amount = min(amount, self.capacity)
+            with self._lock:
+                self._refill()
+                self._tokens -= amount
+                wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+            if wait > 0:
+                self._sleep(wait)
+            return wait
+
+        amount = min(amount, self.capacity - self.reserved)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                missing = amount + self.reserved - self._tokens
+                if missing <= 1e-9:
+                    self._tokens -= amount
+                    return waited
+            wait = missing / self.rate_per_second
+            self._sleep(wait)
+            waited += wait
+
+    def _refill(self) -> None:
+        # Called with the lock held.
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+
+def is_retryable(error: Exception) -> bool:
+    # 429 (rate limit), 5xx, timeouts and connection errors are worth retrying; other 4xx are not.
+    if isinstance(error, (APIConnectionError, RateLimitError, InternalServerError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (isinstance(status_code, int) and status_code >= 500)
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None #HTTP-date form, rare for this API: fall back to our own backoff.
+
+
+class ScheduledEmbedder(EmbedderInterface):
+    """
+    Process-wide scheduler in front of an embedder (see get_embedder), shared by every request and ingest job.
+
+    - embed_many is split into requests of at most max_batch_size texts / max_batch_tokens tokens,
+      run on a pool of `max_in_flight` threads: that many batches are in flight at most, whatever the number of callers.
+    - embed_text (questions) bypasses the pool, so a large upload never delays a question. It shares the rate buckets,
+      but batches leave `question_reserve` of each bucket untouched, which questions may use (see TokenBucket).
+    - Each request first takes 1 unit from the requests-per-minute bucket and its token count from the
+      tokens-per-minute bucket, so concurrent uploads stay under the quota instead of hitting 429s.
+    - 429/5xx/connection errors are retried up to max_retries times with full-jitter exponential backoff
+      (or the server's Retry-After, when longer).
+    - stats() reports queue depth, in-flight requests, retries, throttling and throughput.
+    Token counts come from token_counter when given (the embedding model's encoding), else 4 chars per token.
+    """
+    def __init__(
+        self,
+        embedder: EmbedderInterface,
+        max_in_flight: int = 4,
+        requests_per_minute: int = 3_000,
+        tokens_per_minute: int = 1_000_000,
+        max_batch_size: int = 2048,
+        max_batch_tokens: int = 250_000,
+        max_retries: int = 5,
+        base_delay_seconds: float = 0.5,
+        max_delay_seconds: float = 30.0,
+        token_counter: TokenCounterInterface | None = None,
+        throughput_window_seconds: float = 60.0,
+        question_reserve: float = 0.05, #share of each rate bucket that only questions can use.
+        sleep=time.sleep,
+    ):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be greater than 0.")
+        if max_batch_size <= 0 or max_batch_tokens <= 0:
+            raise ValueError("max_batch_size and max_batch_tokens must be greater than 0.")
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative.")
+        if base_delay_seconds <= 0 or max_delay_seconds < base_delay_seconds:
+            raise ValueError("Delays must be positive and max_delay_seconds >= base_delay_seconds.")
+        if not 0 <= question_reserve < 1:
+            raise ValueError("question_reserve must be between 0 and 1.")
+
+        self.embedder = embedder
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
+        self.dimensions = getattr(embedder, "dimensions", None)
+        self.max_in_flight = max_in_flight
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.token_counter = token_counter
+        self.throughput_window_seconds = throughput_window_seconds
+
+        self.request_bucket = TokenBucket(requests_per_minute, reserved=requests_per_minute * question_reserve)
+        self.token_bucket = TokenBucket(tokens_per_minute, reserved=tokens_per_minute * question_reserve)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedding-scheduler")
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._completed: deque[tuple[float, int, int]] = deque() #(finished at, texts, tokens) inside the throughput window.
+
+        self.queued = 0
+        self.in_flight = 0
+        self.requests_completed = 0
+        self.requests_failed = 0
+        self.direct_requests = 0
+        self.retries = 0
+        self.texts_embedded = 0
+        self.tokens_embedded = 0
+        self.throttled_seconds = 0.0
+
+    def embed_text(self, text: str) -> list[float]:
+        # Questions don't queue behind ingestion batches: one request on the caller's thread, under the same
+        # rate buckets (with priority: batches never borrow the reserve) and retries (the pool only bounds embed_many).
+        tokens = self._count_tokens([text])[0]
+        with self._lock:
+            self.direct_requests += 1
+        return self._request([text], tokens, lambda texts: [self.embedder.embed_text(texts[0])], priority=True)[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        futures = []
+        for batch, tokens in self._batches(texts):
+            with self._lock:
+                self.queued += 1
+            futures.append(self._pool.submit(self._run, batch, tokens))
+
+        embeddings: list[list[float]] = []
+        try:
+            for future in futures: #submission order = input order.
+                embeddings.extend(future.result())
+        except BaseException:
+            for future in futures:
+                if future.cancel():
+                    with self._lock:
+                        self.queued -= 1
+            raise
+        return embeddings
+
+    def _batches(self, texts: list[str]):
+        # Consecutive slices bounded by max_batch_size texts and max_batch_tokens tokens, with their token count.
+        counts = self._count_tokens(texts)
+        batch: list[str] = []
+        batch_tokens = 0
+        for text, tokens in zip(texts, counts):
+            if batch and (len(batch) >= self.max_batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                yield batch, batch_tokens
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch, batch_tokens
+
+    def _count_tokens(self, texts: list[str]) -> list[int]:
+        token_counter = self.token_counter
+        if token_counter is not None:
+            try:
+                return token_counter.count_many(texts)
+            except Exception:
+                # Rate limiting on an estimate is better than failing the request. The counter is dropped for good:
+                # a missing encoding would otherwise be downloaded again on every call.
+                logger.warning("Embedding token counter failed, estimating 4 chars per token from now on", exc_info=True)
+                self.token_counter = None
+        return [max(1, (len(t or "") + 3) // 4) for t in texts]
+
+    def _run(self, batch: list[str], tokens: int) -> list[list[float]]:
+        # Runs in a pool thread.
+        with self._lock:
+            self.queued -= 1
+        return self._request(batch, tokens, self.embedder.embed_many)
+
+    def _request(self, batch: list[str], tokens: int, call, priority: bool = False) -> list[list[float]]:
+        # One API request, throttled and retried. priority: may use the buckets' question reserve.
+        with self._lock:
+            self.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                waited = self.request_bucket.acquire(1, priority) + self.token_bucket.acquire(tokens, priority)
+                if waited:
+                    with self._lock:
+                        self.throttled_seconds += waited
+                try:
+                    embeddings = call(batch)
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        with self._lock:
+                            self.requests_failed += 1
+                        raise
+                    self._sleep(self._backoff(attempt, e))
+                    attempt += 1
+                    with self._lock:
+                        self.retries += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        finished = time.monotonic()
+        with self._lock:
+            self.requests_completed += 1
+            self.texts_embedded += len(batch)
+            self.tokens_embedded += tokens
+            self._completed.append((finished, len(batch), tokens))
+        return embeddings
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)], so retrying callers don't hit the API in lockstep.
+        delay = random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * (2 ** attempt)))
+        retry_after = retry_after_seconds(error)
+        return min(self.max_delay_seconds, max(delay, retry_after)) if retry_after is not None else delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            horizon = time.monotonic() - self.throughput_window_seconds
+            while self._completed and self._completed[0][0] < horizon:
+                self._completed.popleft()
+            window_texts = sum(texts for _, texts, _ in self._completed)
+            window_tokens = sum(tokens for _, _, tokens in self._completed)
+            return {
+                "queue_depth": self.queued,
+                "in_flight": self.in_flight,
+                "requests_completed": self.requests_completed,
+                "requests_failed": self.requests_failed,
+                "direct_requests": self.direct_requests,
+                "retries": self.retries,
+                "texts_embedded": self.texts_embedded,
+                "tokens_embedded": self.tokens_embedded,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "texts_per_second": window_texts / self.throughput_window_seconds,
+                "tokens_per_second": window_tokens / self.throughput_window_seconds,
+            }
+
 
 '''
 class SentenceTransformerEmbedder(EmbedderInterface):
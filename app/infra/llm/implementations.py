@@ -1,8 +1,9 @@
 from decimal import ROUND_HALF_UP, Decimal
 import time
+from typing import Iterator
 
 from app.domain.interfaces import LLMInterface
-from app.domain.types import LLMResponse
+from app.domain.types import LLMResponse, LLMStreamEvent
 
 from openai import OpenAI
 import os
@@ -24,6 +25,13 @@ class FakeLLMClient(LLMInterface):
             latency_ms=25,
             estimated_cost_usd=0.0,
         )
+
+    def stream(self, prompt: str) -> Iterator[LLMStreamEvent]:
+        response = self.call(prompt)
+        words = response.generated_answer.split(" ")
+        for i, word in enumerate(words):
+            yield LLMStreamEvent(delta=word if i == 0 else " " + word)
+        yield LLMStreamEvent(response=response)
         
 
 class OpenAILLMClient(LLMInterface):
@@ -89,6 +97,38 @@ class OpenAILLMClient(LLMInterface):
 
         latency_ms = int((time.perf_counter() - started_at) * 1000)
 
+        return self._to_llm_response(response, latency_ms)
+
+    def stream(self, prompt: str) -> Iterator[LLMStreamEvent]:
+        clean_prompt = (prompt or "").strip()
+        if not clean_prompt:
+            raise ValueError("Prompt cannot be empty.")
+
+        started_at = time.perf_counter()
+
+        events = self.client.responses.create(
+            model=self.model,
+            input=clean_prompt,
+            stream=True,
+        )
+
+        completed = None
+        for event in events:
+            event_type = getattr(event, "type", "")
+            if event_type == "response.output_text.delta":
+                yield LLMStreamEvent(delta=event.delta)
+            elif event_type == "response.completed":
+                completed = event.response
+            elif event_type in ("response.failed", "error"):
+                raise ValueError(f"OpenAI stream failed: {getattr(event, 'message', None) or event_type}")
+
+        if completed is None:
+            raise ValueError("OpenAI stream ended without a completed response.")
+
+        latency_ms = int((time.perf_counter() - started_at) * 1000)
+        yield LLMStreamEvent(response=self._to_llm_response(completed, latency_ms))
+
+    def _to_llm_response(self, response, latency_ms: int) -> LLMResponse:
         generated_answer = self._extract_text(response)
         prompt_tokens = self._safe_int(getattr(response.usage, "input_tokens", 0))
         completion_tokens = self._safe_int(getattr(response.usage, "output_tokens", 0))
@@ -1,4 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+import multiprocessing
+import os
+import tempfile
+import threading
+from typing import Iterator
+
 from pypdf import PdfReader
 
 from app.domain.interfaces import PDFParserInterface
@@ -20,17 +27,165 @@ class V1_PDFParser(PDFParserInterface):
             return ""
         
         #check if file is a PDF by looking at the first few bytes (PDF files start with %PDF-)
-        if not file_content.startswith(b'%PDF-'):
-            raise ValueError("Invalid file type. Only PDFs are allowed.")
+        check_pdf_header(file_content)
 
         pdf_stream = BytesIO(file_content)
         reader = PdfReader(pdf_stream)
 
-        text_chunks: list[str] = []
+        text_chunks: list[str] = extract_page_texts(reader, 0, len(reader.pages))
+
+        return "\n".join(text_chunks)
+
+    def parse_pdf_file(self, path: str) -> str:
+        # Same as parse_pdf, but pypdf reads the pages from the open file instead of a bytes copy.
+        with open(path, "rb") as f:
+            header = f.read(5)
+            if not header:
+                return ""
+            check_pdf_header(header)
+            f.seek(0)
+            reader = PdfReader(f)
+            return "\n".join(extract_page_texts(reader, 0, len(reader.pages)))
+
+    def iter_pdf_file_pages(self, path: str) -> Iterator[str]:
+        # Pages are extracted one at a time, while the caller is still processing the previous ones.
+        with open(path, "rb") as f:
+            header = f.read(5)
+            if not header:
+                return
+            check_pdf_header(header)
+            f.seek(0)
+            reader = PdfReader(f)
+            yield from iter_page_texts(reader, 0, len(reader.pages))
+
+
+def check_pdf_header(header: bytes) -> None:
+    if not header.startswith(b'%PDF-'):
+        raise ValueError("Invalid file type. Only PDFs are allowed.")
+
+
+def iter_page_texts(reader: PdfReader, start: int, stop: int) -> Iterator[str]:
+    # Non-empty page texts for pages [start, stop), in page order.
+    for i in range(start, stop):
+        page_text = reader.pages[i].extract_text()
+        if page_text:
+            yield page_text
+
+
+def extract_page_texts(reader: PdfReader, start: int, stop: int) -> list[str]:
+    return list(iter_page_texts(reader, start, stop))
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    # Runs in a pool process. Each task opens the shared temp file itself, so only the path is pickled, not the PDF bytes.
+    with open(path, "rb") as f:
+        return extract_page_texts(PdfReader(f), start, stop)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    # One pool per process, shared by every parser instance (routers build a new parser per request).
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a process that runs threads (uvicorn threadpool, DB pool) is unsafe.
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = max_workers
+        return _pool
+
+
+class Parallel_PDFParser(PDFParserInterface):
+    """
+    Same output as V1_PDFParser, but page ranges are extracted in parallel in a process pool.
+
+    Every task reads the same file (parse_pdf writes the bytes to a temp file once); results are joined in page order.
+    Documents with fewer than `min_pages_for_pool` pages are parsed in-process, where the pool overhead would not pay off.
+    """
+    def __init__(self, max_workers: int | None = None, min_pages_for_pool: int = 50, pages_per_task: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        if self.max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0.")
+        if min_pages_for_pool <= 0:
+            raise ValueError("min_pages_for_pool must be greater than 0.")
+        if pages_per_task is not None and pages_per_task <= 0:
+            raise ValueError("pages_per_task must be greater than 0.")
+
+        self.min_pages_for_pool = min_pages_for_pool
+        self.pages_per_task = pages_per_task
+
+    def parse_pdf(self, file_content: bytes) -> str:
+        if not file_content:
+            return ""
+
+        check_pdf_header(file_content)
+
+        reader = PdfReader(BytesIO(file_content))
+        page_count = len(reader.pages)
+
+        if self.max_workers == 1 or page_count < self.min_pages_for_pool:
+            return "\n".join(extract_page_texts(reader, 0, page_count))
+
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_content)
+            return self._parse_in_pool(path, page_count)
+        finally:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def parse_pdf_file(self, path: str) -> str:
+        # The pool tasks read the given file directly, no temp copy is needed.
+        with open(path, "rb") as f:
+            header = f.read(5)
+            if not header:
+                return ""
+            check_pdf_header(header)
+            f.seek(0)
+            reader = PdfReader(f)
+            page_count = len(reader.pages)
+            if self.max_workers == 1 or page_count < self.min_pages_for_pool:
+                return "\n".join(extract_page_texts(reader, 0, page_count))
+
+        return self._parse_in_pool(path, page_count)
+
+    def iter_pdf_file_pages(self, path: str) -> Iterator[str]:
+        # Page ranges are yielded in order as soon as each one is extracted, while later ranges are still running.
+        with open(path, "rb") as f:
+            header = f.read(5)
+            if not header:
+                return
+            check_pdf_header(header)
+            f.seek(0)
+            reader = PdfReader(f)
+            page_count = len(reader.pages)
+            if self.max_workers == 1 or page_count < self.min_pages_for_pool:
+                yield from iter_page_texts(reader, 0, page_count)
+                return
+
+        yield from self._iter_pool_pages(path, page_count)
+
+    def _parse_in_pool(self, path: str, page_count: int) -> str:
+        return "\n".join(self._iter_pool_pages(path, page_count))
 
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_chunks.append(page_text)
+    def _iter_pool_pages(self, path: str, page_count: int) -> Iterator[str]:
+        pool = _get_pool(self.max_workers)
+        futures = [pool.submit(_extract_page_range, path, start, stop) for start, stop in self._page_ranges(page_count)]
+        try:
+            for future in futures: #submission order = page order.
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel() #the consumer stopped early (e.g. a failed ingestion): ranges not started yet are dropped.
 
-        return "\n".join(text_chunks)
\ No newline at end of file
+    def _page_ranges(self, page_count: int) -> list[tuple[int, int]]:
+        # Default: ~4 tasks per worker, so a range of slow pages doesn't leave the other workers idle.
+        size = self.pages_per_task or max(1, -(-page_count // (self.max_workers * 4)))
+        return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
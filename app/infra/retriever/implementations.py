@@ -1,23 +1,306 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+
+import numpy as np
+
 from app.domain.interfaces import ChunkRepositoryInterface, RetrieverInterface, EmbedderInterface
 from app.domain.entities import Chunk
-from app.domain.types import RetrievedChunk
+from app.domain.types import RetrievalOptions, RetrievedChunk
 import uuid
 
 class V1_Retriever(RetrieverInterface):
     chunk_repo: ChunkRepositoryInterface
     embedder: EmbedderInterface 
     
-    def __init__(self, chunk_repo: ChunkRepositoryInterface, embedder: EmbedderInterface):
+    def __init__(self, chunk_repo: ChunkRepositoryInterface, embedder: EmbedderInterface, options: RetrievalOptions | None = None):
         self.chunk_repo = chunk_repo
         self.embedder = embedder
+        self.options = options or RetrievalOptions() #deployment defaults, overridden per request.
         
-    def retrieve_best_chunks(self, organization_id: uuid.UUID, question: str) -> list[RetrievedChunk]:
+    def retrieve_best_chunks(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> list[RetrievedChunk]:
+        options = options or self.options
+
         # 1. Embed the question using the embedder. 
         embedded_question = self.embedder.embed_text(question)
         
         # We don't save the embed of the question for now.
         
-        retrieved_chunks: list[RetrievedChunk] = self.chunk_repo.vector_search(organization_id=organization_id, embedded_question=embedded_question, top_k=5)
+        # 2. top_k, similarity cutoff and token budget are applied in the SQL query.
+        retrieved_chunks: list[RetrievedChunk] = self.chunk_repo.vector_search(
+            organization_id=organization_id,
+            embedded_question=embedded_question,
+            top_k=options.top_k,
+            min_similarity=options.min_similarity,
+            max_context_tokens=options.max_context_tokens,
+        )
         
         return retrieved_chunks
-        
\ No newline at end of file
+
+
+class Hybrid_Retriever(RetrieverInterface):
+    """
+    Dense (pgvector) and lexical (PostgreSQL full-text) search fused with reciprocal rank fusion.
+    Exact tokens such as part numbers, error codes or names are found even when the embedding misses them.
+    Both searches run inside one SQL statement (see PostgreSQL_ChunkRepository.hybrid_search).
+    """
+
+    def __init__(self, chunk_repo: ChunkRepositoryInterface, embedder: EmbedderInterface, options: RetrievalOptions | None = None, candidates: int = 50):
+        if candidates < 1:
+            raise ValueError("candidates must be greater than 0.")
+        self.chunk_repo = chunk_repo
+        self.embedder = embedder
+        self.options = options or RetrievalOptions()
+        self.candidates = candidates
+
+    def retrieve_best_chunks(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> list[RetrievedChunk]:
+        options = options or self.options
+        embedded_question = self.embedder.embed_text(question)
+        return self.chunk_repo.hybrid_search(
+            organization_id=organization_id,
+            question=question,
+            embedded_question=embedded_question,
+            top_k=options.top_k,
+            candidates=max(self.candidates, options.top_k), #each side must be able to fill top_k on its own.
+            min_similarity=options.min_similarity,
+            max_context_tokens=options.max_context_tokens,
+        )
+
+
+@dataclass
+class _OrganizationVectors:
+    matrix: np.ndarray #(capacity, dimensions) float32, rows L2-normalized. Only the first `size` rows are valid.
+    size: int
+    chunk_ids: list[uuid.UUID]
+    document_ids: list[uuid.UUID]
+    chunk_indexes: list[int]
+    contents: list[str]
+    token_counts: list[int]
+    positions: dict[uuid.UUID, int] #chunk id -> row, so a chunk is never held twice.
+
+
+class InMemory_VectorIndex:
+    """
+    Process-wide store of chunk embeddings, one contiguous float32 matrix per organization.
+
+    Rows are normalized on insert, so cosine similarity is a single matrix-vector product.
+    Organizations are loaded on demand and the least recently used ones are evicted
+    when more than `max_organizations` are held.
+    """
+
+    def __init__(self, max_organizations: int = 100):
+        if max_organizations <= 0:
+            raise ValueError("max_organizations must be greater than 0.")
+
+        self.max_organizations = max_organizations
+        self._organizations: OrderedDict[uuid.UUID, _OrganizationVectors] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def is_loaded(self, organization_id: uuid.UUID) -> bool:
+        with self._lock:
+            return organization_id in self._organizations
+
+    def load(self, organization_id: uuid.UUID, chunks: list[Chunk]) -> None:
+        # Replaces whatever was held for the organization.
+        vectors = self._build(chunks)
+        with self._lock:
+            self._organizations[organization_id] = vectors
+            self._organizations.move_to_end(organization_id)
+            while len(self._organizations) > self.max_organizations:
+                self._organizations.popitem(last=False)
+
+    def add_chunks(self, organization_id: uuid.UUID, chunks: list[Chunk]) -> None:
+        # Incremental refresh. Cold organizations are skipped, they will be fully loaded on first use.
+        # Idempotent: a chunk already held (the organization was loaded after the chunk was committed) is overwritten in place.
+        if not chunks:
+            return
+        with self._lock:
+            current = self._organizations.get(organization_id)
+            if current is None:
+                return
+
+            new_rows = self._normalize(np.asarray([c.embedding for c in chunks], dtype=np.float32))
+            if current.size == 0:
+                current.matrix = np.empty((0, new_rows.shape[1]), dtype=np.float32) #organization was loaded empty, adopt the dimensions.
+            if new_rows.shape[1] != current.matrix.shape[1]:
+                raise ValueError("Embedding dimensions do not match the loaded index.")
+
+            appended: list[int] = []
+            for i, chunk in enumerate(chunks):
+                row = current.positions.get(chunk.id)
+                if row is None:
+                    current.positions[chunk.id] = current.size + len(appended)
+                    appended.append(i)
+                else:
+                    current.matrix[row] = new_rows[i]
+                    self._set_row(current, row, chunk)
+            if not appended:
+                return
+
+            needed = current.size + len(appended)
+            if needed > current.matrix.shape[0]:
+                #grow geometrically so repeated ingestions are amortized O(1) per row.
+                capacity = max(needed, current.matrix.shape[0] * 2)
+                grown = np.empty((capacity, current.matrix.shape[1]), dtype=np.float32)
+                grown[:current.size] = current.matrix[:current.size]
+                current.matrix = grown
+
+            current.matrix[current.size:needed] = new_rows[appended]
+            added = [chunks[i] for i in appended]
+            current.chunk_ids.extend(c.id for c in added)
+            current.document_ids.extend(c.document_id for c in added)
+            current.chunk_indexes.extend(c.chunk_index for c in added)
+            current.contents.extend(c.content for c in added)
+            current.token_counts.extend(self._token_count(c) for c in added)
+            current.size = needed
+
+    def replace_chunks(self, organization_id: uuid.UUID, removed_ids: list[uuid.UUID], chunks: list[Chunk]) -> None:
+        # Document update: drops the rows of `removed_ids` and appends `chunks`, atomically for concurrent searches.
+        with self._lock:
+            current = self._organizations.get(organization_id)
+            if current is None:
+                return
+
+            removed = set(removed_ids)
+            if removed:
+                keep = [i for i, chunk_id in enumerate(current.chunk_ids[:current.size]) if chunk_id not in removed]
+                if len(keep) < current.size:
+                    current.matrix = np.ascontiguousarray(current.matrix[keep]) if keep else np.empty((0, 0), dtype=np.float32)
+                    current.chunk_ids = [current.chunk_ids[i] for i in keep]
+                    current.document_ids = [current.document_ids[i] for i in keep]
+                    current.chunk_indexes = [current.chunk_indexes[i] for i in keep]
+                    current.contents = [current.contents[i] for i in keep]
+                    current.token_counts = [current.token_counts[i] for i in keep]
+                    current.positions = {chunk_id: row for row, chunk_id in enumerate(current.chunk_ids)}
+                    current.size = len(keep)
+
+            self.add_chunks(organization_id, chunks)
+
+    def invalidate(self, organization_id: uuid.UUID) -> None:
+        with self._lock:
+            self._organizations.pop(organization_id, None)
+
+    def search(
+        self,
+        organization_id: uuid.UUID,
+        embedded_question: list[float],
+        top_k: int = 5,
+        min_similarity: float | None = None,
+        max_context_tokens: int | None = None,
+    ) -> list[RetrievedChunk] | None:
+        """
+        Returns None when the organization is not loaded (cold), so callers can fall back to the database.
+        min_similarity and max_context_tokens behave as in ChunkRepositoryInterface.vector_search.
+        """
+        if top_k <= 0:
+            raise ValueError("top_k must be greater than 0.")
+
+        query = self._normalize(np.asarray(embedded_question, dtype=np.float32).reshape(1, -1))[0]
+
+        with self._lock:
+            current = self._organizations.get(organization_id)
+            if current is None:
+                return None
+            self._organizations.move_to_end(organization_id)
+
+            if current.size == 0:
+                return []
+            if query.shape[0] != current.matrix.shape[1]:
+                raise ValueError("Question embedding dimensions do not match the loaded index.")
+
+            scores = current.matrix[:current.size] @ query
+            k = min(top_k, current.size)
+            if k < current.size:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(current.size)
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            retrieved_chunks: list[RetrievedChunk] = []
+            context_tokens = 0
+            for i in top:
+                if min_similarity is not None and scores[i] < min_similarity:
+                    break #best first: every following chunk is below the cutoff too.
+                context_tokens += current.token_counts[i]
+                if max_context_tokens is not None and retrieved_chunks and context_tokens > max_context_tokens:
+                    break #the best chunk is always kept, as in SQL.
+                retrieved_chunks.append(
+                    RetrievedChunk(
+                        chunk_id=current.chunk_ids[i],
+                        content=current.contents[i],
+                        chunk_index=current.chunk_indexes[i],
+                        similarity_score=max(0.0, min(1.0, float(scores[i]))), #same clamping as the SQL cosine path.
+                        token_count=current.token_counts[i],
+                        document_id=current.document_ids[i],
+                    )
+                )
+            return retrieved_chunks
+
+    @classmethod
+    def _build(cls, chunks: list[Chunk]) -> _OrganizationVectors:
+        chunks = list({c.id: c for c in chunks}.values()) #one row per chunk id, the last one wins.
+        if chunks:
+            matrix = cls._normalize(np.asarray([c.embedding for c in chunks], dtype=np.float32))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return _OrganizationVectors(
+            matrix=np.ascontiguousarray(matrix),
+            size=len(chunks),
+            chunk_ids=[c.id for c in chunks],
+            document_ids=[c.document_id for c in chunks],
+            chunk_indexes=[c.chunk_index for c in chunks],
+            contents=[c.content for c in chunks],
+            token_counts=[cls._token_count(c) for c in chunks],
+            positions={c.id: row for row, c in enumerate(chunks)},
+        )
+
+    @classmethod
+    def _set_row(cls, current: _OrganizationVectors, row: int, chunk: Chunk) -> None:
+        # Metadata of a row whose embedding was just overwritten.
+        current.document_ids[row] = chunk.document_id
+        current.chunk_indexes[row] = chunk.chunk_index
+        current.contents[row] = chunk.content
+        current.token_counts[row] = cls._token_count(chunk)
+
+    @staticmethod
+    def _token_count(chunk: Chunk) -> int:
+        # same estimate as the SQL path for chunks stored without a token count.
+        return chunk.token_count if chunk.token_count is not None else (len(chunk.content) + 3) // 4
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0 #zero vectors stay zero instead of becoming NaN.
+        return matrix / norms
+
+
+class InMemory_Retriever(RetrieverInterface):
+    """
+    Answers from the in-process index when the organization is warm.
+    When it is cold, answers from the database (vector_search) and then loads the organization
+    so following questions skip the database.
+    """
+
+    def __init__(self, chunk_repo: ChunkRepositoryInterface, embedder: EmbedderInterface, index: InMemory_VectorIndex, options: RetrievalOptions | None = None):
+        self.chunk_repo = chunk_repo
+        self.embedder = embedder
+        self.index = index
+        self.options = options or RetrievalOptions()
+
+    def retrieve_best_chunks(self, organization_id: uuid.UUID, question: str, options: RetrievalOptions | None = None) -> list[RetrievedChunk]:
+        options = options or self.options
+        embedded_question = self.embedder.embed_text(question)
+        limits = dict(top_k=options.top_k, min_similarity=options.min_similarity, max_context_tokens=options.max_context_tokens)
+
+        retrieved_chunks = self.index.search(organization_id, embedded_question, **limits)
+        if retrieved_chunks is not None:
+            return retrieved_chunks
+
+        # Cold organization: SQL path, then warm the index for the next calls.
+        retrieved_chunks = self.chunk_repo.vector_search(organization_id=organization_id, embedded_question=embedded_question, **limits)
+        try:
+            self.index.load(organization_id, self.chunk_repo.get_by_organization(organization_id))
+        except Exception:
+            pass #warming is best effort, the answer already came from the database.
+
+        return retrieved_chunks
@@ -1,14 +1,21 @@
+import hashlib
 import os
+import shutil
 
 from app.domain.interfaces import DocumentStorageInterface
+from app.domain.types import StagedFile
 from pathlib import Path
+from typing import BinaryIO
 import uuid
 
+STAGE_CHUNK_SIZE = 1024 * 1024 #bytes read from the upload stream at a time.
+
 #✅#
 class Local_DocumentStorage(DocumentStorageInterface):
     
     def __init__ (self, base_path: str):
         self.base_path = Path(base_path)
+        self.staging_path = self.base_path / ".staging" #inside base_path, so save_staged is a rename on the same filesystem.
     
     def save(self, organization_id: uuid.UUID, document_id: uuid.UUID, content: bytes) -> None:
         if content is None:
@@ -24,12 +31,63 @@ class Local_DocumentStorage(DocumentStorageInterface):
         temp_path.write_bytes(content) #write the content to a temp file
         os.replace(temp_path, path) #atomically rename the temp file to the final path. This ensures that we don't end up with a partially written file if something goes wrong during the write process.
        
-    #def load(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> bytes:
-    #    ...
+    def load(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> bytes:
+        path = self._path(organization_id, document_id)
+        return path.read_bytes() #FileNotFoundError if it was never saved or already deleted.
     
     def delete(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> None:
-        path = self.base_path / str(organization_id) / f"{document_id}.bin"
+        path = self._path(organization_id, document_id)
         try:
             path.unlink()
         except FileNotFoundError:
             pass #if the file doesn't exist, we can consider it already deleted, so we ignore the error.
+
+    def stage(self, stream: BinaryIO, max_size: int | None = None) -> StagedFile:
+        # Copies the stream in STAGE_CHUNK_SIZE pieces, hashing as it goes: memory use doesn't depend on the file size.
+        path = self._new_staging_path()
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(path, "wb") as f:
+                while chunk := stream.read(STAGE_CHUNK_SIZE):
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValueError(f"File exceeds max size ({max_size} bytes).")
+                    sha256.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return StagedFile(path=str(path), size=size, sha256=sha256.hexdigest())
+
+    def stage_stored(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> StagedFile:
+        # Hard link when possible: the stored file stays in place (a retried job needs it) and nothing is copied.
+        source = self._path(organization_id, document_id)
+        path = self._new_staging_path()
+        try:
+            os.link(source, path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(source, path) #filesystems without hard links.
+
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(STAGE_CHUNK_SIZE):
+                sha256.update(chunk)
+        return StagedFile(path=str(path), size=path.stat().st_size, sha256=sha256.hexdigest())
+
+    def save_staged(self, organization_id: uuid.UUID, document_id: uuid.UUID, staged: StagedFile) -> None:
+        path = self._path(organization_id, document_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged.path, path) #rename, the content is not rewritten.
+
+    def discard(self, staged: StagedFile) -> None:
+        Path(staged.path).unlink(missing_ok=True)
+
+    def _path(self, organization_id: uuid.UUID, document_id: uuid.UUID) -> Path:
+        return self.base_path / str(organization_id) / f"{document_id}.bin"
+
+    def _new_staging_path(self) -> Path:
+        self.staging_path.mkdir(parents=True, exist_ok=True)
+        return self.staging_path / f"{uuid.uuid4()}.tmp"
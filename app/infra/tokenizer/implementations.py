@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+import tiktoken
+
+from app.domain.interfaces import TokenCounterInterface
+
+
+DEFAULT_ENCODING = "o200k_base" #encoding of the gpt-4o / gpt-4.1 family.
+
+
+@lru_cache(maxsize=None)
+def encoding_for_model(model_name: str) -> tiktoken.Encoding:
+    # Loading an encoding parses a ~100k entry BPE table, so it is done once per model and process.
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING) #models unknown to this tiktoken version.
+
+
+class Tiktoken_TokenCounter(TokenCounterInterface):
+    """
+    Exact token counts for OpenAI models.
+    The encoding is resolved on first use, not in __init__, so building the counter never downloads anything.
+    """
+
+    def __init__(self, model_name: str = "gpt-4.1-mini", num_threads: int = 8):
+        if num_threads <= 0:
+            raise ValueError("num_threads must be greater than 0.")
+        self.model_name = model_name
+        self.num_threads = num_threads
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        return encoding_for_model(self.model_name)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text or ""))
+
+    def count_many(self, texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        # encode_ordinary_batch releases the GIL and encodes on a thread pool. Special tokens are plain text here.
+        encoded = self.encoding.encode_ordinary_batch([t or "" for t in texts], num_threads=self.num_threads)
+        return [len(tokens) for tokens in encoded]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        tokens = self.encoding.encode_ordinary(text or "")
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens], errors="ignore") #drops a multi-byte character cut in half.
@@ -0,0 +1,179 @@
+"""
+Background ingestion worker.
+
+Claims jobs queued by POST /api/ingest-jobs and runs IngestDocument on them.
+Run as many processes as needed, jobs are claimed with FOR UPDATE SKIP LOCKED:
+
+    python -m app.worker.ingest_worker
+"""
+import logging
+import os
+import signal
+import threading
+import time
+
+from app.api.dependencies import get_chunker, get_embedder, get_embedding_scheduler, get_ingest_pipeline_settings, get_pdf_parser, get_token_counter
+from app.application.use_cases import ClaimNextIngestJob, HeartbeatIngestJob, IngestDocument, RunIngestJob
+from app.domain.entities import IngestJob
+from app.infra.db.engine import SessionLocal
+from app.infra.db.implementations import (
+    PostgreSQL_ChunkRepository,
+    PostgreSQL_DocumentRepository,
+    PostgreSQL_IngestJobRepository,
+    PostgreSQL_OrganizationRepository,
+)
+from app.infra.storage.implementations import Local_DocumentStorage
+
+logger = logging.getLogger(__name__)
+
+STORAGE_PATH = os.getenv("STORAGE_PATH", "./storage")
+POLL_INTERVAL_SECONDS = float(os.getenv("INGEST_WORKER_POLL_INTERVAL_SECONDS", "2"))
+STALE_AFTER_SECONDS = int(os.getenv("INGEST_WORKER_STALE_AFTER_SECONDS", "900"))
+MAX_ATTEMPTS = int(os.getenv("INGEST_WORKER_MAX_ATTEMPTS", "3"))
+# A running job's updated_at is refreshed this often, so only jobs of dead workers go stale.
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("INGEST_WORKER_HEARTBEAT_SECONDS", str(max(1, STALE_AFTER_SECONDS // 3))))
+
+
+def claim_next_job() -> IngestJob | None:
+    # Own short transaction: the job is marked running and the row lock released right away,
+    # so the long ingestion below does not keep a lock (or an idle transaction) open.
+    db = SessionLocal()
+    try:
+        job = ClaimNextIngestJob(
+            job_repo=PostgreSQL_IngestJobRepository(db),
+            stale_after_seconds=STALE_AFTER_SECONDS,
+            max_attempts=MAX_ATTEMPTS,
+        ).execute()
+        db.commit()
+        return job
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def send_heartbeat(job: IngestJob) -> bool:
+    # Own short transaction, like claim_next_job: the ingestion transaction stays open until the job is done.
+    db = SessionLocal()
+    try:
+        alive = HeartbeatIngestJob(job_repo=PostgreSQL_IngestJobRepository(db)).execute(job)
+        db.commit()
+        return alive
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class JobHeartbeat:
+    """Sends a heartbeat for `job` every interval_seconds from a background thread, for the duration of the `with` block."""
+
+    def __init__(self, job: IngestJob, interval_seconds: float = HEARTBEAT_INTERVAL_SECONDS, send=send_heartbeat):
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self._send = send
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ingest-heartbeat-{job.id}", daemon=True)
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                alive = self._send(self.job)
+            except Exception:
+                logger.exception("Failed to send heartbeat for ingest job %s", self.job.id)
+                continue
+            if not alive:
+                # The UPDATE waits for the job row while the job's own transaction commits: that's not a takeover.
+                if not self._stopped.is_set():
+                    logger.warning("Ingest job %s is no longer running on this worker", self.job.id)
+                return
+
+
+def process_job(job: IngestJob) -> None:
+    storage = Local_DocumentStorage(STORAGE_PATH)
+    db = SessionLocal()
+    try:
+        use_case = RunIngestJob(
+            org_repo=PostgreSQL_OrganizationRepository(db),
+            job_repo=PostgreSQL_IngestJobRepository(db),
+            storage=storage,
+            ingest_document=IngestDocument(
+                doc_repo=PostgreSQL_DocumentRepository(db),
+                chunk_repo=PostgreSQL_ChunkRepository(db),
+                embedder=get_embedder(),
+                storage=storage,
+                parser=get_pdf_parser(),
+                chunker=get_chunker(),
+                token_counter=get_token_counter(),
+                **get_ingest_pipeline_settings(),
+            ),
+            max_attempts=MAX_ATTEMPTS,
+        )
+
+        # Heartbeats run until the job row is committed, so a long ingestion is never reclaimed by another worker.
+        with JobHeartbeat(job):
+            try:
+                result = use_case.execute(job)
+                db.commit() #document, chunks and job status in one transaction.
+            except Exception as e:
+                db.rollback()
+                result = use_case.record_failure(job, e)
+                db.commit()
+                logger.warning("Ingest job %s %s (attempt %s): %s", job.id, result.status, job.attempts, e)
+            else:
+                logger.info("Ingest job %s succeeded: document %s, %s chunks", job.id, result.document_id, result.chunks_created)
+
+        if result.status in ("succeeded", "failed"):
+            storage.delete(job.organization_id, job.id) #the uploaded copy is not needed anymore.
+
+        scheduler = get_embedding_scheduler()
+        if scheduler is not None:
+            logger.info("Embedding scheduler: %s", scheduler.stats())
+    finally:
+        db.close()
+
+
+def run(stop_after_idle: bool = False) -> None:
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True #finish the current job, then exit.
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    logger.info("Ingest worker started (poll every %ss)", POLL_INTERVAL_SECONDS)
+    while not stopping:
+        try:
+            job = claim_next_job()
+        except Exception:
+            logger.exception("Failed to claim ingest job")
+            job = None
+
+        if job is None:
+            if stop_after_idle:
+                return
+            time.sleep(POLL_INTERVAL_SECONDS)
+            continue
+
+        try:
+            process_job(job)
+        except Exception:
+            # The job stays "running"; another worker picks it up once it is stale.
+            logger.exception("Failed to process ingest job %s", job.id)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    run()
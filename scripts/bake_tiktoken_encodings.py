@@ -0,0 +1,31 @@
+"""
+Downloads the tiktoken encodings of the given models into TIKTOKEN_CACHE_DIR (Docker build step).
+
+    python scripts/bake_tiktoken_encodings.py gpt-4.1-mini text-embedding-3-small
+
+Models unknown to this tiktoken version use o200k_base at runtime (see app/infra/tokenizer), so it is always included.
+"""
+import sys
+
+import tiktoken
+
+
+FALLBACK_ENCODING = "o200k_base" #same as app.infra.tokenizer.implementations.DEFAULT_ENCODING.
+
+
+def encoding_name(model_name: str) -> str:
+    try:
+        return tiktoken.encoding_name_for_model(model_name)
+    except KeyError:
+        return FALLBACK_ENCODING
+
+
+def main(model_names: list[str]) -> None:
+    names = {FALLBACK_ENCODING} | {encoding_name(m) for m in model_names if m.strip()}
+    for name in sorted(names):
+        tiktoken.get_encoding(name)
+        print(f"baked {name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+"""
+Compares V1_Chunker (fixed character windows) with Sentence_Chunker on a generated multi-megabyte text.
+
+    python -m scripts.benchmark_chunkers                  # 8 MB, 4 chars per token
+    python -m scripts.benchmark_chunkers --size-mb 32 --repeat 5
+    python -m scripts.benchmark_chunkers --tokenizer      # count with tiktoken (needs the encoding locally)
+
+Reports the best time out of --repeat runs, throughput, the number and size of the chunks, and how many
+chunks cut a word or a sentence in half.
+"""
+import argparse
+import random
+import time
+
+from app.application.services.chunker import SentenceChunkingConfig, Sentence_Chunker, V1_Chunker
+
+
+WORDS = (
+    "the invoice customer refund policy warranty period shipping order account payment device firmware update "
+    "support ticket contract clause termination notice data retention backup server region latency request"
+).split()
+
+
+def generate_text(size_bytes: int, seed: int = 7) -> str:
+    # Paragraphs of 3-8 sentences, sentences of 5-30 words, some with abbreviations and numbers.
+    rng = random.Random(seed)
+    paragraphs: list[str] = []
+    size = 0
+    while size < size_bytes:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(WORDS, k=rng.randint(5, 30))
+            if rng.random() < 0.1:
+                words.insert(rng.randrange(len(words)), f"v{rng.randint(1, 9)}.{rng.randint(0, 99)}")
+            sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"]))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def cut_words(chunks: list[str]) -> int:
+    return sum(1 for c in chunks if not c[-1] in ".?!" and not c.endswith(tuple(WORDS)))
+
+
+def cut_sentences(chunks: list[str]) -> int:
+    return sum(1 for c in chunks if c[-1] not in ".?!" or not c[0].isupper())
+
+
+def run(name: str, chunker, text: str, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunker.chunk_text(text)
+        best = min(best, time.perf_counter() - started)
+
+    mb = len(text) / 1_000_000
+    mean_chars = sum(len(c) for c in chunks) / len(chunks)
+    print(
+        f"{name:<18} {best * 1000:9.1f} ms  {mb / best:7.1f} MB/s  {len(chunks):7d} chunks  "
+        f"{mean_chars:7.0f} chars/chunk  {cut_words(chunks):6d} cut words  {cut_sentences(chunks):6d} cut sentences"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the chunkers on a generated text.")
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=300, help="Sentence_Chunker budget (V1 windows are 1200 chars, ~300 tokens).")
+    parser.add_argument("--tokenizer", action="store_true", help="Count tokens with tiktoken instead of 4 chars per token.")
+    args = parser.parse_args()
+
+    text = generate_text(int(args.size_mb * 1_000_000))
+    token_counter = None
+    if args.tokenizer:
+        from app.infra.tokenizer.implementations import Tiktoken_TokenCounter
+        token_counter = Tiktoken_TokenCounter()
+
+    print(f"text: {len(text) / 1_000_000:.1f} MB, best of {args.repeat}")
+    run("V1_Chunker", V1_Chunker(), text, args.repeat)
+    run("Sentence_Chunker", Sentence_Chunker(SentenceChunkingConfig(max_tokens=args.max_tokens), token_counter), text, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
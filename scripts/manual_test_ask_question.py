@@ -51,7 +51,6 @@ def main() -> None:
 
         # 4. Build use case
         use_case = AskQuestion(
-            org_repo=org_repo,
             query_repo=query_repo,
             llm_usage_repo=llm_usage_repo,
             query_chunk_repo=query_chunk_repo,
@@ -64,7 +63,7 @@ def main() -> None:
         question = "What appears repeatedly in this document?"
 
         result = use_case.execute(
-            organization_id=org.id,
+            organization=org,
             question=question,
         )
 
@@ -40,16 +40,13 @@ def main() -> None:
         else:
             print(f"Test organization already exists with id: {org.id}")
         
-        # 4. Load PDF from disk:
+        # 4. Locate the PDF on disk (it is streamed into storage below):
         file_path = Path("./samples/pdf-sample-test.pdf")
         if not file_path.exists():
             raise FileNotFoundError(f"Test PDF not found at path: {file_path}")
         
-        file_content = file_path.read_bytes()
-        
         # 5. Build use case
         use_case = IngestDocument(
-            org_repo=org_repo,
             doc_repo=doc_repo,
             chunk_repo=chunk_repo,
             storage=storage,
@@ -59,11 +56,16 @@ def main() -> None:
         )
         
         #6 . Exceute
-        result = use_case.execute(
-            organization_id=org.id,
-            filename=file_path.name,
-            file_content=file_content
-        )
+        with file_path.open("rb") as f:
+            upload = storage.stage(f)
+        try:
+            result = use_case.execute(
+                organization=org,
+                filename=file_path.name,
+                upload=upload
+            )
+        finally:
+            storage.discard(upload)
         
         # 7. Commit
         db.commit()
@@ -0,0 +1,35 @@
+"""
+Rebuilds usage_daily_rollups from queries + llm_usage.
+
+    python -m scripts.rebuild_usage_rollups                      # every organization
+    python -m scripts.rebuild_usage_rollups --organization-id <uuid>
+
+Safe to run while the API is serving: increments wait for the rebuild to commit.
+"""
+import argparse
+import uuid
+
+from app.infra.db.engine import SessionLocal
+from app.infra.db.implementations import PostgreSQL_UsageRollupRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the per organization/model/day usage rollups.")
+    parser.add_argument("--organization-id", type=uuid.UUID, default=None, help="Only rebuild this organization.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = PostgreSQL_UsageRollupRepository(db).rebuild(organization_id=args.organization_id)
+        db.commit()
+        scope = f"organization {args.organization_id}" if args.organization_id else "all organizations"
+        print(f"[OK] Rebuilt usage rollups for {scope}: {rows} rows.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import streamlit as st
 
 DEFAULT_API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 REQUEST_TIMEOUT_SECONDS = 600
+DASHBOARD_PAGE_SIZE = 200  # maximum accepted by GET /api/dashboard
 
 
 class APIError(Exception):
@@ -40,15 +41,51 @@ class BackendClient:
         )
 
     def get_dashboard(self, api_key: str) -> Dict[str, Any]:
+        # Documents and queries are keyset-paginated (oldest first): follow both cursors
+        # so the demo sees every row, including the newest ones.
         headers = {"X-API-Key": api_key}
-        return self._get_json("/api/dashboard", headers=headers)
-
-    def _get_json(self, path: str, headers: Optional[Dict[str, str]] = None) -> Any:
+        params: Dict[str, Any] = {"limit": DASHBOARD_PAGE_SIZE}
+        dashboard = self._get_json("/api/dashboard", headers=headers, params=params)
+
+        documents = list(dashboard.get("documents", []))
+        queries = list(dashboard.get("queries", []))
+        documents_cursor = dashboard.get("next_documents_cursor")
+        queries_cursor = dashboard.get("next_queries_cursor")
+
+        # A list whose cursor is exhausted is not requested again (no cursor = first page).
+        while documents_cursor or queries_cursor:
+            page_params = dict(params)
+            if documents_cursor:
+                page_params["documents_cursor"] = documents_cursor
+            if queries_cursor:
+                page_params["queries_cursor"] = queries_cursor
+            page = self._get_json("/api/dashboard", headers=headers, params=page_params)
+
+            if documents_cursor:
+                documents.extend(page.get("documents", []))
+                documents_cursor = page.get("next_documents_cursor")
+            if queries_cursor:
+                queries.extend(page.get("queries", []))
+                queries_cursor = page.get("next_queries_cursor")
+
+        dashboard["documents"] = documents
+        dashboard["queries"] = queries
+        dashboard["next_documents_cursor"] = None
+        dashboard["next_queries_cursor"] = None
+        return dashboard
+
+    def _get_json(
+        self,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Any:
         url = f"{self.base_url}{path}"
         try:
             response = requests.get(
                 url,
                 headers=headers,
+                params=params,
                 timeout=REQUEST_TIMEOUT_SECONDS,
             )
             return self._handle_response(response)
@@ -275,11 +312,10 @@ def render_sidebar_summary() -> None:
     for org_data in orgs.values():
         dashboard = org_data.get("dashboard", {})
         docs = dashboard.get("documents", [])
-        queries = dashboard.get("queries", [])
         usage = dashboard.get("usage_summary", {})
 
         total_documents += len(docs)
-        total_queries += len(queries)
+        total_queries += safe_int(usage.get("request_count"))
         total_tokens += safe_int(usage.get("total_tokens"))
         total_cost += safe_float(usage.get("total_estimated_cost_usd"))
 
@@ -497,7 +533,7 @@ def render_documents_table(dashboard: Dict[str, Any]) -> None:
 
     rows = []
     total_chunks = 0
-    for doc in documents:
+    for doc in newest_first(documents):
         chunks_created = safe_int(doc.get("chunks_created"))
         total_chunks += chunks_created
         rows.append(
@@ -524,7 +560,7 @@ def render_queries_table(dashboard: Dict[str, Any]) -> None:
         return
 
     rows = []
-    for query in queries:
+    for query in newest_first(queries):
         rows.append(
             {
                 "query_id": query.get("query_id", "-"),
@@ -536,7 +572,8 @@ def render_queries_table(dashboard: Dict[str, Any]) -> None:
             }
         )
 
-    st.metric("Queries", len(rows))
+    usage = dashboard.get("usage_summary", {})
+    st.metric("Queries", safe_int(usage.get("request_count")))
     st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
 
@@ -580,7 +617,7 @@ def build_org_option_label(org_id: str, org_data: Dict[str, Any]) -> str:
     dashboard = org_data.get("dashboard", {})
     name = dashboard.get("organization_name") or org_data.get("label") or "organization"
     docs = len(dashboard.get("documents", []))
-    queries = len(dashboard.get("queries", []))
+    queries = safe_int(dashboard.get("usage_summary", {}).get("request_count"))
     short_id = org_id[:8]
     return f"{name} · docs:{docs} · queries:{queries} · {short_id}"
 
@@ -596,6 +633,10 @@ def extract_api_key(payload: Dict[str, Any]) -> str:
 # ============================================================
 # Small helpers
 # ============================================================
+def newest_first(rows: list) -> list:
+    return sorted(rows, key=lambda row: str(row.get("created_at", "")), reverse=True)
+
+
 def safe_int(value: Any) -> int:
     try:
         return int(value)
@@ -0,0 +1,89 @@
+import uuid
+
+from app.domain.types import LLMResponse, RetrievalOptions, RetrievedChunk
+from app.infra.cache.implementations import InMemory_AnswerCache
+
+
+EMBEDDINGS = {
+    "what is rag?": [1.0, 0.0, 0.0],
+    "what's rag?": [0.99, 0.05, 0.0],
+    "how much does it cost?": [0.0, 1.0, 0.0],
+}
+
+
+class EmbedderFake:
+    def embed_text(self, text):
+        return EMBEDDINGS[" ".join(text.lower().split())]
+
+    def embed_many(self, texts):
+        return [self.embed_text(t) for t in texts]
+
+
+def make_response(answer="RAG answer"):
+    return LLMResponse(
+        generated_answer=answer,
+        model_name="fake-llm",
+        prompt_tokens=100,
+        completion_tokens=10,
+        total_tokens=110,
+        latency_ms=50,
+        estimated_cost_usd=0.001,
+    )
+
+
+def make_chunk():
+    return RetrievedChunk(chunk_id=uuid.uuid4(), content="Chunk content", chunk_index=0, similarity_score=0.9)
+
+
+def test_exact_match_ignores_case_and_whitespace():
+    org_id = uuid.uuid4()
+    cache = InMemory_AnswerCache()
+    cache.set(org_id, "What is RAG?", make_response(), [make_chunk()])
+
+    cached = cache.get(org_id, "  what IS   rag? ")
+
+    assert cached is not None
+    assert cached.llm_response.generated_answer == "RAG answer"
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_match_above_threshold():
+    org_id = uuid.uuid4()
+    cache = InMemory_AnswerCache(embedder=EmbedderFake(), similarity_threshold=0.95)
+    cache.set(org_id, "What is RAG?", make_response(), [make_chunk()])
+
+    assert cache.get(org_id, "What's RAG?") is not None
+    assert cache.get(org_id, "How much does it cost?") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_entries_are_isolated_per_organization_and_invalidated():
+    org_a, org_b = uuid.uuid4(), uuid.uuid4()
+    cache = InMemory_AnswerCache()
+    cache.set(org_a, "What is RAG?", make_response(), [make_chunk()])
+
+    assert cache.get(org_b, "What is RAG?") is None
+
+    cache.invalidate(org_a)
+    assert cache.get(org_a, "What is RAG?") is None
+
+
+def test_oldest_entry_is_evicted_per_organization():
+    org_id = uuid.uuid4()
+    cache = InMemory_AnswerCache(max_entries_per_organization=1)
+    cache.set(org_id, "What is RAG?", make_response(), [make_chunk()])
+    cache.set(org_id, "How much does it cost?", make_response("Cost answer"), [make_chunk()])
+
+    assert cache.get(org_id, "What is RAG?") is None
+    assert cache.get(org_id, "How much does it cost?") is not None
+
+
+def test_answers_are_not_reused_across_retrieval_options():
+    org_id = uuid.uuid4()
+    cache = InMemory_AnswerCache(embedder=EmbedderFake(), similarity_threshold=0.95)
+    defaults, narrow = RetrievalOptions(), RetrievalOptions(top_k=1, min_similarity=0.9)
+    cache.set(org_id, "What is RAG?", make_response(), [make_chunk()], defaults)
+
+    assert cache.get(org_id, "What is RAG?", narrow) is None
+    assert cache.get(org_id, "What's RAG?", narrow) is None #no semantic match either.
+    assert cache.get(org_id, "What is RAG?", RetrievalOptions()) is not None
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from app.infra.embedder.implementations import CachedEmbedder, SQLite_EmbeddingCacheStore
+
+
+class EmbedderSpy:
+    model_name = "fake-embedding"
+    dimensions = 3
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_text(self, text):
+        self.calls.append(("embed_text", text))
+        return [0.1, 0.2, float(len(self.calls))]
+
+    def embed_many(self, texts):
+        self.calls.append(("embed_many", texts))
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+def test_repeated_question_is_served_from_cache():
+    inner = EmbedderSpy()
+    embedder = CachedEmbedder(inner)
+
+    first = embedder.embed_text("What is RAG?")
+    second = embedder.embed_text("  what   is rag?  ")
+
+    assert first == second
+    assert len(inner.calls) == 1
+    assert embedder.stats()["hits"] == 1
+    assert embedder.stats()["misses"] == 1
+
+
+def test_key_includes_model_and_dimensions():
+    inner = EmbedderSpy()
+
+    key_a = CachedEmbedder(inner, dimensions=384).cache_key("What is RAG?")
+    key_b = CachedEmbedder(inner, dimensions=1536).cache_key("What is RAG?")
+
+    assert key_a != key_b
+
+
+def test_least_recently_used_entry_is_evicted():
+    inner = EmbedderSpy()
+    embedder = CachedEmbedder(inner, max_size=1)
+
+    embedder.embed_text("first")
+    embedder.embed_text("second")
+    embedder.embed_text("first")
+
+    assert len(inner.calls) == 3
+
+
+def test_embed_many_bypasses_cache():
+    inner = EmbedderSpy()
+    embedder = CachedEmbedder(inner)
+
+    embedder.embed_many(["chunk 1", "chunk 2"])
+
+    assert inner.calls == [("embed_many", ["chunk 1", "chunk 2"])]
+    assert embedder.stats()["size"] == 0
+
+
+def test_persistent_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    inner = EmbedderSpy()
+
+    CachedEmbedder(inner, store=SQLite_EmbeddingCacheStore(path)).embed_text("What is RAG?")
+    other = CachedEmbedder(inner, store=SQLite_EmbeddingCacheStore(path))
+    embedding = other.embed_text("What is RAG?")
+
+    assert embedding == [0.1, 0.2, 1.0]
+    assert len(inner.calls) == 1
+    assert other.stats()["store_hits"] == 1
+
+
+def test_expired_store_rows_are_deleted_at_startup_and_on_write(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    store = SQLite_EmbeddingCacheStore(path, ttl_seconds=60)
+    store.set("old", [1.0])
+    store.set("recent", [2.0])
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE embedding_cache SET created_at = created_at - 120 WHERE key = 'old'")
+
+    assert store.get("old") is None
+    SQLite_EmbeddingCacheStore(path, ttl_seconds=60)
+    assert [k for (k,) in conn.execute("SELECT key FROM embedding_cache")] == ["recent"]
+
+    with conn:
+        conn.execute("UPDATE embedding_cache SET created_at = created_at - 120 WHERE key = 'recent'")
+    store.set("new", [3.0])
+    assert [k for (k,) in conn.execute("SELECT key FROM embedding_cache")] == ["new"]
+    conn.close()
+
+
+def test_store_rejects_invalid_ttl(tmp_path):
+    with pytest.raises(ValueError):
+        SQLite_EmbeddingCacheStore(str(tmp_path / "embeddings.sqlite"), ttl_seconds=0)
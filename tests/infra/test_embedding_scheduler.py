@@ -0,0 +1,218 @@
+import threading
+import time
+
+import pytest
+
+from app.infra.embedder.implementations import ScheduledEmbedder, TokenBucket
+
+
+class StatusError(Exception):
+    #shaped like openai.APIStatusError: the status code is all the scheduler looks at.
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class EmbedderSpy:
+    model_name = "fake-embedding"
+    dimensions = 2
+
+    def __init__(self, delay=0.0, errors=()):
+        self.delay = delay
+        self.errors = list(errors) #raised by the first calls, in order.
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def embed_many(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+            error = self.errors.pop(0) if self.errors else None
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if error is not None:
+                raise error
+            return [[float(len(t)), 1.0] for t in texts]
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def embed_text(self, text):
+        return self.embed_many([text])[0]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def scheduler(inner, sleeps=None, **kwargs):
+    kwargs.setdefault("requests_per_minute", 1_000_000)
+    kwargs.setdefault("tokens_per_minute", 1_000_000_000)
+    return ScheduledEmbedder(inner, sleep=(sleeps.append if sleeps is not None else lambda s: None), **kwargs)
+
+
+def test_batches_run_concurrently_and_results_keep_input_order():
+    inner = EmbedderSpy(delay=0.02)
+    texts = [f"text number {i}" * (i % 3 + 1) for i in range(12)]
+    embedder = scheduler(inner, max_in_flight=3, max_batch_size=1)
+
+    embeddings = embedder.embed_many(texts)
+
+    assert embeddings == [[float(len(t)), 1.0] for t in texts]
+    assert 1 < inner.max_running <= 3
+    assert embedder.stats()["requests_completed"] == 12
+    assert embedder.stats()["texts_embedded"] == 12
+
+
+def test_in_flight_limit_is_shared_by_concurrent_callers():
+    inner = EmbedderSpy(delay=0.02)
+    embedder = scheduler(inner, max_in_flight=2, max_batch_size=1)
+
+    callers = [threading.Thread(target=embedder.embed_many, args=([f"job {j} text {i}" for i in range(4)],)) for j in range(4)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert len(inner.calls) == 16
+    assert inner.max_running <= 2
+    assert embedder.stats()["queue_depth"] == embedder.stats()["in_flight"] == 0
+
+
+def test_questions_do_not_wait_behind_queued_batches():
+    inner = EmbedderSpy(delay=0.2)
+    embedder = scheduler(inner, max_in_flight=1, max_batch_size=1)
+    upload = threading.Thread(target=embedder.embed_many, args=([f"chunk {i}" for i in range(5)],))
+    upload.start()
+    time.sleep(0.05) #the first batch is running, the others are queued.
+
+    started = time.perf_counter()
+    embedding = embedder.embed_text("question")
+    elapsed = time.perf_counter() - started
+    upload.join()
+
+    assert embedding == [8.0, 1.0]
+    assert elapsed < 0.4 #one request, not the five batches.
+    assert embedder.stats()["direct_requests"] == 1
+
+
+def test_rate_limit_and_server_errors_are_retried_with_backoff():
+    inner = EmbedderSpy(errors=[StatusError(429), StatusError(503)])
+    sleeps = []
+    embedder = scheduler(inner, sleeps=sleeps, base_delay_seconds=1.0, max_delay_seconds=8.0)
+
+    assert embedder.embed_text("hello") == [5.0, 1.0]
+
+    assert len(inner.calls) == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0 #full jitter under base * 2^attempt.
+    assert embedder.stats()["retries"] == 2
+
+
+def test_client_errors_are_not_retried_and_retries_are_bounded():
+    inner = EmbedderSpy(errors=[StatusError(400)])
+    embedder = scheduler(inner)
+    with pytest.raises(StatusError):
+        embedder.embed_many(["hello"])
+    assert len(inner.calls) == 1
+
+    inner = EmbedderSpy(errors=[StatusError(429)] * 10)
+    embedder = scheduler(inner, max_retries=2)
+    with pytest.raises(StatusError):
+        embedder.embed_many(["hello"])
+    assert len(inner.calls) == 3
+    assert embedder.stats()["requests_failed"] == 1
+
+
+def test_batches_are_bounded_by_texts_and_tokens():
+    class CharCounter:
+        def count_many(self, texts):
+            return [len(t) for t in texts]
+
+    inner = EmbedderSpy()
+    embedder = scheduler(inner, max_in_flight=1, max_batch_size=3, max_batch_tokens=10, token_counter=CharCounter())
+
+    embedder.embed_many(["aaaa", "bbbb", "cc", "d", "e", "ffffffffff", "g"])
+
+    assert inner.calls == [["aaaa", "bbbb", "cc"], ["d", "e"], ["ffffffffff"], ["g"]]
+    assert embedder.stats()["tokens_embedded"] == 23
+
+
+def test_token_bucket_serves_the_burst_then_waits_for_the_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=600, clock=clock, sleep=clock.sleep) #10 per second, 600 capacity.
+
+    assert bucket.acquire(600) == 0.0
+    assert bucket.acquire(50) == pytest.approx(5.0)
+    assert bucket.acquire(10) == pytest.approx(1.0)
+    clock.now += 60.0
+    assert bucket.acquire(600) == 0.0 #refilled, but never beyond its capacity.
+    assert bucket.acquire(1) == pytest.approx(0.1)
+
+
+def test_token_bucket_caps_oversized_requests_and_rejects_invalid_rates():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=10, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire(10)
+    assert bucket.acquire(1000) == pytest.approx(10.0) #waits for a full bucket instead of forever.
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_minute=0)
+
+
+def test_batches_leave_the_reserve_to_priority_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=600, reserved=60, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire(540) == 0.0 #down to the reserve.
+    assert bucket.acquire(30, priority=True) == 0.0 #a question doesn't wait.
+    assert bucket.acquire(100) == pytest.approx(13.0) #a batch waits until the reserve is whole again.
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_minute=60, reserved=60)
+
+
+def test_question_is_not_throttled_behind_a_batch_that_drained_the_bucket():
+    class CharCounter:
+        def count_many(self, texts):
+            return [len(t) for t in texts]
+
+    clock = FakeClock()
+    embedder = scheduler(EmbedderSpy(), token_counter=CharCounter())
+    embedder.token_bucket = TokenBucket(rate_per_minute=600, reserved=60, clock=clock, sleep=clock.sleep)
+    embedder.embed_many(["x" * 540])
+
+    embedder.embed_text("question")
+
+    assert clock.sleeps == []
+    assert embedder.stats()["throttled_seconds"] == 0.0
+    embedder.embed_many(["y" * 100])
+    assert clock.sleeps == [pytest.approx(10.8)] #8 question tokens + 100, at 10 per second, back above the reserve.
+
+
+def test_failing_token_counter_is_dropped_after_the_first_error():
+    class BrokenCounter:
+        calls = 0
+
+        def count_many(self, texts):
+            BrokenCounter.calls += 1
+            raise OSError("encoding download failed")
+
+    embedder = scheduler(EmbedderSpy(), token_counter=BrokenCounter())
+
+    embedder.embed_many(["x" * 40])
+    embedder.embed_many(["y" * 40])
+
+    assert BrokenCounter.calls == 1
+    assert embedder.stats()["tokens_embedded"] == 20 #estimated, 4 chars per token.
@@ -0,0 +1,51 @@
+import uuid
+
+import pytest
+
+from app.domain.types import RetrievalOptions, RetrievedChunk
+from app.infra.retriever.implementations import Hybrid_Retriever
+
+
+class EmbedderFake:
+    def embed_text(self, text):
+        return [1.0, 0.0]
+
+    def embed_many(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+class ChunkRepoSpy:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def hybrid_search(self, organization_id, question, embedded_question, top_k=5, candidates=50, min_similarity=None, max_context_tokens=None):
+        self.calls.append((organization_id, question, embedded_question, top_k, candidates, min_similarity, max_context_tokens))
+        return self.results
+
+
+def test_retriever_sends_question_text_and_embedding_in_one_search():
+    org_id = uuid.uuid4()
+    expected = [RetrievedChunk(chunk_id=uuid.uuid4(), content="Error E-1234: pump overheated", chunk_index=0, similarity_score=0.4)]
+    chunk_repo = ChunkRepoSpy(expected)
+    retriever = Hybrid_Retriever(chunk_repo=chunk_repo, embedder=EmbedderFake(), options=RetrievalOptions(top_k=3), candidates=20)
+
+    assert retriever.retrieve_best_chunks(organization_id=org_id, question="What is E-1234?") == expected
+    assert chunk_repo.calls == [(org_id, "What is E-1234?", [1.0, 0.0], 3, 20, None, None)]
+
+
+def test_request_options_override_defaults_and_widen_candidates():
+    org_id = uuid.uuid4()
+    chunk_repo = ChunkRepoSpy([])
+    retriever = Hybrid_Retriever(chunk_repo=chunk_repo, embedder=EmbedderFake(), candidates=5)
+
+    retriever.retrieve_best_chunks(org_id, "What?", options=RetrievalOptions(top_k=10, min_similarity=0.3, max_context_tokens=500))
+
+    assert chunk_repo.calls[0][3:] == (10, 10, 0.3, 500)
+
+
+def test_rejects_invalid_retrieval_options():
+    with pytest.raises(ValueError):
+        RetrievalOptions(top_k=0)
+    with pytest.raises(ValueError):
+        RetrievalOptions(min_similarity=1.5)
@@ -0,0 +1,152 @@
+import uuid
+
+import pytest
+
+from app.domain.entities import Chunk
+from app.domain.types import RetrievedChunk
+from app.infra.retriever.implementations import InMemory_Retriever, InMemory_VectorIndex
+
+
+def make_chunk(organization_id, embedding, chunk_index=0, content="Chunk content"):
+    return Chunk(
+        document_id=uuid.uuid4(),
+        organization_id=organization_id,
+        chunk_index=chunk_index,
+        content=content,
+        embedding=embedding,
+        token_count=None,
+    )
+
+
+class EmbedderFake:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+    def embed_text(self, text):
+        return self.embedding
+
+    def embed_many(self, texts):
+        return [self.embedding for _ in texts]
+
+
+class ChunkRepoSpy:
+    def __init__(self, chunks=None, sql_results=None):
+        self.chunks = chunks or []
+        self.sql_results = sql_results or []
+        self.calls = []
+
+    def vector_search(self, organization_id, embedded_question, top_k=5, min_similarity=None, max_context_tokens=None):
+        self.calls.append(("vector_search", organization_id))
+        return self.sql_results
+
+    def get_by_organization(self, organization_id):
+        self.calls.append(("get_by_organization", organization_id))
+        return self.chunks
+
+
+def test_search_returns_none_when_organization_is_cold():
+    index = InMemory_VectorIndex()
+
+    assert index.search(uuid.uuid4(), [1.0, 0.0]) is None
+
+
+def test_search_orders_by_cosine_similarity_and_limits_top_k():
+    org_id = uuid.uuid4()
+    index = InMemory_VectorIndex()
+    index.load(org_id, [
+        make_chunk(org_id, [0.0, 1.0], chunk_index=0, content="orthogonal"),
+        make_chunk(org_id, [10.0, 0.0], chunk_index=1, content="same direction"),
+        make_chunk(org_id, [1.0, 1.0], chunk_index=2, content="diagonal"),
+    ])
+
+    results = index.search(org_id, [1.0, 0.0], top_k=2)
+
+    assert [r.content for r in results] == ["same direction", "diagonal"]
+    assert results[0].similarity_score == pytest.approx(1.0)
+    assert results[1].similarity_score == pytest.approx(0.7071, abs=1e-4)
+
+
+def test_search_applies_similarity_cutoff_and_token_budget():
+    org_id = uuid.uuid4()
+    index = InMemory_VectorIndex()
+    index.load(org_id, [
+        make_chunk(org_id, [1.0, 0.0], content="a" * 400),  #100 tokens, similarity 1.0
+        make_chunk(org_id, [1.0, 0.2], content="b" * 400),  #100 tokens, similarity ~0.98
+        make_chunk(org_id, [1.0, 0.5], content="c" * 40),   #10 tokens, similarity ~0.89
+        make_chunk(org_id, [0.0, 1.0], content="d" * 40),   #similarity 0.0
+    ])
+
+    assert len(index.search(org_id, [1.0, 0.0], top_k=10, min_similarity=0.5)) == 3
+    assert len(index.search(org_id, [1.0, 0.0], top_k=10, max_context_tokens=150)) == 1
+    assert len(index.search(org_id, [1.0, 0.0], top_k=10, max_context_tokens=50)) == 1 #the best chunk is always returned.
+    assert [r.token_count for r in index.search(org_id, [1.0, 0.0], top_k=10, min_similarity=0.5, max_context_tokens=205)] == [100, 100] #the third one (10 tokens) would make 210.
+
+
+def test_add_chunks_refreshes_warm_organization_only():
+    warm_org, cold_org = uuid.uuid4(), uuid.uuid4()
+    index = InMemory_VectorIndex()
+    index.load(warm_org, [make_chunk(warm_org, [0.0, 1.0])])
+
+    index.add_chunks(warm_org, [make_chunk(warm_org, [1.0, 0.0], content="new chunk")])
+    index.add_chunks(cold_org, [make_chunk(cold_org, [1.0, 0.0])])
+
+    assert index.search(warm_org, [1.0, 0.0], top_k=1)[0].content == "new chunk"
+    assert not index.is_loaded(cold_org)
+
+
+def test_chunks_already_loaded_are_not_added_twice():
+    #the organization was cold-loaded after the ingest committed, then the refresh for that ingest runs.
+    org_id = uuid.uuid4()
+    chunks = [make_chunk(org_id, [1.0, 0.0], content="a"), make_chunk(org_id, [0.0, 1.0], chunk_index=1, content="b")]
+    index = InMemory_VectorIndex()
+    index.load(org_id, chunks)
+
+    index.add_chunks(org_id, chunks)
+    index.add_chunks(org_id, [chunks[0], make_chunk(org_id, [1.0, 1.0], chunk_index=2, content="c")])
+
+    results = index.search(org_id, [1.0, 0.0], top_k=10)
+    assert sorted(r.content for r in results) == ["a", "b", "c"]
+    assert len({r.chunk_id for r in results}) == 3
+
+
+def test_replace_chunks_drops_removed_rows_and_adds_new_ones():
+    org_id = uuid.uuid4()
+    kept, removed = make_chunk(org_id, [0.0, 1.0], content="kept"), make_chunk(org_id, [1.0, 0.0], content="removed")
+    index = InMemory_VectorIndex()
+    index.load(org_id, [kept, removed])
+
+    index.replace_chunks(org_id, [removed.id], [make_chunk(org_id, [1.0, 1.0], chunk_index=1, content="added")])
+
+    results = index.search(org_id, [1.0, 0.0], top_k=5)
+    assert [r.content for r in results] == ["added", "kept"]
+
+    index.add_chunks(org_id, [kept]) #positions were rebuilt after the removal.
+    assert len(index.search(org_id, [1.0, 0.0], top_k=5)) == 2
+
+
+def test_least_recently_used_organization_is_evicted():
+    org_a, org_b, org_c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index = InMemory_VectorIndex(max_organizations=2)
+    index.load(org_a, [make_chunk(org_a, [1.0, 0.0])])
+    index.load(org_b, [make_chunk(org_b, [1.0, 0.0])])
+    index.search(org_a, [1.0, 0.0])
+
+    index.load(org_c, [make_chunk(org_c, [1.0, 0.0])])
+
+    assert index.is_loaded(org_a)
+    assert not index.is_loaded(org_b)
+    assert index.is_loaded(org_c)
+
+
+def test_retriever_falls_back_to_sql_when_cold_and_then_warms_the_index():
+    org_id = uuid.uuid4()
+    sql_result = RetrievedChunk(chunk_id=uuid.uuid4(), content="from sql", chunk_index=0, similarity_score=0.9)
+    chunk_repo = ChunkRepoSpy(chunks=[make_chunk(org_id, [1.0, 0.0], content="from memory")], sql_results=[sql_result])
+    retriever = InMemory_Retriever(chunk_repo=chunk_repo, embedder=EmbedderFake([1.0, 0.0]), index=InMemory_VectorIndex())
+
+    first = retriever.retrieve_best_chunks(organization_id=org_id, question="What?")
+    second = retriever.retrieve_best_chunks(organization_id=org_id, question="What?")
+
+    assert [c.content for c in first] == ["from sql"]
+    assert [c.content for c in second] == ["from memory"]
+    assert chunk_repo.calls == [("vector_search", org_id), ("get_by_organization", org_id)]
@@ -0,0 +1,52 @@
+import hashlib
+from io import BytesIO
+import uuid
+
+import pytest
+
+from app.infra.storage import implementations as storage_module
+from app.infra.storage.implementations import Local_DocumentStorage
+
+
+def test_stage_hashes_while_streaming_and_save_moves_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "STAGE_CHUNK_SIZE", 4) #several reads for a small payload.
+    storage = Local_DocumentStorage(str(tmp_path))
+    content = b"%PDF-1.4 some document bytes"
+    organization_id, document_id = uuid.uuid4(), uuid.uuid4()
+
+    staged = storage.stage(BytesIO(content))
+    storage.save_staged(organization_id, document_id, staged)
+
+    assert staged.size == len(content)
+    assert staged.sha256 == hashlib.sha256(content).hexdigest()
+    assert storage.load(organization_id, document_id) == content
+    assert list((tmp_path / ".staging").iterdir()) == []
+    storage.discard(staged) #no-op once saved.
+
+
+def test_stage_rejects_files_over_max_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "STAGE_CHUNK_SIZE", 4)
+    storage = Local_DocumentStorage(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        storage.stage(BytesIO(b"x" * 20), max_size=10)
+
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+def test_stage_stored_keeps_the_original(tmp_path):
+    storage = Local_DocumentStorage(str(tmp_path))
+    organization_id, job_id, document_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    storage.save(organization_id, job_id, b"job file")
+
+    staged = storage.stage_stored(organization_id, job_id)
+    storage.save_staged(organization_id, document_id, staged)
+
+    assert staged.sha256 == hashlib.sha256(b"job file").hexdigest()
+    assert storage.load(organization_id, job_id) == b"job file"
+    assert storage.load(organization_id, document_id) == b"job file"
+
+
+def test_stage_stored_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Local_DocumentStorage(str(tmp_path)).stage_stored(uuid.uuid4(), uuid.uuid4())
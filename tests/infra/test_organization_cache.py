@@ -0,0 +1,83 @@
+import pytest
+
+from app.domain.entities import Organization
+from app.infra.cache.implementations import CachedOrganizationRepository, InMemory_OrganizationCache
+
+
+OLD_HASH = "a" * 64
+NEW_HASH = "b" * 64
+
+
+class OrgRepoSpy:
+    def __init__(self, orgs=None):
+        self.orgs = {o.api_key_hash: o for o in (orgs or [])}
+        self.calls = []
+
+    def get_by_api_key_hash(self, api_key_hash):
+        self.calls.append(("get_by_api_key_hash", api_key_hash))
+        return self.orgs.get(api_key_hash)
+
+    def delete(self, id):
+        self.calls.append(("delete", id))
+        self.orgs = {h: o for h, o in self.orgs.items() if o.id != id}
+
+    def update_api_key_hash(self, id, api_key_hash):
+        self.calls.append(("update_api_key_hash", id))
+        org = next(o for o in self.orgs.values() if o.id == id)
+        self.orgs = {api_key_hash: Organization(id=org.id, name=org.name, api_key_hash=api_key_hash, created_at=org.created_at)}
+
+
+def lookups(repo):
+    return [c for c in repo.calls if c[0] == "get_by_api_key_hash"]
+
+
+def test_repeated_lookup_is_served_from_cache():
+    org = Organization(name="Acme", api_key_hash=OLD_HASH)
+    inner, cache = OrgRepoSpy([org]), InMemory_OrganizationCache()
+    repo = CachedOrganizationRepository(inner, cache)
+
+    assert repo.get_by_api_key_hash(OLD_HASH) == org
+    assert repo.get_by_api_key_hash(OLD_HASH) == org
+
+    assert len(lookups(inner)) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_unknown_key_is_not_cached():
+    inner = OrgRepoSpy()
+    repo = CachedOrganizationRepository(inner, InMemory_OrganizationCache())
+
+    assert repo.get_by_api_key_hash(OLD_HASH) is None
+    assert repo.get_by_api_key_hash(OLD_HASH) is None
+
+    assert len(lookups(inner)) == 2
+
+
+def test_delete_invalidates_cached_organization():
+    org = Organization(name="Acme", api_key_hash=OLD_HASH)
+    inner = OrgRepoSpy([org])
+    repo = CachedOrganizationRepository(inner, InMemory_OrganizationCache())
+    repo.get_by_api_key_hash(OLD_HASH)
+
+    repo.delete(org.id)
+
+    assert repo.get_by_api_key_hash(OLD_HASH) is None
+
+
+def test_key_rotation_invalidates_old_key():
+    org = Organization(name="Acme", api_key_hash=OLD_HASH)
+    inner = OrgRepoSpy([org])
+    repo = CachedOrganizationRepository(inner, InMemory_OrganizationCache())
+    repo.get_by_api_key_hash(OLD_HASH)
+
+    repo.update_api_key_hash(org.id, NEW_HASH)
+
+    assert repo.get_by_api_key_hash(OLD_HASH) is None
+    assert repo.get_by_api_key_hash(NEW_HASH).id == org.id
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        InMemory_OrganizationCache(max_entries=0)
+    with pytest.raises(ValueError):
+        InMemory_OrganizationCache(ttl_seconds=0)
@@ -0,0 +1,92 @@
+from io import BytesIO
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.infra.parser.implementations import Parallel_PDFParser, V1_PDFParser
+
+
+def make_pdf(page_texts: list[str]) -> bytes:
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode() if text else b"")
+        page[NameObject("/Contents")] = writer._add_object(content)
+
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_parallel_parser_matches_serial_output_and_page_order():
+    texts = [f"Page number {i}" for i in range(12)]
+    texts[5] = "" #empty pages are skipped by both parsers.
+    pdf = make_pdf(texts)
+
+    parallel = Parallel_PDFParser(max_workers=2, min_pages_for_pool=1, pages_per_task=5)
+
+    result = parallel.parse_pdf(pdf)
+
+    assert result == V1_PDFParser().parse_pdf(pdf)
+    assert [line for line in result.split("\n")] == [t for t in texts if t]
+
+
+def test_parallel_parser_small_file_skips_pool(monkeypatch):
+    import app.infra.parser.implementations as parser_module
+
+    def no_pool(max_workers):
+        raise AssertionError("pool should not be used for small files")
+
+    monkeypatch.setattr(parser_module, "_get_pool", no_pool)
+    pdf = make_pdf(["only page"])
+
+    assert Parallel_PDFParser(max_workers=4, min_pages_for_pool=10).parse_pdf(pdf) == "only page"
+
+
+def test_parallel_parser_rejects_non_pdf():
+    with pytest.raises(ValueError):
+        Parallel_PDFParser(max_workers=2).parse_pdf(b"not a pdf")
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    parser = Parallel_PDFParser(max_workers=3)
+
+    ranges = parser._page_ranges(100)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == 100
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_parse_pdf_file_matches_parse_pdf(tmp_path):
+    texts = [f"Page number {i}" for i in range(6)]
+    pdf = make_pdf(texts)
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(pdf)
+
+    parallel = Parallel_PDFParser(max_workers=2, min_pages_for_pool=1, pages_per_task=2)
+
+    assert parallel.parse_pdf_file(str(path)) == V1_PDFParser().parse_pdf(pdf)
+    assert V1_PDFParser().parse_pdf_file(str(path)) == V1_PDFParser().parse_pdf(pdf)
+
+
+def test_iter_pdf_file_pages_yields_the_non_empty_pages_in_order(tmp_path):
+    texts = [f"Page number {i}" for i in range(6)]
+    texts[2] = ""
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(make_pdf(texts))
+
+    parallel = Parallel_PDFParser(max_workers=2, min_pages_for_pool=1, pages_per_task=2)
+
+    assert list(parallel.iter_pdf_file_pages(str(path))) == [t for t in texts if t]
+    assert list(V1_PDFParser().iter_pdf_file_pages(str(path))) == [t for t in texts if t]
@@ -0,0 +1,253 @@
+"""
+PostgreSQL_ChunkRepository against the test database: the retrieval SQL (pgvector, full-text search, fusion)
+and the bulk writes can only be checked by running them.
+"""
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.entities import Query, QueryChunk
+from app.infra.db.implementations import PostgreSQL_ChunkRepository, PostgreSQL_QueryChunkRepository, PostgreSQL_QueryRepository
+from tests.use_cases.helpers import (
+    add_test_document,
+    add_test_organization,
+    axis_embedding,
+    delete_test_organization,
+    make_db_session,
+    make_test_chunk,
+)
+
+
+@pytest.fixture
+def db_session() -> Session:
+    session = make_db_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def organization(db_session: Session):
+    organization, _ = add_test_organization(db_session, "Chunk Repo Org")
+    yield organization
+    delete_test_organization(db_session, organization.id)
+
+
+@pytest.fixture
+def document(db_session: Session, organization):
+    return add_test_document(db_session, organization)
+
+
+def add_chunks(db_session: Session, chunks):
+    PostgreSQL_ChunkRepository(db_session).add_many(chunks)
+    db_session.commit()
+    return chunks
+
+
+# ---------- add_many (binary COPY) ---------- #
+
+def test_add_many_round_trips_every_column(db_session, document, organization):
+    chunks = add_chunks(db_session, [
+        make_test_chunk(document, 0, "First chunk.", axis_embedding(0.25, -0.5, 1), token_count=3),
+        make_test_chunk(document, 1, "Second chunk, no token count.", axis_embedding(0, 1)),
+    ])
+
+    stored = PostgreSQL_ChunkRepository(make_db_session()).get_by_document(organization.id, document.id)
+
+    assert [c.id for c in stored] == [c.id for c in chunks]
+    for written, read in zip(chunks, stored):
+        assert read.document_id == document.id
+        assert read.organization_id == organization.id
+        assert read.chunk_index == written.chunk_index
+        assert read.content == written.content
+        assert read.embedding == pytest.approx(written.embedding)
+        assert read.token_count == written.token_count
+        assert read.created_at == written.created_at
+        assert read.content_hash == written.content_hash
+        assert read.embedding_model == written.embedding_model
+
+
+def test_add_many_is_part_of_the_document_transaction(db_session, organization):
+    # The document is only flushed by add_many; rolling back drops it and its copied chunks together.
+    document = add_test_document(db_session, organization)
+    PostgreSQL_ChunkRepository(db_session).add_many([make_test_chunk(document, 0, "Never committed.", axis_embedding(1))])
+    assert PostgreSQL_ChunkRepository(db_session).count_by_document_id(organization.id, document.id) == 1
+
+    db_session.rollback()
+
+    assert PostgreSQL_ChunkRepository(db_session).count_by_document_id(organization.id, document.id) == 0
+
+
+def test_add_many_without_chunks_writes_nothing(db_session, document, organization):
+    PostgreSQL_ChunkRepository(db_session).add_many([])
+    db_session.commit()
+
+    assert PostgreSQL_ChunkRepository(db_session).get_by_document(organization.id, document.id) == []
+
+
+# ---------- lexical_search / hybrid_search ---------- #
+
+def test_lexical_search_matches_chunks_containing_any_question_word(db_session, document, organization):
+    # plainto_tsquery ANDs every word; the rewrite to OR lets a chunk that only shares some of them match.
+    both, one, none = add_chunks(db_session, [
+        make_test_chunk(document, 0, "The refund policy allows returns within thirty days.", axis_embedding(1, 0)),
+        make_test_chunk(document, 1, "Every refund is processed by the billing team.", axis_embedding(0, 1)),
+        make_test_chunk(document, 2, "The office is closed on public holidays.", axis_embedding(1, 1)),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).lexical_search(organization.id, "What is the refund policy?", top_k=5)
+
+    assert [r.chunk_id for r in results] == [both.id, one.id]
+    assert none.id not in {r.chunk_id for r in results}
+    assert 0.0 < results[1].similarity_score < results[0].similarity_score < 1.0
+
+
+def test_lexical_search_stays_within_the_organization(db_session, document, organization):
+    add_chunks(db_session, [make_test_chunk(document, 0, "Invoices are sent monthly.", axis_embedding(1, 0))])
+    other, _ = add_test_organization(db_session, "Other Chunk Repo Org")
+    try:
+        assert PostgreSQL_ChunkRepository(db_session).lexical_search(other.id, "invoices", top_k=5) == []
+    finally:
+        delete_test_organization(db_session, other.id)
+
+
+def test_hybrid_search_ranks_chunks_found_by_both_searches_first(db_session, document, organization):
+    dense_only, both, lexical_only = add_chunks(db_session, [
+        make_test_chunk(document, 0, "Customers may send items back for a full credit.", axis_embedding(1, 0)),
+        make_test_chunk(document, 1, "The refund policy covers unopened items.", axis_embedding(1, 0.2)),
+        make_test_chunk(document, 2, "Refund requests need the order number.", axis_embedding(0, 1)),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).hybrid_search(
+        organization.id, "refund policy", axis_embedding(1, 0), top_k=3, candidates=2,
+    )
+
+    # dense ranks: dense_only 1, both 2 (lexical_only is cut by candidates=2); lexical ranks: both 1, lexical_only 2.
+    assert [r.chunk_id for r in results] == [both.id, dense_only.id, lexical_only.id]
+    assert results[1].similarity_score == pytest.approx(1.0)
+    assert results[2].similarity_score == pytest.approx(0.0, abs=1e-6)
+
+
+def test_hybrid_search_similarity_cutoff_applies_to_the_dense_side_only(db_session, document, organization):
+    near, far_keyword, far = add_chunks(db_session, [
+        make_test_chunk(document, 0, "Shipping takes three days.", axis_embedding(1, 0)),
+        make_test_chunk(document, 1, "Warranty claims go through support.", axis_embedding(0, 1)),
+        make_test_chunk(document, 2, "Opening hours are nine to five.", axis_embedding(0, 1)),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).hybrid_search(
+        organization.id, "warranty", axis_embedding(1, 0), top_k=5, min_similarity=0.5,
+    )
+
+    assert {r.chunk_id for r in results} == {near.id, far_keyword.id}
+    assert far.id not in {r.chunk_id for r in results}
+
+
+# ---------- vector_search: similarity cutoff and token budget ---------- #
+
+def test_vector_search_returns_the_top_k_closest_above_the_cutoff(db_session, document, organization):
+    closest, close, far = add_chunks(db_session, [
+        make_test_chunk(document, 0, "Closest.", axis_embedding(1, 0.1)),
+        make_test_chunk(document, 1, "Close.", axis_embedding(1, 0.5)),
+        make_test_chunk(document, 2, "Far.", axis_embedding(0, 1)),
+    ])
+    repo = PostgreSQL_ChunkRepository(db_session)
+
+    assert [r.chunk_id for r in repo.vector_search(organization.id, axis_embedding(1, 0), top_k=2)] == [closest.id, close.id]
+    assert [r.chunk_id for r in repo.vector_search(organization.id, axis_embedding(1, 0), top_k=5, min_similarity=0.5)] == [closest.id, close.id]
+    assert far.id in {r.chunk_id for r in repo.vector_search(organization.id, axis_embedding(1, 0), top_k=5)}
+
+
+def test_vector_search_stops_once_the_running_token_count_exceeds_the_budget(db_session, document, organization):
+    first, second, third = add_chunks(db_session, [
+        make_test_chunk(document, 0, "First.", axis_embedding(1, 0.1), token_count=30),
+        make_test_chunk(document, 1, "Second.", axis_embedding(1, 0.2), token_count=30),
+        make_test_chunk(document, 2, "Third.", axis_embedding(1, 0.3), token_count=30),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).vector_search(organization.id, axis_embedding(1, 0), top_k=5, max_context_tokens=70)
+
+    assert [r.chunk_id for r in results] == [first.id, second.id]
+    assert [r.token_count for r in results] == [30, 30]
+
+
+def test_vector_search_always_keeps_the_best_chunk(db_session, document, organization):
+    # The best chunk alone is over budget: it is still returned, and nothing after it.
+    long, short = add_chunks(db_session, [
+        make_test_chunk(document, 0, "Long.", axis_embedding(1, 0.1), token_count=500),
+        make_test_chunk(document, 1, "Short.", axis_embedding(1, 0.2), token_count=5),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).vector_search(organization.id, axis_embedding(1, 0), top_k=5, max_context_tokens=100)
+
+    assert [r.chunk_id for r in results] == [long.id]
+
+
+def test_vector_search_estimates_missing_token_counts_from_the_content(db_session, document, organization):
+    # 4 characters per token, rounded up, like approx_token_count.
+    add_chunks(db_session, [
+        make_test_chunk(document, 0, "x" * 41, axis_embedding(1, 0.1)),
+        make_test_chunk(document, 1, "y" * 40, axis_embedding(1, 0.2)),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).vector_search(organization.id, axis_embedding(1, 0), top_k=5, max_context_tokens=20)
+
+    assert [r.token_count for r in results] == [11]
+
+
+def test_hybrid_search_applies_the_token_budget_in_fused_order(db_session, document, organization):
+    both, dense_only = add_chunks(db_session, [
+        make_test_chunk(document, 0, "The refund policy.", axis_embedding(1, 0.2), token_count=40),
+        make_test_chunk(document, 1, "Send items back.", axis_embedding(1, 0), token_count=40),
+    ])
+
+    results = PostgreSQL_ChunkRepository(db_session).hybrid_search(
+        organization.id, "refund", axis_embedding(1, 0), top_k=5, max_context_tokens=60,
+    )
+
+    assert [r.chunk_id for r in results] == [both.id]
+    assert dense_only.id not in {r.chunk_id for r in results}
+
+
+# ---------- update_document_chunks ---------- #
+
+def test_update_document_chunks_reorders_kept_chunks_without_unique_index_conflicts(db_session, document, organization):
+    # Kept chunks swap places and a new chunk takes an index that was in use: (document_id, chunk_index) stays unique.
+    first, dropped, last = add_chunks(db_session, [
+        make_test_chunk(document, 0, "First.", axis_embedding(1, 0)),
+        make_test_chunk(document, 1, "Dropped.", axis_embedding(0, 1)),
+        make_test_chunk(document, 2, "Last.", axis_embedding(1, 1)),
+    ])
+    added = make_test_chunk(document, 1, "New.", axis_embedding(0, 0, 1))
+    query = Query(organization_id=organization.id, question="Which chunk?", answer="First.", latency_ms=1)
+    PostgreSQL_QueryRepository(db_session).add(query)
+    PostgreSQL_QueryChunkRepository(db_session).add_links([QueryChunk(query.id, first.id, 0.9, 1), QueryChunk(query.id, dropped.id, 0.5, 2)])
+    db_session.commit()
+
+    PostgreSQL_ChunkRepository(db_session).update_document_chunks(
+        organization.id, document.id, added=[added], deleted_ids=[dropped.id], moved={last.id: 0, first.id: 2},
+    )
+    db_session.commit()
+
+    stored = PostgreSQL_ChunkRepository(make_db_session()).get_by_document(organization.id, document.id)
+    assert [(c.chunk_index, c.id) for c in stored] == [(0, last.id), (1, added.id), (2, first.id)]
+    assert stored[2].embedding == pytest.approx(first.embedding)
+    # the kept chunk keeps its query link, the deleted one takes its link with it.
+    links = PostgreSQL_QueryChunkRepository(db_session).get_by_query_id(organization.id, query.id)
+    assert [link.chunk_id for link in links] == [first.id]
+
+
+def test_update_document_chunks_leaves_other_documents_alone(db_session, document, organization):
+    other_document = add_test_document(db_session, organization, content="other document text")
+    kept, other = add_chunks(db_session, [
+        make_test_chunk(document, 0, "Kept.", axis_embedding(1, 0)),
+        make_test_chunk(other_document, 0, "Other.", axis_embedding(0, 1)),
+    ])
+
+    PostgreSQL_ChunkRepository(db_session).update_document_chunks(
+        organization.id, document.id, added=[make_test_chunk(document, 0, "New.", axis_embedding(1, 1))], deleted_ids=[], moved={kept.id: 1},
+    )
+    db_session.commit()
+
+    repo = PostgreSQL_ChunkRepository(db_session)
+    assert [(c.chunk_index, c.content) for c in repo.get_by_document(organization.id, document.id)] == [(0, "New."), (1, "Kept.")]
+    assert [(c.chunk_index, c.id) for c in repo.get_by_document(organization.id, other_document.id)] == [(0, other.id)]
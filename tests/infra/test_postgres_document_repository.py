@@ -0,0 +1,134 @@
+"""
+PostgreSQL_DocumentRepository against the test database: conflict handling relies on the
+(organization_id, document_hash) unique index and the dashboard pages on row-value comparisons,
+so they can only be checked by running them.
+"""
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.entities import Document
+from app.domain.types import PageCursor
+from app.infra.db.implementations import PostgreSQL_ChunkRepository, PostgreSQL_DocumentRepository
+from tests.use_cases.helpers import add_test_organization, axis_embedding, delete_test_organization, make_db_session, make_test_chunk
+
+
+@pytest.fixture
+def db_session() -> Session:
+    session = make_db_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def organization(db_session: Session):
+    organization, _ = add_test_organization(db_session, "Document Repo Org")
+    yield organization
+    delete_test_organization(db_session, organization.id)
+
+
+def make_document(organization, document_hash: str = "a" * 64, title: str = "doc.pdf", **fields) -> Document:
+    return Document(organization_id=organization.id, title=title, source_type="pdf", content="document text", document_hash=document_hash, **fields)
+
+
+# ---------- add_if_new ---------- #
+
+def test_add_if_new_inserts_a_new_document(db_session, organization):
+    document = make_document(organization)
+
+    assert PostgreSQL_DocumentRepository(db_session).add_if_new(document) is True
+    db_session.commit()
+
+    assert PostgreSQL_DocumentRepository(make_db_session()).get_by_id(organization.id, document.id) == document
+
+
+def test_add_if_new_returns_false_for_a_known_hash_without_aborting_the_transaction(db_session, organization):
+    repo = PostgreSQL_DocumentRepository(db_session)
+    first = make_document(organization, title="first.pdf")
+    repo.add_if_new(first)
+
+    assert repo.add_if_new(make_document(organization, title="second.pdf")) is False
+
+    # The transaction is still usable: the first document commits as if nothing happened.
+    db_session.commit()
+    assert [d.id for d in PostgreSQL_DocumentRepository(make_db_session()).list_by_organization(organization.id)] == [first.id]
+
+
+def test_add_if_new_allows_the_same_hash_in_another_organization(db_session, organization):
+    other, _ = add_test_organization(db_session, "Other Document Repo Org")
+    try:
+        repo = PostgreSQL_DocumentRepository(db_session)
+        assert repo.add_if_new(make_document(organization)) is True
+        assert repo.add_if_new(make_document(other)) is True
+        db_session.commit()
+    finally:
+        delete_test_organization(db_session, other.id)
+
+
+def test_add_if_new_waits_for_a_concurrent_upload_of_the_same_file(db_session, organization):
+    # The second insert blocks on the first one's uncommitted row, then loses once it commits.
+    winner = make_document(organization, title="winner.pdf")
+    assert PostgreSQL_DocumentRepository(db_session).add_if_new(winner) is True
+
+    loser_session = make_db_session()
+    results = []
+
+    def upload_again():
+        results.append(PostgreSQL_DocumentRepository(loser_session).add_if_new(make_document(organization, title="loser.pdf")))
+
+    loser = threading.Thread(target=upload_again)
+    loser.start()
+    loser.join(timeout=0.5)
+    assert loser.is_alive() #waiting on the unique index.
+
+    db_session.commit()
+    loser.join(timeout=10)
+    loser_session.rollback()
+    loser_session.close()
+
+    assert results == [False]
+    assert [d.title for d in PostgreSQL_DocumentRepository(db_session).list_by_organization(organization.id)] == ["winner.pdf"]
+
+
+# ---------- list_summaries_by_organization (dashboard keyset pages) ---------- #
+
+def test_list_summaries_pages_through_documents_created_at_the_same_time(db_session, organization):
+    # Rows sharing a created_at are ordered by id: the cursor neither skips nor repeats them across pages.
+    created_at = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+    documents = [make_document(organization, document_hash=str(i) * 64, title=f"doc-{i}.pdf", created_at=created_at) for i in range(5)]
+    repo = PostgreSQL_DocumentRepository(db_session)
+    for document in documents:
+        repo.add(document)
+    db_session.commit()
+
+    pages, after = [], None
+    while True:
+        page = repo.list_summaries_by_organization(organization.id, limit=2, after=after)
+        if not page:
+            break
+        pages.append([s.document_id for s in page])
+        after = PageCursor(created_at=page[-1].created_at, id=page[-1].document_id)
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [id for p in pages for id in p] == sorted(d.id for d in documents)
+
+
+def test_list_summaries_counts_chunks_and_applies_the_time_window(db_session, organization):
+    repo = PostgreSQL_DocumentRepository(db_session)
+    march = make_document(organization, document_hash="m" * 64, title="march.pdf", created_at=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    april = make_document(organization, document_hash="a" * 64, title="april.pdf", created_at=datetime(2026, 4, 1, tzinfo=timezone.utc))
+    repo.add(march)
+    repo.add(april)
+    PostgreSQL_ChunkRepository(db_session).add_many([make_test_chunk(march, i, f"Chunk {i}.", axis_embedding(1)) for i in range(3)])
+    db_session.commit()
+
+    summaries = repo.list_summaries_by_organization(organization.id)
+    assert [(s.title, s.chunk_count) for s in summaries] == [("march.pdf", 3), ("april.pdf", 0)]
+
+    april_only = repo.list_summaries_by_organization(organization.id, since=datetime(2026, 3, 2, tzinfo=timezone.utc))
+    march_only = repo.list_summaries_by_organization(organization.id, until=datetime(2026, 4, 1, tzinfo=timezone.utc))
+    assert [s.title for s in april_only] == ["april.pdf"]
+    assert [s.title for s in march_only] == ["march.pdf"]
@@ -0,0 +1,108 @@
+"""
+PostgreSQL_IngestJobRepository against the test database: claim_next relies on FOR UPDATE SKIP LOCKED
+and on the database clock, so it can only be checked with real concurrent sessions.
+The queue is shared by every organization: the jobs below are dated 2000, so they are the oldest ones in it.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.entities import IngestJob
+from app.infra.db.implementations import PostgreSQL_IngestJobRepository
+from tests.use_cases.helpers import add_test_organization, delete_test_organization, make_db_session
+
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+STALE_AFTER_SECONDS = 900
+MAX_ATTEMPTS = 3
+
+
+@pytest.fixture
+def db_session() -> Session:
+    session = make_db_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def organization(db_session: Session):
+    organization, _ = add_test_organization(db_session, "Ingest Job Repo Org")
+    yield organization
+    delete_test_organization(db_session, organization.id)
+
+
+def add_job(db_session: Session, organization, minutes: int, status: str = "queued", attempts: int = 0, updated_at: datetime | None = None) -> IngestJob:
+    created_at = LONG_AGO + timedelta(minutes=minutes)
+    job = IngestJob(
+        organization_id=organization.id,
+        filename=f"job-{minutes}.pdf",
+        status=status,
+        attempts=attempts,
+        created_at=created_at,
+        updated_at=updated_at or created_at,
+    )
+    PostgreSQL_IngestJobRepository(db_session).add(job)
+    db_session.commit()
+    return job
+
+
+def claim(session: Session) -> IngestJob | None:
+    return PostgreSQL_IngestJobRepository(session).claim_next(stale_after_seconds=STALE_AFTER_SECONDS, max_attempts=MAX_ATTEMPTS)
+
+
+def test_claim_next_returns_the_oldest_queued_job(db_session, organization):
+    add_job(db_session, organization, minutes=2)
+    older = add_job(db_session, organization, minutes=1)
+
+    claimed = claim(db_session)
+
+    assert claimed.id == older.id
+    assert claimed.status == "queued" #ClaimNextIngestJob marks it running.
+
+
+def test_concurrent_workers_skip_the_job_locked_by_another(db_session, organization):
+    first = add_job(db_session, organization, minutes=1)
+    second = add_job(db_session, organization, minutes=2)
+    other_worker = make_db_session()
+    try:
+        # The first worker's transaction is still open: its row is locked, the other worker gets the next one without waiting.
+        assert claim(db_session).id == first.id
+        assert claim(other_worker).id == second.id
+    finally:
+        other_worker.rollback()
+        other_worker.close()
+
+
+def test_claim_next_reclaims_stale_running_jobs_only(db_session, organization):
+    now = datetime.now(timezone.utc)
+    add_job(db_session, organization, minutes=1, status="running", attempts=1, updated_at=now) #its worker is alive.
+    stale = add_job(db_session, organization, minutes=2, status="running", attempts=1, updated_at=now - timedelta(seconds=STALE_AFTER_SECONDS + 60))
+
+    assert claim(db_session).id == stale.id
+
+
+def test_claim_next_fails_stale_jobs_that_are_out_of_attempts(db_session, organization):
+    exhausted = add_job(db_session, organization, minutes=1, status="running", attempts=MAX_ATTEMPTS, updated_at=LONG_AGO)
+    queued = add_job(db_session, organization, minutes=2)
+
+    assert claim(db_session).id == queued.id
+    db_session.commit()
+
+    failed = PostgreSQL_IngestJobRepository(make_db_session()).get_by_id(organization.id, exhausted.id)
+    assert failed.status == "failed"
+    assert "too many times" in failed.error
+
+
+def test_heartbeat_only_refreshes_the_attempt_that_is_still_running(db_session, organization):
+    job = add_job(db_session, organization, minutes=1, status="running", attempts=1, updated_at=LONG_AGO)
+    repo = PostgreSQL_IngestJobRepository(db_session)
+
+    assert repo.heartbeat(job) is True
+    db_session.commit()
+    assert repo.get_by_id(organization.id, job.id).updated_at > LONG_AGO
+
+    # Another worker reclaimed it meanwhile (attempt 2): the first worker's heartbeat no longer counts.
+    repo.update(job.mark_running())
+    db_session.commit()
+    assert repo.heartbeat(job) is False
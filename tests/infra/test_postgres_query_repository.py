@@ -0,0 +1,81 @@
+"""
+PostgreSQL_QueryRepository against the test database: the dashboard pages of queries are keyset-paginated
+with row-value comparisons and joined with their usage in SQL, so they can only be checked by running them.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.entities import LLMUsage, Query
+from app.domain.types import PageCursor
+from app.infra.db.implementations import PostgreSQL_LLMUsageRepository, PostgreSQL_QueryRepository
+from tests.use_cases.helpers import add_test_organization, delete_test_organization, make_db_session
+
+
+@pytest.fixture
+def db_session() -> Session:
+    session = make_db_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def organization(db_session: Session):
+    organization, _ = add_test_organization(db_session, "Query Repo Org")
+    yield organization
+    delete_test_organization(db_session, organization.id)
+
+
+def add_query(db_session: Session, organization, question: str, created_at: datetime, **fields) -> Query:
+    query = Query(organization_id=organization.id, question=question, answer="An answer.", latency_ms=10, created_at=created_at, **fields)
+    PostgreSQL_QueryRepository(db_session).add(query)
+    return query
+
+
+def test_list_with_usage_pages_through_queries_created_at_the_same_time(db_session, organization):
+    created_at = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+    queries = [add_query(db_session, organization, f"Question {i}?", created_at) for i in range(5)]
+    db_session.commit()
+    repo = PostgreSQL_QueryRepository(db_session)
+
+    pages, after = [], None
+    while True:
+        page = repo.list_with_usage_by_organization(organization.id, limit=2, after=after)
+        if not page:
+            break
+        pages.append([q.query_id for q in page])
+        after = PageCursor(created_at=page[-1].created_at, id=page[-1].query_id)
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [id for p in pages for id in p] == sorted(q.id for q in queries)
+
+
+def test_list_with_usage_joins_the_usage_of_each_query(db_session, organization):
+    answered = add_query(db_session, organization, "Answered by the LLM?", datetime(2026, 3, 1, tzinfo=timezone.utc))
+    cached = add_query(db_session, organization, "Answered from the cache?", datetime(2026, 3, 2, tzinfo=timezone.utc), cache_hit=True)
+    usage_repo = PostgreSQL_LLMUsageRepository(db_session)
+    usage_repo.add(LLMUsage(query_id=answered.id, model_name="gpt-4o-mini", prompt_tokens=90, completion_tokens=10, total_tokens=100, estimated_cost_usd=0.5))
+    usage_repo.add(LLMUsage(query_id=answered.id, model_name="gpt-4o-mini", prompt_tokens=15, completion_tokens=5, total_tokens=20, estimated_cost_usd=0.25))
+    db_session.commit()
+
+    summaries = PostgreSQL_QueryRepository(db_session).list_with_usage_by_organization(organization.id)
+
+    assert [(s.query_id, s.model_name, s.total_tokens, s.cache_hit) for s in summaries] == [
+        (answered.id, "gpt-4o-mini", 120, False), #one row per query, its usage rows summed.
+        (cached.id, None, 0, True),
+    ]
+    assert [s.estimated_cost_usd for s in summaries] == pytest.approx([0.75, 0.0])
+
+
+def test_list_with_usage_applies_the_time_window_before_paging(db_session, organization):
+    for day in (1, 2, 3, 4):
+        add_query(db_session, organization, f"Question of March {day}?", datetime(2026, 3, day, tzinfo=timezone.utc))
+    db_session.commit()
+
+    page = PostgreSQL_QueryRepository(db_session).list_with_usage_by_organization(
+        organization.id, limit=5, since=datetime(2026, 3, 2, tzinfo=timezone.utc), until=datetime(2026, 3, 4, tzinfo=timezone.utc),
+    )
+
+    assert [q.question for q in page] == ["Question of March 2?", "Question of March 3?"]
@@ -0,0 +1,132 @@
+"""
+PostgreSQL_UsageRollupRepository against the test database: the upsert counters and the rebuild
+from queries + llm_usage are plain SQL, so they can only be checked by running them.
+"""
+import threading
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.entities import LLMUsage, Query
+from app.infra.db.implementations import PostgreSQL_LLMUsageRepository, PostgreSQL_QueryRepository, PostgreSQL_UsageRollupRepository
+from tests.use_cases.helpers import add_test_organization, delete_test_organization, make_db_session
+
+DAY_1 = date(2026, 3, 1)
+DAY_2 = date(2026, 3, 2)
+
+
+@pytest.fixture
+def db_session() -> Session:
+    session = make_db_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def organization(db_session: Session):
+    organization, _ = add_test_organization(db_session, "Usage Rollup Org")
+    yield organization
+    delete_test_organization(db_session, organization.id)
+
+
+def add_query(db_session: Session, organization, created_at: datetime, model_name: str | None, total_tokens: int = 0, cost: float = 0.0) -> Query:
+    # model_name None = answered from the answer cache, no LLM usage row.
+    query = Query(organization_id=organization.id, question="What changed?", answer="Nothing.", latency_ms=5, created_at=created_at, cache_hit=model_name is None)
+    PostgreSQL_QueryRepository(db_session).add(query)
+    if model_name is not None:
+        PostgreSQL_LLMUsageRepository(db_session).add(LLMUsage(
+            query_id=query.id,
+            model_name=model_name,
+            prompt_tokens=total_tokens - 10,
+            completion_tokens=10,
+            total_tokens=total_tokens,
+            estimated_cost_usd=cost,
+        ))
+    return query
+
+
+# ---------- increment ---------- #
+
+def test_increment_adds_to_the_row_of_the_day_and_model(db_session, organization):
+    repo = PostgreSQL_UsageRollupRepository(db_session)
+    repo.increment(organization.id, DAY_1, "gpt-4o-mini", prompt_tokens=90, completion_tokens=10, total_tokens=100, estimated_cost_usd=0.5)
+    repo.increment(organization.id, DAY_1, "gpt-4o-mini", prompt_tokens=40, completion_tokens=10, total_tokens=50, estimated_cost_usd=0.25)
+    repo.increment(organization.id, DAY_1, "", cache_hit=True)
+    repo.increment(organization.id, DAY_2, "gpt-4o", prompt_tokens=5, completion_tokens=5, total_tokens=10, estimated_cost_usd=1.0)
+    db_session.commit()
+
+    totals = repo.get_totals_by_organization(organization.id)
+    assert (totals.request_count, totals.prompt_tokens, totals.completion_tokens, totals.total_tokens) == (4, 135, 25, 160)
+    assert totals.estimated_cost_usd == pytest.approx(1.75)
+    assert totals.models_used == ["gpt-4o", "gpt-4o-mini"]
+
+    daily = repo.list_daily_by_organization(organization.id)
+    assert [(d.day, d.request_count, d.cache_hit_count, d.total_tokens) for d in daily] == [(DAY_1, 3, 1, 150), (DAY_2, 1, 0, 10)]
+    assert repo.get_totals_by_organization(organization.id, since=DAY_2).request_count == 1
+    assert repo.get_totals_by_organization(organization.id, until=DAY_2).request_count == 3
+
+
+def test_concurrent_increments_are_not_lost(organization):
+    # Every thread upserts the same (organization, day, model) row from its own session and transaction.
+    threads, increments = 8, 10
+
+    def record_requests():
+        session = make_db_session()
+        try:
+            for _ in range(increments):
+                PostgreSQL_UsageRollupRepository(session).increment(organization.id, DAY_1, "gpt-4o-mini", total_tokens=3)
+                session.commit()
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=record_requests) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    totals = PostgreSQL_UsageRollupRepository(make_db_session()).get_totals_by_organization(organization.id)
+    assert (totals.request_count, totals.total_tokens) == (threads * increments, threads * increments * 3)
+
+
+# ---------- rebuild ---------- #
+
+def test_rebuild_recomputes_the_rollup_from_queries_and_usage(db_session, organization):
+    add_query(db_session, organization, datetime(2026, 3, 1, 8, tzinfo=timezone.utc), "gpt-4o-mini", total_tokens=100, cost=0.5)
+    add_query(db_session, organization, datetime(2026, 3, 1, 23, 59, tzinfo=timezone.utc), "gpt-4o-mini", total_tokens=50, cost=0.25)
+    add_query(db_session, organization, datetime(2026, 3, 1, 12, tzinfo=timezone.utc), None)
+    add_query(db_session, organization, datetime(2026, 3, 2, 0, 1, tzinfo=timezone.utc), "gpt-4o", total_tokens=20, cost=1.0)
+    repo = PostgreSQL_UsageRollupRepository(db_session)
+    repo.increment(organization.id, DAY_1, "gpt-4o-mini", total_tokens=999_999) #drifted counters are replaced.
+    db_session.commit()
+
+    rows = repo.rebuild(organization.id)
+    db_session.commit()
+
+    assert rows == 3 #(day 1, gpt-4o-mini), (day 1, cache hits), (day 2, gpt-4o).
+    daily = repo.list_daily_by_organization(organization.id)
+    assert [(d.day, d.request_count, d.cache_hit_count, d.prompt_tokens, d.completion_tokens, d.total_tokens) for d in daily] == [
+        (DAY_1, 3, 1, 130, 20, 150),
+        (DAY_2, 1, 0, 10, 10, 20),
+    ]
+    assert [d.estimated_cost_usd for d in daily] == pytest.approx([0.75, 1.0])
+    assert repo.get_totals_by_organization(organization.id).models_used == ["gpt-4o", "gpt-4o-mini"]
+
+
+def test_rebuild_of_one_organization_leaves_the_others_alone(db_session, organization):
+    other, _ = add_test_organization(db_session, "Other Usage Rollup Org")
+    try:
+        repo = PostgreSQL_UsageRollupRepository(db_session)
+        repo.increment(other.id, DAY_1, "gpt-4o-mini", total_tokens=7) #no queries behind it: a rebuild of `other` would clear it.
+        add_query(db_session, organization, datetime(2026, 3, 1, 8, tzinfo=timezone.utc), "gpt-4o-mini", total_tokens=100)
+        db_session.commit()
+
+        repo.rebuild(organization.id)
+        db_session.commit()
+
+        assert repo.get_totals_by_organization(organization.id).total_tokens == 100
+        assert repo.get_totals_by_organization(other.id).total_tokens == 7
+    finally:
+        delete_test_organization(db_session, other.id)
@@ -0,0 +1,59 @@
+import pytest
+import tiktoken
+
+from app.infra.tokenizer import implementations
+from app.infra.tokenizer.implementations import Tiktoken_TokenCounter
+
+
+def byte_encoding() -> tiktoken.Encoding:
+    #one token per byte, built locally so the tests don't download a BPE table.
+    return tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+@pytest.fixture
+def loaded_models(monkeypatch):
+    loaded = []
+
+    def encoding_for_model(model_name):
+        loaded.append(model_name)
+        return byte_encoding()
+
+    monkeypatch.setattr(implementations.tiktoken, "encoding_for_model", encoding_for_model)
+    implementations.encoding_for_model.cache_clear()
+    yield loaded
+    implementations.encoding_for_model.cache_clear()
+
+
+def test_counts_in_one_batch_in_input_order(loaded_models):
+    counter = Tiktoken_TokenCounter(model_name="gpt-test")
+
+    assert counter.count_many(["abc", "", "hello world"]) == [3, 0, 11]
+    assert counter.count("héllo") == 6 #é is two bytes.
+    assert counter.count_many([]) == []
+
+
+def test_encoding_is_loaded_once_per_model(loaded_models):
+    Tiktoken_TokenCounter(model_name="gpt-test").count("a")
+    Tiktoken_TokenCounter(model_name="gpt-test").count_many(["a", "b"])
+    Tiktoken_TokenCounter(model_name="gpt-other").count("a")
+
+    assert loaded_models == ["gpt-test", "gpt-other"]
+
+
+def test_truncate_keeps_the_first_tokens(loaded_models):
+    counter = Tiktoken_TokenCounter(model_name="gpt-test")
+
+    assert counter.truncate("hello world", 5) == "hello"
+    assert counter.truncate("short", 50) == "short"
+    assert counter.truncate("héllo", 2) == "h" #the half of é is dropped, not decoded as garbage.
+    assert counter.truncate("anything", 0) == ""
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        Tiktoken_TokenCounter(num_threads=0)
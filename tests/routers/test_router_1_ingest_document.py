@@ -10,6 +10,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.api.dependencies import get_answer_cache, get_embedder, get_pdf_parser
 from app.api.main import app
 from app.infra.db.engine import get_db_session
 from app.infra.db.implementations import (
@@ -19,7 +20,7 @@ from app.infra.db.implementations import (
 )
 from app.domain.entities import Organization
 from app.application.services.api_key import generate_api_key, hash_api_key
-from tests.use_cases.helpers import make_db_session
+from tests.use_cases.helpers import EmbedderSpy, ParserFake, make_db_session
 
 
 @pytest.fixture
@@ -506,3 +507,131 @@ class TestIngestDocumentEndpointEdgeCases:
         # Verify filename is preserved
         document = doc_repo.get_by_id(org.id, data["document_id"])
         assert document.title == special_filename
+
+
+def numbered_sentences(first: int, last: int) -> str:
+    return " ".join(f"Sentence number {i} of the handbook." for i in range(first, last))
+
+
+@pytest.fixture
+def fake_parser(client: TestClient) -> ParserFake:
+    """Fixture that replaces the PDF parser and the embedder: the uploaded bytes only need to differ, the text comes from `pages`"""
+    parser = ParserFake(pages=[numbered_sentences(0, 80)])
+    app.dependency_overrides[get_pdf_parser] = lambda: parser
+    app.dependency_overrides[get_embedder] = lambda: EmbedderSpy(dimensions=384)
+    app.dependency_overrides[get_answer_cache] = lambda: None
+    return parser
+
+
+class TestUpdateDocumentEndpoint:
+    """Test suite for PUT /api/documents/{document_id}"""
+
+    def ingest(self, client: TestClient, api_key: str, content: bytes) -> dict:
+        files = {"file": ("handbook.pdf", io.BytesIO(content), "application/pdf")}
+        response = client.post("/api/ingest-document", headers={"X-API-Key": api_key}, files=files)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_update_document_keeps_unchanged_chunks(
+        self,
+        client: TestClient,
+        fake_parser: ParserFake,
+        test_organization: Organization,
+        chunk_repo: PostgreSQL_ChunkRepository,
+        doc_repo: PostgreSQL_DocumentRepository,
+        storage_cleanup
+    ):
+        """Test that only the end of the document is re-chunked when only the end changed"""
+        # Arrange
+        org, api_key = test_organization
+        storage_cleanup(f"./storage/{org.id}")
+        document_id = self.ingest(client, api_key, b"%PDF-1.4 version 1")["document_id"]
+        before = chunk_repo.get_by_document(org.id, document_id)
+        fake_parser.pages = [numbered_sentences(0, 70) + " A new closing paragraph."]
+
+        # Act
+        files = {"file": ("handbook-v2.pdf", io.BytesIO(b"%PDF-1.4 version 2"), "application/pdf")}
+        response = client.put(f"/api/documents/{document_id}", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["document_id"] == document_id
+        assert data["chunks_unchanged"] >= 1
+        assert data["chunks_added"] >= 1
+        assert data["chunks_unchanged"] + data["chunks_added"] == data["chunks_total"]
+
+        after = chunk_repo.get_by_document(org.id, document_id)
+        assert [c.chunk_index for c in after] == list(range(data["chunks_total"]))
+        assert after[0].id == before[0].id
+        assert after[-1].content.endswith("A new closing paragraph.")
+        assert len({c.id for c in before} - {c.id for c in after}) == data["chunks_deleted"]
+
+        document = doc_repo.get_by_id(org.id, document_id)
+        assert document.title == "handbook-v2.pdf"
+        assert document.document_hash == data["document_hash"]
+        assert Path(f"./storage/{org.id}/{document_id}.bin").read_bytes() == b"%PDF-1.4 version 2"
+
+    def test_update_document_with_the_same_file_changes_nothing(
+        self,
+        client: TestClient,
+        fake_parser: ParserFake,
+        test_organization: Organization,
+        chunk_repo: PostgreSQL_ChunkRepository,
+        storage_cleanup
+    ):
+        """Test that re-uploading the same bytes keeps every chunk"""
+        # Arrange
+        org, api_key = test_organization
+        storage_cleanup(f"./storage/{org.id}")
+        created = self.ingest(client, api_key, b"%PDF-1.4 same")
+        before = chunk_repo.get_by_document(org.id, created["document_id"])
+
+        # Act
+        files = {"file": ("handbook.pdf", io.BytesIO(b"%PDF-1.4 same"), "application/pdf")}
+        response = client.put(f"/api/documents/{created['document_id']}", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["chunks_unchanged"], data["chunks_added"], data["chunks_deleted"]) == (len(before), 0, 0)
+        assert [c.id for c in chunk_repo.get_by_document(org.id, created["document_id"])] == [c.id for c in before]
+
+    def test_update_document_with_the_content_of_another_document_returns_409(
+        self,
+        client: TestClient,
+        fake_parser: ParserFake,
+        test_organization: Organization,
+        storage_cleanup
+    ):
+        """Test that a document can't be updated to the content of another document"""
+        # Arrange
+        org, api_key = test_organization
+        storage_cleanup(f"./storage/{org.id}")
+        first = self.ingest(client, api_key, b"%PDF-1.4 first")
+        fake_parser.pages = ["Another document entirely. " * 10]
+        self.ingest(client, api_key, b"%PDF-1.4 second")
+
+        # Act
+        files = {"file": ("first.pdf", io.BytesIO(b"%PDF-1.4 second"), "application/pdf")}
+        response = client.put(f"/api/documents/{first['document_id']}", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 409
+
+    def test_update_unknown_document_returns_404(
+        self,
+        client: TestClient,
+        fake_parser: ParserFake,
+        test_organization: Organization
+    ):
+        """Test that updating a document of another organization (or no document) returns 404"""
+        # Arrange
+        org, api_key = test_organization
+        files = {"file": ("handbook.pdf", io.BytesIO(b"%PDF-1.4 data"), "application/pdf")}
+
+        # Act
+        response = client.put(f"/api/documents/{uuid.uuid4()}", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 404
@@ -3,8 +3,9 @@ Integration tests for router_3_ask_question.py endpoint
 Tests the entire vertical pipeline: API -> Auth -> Use Case -> Retriever -> LLM -> Repository -> Database
 """
 import io
+import json
 import uuid
-from app.api.dependencies import get_llm_client
+from app.api.dependencies import get_answer_cache, get_embedder, get_llm_client
 import pytest
 from pathlib import Path
 from fastapi.testclient import TestClient
@@ -13,13 +14,23 @@ from sqlalchemy.orm import Session
 from app.api.main import app
 from app.infra.db.engine import get_db_session
 from app.infra.db.implementations import (
+    PostgreSQL_ChunkRepository,
     PostgreSQL_QueryRepository,
     PostgreSQL_LLMUsageRepository,
     PostgreSQL_QueryChunkRepository,
+    PostgreSQL_UsageRollupRepository,
 )
 from app.domain.entities import Organization
+from app.domain.types import LLMStreamEvent
 from app.application.services.api_key import generate_api_key, hash_api_key
-from tests.use_cases.helpers import make_db_session
+from tests.use_cases.helpers import (
+    add_test_document,
+    add_test_organization,
+    axis_embedding,
+    delete_test_organization,
+    make_db_session,
+    make_test_chunk,
+)
 
 from app.infra.llm.implementations import FakeLLMClient
 
@@ -637,3 +648,145 @@ class TestAskQuestionEndpointEdgeCases:
         assert data["answer"] is not None
         assert len(data["answer"]) > 0
         assert isinstance(data["answer"], str)
+
+
+class QuestionEmbedderFake:
+    """Every question is embedded on the first axis, like the chunks of organization_with_chunks"""
+    model_name = "fake-embedding"
+    dimensions = 384
+
+    def embed_text(self, text):
+        return axis_embedding(1, 0)
+
+    def embed_many(self, texts):
+        return [axis_embedding(1, 0) for _ in texts]
+
+
+class FailingStreamLLMClient(FakeLLMClient):
+    """Streams one word, then the connection to the LLM drops"""
+    def stream(self, prompt):
+        yield LLMStreamEvent(delta="Partial")
+        raise ConnectionError("LLM connection dropped")
+
+
+@pytest.fixture
+def stream_client(client: TestClient, monkeypatch):
+    """Fixture that adds a fake embedder (and no answer cache) to the client, so streamed questions never leave the process"""
+    monkeypatch.setenv("PROMPT_MAX_CONTEXT_TOKENS", "0") #no tokenizer download, the prompt budget has its own tests.
+    app.dependency_overrides[get_embedder] = lambda: QuestionEmbedderFake()
+    app.dependency_overrides[get_answer_cache] = lambda: None
+    return client
+
+
+@pytest.fixture
+def organization_with_chunks(db_session: Session):
+    """Fixture that creates an organization with one document of two chunks, deleted afterwards"""
+    org, api_key = add_test_organization(db_session, "Stream Question Org")
+    document = add_test_document(db_session, org, content="Refunds are accepted within thirty days.")
+    PostgreSQL_ChunkRepository(db_session).add_many([
+        make_test_chunk(document, 0, "Refunds are accepted within thirty days.", axis_embedding(1, 0.1)),
+        make_test_chunk(document, 1, "Shipping is free above fifty euros.", axis_embedding(1, 0.5)),
+    ])
+    db_session.commit()
+    yield org, api_key
+    delete_test_organization(db_session, org.id)
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAskQuestionStreamEndpoint:
+    """Test suite for POST /api/questions/stream (Server-Sent Events)"""
+
+    def test_stream_sends_token_events_then_done(
+        self,
+        stream_client: TestClient,
+        organization_with_chunks,
+        db_session: Session,
+    ):
+        """Test that the deltas add up to the answer of the done event, persisted like POST /questions"""
+        # Arrange
+        org, api_key = organization_with_chunks
+
+        # Act
+        response = stream_client.post("/api/questions/stream", headers={"X-API-Key": api_key}, json={"question": "Can I get a refund?"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        names = [name for name, _ in events]
+        assert names[-1] == "done"
+        assert set(names[:-1]) == {"token"}
+
+        done = events[-1][1]
+        assert "".join(data["delta"] for name, data in events[:-1]) == done["answer"]
+        assert (done["question"], done["model_name"], done["total_tokens"], done["cache_hit"]) == ("Can I get a refund?", "fake-llm", 130, False)
+
+        query_id = uuid.UUID(done["query_id"])
+        verify_session = make_db_session()
+        assert PostgreSQL_QueryRepository(verify_session).get_by_id(org.id, query_id).answer == done["answer"]
+        assert PostgreSQL_LLMUsageRepository(verify_session).get_by_query_id(org.id, query_id).total_tokens == 130
+        assert len(PostgreSQL_QueryChunkRepository(verify_session).get_by_query_id(org.id, query_id)) == 2
+        assert PostgreSQL_UsageRollupRepository(verify_session).get_totals_by_organization(org.id).request_count == 1
+        verify_session.close()
+
+    def test_stream_applies_the_retrieval_overrides(
+        self,
+        stream_client: TestClient,
+        organization_with_chunks,
+    ):
+        """Test that top_k set on the request limits the chunks linked to the query"""
+        org, api_key = organization_with_chunks
+
+        response = stream_client.post("/api/questions/stream", headers={"X-API-Key": api_key}, json={"question": "Can I get a refund?", "top_k": 1})
+
+        assert response.status_code == 200
+        query_id = uuid.UUID(parse_sse(response.text)[-1][1]["query_id"])
+        links = PostgreSQL_QueryChunkRepository(make_db_session()).get_by_query_id(org.id, query_id)
+        assert len(links) == 1
+
+    def test_stream_without_documents_returns_404_before_streaming(
+        self,
+        stream_client: TestClient,
+        test_organization_no_documents,
+    ):
+        """Test that retrieval errors are regular HTTP errors, not events"""
+        org, api_key = test_organization_no_documents
+
+        response = stream_client.post("/api/questions/stream", headers={"X-API-Key": api_key}, json={"question": "Anything?"})
+
+        assert response.status_code == 404
+        assert not response.headers["content-type"].startswith("text/event-stream")
+
+    def test_stream_reports_an_llm_failure_as_an_error_event(
+        self,
+        stream_client: TestClient,
+        organization_with_chunks,
+    ):
+        """Test that a failure once the stream started ends it with an error event, and no usage is recorded"""
+        # Arrange
+        org, api_key = organization_with_chunks
+        app.dependency_overrides[get_llm_client] = lambda: FailingStreamLLMClient()
+
+        # Act
+        response = stream_client.post("/api/questions/stream", headers={"X-API-Key": api_key}, json={"question": "Can I get a refund?"})
+
+        # Assert
+        assert response.status_code == 200
+        events = parse_sse(response.text)
+        assert events[0] == ("token", {"delta": "Partial"})
+        assert events[-1][0] == "error"
+        assert "LLM connection dropped" in events[-1][1]["detail"]
+        assert PostgreSQL_UsageRollupRepository(make_db_session()).get_totals_by_organization(org.id).request_count == 0
+
+    def test_stream_invalid_api_key_returns_401(self, stream_client: TestClient):
+        """Test that an invalid API key returns 401"""
+        response = stream_client.post("/api/questions/stream", headers={"X-API-Key": "invalid_api_key_12345"}, json={"question": "Anything?"})
+
+        assert response.status_code == 401
@@ -4,6 +4,8 @@ Tests the vertical pipeline: API -> Auth -> Use Case -> Repository -> Database
 """
 
 import uuid
+from datetime import datetime, timezone
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -16,6 +18,7 @@ from app.infra.db.implementations import (
     PostgreSQL_ChunkRepository,
     PostgreSQL_QueryRepository,
     PostgreSQL_LLMUsageRepository,
+    PostgreSQL_UsageRollupRepository,
 )
 from app.domain.entities import Organization, Document, Chunk, Query, LLMUsage
 from app.application.services.api_key import generate_api_key, hash_api_key
@@ -186,6 +189,8 @@ def test_organization_with_dashboard_data(db_session: Session):
             estimated_cost_usd=0.0023,
         )
     )
+    # The usage summary reads the daily rollups, which the question path maintains: rebuilt here like a backfill.
+    PostgreSQL_UsageRollupRepository(db_session).rebuild(org.id)
 
     db_session.commit()
 
@@ -472,6 +477,8 @@ class TestGetDashboardEndpoint:
                 estimated_cost_usd=0.0007,
             )
         )
+        PostgreSQL_UsageRollupRepository(db_session).rebuild(org1.id)
+        PostgreSQL_UsageRollupRepository(db_session).rebuild(org2.id)
 
         db_session.commit()
 
@@ -528,6 +535,7 @@ class TestGetDashboardEndpointEdgeCases:
             latency_ms=33,
         )
         query_repo.add(query)
+        PostgreSQL_UsageRollupRepository(db_session).rebuild(org.id)
         db_session.commit()
 
         response = client.get("/api/dashboard", headers={"X-API-Key": api_key})
@@ -549,4 +557,139 @@ class TestGetDashboardEndpointEdgeCases:
         assert usage["total_completion_tokens"] == 0
         assert usage["total_tokens"] == 0
         assert usage["total_estimated_cost_usd"] == 0.0
-        assert usage["models_used"] == []
\ No newline at end of file
+        assert usage["models_used"] == []
+
+@pytest.fixture
+def test_organization_with_three_of_each(db_session: Session):
+    """Organization with 3 documents and 3 queries, one per day from 2026-03-01"""
+    org_repo = PostgreSQL_OrganizationRepository(db_session)
+    doc_repo = PostgreSQL_DocumentRepository(db_session)
+    query_repo = PostgreSQL_QueryRepository(db_session)
+
+    api_key = generate_api_key()
+    org = Organization(
+        name=get_unique_org_name("Paginated Dashboard Org"),
+        api_key_hash=hash_api_key(api_key),
+    )
+    org_repo.add(org)
+    db_session.flush()
+
+    for day in (1, 2, 3):
+        created_at = datetime(2026, 3, day, tzinfo=timezone.utc)
+        doc_repo.add(
+            Document(
+                organization_id=org.id,
+                title=f"doc-{day}.pdf",
+                source_type="pdf",
+                content=f"Content of document {day}.",
+                document_hash=f"hash-doc-{day}-{uuid.uuid4().hex}",
+                created_at=created_at,
+            )
+        )
+        query_repo.add(
+            Query(
+                organization_id=org.id,
+                question=f"Question {day}?",
+                answer=f"Answer {day}.",
+                latency_ms=10,
+                created_at=created_at,
+            )
+        )
+    db_session.commit()
+
+    return org, api_key
+
+
+class TestGetDashboardPagination:
+    """Keyset pagination and time window of GET /api/dashboard"""
+
+    def test_get_dashboard_pages_through_documents_and_queries(
+        self,
+        client: TestClient,
+        test_organization_with_three_of_each,
+    ):
+        org, api_key = test_organization_with_three_of_each
+        headers = {"X-API-Key": api_key}
+
+        first = client.get("/api/dashboard", headers=headers, params={"limit": 2})
+        assert first.status_code == 200, first.json()
+        first_page = first.json()
+        assert [d["filename"] for d in first_page["documents"]] == ["doc-1.pdf", "doc-2.pdf"]
+        assert [q["question"] for q in first_page["queries"]] == ["Question 1?", "Question 2?"]
+        assert first_page["next_documents_cursor"] is not None
+        assert first_page["next_queries_cursor"] is not None
+
+        # The two lists are paged independently: only the documents move on here.
+        second = client.get(
+            "/api/dashboard",
+            headers=headers,
+            params={"limit": 2, "documents_cursor": first_page["next_documents_cursor"]},
+        )
+        assert second.status_code == 200, second.json()
+        second_page = second.json()
+        assert [d["filename"] for d in second_page["documents"]] == ["doc-3.pdf"]
+        assert second_page["next_documents_cursor"] is None
+        assert [q["question"] for q in second_page["queries"]] == ["Question 1?", "Question 2?"]
+
+        last = client.get(
+            "/api/dashboard",
+            headers=headers,
+            params={"limit": 2, "queries_cursor": first_page["next_queries_cursor"]},
+        )
+        assert [q["question"] for q in last.json()["queries"]] == ["Question 3?"]
+        assert last.json()["next_queries_cursor"] is None
+
+    def test_get_dashboard_applies_the_time_window(
+        self,
+        client: TestClient,
+        test_organization_with_three_of_each,
+    ):
+        org, api_key = test_organization_with_three_of_each
+
+        response = client.get(
+            "/api/dashboard",
+            headers={"X-API-Key": api_key},
+            params={"since": "2026-03-02T00:00:00Z", "until": "2026-03-03T00:00:00Z"},
+        )
+
+        assert response.status_code == 200, response.json()
+        data = response.json()
+        assert [d["filename"] for d in data["documents"]] == ["doc-2.pdf"]
+        assert [q["question"] for q in data["queries"]] == ["Question 2?"]
+
+    def test_get_dashboard_with_invalid_cursor_returns_400(
+        self,
+        client: TestClient,
+        test_organization_with_three_of_each,
+    ):
+        org, api_key = test_organization_with_three_of_each
+
+        response = client.get("/api/dashboard", headers={"X-API-Key": api_key}, params={"documents_cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+    def test_get_dashboard_with_since_after_until_returns_400(
+        self,
+        client: TestClient,
+        test_organization_with_three_of_each,
+    ):
+        org, api_key = test_organization_with_three_of_each
+
+        response = client.get(
+            "/api/dashboard",
+            headers={"X-API-Key": api_key},
+            params={"since": "2026-03-03T00:00:00Z", "until": "2026-03-02T00:00:00Z"},
+        )
+
+        assert response.status_code == 400
+
+    def test_get_dashboard_with_out_of_range_limit_returns_422(
+        self,
+        client: TestClient,
+        test_organization_with_three_of_each,
+    ):
+        org, api_key = test_organization_with_three_of_each
+
+        response = client.get("/api/dashboard", headers={"X-API-Key": api_key}, params={"limit": 0})
+
+        assert response.status_code == 422
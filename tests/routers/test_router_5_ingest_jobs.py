@@ -0,0 +1,219 @@
+"""
+Integration tests for router_5_ingest_jobs.py endpoints
+Tests the vertical pipeline: API -> Auth -> Use Case -> Repository -> Database -> Storage
+"""
+import io
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api import main, router_5_ingest_jobs
+from app.api.dependencies import get_answer_cache
+from app.api.main import app
+from app.infra.db.engine import get_db_session
+from app.infra.db.implementations import PostgreSQL_IngestJobRepository
+from tests.use_cases.helpers import add_test_document, add_test_organization, delete_test_organization, make_db_session
+
+
+class AnswerCacheSpy:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, organization_id):
+        self.invalidated.append(organization_id)
+
+
+@pytest.fixture
+def db_session() -> Session:
+    """Fixture that provides a test database session"""
+    session = make_db_session()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def answer_cache() -> AnswerCacheSpy:
+    return AnswerCacheSpy()
+
+
+@pytest.fixture
+def client(db_session: Session, answer_cache: AnswerCacheSpy, monkeypatch):
+    """Fixture that provides a TestClient with overridden database dependency"""
+    def override_get_db_session():
+        try:
+            yield db_session
+        finally:
+            pass
+
+    # The background sync would apply succeeded jobs on its own: only the status poll applies them here.
+    monkeypatch.setattr(main, "INGEST_JOB_SYNC_INTERVAL_SECONDS", 0)
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    app.dependency_overrides[get_answer_cache] = lambda: answer_cache
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def test_organization(db_session: Session):
+    """Fixture that creates a test organization with API key, deleted with its jobs afterwards"""
+    org, api_key = add_test_organization(db_session, "Test Org for Ingest Jobs")
+    yield org, api_key
+    delete_test_organization(db_session, org.id)
+
+
+@pytest.fixture
+def storage_cleanup(test_organization):
+    """Fixture that removes the files stored for the test organization"""
+    yield
+    shutil.rmtree(f"./storage/{test_organization[0].id}", ignore_errors=True)
+
+
+def enqueue(client: TestClient, api_key: str) -> dict:
+    files = {"file": ("queued.pdf", io.BytesIO(b"%PDF-1.4 queued"), "application/pdf")}
+    response = client.post("/api/ingest-jobs", headers={"X-API-Key": api_key}, files=files)
+    assert response.status_code == 202
+    return response.json()
+
+
+def succeed_job(db_session: Session, org, job_id: uuid.UUID):
+    # What the worker does once the document is ingested.
+    document = add_test_document(db_session, org)
+    repo = PostgreSQL_IngestJobRepository(db_session)
+    repo.update(repo.get_by_id(org.id, job_id).mark_running().mark_succeeded(document.id, document.document_hash, 0))
+    db_session.commit()
+    return document
+
+
+class TestEnqueueIngestJobEndpoint:
+    """Test suite for POST /api/ingest-jobs"""
+
+    def test_enqueue_ingest_job_returns_202_and_stores_the_file(self, client: TestClient, test_organization, db_session: Session, storage_cleanup):
+        """Test that the upload is queued and stored under the job id"""
+        # Arrange
+        org, api_key = test_organization
+        files = {"file": ("queued.pdf", io.BytesIO(b"%PDF-1.4 queued"), "application/pdf")}
+
+        # Act
+        response = client.post("/api/ingest-jobs", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 202
+        data = response.json()
+        assert data["organization_id"] == str(org.id)
+        assert data["filename"] == "queued.pdf"
+        assert (data["status"], data["attempts"], data["document_id"]) == ("queued", 0, None)
+
+        job = PostgreSQL_IngestJobRepository(db_session).get_by_id(org.id, uuid.UUID(data["job_id"]))
+        assert job.status == "queued"
+        assert Path(f"./storage/{org.id}/{data['job_id']}.bin").read_bytes() == b"%PDF-1.4 queued"
+
+    def test_enqueue_empty_file_returns_400(self, client: TestClient, test_organization):
+        """Test that an empty upload is rejected before anything is queued"""
+        # Arrange
+        org, api_key = test_organization
+        files = {"file": ("empty.pdf", io.BytesIO(b""), "application/pdf")}
+
+        # Act
+        response = client.post("/api/ingest-jobs", headers={"X-API-Key": api_key}, files=files)
+
+        # Assert
+        assert response.status_code == 400
+
+    def test_enqueue_invalid_api_key_returns_401(self, client: TestClient):
+        """Test that an invalid API key returns 401"""
+        files = {"file": ("queued.pdf", io.BytesIO(b"%PDF-1.4 queued"), "application/pdf")}
+
+        response = client.post("/api/ingest-jobs", headers={"X-API-Key": "invalid_api_key_12345"}, files=files)
+
+        assert response.status_code == 401
+
+
+class TestGetIngestJobEndpoint:
+    """Test suite for GET /api/ingest-jobs/{job_id}"""
+
+    def test_get_queued_job(self, client: TestClient, test_organization, answer_cache: AnswerCacheSpy, storage_cleanup):
+        """Test that a queued job is returned as is, without touching the answer cache"""
+        # Arrange
+        org, api_key = test_organization
+        job_id = enqueue(client, api_key)["job_id"]
+
+        # Act
+        response = client.get(f"/api/ingest-jobs/{job_id}", headers={"X-API-Key": api_key})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        assert answer_cache.invalidated == []
+
+    def test_get_succeeded_job_invalidates_the_answer_cache_once(self, client: TestClient, test_organization, db_session: Session, answer_cache: AnswerCacheSpy, storage_cleanup):
+        """Test that the first poll that sees the job succeeded applies it, later polls don't"""
+        # Arrange
+        org, api_key = test_organization
+        job_id = enqueue(client, api_key)["job_id"]
+        document = succeed_job(db_session, org, uuid.UUID(job_id))
+
+        # Act
+        first = client.get(f"/api/ingest-jobs/{job_id}", headers={"X-API-Key": api_key})
+        second = client.get(f"/api/ingest-jobs/{job_id}", headers={"X-API-Key": api_key})
+
+        # Assert
+        assert first.status_code == second.status_code == 200
+        data = first.json()
+        assert (data["status"], data["attempts"], data["document_id"]) == ("succeeded", 1, str(document.id))
+        assert answer_cache.invalidated == [org.id]
+
+    def test_get_job_of_another_organization_returns_404(self, client: TestClient, test_organization, db_session: Session, storage_cleanup):
+        """Test that a job id is only visible to the organization that queued it"""
+        # Arrange
+        org, api_key = test_organization
+        job_id = enqueue(client, api_key)["job_id"]
+        other, other_api_key = add_test_organization(db_session, "Other Org for Ingest Jobs")
+
+        try:
+            # Act
+            response = client.get(f"/api/ingest-jobs/{job_id}", headers={"X-API-Key": other_api_key})
+
+            # Assert
+            assert response.status_code == 404
+        finally:
+            delete_test_organization(db_session, other.id)
+
+    def test_get_unknown_job_returns_404(self, client: TestClient, test_organization):
+        """Test that an unknown job id returns 404"""
+        org, api_key = test_organization
+
+        response = client.get(f"/api/ingest-jobs/{uuid.uuid4()}", headers={"X-API-Key": api_key})
+
+        assert response.status_code == 404
+
+
+class TestSyncSucceededJobs:
+    """Test suite for the background sync of jobs ingested by the worker"""
+
+    def test_sync_applies_jobs_that_nobody_polled(self, client: TestClient, test_organization, db_session: Session, answer_cache: AnswerCacheSpy, monkeypatch, storage_cleanup):
+        """Test that a succeeded job is applied by the sync without any status poll, and only once"""
+        # Arrange
+        org, api_key = test_organization
+        monkeypatch.setattr(router_5_ingest_jobs, "get_answer_cache", lambda: answer_cache)
+        job_id = enqueue(client, api_key)["job_id"]
+        since = datetime.now(timezone.utc) - timedelta(seconds=1)
+        succeed_job(db_session, org, uuid.UUID(job_id))
+
+        # Act
+        next_since = router_5_ingest_jobs.sync_succeeded_jobs(since)
+        router_5_ingest_jobs.sync_succeeded_jobs(next_since)
+
+        # Assert
+        assert next_since > since
+        assert answer_cache.invalidated.count(org.id) == 1 #the queue is shared: other organizations' jobs may be synced too.
@@ -2,9 +2,20 @@
 
 import hashlib
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+import uuid
+
+from pgvector.psycopg import register_vector
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
+from app.application.services.api_key import generate_api_key, hash_api_key
+from app.application.use_cases import IngestDocument, UpdateDocument, chunk_content_hash
+from app.domain.entities import Chunk, Document, Organization
+from app.domain.interfaces import ChunkerInterface, PDFParserInterface
+from app.domain.types import StagedFile
+
 
 def make_db_session():
     user = os.environ["DB_USER"]
@@ -15,6 +26,8 @@ def make_db_session():
     DATABASE_URL = f"postgresql+psycopg://{user}:{password}@{host}:{port}/{test_db_name}"
 
     engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    # Same as app.infra.db.engine: the binary COPY of chunks needs the vector type registered on the connection.
+    event.listen(engine, "connect", lambda dbapi_connection, connection_record: register_vector(dbapi_connection))
     SessionLocal = sessionmaker(
         autocommit=False,
         autoflush=False,
@@ -23,3 +36,209 @@ def make_db_session():
         future=True,
     )
     return SessionLocal()
+
+
+
+# --- Rows for the tests that run against the test database (repositories, routers). --- #
+
+EMBEDDING_DIMENSIONS = 384 #chunks.embedding is vector(384).
+
+
+def axis_embedding(*weights: float) -> list[float]:
+    # `weights` on the first axes, zeros elsewhere: cosine similarities are easy to work out by hand.
+    return [float(w) for w in weights] + [0.0] * (EMBEDDING_DIMENSIONS - len(weights))
+
+
+def add_test_organization(db, name: str = "Test Org") -> tuple[Organization, str]:
+    # Committed, like the organizations created through the API. Returns the plain API key too.
+    from app.infra.db.implementations import PostgreSQL_OrganizationRepository
+
+    api_key = generate_api_key()
+    organization = Organization(name=f"{name} {uuid.uuid4()}", api_key_hash=hash_api_key(api_key))
+    PostgreSQL_OrganizationRepository(db).add(organization)
+    db.commit()
+    return organization, api_key
+
+
+def delete_test_organization(db, organization_id: uuid.UUID) -> None:
+    # Documents, chunks, queries, jobs and rollups go with it (ON DELETE CASCADE).
+    db.rollback()
+    db.execute(text("DELETE FROM organizations WHERE id = :id"), {"id": organization_id})
+    db.commit()
+
+
+def add_test_document(db, organization: Organization, content: str = "document text", title: str = "doc.pdf") -> Document:
+    from app.infra.db.implementations import PostgreSQL_DocumentRepository
+
+    document = Document(
+        organization_id=organization.id,
+        title=title,
+        source_type="pdf",
+        content=content,
+        document_hash=hashlib.sha256(f"{content} {uuid.uuid4()}".encode()).hexdigest(),
+    )
+    PostgreSQL_DocumentRepository(db).add(document)
+    return document
+
+
+def make_test_chunk(document: Document, chunk_index: int, content: str, embedding: list[float], token_count: int | None = None) -> Chunk:
+    return Chunk(
+        document_id=document.id,
+        organization_id=document.organization_id,
+        chunk_index=chunk_index,
+        content=content,
+        embedding=embedding,
+        token_count=token_count,
+        content_hash=chunk_content_hash(content),
+        embedding_model="fake-embedding:384",
+    )
+
+
+# --- In-memory fakes shared by the use case tests that don't need a database. --- #
+
+FAKE_HASH = "a" * 64
+
+
+def make_org() -> Organization:
+    return Organization(name="Acme", api_key_hash=FAKE_HASH)
+
+
+def make_upload(content: bytes = b"%PDF-1.4 data") -> StagedFile:
+    return StagedFile(path="staged.pdf", size=len(content), sha256=hashlib.sha256(content).hexdigest())
+
+
+class DocRepoFake:
+    def __init__(self, documents=(), hash_taken_on_update=False):
+        self.documents = {d.id: d for d in documents}
+        self.hash_taken_on_update = hash_taken_on_update #another document got the new hash after the get_by_hash check.
+        self.added = []
+        self.locked = []
+        self.updated = []
+
+    def add_if_new(self, document):
+        if self.get_by_hash(document.organization_id, document.document_hash) is not None:
+            return False
+        self.added.append(document)
+        self.documents[document.id] = document
+        return True
+
+    def get_by_hash(self, organization_id, document_hash):
+        return next((d for d in self.documents.values() if d.organization_id == organization_id and d.document_hash == document_hash), None)
+
+    def get_by_id_for_update(self, organization_id, id):
+        document = self.documents.get(id)
+        if document is None or document.organization_id != organization_id:
+            return None
+        self.locked.append(id)
+        return document
+
+    def update(self, document):
+        if self.hash_taken_on_update:
+            return False
+        self.updated.append(document)
+        self.documents[document.id] = document
+        return True
+
+
+class StorageSpy:
+    def __init__(self):
+        self.saved = []
+        self.deleted = []
+
+    def save_staged(self, organization_id, document_id, staged):
+        self.saved.append(document_id)
+
+    def delete(self, organization_id, document_id):
+        self.deleted.append(document_id)
+
+
+class ParserFake(PDFParserInterface):
+    def __init__(self, pages=("parsed text",), fail_after=None):
+        self.pages = list(pages)
+        self.fail_after = fail_after #index of the first page that can't be parsed.
+
+    def parse_pdf(self, file_content):
+        return "\n".join(self.pages)
+
+    def parse_pdf_file(self, path):
+        return "\n".join(self.pages)
+
+    def iter_pdf_file_pages(self, path):
+        for i, page in enumerate(self.pages):
+            if i == self.fail_after:
+                raise ValueError("corrupted page")
+            yield page
+
+
+class ChunkerFake(ChunkerInterface):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def chunk_text(self, content):
+        return self.chunks
+
+
+class EmbedderSpy:
+    model_name = "fake-embedding"
+
+    def __init__(self, dimensions=2, delay=0.0, fail_on_call=None, wrong_count=False):
+        self.dimensions = dimensions
+        self.delay = delay
+        self.fail_on_call = fail_on_call
+        self.wrong_count = wrong_count
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def embed_many(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+            call = len(self.calls)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if call == self.fail_on_call:
+                raise Exception("rate limited")
+            vectors = [[float(len(t))] + [0.0] * (self.dimensions - 2) + [1.0] for t in texts]
+            return vectors[:-1] if self.wrong_count else vectors
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class CommitSpy:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise Exception("db down on commit")
+
+
+def build_ingest_document(chunk_repo, embedder, parser=None, chunker=None, doc_repo=None, storage=None, **kwargs) -> IngestDocument:
+    return IngestDocument(
+        doc_repo=doc_repo or DocRepoFake(),
+        chunk_repo=chunk_repo,
+        storage=storage or StorageSpy(),
+        embedder=embedder,
+        parser=parser or ParserFake(),
+        chunker=chunker,
+        **kwargs,
+    )
+
+
+def build_update_document(doc_repo, chunk_repo, chunker, embedder=None, storage=None, commit=None, **kwargs) -> UpdateDocument:
+    return UpdateDocument(
+        doc_repo=doc_repo,
+        chunk_repo=chunk_repo,
+        storage=storage or StorageSpy(),
+        embedder=embedder or EmbedderSpy(),
+        parser=ParserFake(),
+        chunker=chunker,
+        commit=commit or CommitSpy(),
+        **kwargs,
+    )
@@ -10,10 +10,12 @@ from app.application.exceptions import (
     QueryPersistenceError,
     LLMUsagePersistenceError,
     QueryChunkPersistenceError,
-    OrganizationNotFoundError,
     UseCaseError,
+    UsageRollupPersistenceError,
 )
 from app.domain.entities import Organization
+from app.domain.types import CachedAnswer, LLMStreamEvent, RetrievalOptions
+from app.application.dto import AskQuestionResult
 
 
 FAKE_HASH = "a" * 64
@@ -42,16 +44,6 @@ class FakeLLMResponse:
     estimated_cost_usd: float = 0.001
 
 
-class OrgRepoFake:
-    def __init__(self, org=None):
-        self.org = org
-        self.calls = []
-
-    def get_by_id(self, organization_id):
-        self.calls.append(("get_by_id", organization_id))
-        return self.org
-
-
 class QueryRepoSpy:
     def __init__(self, fail_on_add=False, fail_on_update=False):
         self.fail_on_add = fail_on_add
@@ -82,8 +74,9 @@ class LLMUsageRepoSpy:
 
 
 class QueryChunkRepoSpy:
-    def __init__(self, fail_on_add_links=False):
+    def __init__(self, fail_on_add_links=False, deleted_chunk_ids=()):
         self.fail_on_add_links = fail_on_add_links
+        self.deleted_chunk_ids = set(deleted_chunk_ids)
         self.added_links = []
 
     def add_links(self, query_chunks):
@@ -91,6 +84,12 @@ class QueryChunkRepoSpy:
             raise Exception("db down on query chunk add_links")
         self.added_links.extend(query_chunks)
 
+    def add_links_if_chunks_exist(self, query_chunks):
+        if any(qc.chunk_id in self.deleted_chunk_ids for qc in query_chunks):
+            return False
+        self.add_links(query_chunks)
+        return True
+
 
 class RetrieverSpy:
     def __init__(self, chunks=None, fail=False):
@@ -98,8 +97,9 @@ class RetrieverSpy:
         self.fail = fail
         self.calls = []
 
-    def retrieve_best_chunks(self, organization_id, question):
+    def retrieve_best_chunks(self, organization_id, question, options=None):
         self.calls.append(("retrieve_best_chunks", organization_id, question))
+        self.options = options
         if self.fail:
             raise Exception("retriever failed")
         return self.chunks
@@ -131,6 +131,36 @@ class LLMClientSpy:
         return self.response
 
 
+class AnswerCacheFake:
+    def __init__(self, cached=None, fail=False):
+        self.cached = cached
+        self.fail = fail
+        self.stored = []
+
+    def get(self, organization_id, question, options=None):
+        if self.fail:
+            raise Exception("cache down")
+        self.looked_up_options = options
+        return self.cached
+
+    def set(self, organization_id, question, llm_response, retrieved_chunks, options=None):
+        self.stored.append((organization_id, question, llm_response, retrieved_chunks, options))
+
+    def invalidate(self, organization_id):
+        self.cached = None
+
+
+class UsageRollupSpy:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.increments = []
+
+    def increment(self, **kwargs):
+        if self.fail:
+            raise Exception("db down on rollup upsert")
+        self.increments.append(kwargs)
+
+
 def make_retrieved_chunk(score=0.95, content="Chunk content", chunk_index=0):
     return FakeRetrievedChunk(
         chunk_id=uuid.uuid4(),
@@ -141,16 +171,16 @@ def make_retrieved_chunk(score=0.95, content="Chunk content", chunk_index=0):
 
 
 def build_use_case(
-    org_repo=None,
     query_repo=None,
     llm_usage_repo=None,
     query_chunk_repo=None,
     retriever=None,
     prompt_builder=None,
     llm_client=None,
+    answer_cache=None,
+    usage_rollup_repo=None,
+    commit=None,
 ):
-    if org_repo is None:
-        org_repo = OrgRepoFake(org=make_org())
     if query_repo is None:
         query_repo = QueryRepoSpy()
     if llm_usage_repo is None:
@@ -165,17 +195,18 @@ def build_use_case(
         llm_client = LLMClientSpy()
 
     uc = AskQuestion(
-        org_repo=org_repo,
         query_repo=query_repo,
         llm_usage_repo=llm_usage_repo,
         query_chunk_repo=query_chunk_repo,
         retriever=retriever,
         prompt_builder=prompt_builder,
         llm_client=llm_client,
+        answer_cache=answer_cache,
+        usage_rollup_repo=usage_rollup_repo,
+        commit=commit,
     )
 
     return uc, {
-        "org_repo": org_repo,
         "query_repo": query_repo,
         "llm_usage_repo": llm_usage_repo,
         "query_chunk_repo": query_chunk_repo,
@@ -189,14 +220,7 @@ def test_ask_question_rejects_empty_question():
     uc, _ = build_use_case()
 
     with pytest.raises(EmptyQuestionError):
-        uc.execute(organization_id=uuid.uuid4(), question="   ")
-
-
-def test_ask_question_rejects_when_organization_does_not_exist():
-    uc, _ = build_use_case(org_repo=OrgRepoFake(org=None))
-
-    with pytest.raises(OrganizationNotFoundError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="   ")
 
 
 def test_ask_question_persists_query_asap_and_raises_if_no_relevant_chunks():
@@ -204,7 +228,7 @@ def test_ask_question_persists_query_asap_and_raises_if_no_relevant_chunks():
     uc, deps = build_use_case(retriever=retriever)
 
     with pytest.raises(NoRelevantChunksFoundError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
     assert len(deps["query_repo"].added) == 1
     persisted_query = deps["query_repo"].added[0]
@@ -221,7 +245,7 @@ def test_ask_question_wraps_query_add_persistence_error():
     uc, _ = build_use_case(query_repo=query_repo)
 
     with pytest.raises(QueryPersistenceError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_wraps_retriever_error():
@@ -229,7 +253,7 @@ def test_ask_question_wraps_retriever_error():
     uc, _ = build_use_case(retriever=retriever)
 
     with pytest.raises(UseCaseError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_wraps_prompt_builder_error():
@@ -237,7 +261,7 @@ def test_ask_question_wraps_prompt_builder_error():
     uc, _ = build_use_case(prompt_builder=prompt_builder)
 
     with pytest.raises(UseCaseError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_wraps_llm_error():
@@ -245,11 +269,12 @@ def test_ask_question_wraps_llm_error():
     uc, _ = build_use_case(llm_client=llm_client)
 
     with pytest.raises(UseCaseError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_happy_path_returns_answer_and_persists_everything():
-    organization_id = uuid.uuid4()
+    org = make_org()
+    organization_id = org.id
     chunks = [
         make_retrieved_chunk(score=0.91, content="RAG retrieves relevant chunks.", chunk_index=0),
         make_retrieved_chunk(score=0.88, content="The LLM answers using that context.", chunk_index=1),
@@ -265,14 +290,13 @@ def test_ask_question_happy_path_returns_answer_and_persists_everything():
     )
 
     uc, deps = build_use_case(
-        org_repo=OrgRepoFake(org=make_org()),
         retriever=RetrieverSpy(chunks=chunks),
         prompt_builder=PromptBuilderSpy(prompt="FINAL PROMPT"),
         llm_client=LLMClientSpy(response=llm_response),
     )
 
     result = uc.execute(
-        organization_id=organization_id,
+        organization=org,
         question="  What is RAG?  ",
     )
 
@@ -315,11 +339,20 @@ def test_ask_question_happy_path_returns_answer_and_persists_everything():
     assert deps["query_chunk_repo"].added_links[1].rank == 2
 
 
+def test_ask_question_passes_retrieval_options_to_retriever():
+    options = RetrievalOptions(top_k=3, min_similarity=0.4, max_context_tokens=800)
+    uc, deps = build_use_case()
+
+    uc.execute(organization=make_org(), question="What is RAG?", options=options)
+
+    assert deps["retriever"].options == options
+
+
 def test_ask_question_trims_question_before_persisting():
     uc, deps = build_use_case()
 
     uc.execute(
-        organization_id=uuid.uuid4(),
+        organization=make_org(),
         question="   What is vector search?   ",
     )
 
@@ -333,7 +366,7 @@ def test_ask_question_wraps_query_update_persistence_error():
     uc, _ = build_use_case(query_repo=query_repo)
 
     with pytest.raises(QueryPersistenceError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_wraps_llm_usage_persistence_error():
@@ -341,7 +374,7 @@ def test_ask_question_wraps_llm_usage_persistence_error():
     uc, _ = build_use_case(llm_usage_repo=llm_usage_repo)
 
     with pytest.raises(LLMUsagePersistenceError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
+        uc.execute(organization=make_org(), question="What is RAG?")
 
 
 def test_ask_question_wraps_query_chunk_persistence_error():
@@ -349,4 +382,202 @@ def test_ask_question_wraps_query_chunk_persistence_error():
     uc, _ = build_use_case(query_chunk_repo=query_chunk_repo)
 
     with pytest.raises(QueryChunkPersistenceError):
-        uc.execute(organization_id=uuid.uuid4(), question="What is RAG?")
\ No newline at end of file
+        uc.execute(organization=make_org(), question="What is RAG?")
+
+
+def test_ask_question_commits_the_query_before_calling_the_llm():
+    #the DB connection goes back to the pool while the LLM answers.
+    llm_client = LLMClientSpy()
+    uc, deps = build_use_case(llm_client=llm_client, commit=lambda: llm_client.calls.append(("commit",)))
+
+    uc.execute(organization=make_org(), question="What is RAG?")
+
+    assert [c[0] for c in llm_client.calls] == ["commit", "call"]
+    assert len(deps["llm_usage_repo"].added) == 1 #written after the LLM call, in the next transaction.
+
+
+def test_ask_question_commit_failure_raises_before_the_llm_call():
+    def failing_commit():
+        raise Exception("db down on commit")
+
+    llm_client = LLMClientSpy()
+    uc, _ = build_use_case(llm_client=llm_client, commit=failing_commit)
+
+    with pytest.raises(QueryPersistenceError):
+        uc.execute(organization=make_org(), question="What is RAG?")
+    assert llm_client.calls == []
+
+
+def test_ask_question_cache_hit_skips_retrieval_and_llm():
+    cached_chunks = [make_retrieved_chunk(score=0.9), make_retrieved_chunk(score=0.8)]
+    cache = AnswerCacheFake(
+        cached=CachedAnswer(
+            question="What is RAG?",
+            llm_response=FakeLLMResponse(generated_answer="Cached answer", model_name="fake-llm"),
+            retrieved_chunks=cached_chunks,
+        )
+    )
+    uc, deps = build_use_case(answer_cache=cache)
+
+    result = uc.execute(organization=make_org(), question="What is RAG?")
+
+    assert result.answer == "Cached answer"
+    assert result.cache_hit is True
+    assert result.total_tokens == 0
+    assert result.estimated_cost_usd == 0.0
+
+    assert len(deps["retriever"].calls) == 0
+    assert len(deps["llm_client"].calls) == 0
+    assert len(deps["llm_usage_repo"].added) == 0
+
+    assert len(deps["query_repo"].added) == 1
+    assert deps["query_repo"].updated[0].cache_hit is True
+    assert [link.rank for link in deps["query_chunk_repo"].added_links] == [1, 2]
+
+
+def test_ask_question_cache_hit_on_deleted_chunks_is_a_miss():
+    #the document was updated by another API process or a worker: this process' cache was not invalidated.
+    gone = make_retrieved_chunk(score=0.9)
+    cache = AnswerCacheFake(
+        cached=CachedAnswer(
+            question="What is RAG?",
+            llm_response=FakeLLMResponse(generated_answer="Cached answer", model_name="fake-llm"),
+            retrieved_chunks=[gone],
+        )
+    )
+    uc, deps = build_use_case(answer_cache=cache, query_chunk_repo=QueryChunkRepoSpy(deleted_chunk_ids=[gone.chunk_id]))
+
+    result = uc.execute(organization=make_org(), question="What is RAG?")
+
+    assert result.cache_hit is False
+    assert result.answer == "Fake answer"
+    assert len(deps["llm_client"].calls) == 1
+    assert all(link.chunk_id != gone.chunk_id for link in deps["query_chunk_repo"].added_links)
+    assert [q.cache_hit for q in deps["query_repo"].updated] == [False]
+    assert len(cache.stored) == 1 #the stale entry was dropped and replaced.
+
+
+def test_ask_question_cache_miss_calls_llm_and_stores_answer():
+    cache = AnswerCacheFake(cached=None)
+    org = make_org()
+    organization_id = org.id
+    uc, deps = build_use_case(answer_cache=cache)
+
+    result = uc.execute(organization=org, question="What is RAG?")
+
+    assert result.cache_hit is False
+    assert len(deps["llm_client"].calls) == 1
+    assert deps["query_repo"].updated[0].cache_hit is False
+    assert len(cache.stored) == 1
+    assert cache.stored[0][0] == organization_id
+    assert cache.stored[0][1] == "What is RAG?"
+
+
+def test_ask_question_cache_is_keyed_on_retrieval_options():
+    options = RetrievalOptions(top_k=1, min_similarity=0.9)
+    cache = AnswerCacheFake(cached=None)
+    uc, _ = build_use_case(answer_cache=cache)
+
+    uc.execute(organization=make_org(), question="What is RAG?", options=options)
+
+    assert cache.looked_up_options == options
+    assert cache.stored[0][4] == options
+
+
+def test_ask_question_cache_failure_falls_back_to_llm():
+    uc, deps = build_use_case(answer_cache=AnswerCacheFake(fail=True))
+
+    result = uc.execute(organization=make_org(), question="What is RAG?")
+
+    assert result.answer == "Fake answer"
+    assert len(deps["llm_client"].calls) == 1
+
+
+class StreamingLLMClientSpy(LLMClientSpy):
+    def stream(self, prompt):
+        self.calls.append(("stream", prompt))
+        if self.fail:
+            raise Exception("llm failed")
+        yield LLMStreamEvent(delta="Fake ")
+        yield LLMStreamEvent(delta="answer")
+        yield LLMStreamEvent(response=self.response)
+
+
+def test_ask_question_stream_yields_deltas_then_persisted_result():
+    llm_client = StreamingLLMClientSpy()
+    uc, deps = build_use_case(llm_client=llm_client)
+
+    items = list(uc.stream(organization=make_org(), question="What is RAG?"))
+
+    assert items[:2] == ["Fake ", "answer"]
+    result = items[-1]
+    assert isinstance(result, AskQuestionResult)
+    assert result.answer == "Fake answer"
+    assert result.total_tokens == 130
+
+    assert deps["llm_client"].calls == [("stream", "FINAL PROMPT")]
+    assert len(deps["query_repo"].updated) == 1
+    assert len(deps["llm_usage_repo"].added) == 1
+    assert len(deps["query_chunk_repo"].added_links) == 1
+
+
+def test_ask_question_stream_raises_validation_errors_before_first_item():
+    uc, deps = build_use_case(llm_client=StreamingLLMClientSpy())
+
+    with pytest.raises(EmptyQuestionError):
+        next(uc.stream(organization=make_org(), question="   "))
+
+    assert len(deps["llm_client"].calls) == 0
+
+
+def test_ask_question_stream_wraps_llm_error():
+    uc, deps = build_use_case(llm_client=StreamingLLMClientSpy(fail=True))
+
+    with pytest.raises(UseCaseError):
+        list(uc.stream(organization=make_org(), question="What is RAG?"))
+
+    assert len(deps["llm_usage_repo"].added) == 0
+
+
+def test_ask_question_increments_usage_rollup():
+    rollup = UsageRollupSpy()
+    org = make_org()
+    organization_id = org.id
+    uc, deps = build_use_case(usage_rollup_repo=rollup)
+
+    uc.execute(organization=org, question="What is RAG?")
+
+    assert len(rollup.increments) == 1
+    inc = rollup.increments[0]
+    assert inc["organization_id"] == organization_id
+    assert inc["model_name"] == "fake-llm"
+    assert inc["total_tokens"] == 130
+    assert inc["estimated_cost_usd"] == 0.001
+    assert inc["cache_hit"] is False
+    assert inc["day"] == deps["query_repo"].added[0].created_at.date()
+
+
+def test_ask_question_cache_hit_counts_as_request_without_model():
+    rollup = UsageRollupSpy()
+    cache = AnswerCacheFake(
+        cached=CachedAnswer(
+            question="What is RAG?",
+            llm_response=FakeLLMResponse(generated_answer="Cached answer"),
+            retrieved_chunks=[make_retrieved_chunk()],
+        )
+    )
+    uc, _ = build_use_case(answer_cache=cache, usage_rollup_repo=rollup)
+
+    uc.execute(organization=make_org(), question="What is RAG?")
+
+    assert len(rollup.increments) == 1
+    assert rollup.increments[0]["model_name"] == ""
+    assert rollup.increments[0]["total_tokens"] == 0
+    assert rollup.increments[0]["cache_hit"] is True
+
+
+def test_ask_question_rollup_failure_raises():
+    uc, _ = build_use_case(usage_rollup_repo=UsageRollupSpy(fail=True))
+
+    with pytest.raises(UsageRollupPersistenceError):
+        uc.execute(organization=make_org(), question="What is RAG?")
@@ -1,4 +1,5 @@
 import hashlib
+import io
 import os
 
 from pathlib import Path
@@ -25,7 +26,6 @@ from app.domain.entities import Organization
 
 from app.application.exceptions import (
     ChunkPersistenceError,
-    OrganizationNotFoundError,
     DocumentPersistError,
     UseCaseError,
     DocumentAlreadyExistsError,
@@ -49,6 +49,10 @@ def read_sample_pdf_bytes():
     with open(f"./samples/{filename}", "rb") as f:
         return filename, f.read()
     
+def stage(tmp_path, file_content: bytes):
+    # Uploads reach IngestDocument as staged files, like in the router.
+    return Local_DocumentStorage(str(tmp_path)).stage(io.BytesIO(file_content))
+
 def build_use_case(db, path_storage, doc_repo=None, storage=None, chunker=None, chunk_repo=None, embedder=None):
     if storage is None:
         storage = Local_DocumentStorage(path_storage)
@@ -64,7 +68,6 @@ def build_use_case(db, path_storage, doc_repo=None, storage=None, chunker=None,
         embedder = SentenceTransformerEmbedder()
 
     return IngestDocument(
-        org_repo=org_repo,
         doc_repo=doc_repo,
         chunk_repo=chunk_repo,
         storage=storage,
@@ -109,7 +112,7 @@ def test_ingest_document(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         # Execute the use case
-        result = use_case.execute(entity_org.id, file_content, filename)
+        result = use_case.execute(entity_org, stage(tmp_path, file_content), filename)
         
         assert result.organization_id == entity_org.id
         assert result.document_id is not None
@@ -150,7 +153,7 @@ def test_empty_file(tmp_path):
         file_content = b""
         
         with pytest.raises(EmptyFileError): 
-            use_case.execute(entity_org.id, file_content, filename)            
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)            
     finally:
         db.rollback()
         db.close()
@@ -162,11 +165,12 @@ def test_org_not_found(tmp_path):
     try:    
         use_case, org_repo = build_use_case(db, str(tmp_path))
         
-        non_existent_org_id = "00000000-0000-0000-0000-000000000000"
+        # The organization comes from the caller; one that was never persisted fails on the foreign key.
+        non_existent_org = Organization(name="Ghost Org", api_key_hash="0" * 64)
         filename, file_content = read_sample_pdf_bytes()
         
-        with pytest.raises(OrganizationNotFoundError):
-            use_case.execute(non_existent_org_id, file_content, filename)
+        with pytest.raises(DocumentPersistError):
+            use_case.execute(non_existent_org, stage(tmp_path, file_content), filename)
             
     finally:
         db.rollback()
@@ -188,7 +192,7 @@ def test_parsing_error(tmp_path):
         file_content = b"This is not a PDF file."
         
         with pytest.raises(ParsingError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
             
     finally:
         db.rollback()
@@ -209,7 +213,7 @@ def test_empty_pdf(tmp_path):
         filename = "empty.pdf"
         file_content = b"%PDF-1.4\n%EOF"  # Minimal PDF structure with no content        
         with pytest.raises(ParsingError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
             
     finally:
         db.rollback()
@@ -230,12 +234,16 @@ def test_document_already_exists_hash(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         # First ingestion should succeed
-        result1 = use_case.execute(entity_org.id, file_content, filename)
+        result1 = use_case.execute(entity_org, stage(tmp_path, file_content), filename)
         assert result1.document_id is not None
         
-        # Second ingestion with the same file should raise DocumentAlreadyExistsError
+        # Second ingestion with the same file should raise DocumentAlreadyExistsError, before parsing it again
+        class failingParser:
+            def parse_pdf_file(self, path: str) -> str:
+                raise AssertionError("duplicates must be rejected before parsing")
+        use_case.parser = failingParser()
         with pytest.raises(DocumentAlreadyExistsError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
             
     finally:
         db.rollback()
@@ -249,7 +257,7 @@ def test_persistence_error(tmp_path):
     try:           
         #we fake the document repo.        
         class failingDocumentRepo:         
-            def add(self, document: Document) -> None:
+            def add_if_new(self, document: Document) -> bool:
                 raise Exception("Simulated database failure")            
             def get_by_hash(self, organization_id: uuid.UUID, document_hash: str) -> Document | None:                
                 return None        
@@ -263,7 +271,7 @@ def test_persistence_error(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         with pytest.raises(DocumentPersistError):
-            use_case.execute(entity_org.id, file_content, filename) 
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename) 
         
     finally:
         db.rollback()
@@ -277,7 +285,7 @@ def test_storage_error(tmp_path):
     try:           
         #we fake the storage.        
         class failingStorage:         
-            def save(self, organization_id: uuid.UUID, document_id: uuid.UUID, content: bytes) -> None:
+            def save_staged(self, organization_id: uuid.UUID, document_id: uuid.UUID, staged) -> None:
                 raise Exception("Simulated storage failure")     
         
         use_case, org_repo = build_use_case(db, str(tmp_path), storage=failingStorage())
@@ -289,7 +297,7 @@ def test_storage_error(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         with pytest.raises(StorageWriteError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
     finally:
         db.rollback()
         db.close()
@@ -315,7 +323,7 @@ def test_chunk_error(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         with pytest.raises(ChunkingError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
     finally:
         db.rollback()
         db.close()
@@ -340,7 +348,7 @@ def test_chunkrepo_error(tmp_path):
         filename, file_content = read_sample_pdf_bytes()
         
         with pytest.raises(ChunkPersistenceError):
-            use_case.execute(entity_org.id, file_content, filename)
+            use_case.execute(entity_org, stage(tmp_path, file_content), filename)
     finally:
         db.rollback()
         db.close()
\ No newline at end of file
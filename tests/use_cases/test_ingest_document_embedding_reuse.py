@@ -0,0 +1,114 @@
+import pytest
+
+from app.application.use_cases import chunk_content_hash, embedding_model_key
+from app.application.exceptions import ChunkEmbeddingError, ChunkPersistenceError
+from tests.use_cases.helpers import ChunkerFake, EmbedderSpy, build_ingest_document, make_org, make_upload
+
+
+class ChunkRepoSpy:
+    def __init__(self, known=None, fail_on_lookup=False):
+        self.known = known or {}
+        self.fail_on_lookup = fail_on_lookup
+        self.lookups = []
+        self.added = []
+
+    def get_embeddings_by_content_hash(self, organization_id, content_hashes, embedding_model):
+        self.lookups.append((organization_id, list(content_hashes), embedding_model))
+        if self.fail_on_lookup:
+            raise Exception("db down on lookup")
+        return {h: e for (h, m), e in self.known.items() if m == embedding_model and h in content_hashes}
+
+    def add_many(self, chunks):
+        self.added.extend(chunks)
+
+
+class TokenCounterSpy:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def count_many(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise Exception("encoding unavailable")
+        return [len(t.split()) for t in texts]
+
+
+def build_use_case(chunks, chunk_repo, embedder, token_counter=None):
+    return build_ingest_document(chunk_repo, embedder, chunker=ChunkerFake(chunks), token_counter=token_counter)
+
+
+def test_only_novel_chunks_are_embedded():
+    embedder = EmbedderSpy(dimensions=3)
+    model = embedding_model_key(embedder)
+    reused = [9.0, 9.0, 9.0]
+    chunk_repo = ChunkRepoSpy(known={(chunk_content_hash("unchanged intro"), model): reused})
+    uc = build_use_case(["unchanged intro", "new section"], chunk_repo, embedder)
+
+    result = uc.execute(make_org(), make_upload(), "manual-v2.pdf")
+
+    assert result.chunks_created == 2
+    assert embedder.calls == [["new section"]]
+    assert [c.embedding for c in chunk_repo.added] == [reused, [11.0, 0.0, 1.0]]
+    assert all(c.embedding_model == "fake-embedding:3" for c in chunk_repo.added)
+    assert chunk_repo.added[1].content_hash == chunk_content_hash("new section")
+
+
+def test_embeddings_from_another_model_are_not_reused():
+    embedder = EmbedderSpy(dimensions=3)
+    chunk_repo = ChunkRepoSpy(known={(chunk_content_hash("intro"), "other-model:1536"): [1.0] * 3})
+    uc = build_use_case(["intro"], chunk_repo, embedder)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert embedder.calls == [["intro"]]
+    assert chunk_repo.lookups[0][2] == "fake-embedding:3"
+
+
+def test_repeated_text_inside_a_document_is_embedded_once():
+    embedder = EmbedderSpy(dimensions=3)
+    chunk_repo = ChunkRepoSpy()
+    uc = build_use_case(["footer", "body", "footer"], chunk_repo, embedder)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert embedder.calls == [["footer", "body"]]
+    assert chunk_repo.added[0].embedding == chunk_repo.added[2].embedding
+
+
+def test_lookup_failure_is_reported_instead_of_embedding_everything():
+    #a failed SELECT aborts the Postgres transaction: writing the chunks afterwards would fail with another error.
+    embedder, chunk_repo = EmbedderSpy(dimensions=3), ChunkRepoSpy(fail_on_lookup=True)
+    uc = build_use_case(["a chunk", "another chunk"], chunk_repo, embedder)
+
+    with pytest.raises(ChunkPersistenceError, match="db down on lookup"):
+        uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert embedder.calls == []
+    assert chunk_repo.added == []
+
+
+def test_embedder_count_mismatch_raises():
+    uc = build_use_case(["a chunk", "another chunk"], ChunkRepoSpy(), EmbedderSpy(dimensions=3, wrong_count=True))
+
+    with pytest.raises(ChunkEmbeddingError):
+        uc.execute(make_org(), make_upload(), "manual.pdf")
+
+
+def test_token_counts_come_from_the_tokenizer_in_one_batch():
+    token_counter, chunk_repo = TokenCounterSpy(), ChunkRepoSpy()
+    uc = build_use_case(["one two three", "four"], chunk_repo, EmbedderSpy(dimensions=3), token_counter)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert token_counter.batches == [["one two three", "four"]]
+    assert [c.token_count for c in chunk_repo.added] == [3, 1]
+
+
+def test_tokenizer_failure_falls_back_to_the_estimate():
+    chunk_repo = ChunkRepoSpy()
+    uc = build_use_case(["x" * 40], chunk_repo, EmbedderSpy(dimensions=3), TokenCounterSpy(fail=True))
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert chunk_repo.added[0].token_count == 10
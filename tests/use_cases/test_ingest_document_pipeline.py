@@ -0,0 +1,118 @@
+import pytest
+
+from app.application.exceptions import ChunkEmbeddingError, ParsingError
+from app.application.services.chunker import ChunkingConfig, V1_Chunker
+from app.domain.interfaces import ChunkerInterface
+from tests.use_cases.helpers import DocRepoFake, EmbedderSpy, ParserFake, StorageSpy, build_ingest_document, make_org, make_upload
+
+
+class PageChunkerFake(ChunkerInterface):
+    #one chunk per page, so batches are easy to follow.
+    def chunk_text(self, content):
+        return content.split("\n")
+
+    def iter_chunks(self, pages):
+        yield from pages
+
+
+class ChunkRepoSpy:
+    def __init__(self):
+        self.batches = []
+
+    def get_embeddings_by_content_hash(self, organization_id, content_hashes, embedding_model):
+        #earlier batches are visible, as they are in the database session.
+        stored = {c.content_hash: c.embedding for batch in self.batches for c in batch}
+        return {h: stored[h] for h in content_hashes if h in stored}
+
+    def add_many(self, chunks):
+        self.batches.append(list(chunks))
+
+
+def build_use_case(pages, embedder, chunk_repo, doc_repo=None, storage=None, chunker=None, fail_after=None, **kwargs):
+    return build_ingest_document(
+        chunk_repo,
+        embedder,
+        parser=ParserFake(pages, fail_after),
+        chunker=chunker or PageChunkerFake(),
+        doc_repo=doc_repo,
+        storage=storage,
+        **kwargs,
+    )
+
+
+def test_batches_are_written_in_order_as_they_are_embedded():
+    pages = [f"page {i}" for i in range(7)]
+    chunk_repo, doc_repo = ChunkRepoSpy(), DocRepoFake()
+    uc = build_use_case(pages, EmbedderSpy(), chunk_repo, doc_repo, embed_batch_size=3, max_in_flight_batches=2)
+
+    result = uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert result.chunks_created == 7
+    assert [len(b) for b in chunk_repo.batches] == [3, 3, 1]
+    assert [c.chunk_index for b in chunk_repo.batches for c in b] == list(range(7))
+    assert [c.content for b in chunk_repo.batches for c in b] == pages
+    #the document row is written with the first page and completed once every page was parsed.
+    assert doc_repo.added[0].content == "page 0"
+    assert doc_repo.updated[0].content == "\n".join(pages)
+
+
+def test_embedding_requests_in_flight_are_bounded():
+    embedder = EmbedderSpy(delay=0.02)
+    uc = build_use_case([f"page {i}" for i in range(12)], embedder, ChunkRepoSpy(), embed_batch_size=1, max_in_flight_batches=3)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert len(embedder.calls) == 12
+    assert 1 < embedder.max_running <= 3
+
+
+def test_text_repeated_across_batches_is_embedded_once():
+    embedder, chunk_repo = EmbedderSpy(delay=0.01), ChunkRepoSpy()
+    uc = build_use_case(["footer", "body", "footer", "body", "footer"], embedder, chunk_repo, embed_batch_size=1, max_in_flight_batches=4)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert sorted(t for call in embedder.calls for t in call) == ["body", "footer"]
+    chunks = [c for b in chunk_repo.batches for c in b]
+    assert chunks[0].embedding == chunks[2].embedding == chunks[4].embedding
+
+
+def test_streamed_v1_chunks_match_the_whole_text_chunks():
+    pages = [" ".join(f"word{p}-{i}" for i in range(150)) for p in range(5)]
+    chunker = V1_Chunker(ChunkingConfig(chunk_size=500, overlap=50, min_chunk_size=10))
+    chunk_repo = ChunkRepoSpy()
+    uc = build_use_case(pages, EmbedderSpy(), chunk_repo, chunker=chunker, embed_batch_size=4)
+
+    uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert [c.content for b in chunk_repo.batches for c in b] == chunker.chunk_text("\n".join(pages))
+
+
+def test_failed_batch_stops_the_pipeline_and_removes_the_file():
+    storage = StorageSpy()
+    uc = build_use_case([f"page {i}" for i in range(6)], EmbedderSpy(fail_on_call=2), ChunkRepoSpy(), storage=storage, embed_batch_size=2, max_in_flight_batches=1)
+
+    with pytest.raises(ChunkEmbeddingError):
+        uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert len(storage.deleted) == 1 #the caller rolls back the rows written so far.
+
+
+def test_parsing_error_after_the_first_page_is_reported_as_such():
+    storage = StorageSpy()
+    uc = build_use_case(["page 0", "page 1", "page 2"], EmbedderSpy(), ChunkRepoSpy(), storage=storage, fail_after=2)
+
+    with pytest.raises(ParsingError):
+        uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert len(storage.deleted) == 1
+
+
+def test_blank_document_is_rejected_before_anything_is_written():
+    doc_repo = DocRepoFake()
+    uc = build_use_case(["  ", "\n"], EmbedderSpy(), ChunkRepoSpy(), doc_repo=doc_repo)
+
+    with pytest.raises(ParsingError):
+        uc.execute(make_org(), make_upload(), "manual.pdf")
+
+    assert doc_repo.added == []
@@ -0,0 +1,333 @@
+import hashlib
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.application.use_cases import ClaimNextIngestJob, EnqueueIngestJob, GetIngestJob, HeartbeatIngestJob, ListSucceededIngestJobs, RunIngestJob
+from app.application.dto import IngestDocumentResult
+from app.application.exceptions import (
+    EmptyFileError,
+    IngestJobFileNotFoundError,
+    IngestJobNotFoundError,
+    IngestJobPersistenceError,
+    OrganizationNotFoundError,
+    ParsingError,
+    StorageWriteError,
+)
+from app.domain.entities import IngestJob, Organization
+from app.domain.types import StagedFile
+
+
+FAKE_HASH = "a" * 64
+
+
+def make_org(name: str = "Acme") -> Organization:
+    return Organization(name=name, api_key_hash=FAKE_HASH)
+
+
+class OrgRepoFake:
+    def __init__(self, org=None):
+        self.org = org
+
+    def get_by_id(self, organization_id):
+        return self.org
+
+
+class JobRepoSpy:
+    def __init__(self, jobs=None, fail_on_add=False, fail_on_update=False):
+        self.jobs = {j.id: j for j in (jobs or [])}
+        self.fail_on_add = fail_on_add
+        self.fail_on_update = fail_on_update
+        self.updated = []
+
+    def add(self, job):
+        if self.fail_on_add:
+            raise Exception("db down on add")
+        self.jobs[job.id] = job
+
+    def get_by_id(self, organization_id, id):
+        job = self.jobs.get(id)
+        return job if job is not None and job.organization_id == organization_id else None
+
+    def update(self, job):
+        if self.fail_on_update:
+            raise Exception("db down on update")
+        self.jobs[job.id] = job
+        self.updated.append(job)
+
+    def claim_next(self, stale_after_seconds, max_attempts):
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+        stale = [j for j in self.jobs.values() if j.status == "running" and j.updated_at < stale_before]
+        for job in stale:
+            if job.attempts >= max_attempts:
+                self.jobs[job.id] = job.mark_failed("The worker stopped while processing this job too many times.")
+        claimable = [j for j in self.jobs.values() if j.status == "queued" or (j in stale and j.attempts < max_attempts)]
+        return min(claimable, key=lambda j: j.created_at) if claimable else None
+
+    def list_succeeded_since(self, since):
+        if self.fail_on_update:
+            raise Exception("db down on list")
+        return sorted((j for j in self.jobs.values() if j.status == "succeeded" and j.updated_at >= since), key=lambda j: j.updated_at)
+
+    def heartbeat(self, job):
+        if self.fail_on_update:
+            raise Exception("db down on heartbeat")
+        current = self.jobs.get(job.id)
+        return current is not None and current.status == "running" and current.attempts == job.attempts
+
+
+class StorageSpy:
+    # Staged files are kept in memory, keyed by their fake path.
+    def __init__(self, fail_on_save=False):
+        self.files = {}
+        self.staged = {}
+        self.fail_on_save = fail_on_save
+        self.deleted = []
+        self.discarded = []
+
+    def stage_bytes(self, content):
+        staged = StagedFile(path=f"staged-{uuid.uuid4()}", size=len(content), sha256=hashlib.sha256(content).hexdigest())
+        self.staged[staged.path] = content
+        return staged
+
+    def stage_stored(self, organization_id, document_id):
+        if (organization_id, document_id) not in self.files:
+            _raise_not_found()
+        return self.stage_bytes(self.files[(organization_id, document_id)])
+
+    def save_staged(self, organization_id, document_id, staged):
+        if self.fail_on_save:
+            raise Exception("disk full")
+        self.files[(organization_id, document_id)] = self.staged.pop(staged.path)
+
+    def discard(self, staged):
+        self.discarded.append(staged.path)
+        self.staged.pop(staged.path, None)
+
+    def delete(self, organization_id, document_id):
+        self.deleted.append((organization_id, document_id))
+        self.files.pop((organization_id, document_id), None)
+
+
+def _raise_not_found():
+    raise FileNotFoundError("missing")
+
+
+class IngestDocumentSpy:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def execute(self, organization, upload, filename):
+        organization_id = organization.id
+        self.calls.append((organization_id, upload.sha256, filename))
+        if self.error is not None:
+            raise self.error
+        return IngestDocumentResult(
+            organization_id=organization_id,
+            document_id=uuid.uuid4(),
+            chunks_created=3,
+            document_hash="b" * 64,
+        )
+
+
+# --- EnqueueIngestJob --- #
+
+def test_enqueue_stores_file_and_queues_job():
+    org = make_org()
+    job_repo, storage = JobRepoSpy(), StorageSpy()
+    uc = EnqueueIngestJob(job_repo=job_repo, storage=storage)
+
+    result = uc.execute(org, storage.stage_bytes(b"%PDF-1.4 data"), "report.pdf")
+
+    assert result.status == "queued"
+    assert result.attempts == 0
+    assert result.filename == "report.pdf"
+    assert job_repo.jobs[result.job_id].status == "queued"
+    assert storage.files[(org.id, result.job_id)] == b"%PDF-1.4 data"
+
+
+def test_enqueue_rejects_empty_file():
+    storage = StorageSpy()
+    uc = EnqueueIngestJob(job_repo=JobRepoSpy(), storage=storage)
+
+    with pytest.raises(EmptyFileError):
+        uc.execute(make_org(), storage.stage_bytes(b""), "empty.pdf")
+
+
+def test_enqueue_wraps_storage_error():
+    org = make_org()
+    job_repo = JobRepoSpy()
+    storage = StorageSpy(fail_on_save=True)
+    uc = EnqueueIngestJob(job_repo=job_repo, storage=storage)
+
+    with pytest.raises(StorageWriteError):
+        uc.execute(org, storage.stage_bytes(b"data"), "a.pdf")
+    assert job_repo.jobs == {}
+
+
+def test_enqueue_persistence_error_deletes_stored_file():
+    org = make_org()
+    storage = StorageSpy()
+    uc = EnqueueIngestJob(job_repo=JobRepoSpy(fail_on_add=True), storage=storage)
+
+    with pytest.raises(IngestJobPersistenceError):
+        uc.execute(org, storage.stage_bytes(b"data"), "a.pdf")
+    assert storage.files == {}
+    assert len(storage.deleted) == 1
+
+
+# --- GetIngestJob --- #
+
+def test_get_ingest_job_is_scoped_to_organization():
+    org = make_org()
+    job = IngestJob(organization_id=org.id, filename="a.pdf")
+    uc = GetIngestJob(job_repo=JobRepoSpy([job]))
+
+    assert uc.execute(org.id, job.id).job_id == job.id
+    with pytest.raises(IngestJobNotFoundError):
+        uc.execute(uuid.uuid4(), job.id)
+
+
+# --- ClaimNextIngestJob --- #
+
+def test_claim_marks_job_running_and_counts_attempt():
+    job = IngestJob(organization_id=uuid.uuid4(), filename="a.pdf")
+    job_repo = JobRepoSpy([job])
+
+    claimed = ClaimNextIngestJob(job_repo=job_repo).execute()
+
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert job_repo.jobs[job.id].status == "running"
+
+
+def test_claim_returns_none_when_queue_is_empty():
+    assert ClaimNextIngestJob(job_repo=JobRepoSpy()).execute() is None
+
+
+def test_stale_job_is_reclaimed_until_it_runs_out_of_attempts():
+    #its worker died (OOM, crashed parser): record_failure never ran.
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    retry = replace(IngestJob(organization_id=uuid.uuid4(), filename="a.pdf", status="running", attempts=1), updated_at=long_ago)
+    exhausted = replace(IngestJob(organization_id=uuid.uuid4(), filename="b.pdf", status="running", attempts=3), updated_at=long_ago)
+    job_repo = JobRepoSpy([exhausted, retry])
+    uc = ClaimNextIngestJob(job_repo=job_repo, stale_after_seconds=60, max_attempts=3)
+
+    claimed = uc.execute()
+
+    assert (claimed.id, claimed.attempts) == (retry.id, 2)
+    assert job_repo.jobs[exhausted.id].status == "failed"
+    assert uc.execute() is None
+
+
+# --- HeartbeatIngestJob --- #
+
+def test_heartbeat_reports_whether_the_job_is_still_this_run():
+    job = IngestJob(organization_id=uuid.uuid4(), filename="a.pdf")
+    job_repo = JobRepoSpy([job])
+    running = ClaimNextIngestJob(job_repo=job_repo).execute()
+
+    assert HeartbeatIngestJob(job_repo=job_repo).execute(running) is True
+
+    job_repo.update(running.mark_running()) #claimed again by another worker.
+    assert HeartbeatIngestJob(job_repo=job_repo).execute(running) is False
+
+
+def test_heartbeat_wraps_persistence_errors():
+    job = IngestJob(organization_id=uuid.uuid4(), filename="a.pdf", status="running", attempts=1)
+
+    with pytest.raises(IngestJobPersistenceError):
+        HeartbeatIngestJob(job_repo=JobRepoSpy([job], fail_on_update=True)).execute(job)
+
+
+# --- ListSucceededIngestJobs --- #
+
+def succeeded_job(finished_at: datetime) -> IngestJob:
+    job = IngestJob(organization_id=uuid.uuid4(), filename="a.pdf", status="running", attempts=1)
+    return replace(job.mark_succeeded(document_id=uuid.uuid4(), document_hash=None, chunks_created=1), updated_at=finished_at)
+
+
+def test_list_succeeded_returns_jobs_finished_since_oldest_first():
+    now = datetime.now(timezone.utc)
+    older, first, second = succeeded_job(now - timedelta(hours=1)), succeeded_job(now - timedelta(seconds=30)), succeeded_job(now)
+    job_repo = JobRepoSpy([second, older, first, IngestJob(organization_id=uuid.uuid4(), filename="queued.pdf")])
+
+    jobs = ListSucceededIngestJobs(job_repo=job_repo).execute(now - timedelta(minutes=1))
+
+    assert [j.id for j in jobs] == [first.id, second.id]
+
+
+def test_list_succeeded_wraps_persistence_errors():
+    with pytest.raises(IngestJobPersistenceError):
+        ListSucceededIngestJobs(job_repo=JobRepoSpy(fail_on_update=True)).execute(datetime.now(timezone.utc))
+
+
+# --- RunIngestJob --- #
+
+def make_running_job(storage: StorageSpy, attempts: int = 1, org: Organization | None = None) -> IngestJob:
+    job = IngestJob(organization_id=(org or make_org()).id, filename="a.pdf", status="running", attempts=attempts)
+    storage.files[(job.organization_id, job.id)] = b"%PDF-1.4 data"
+    return job
+
+
+def test_run_ingests_stored_file_and_marks_succeeded():
+    org, storage = make_org(), StorageSpy()
+    job = make_running_job(storage, org=org)
+    job_repo, ingest = JobRepoSpy([job]), IngestDocumentSpy()
+
+    result = RunIngestJob(org_repo=OrgRepoFake(org), job_repo=job_repo, storage=storage, ingest_document=ingest).execute(job)
+
+    assert ingest.calls == [(job.organization_id, hashlib.sha256(b"%PDF-1.4 data").hexdigest(), "a.pdf")]
+    assert (job.organization_id, job.id) in storage.files #kept for retries, ingestion got a staged copy.
+    assert storage.staged == {}
+    assert result.status == "succeeded"
+    assert result.chunks_created == 3
+    assert result.document_id is not None
+    assert job_repo.jobs[job.id].status == "succeeded"
+
+
+def test_run_missing_file_raises():
+    storage = StorageSpy()
+    job = IngestJob(organization_id=uuid.uuid4(), filename="a.pdf", status="running", attempts=1)
+    uc = RunIngestJob(org_repo=OrgRepoFake(make_org()), job_repo=JobRepoSpy([job]), storage=storage, ingest_document=IngestDocumentSpy())
+
+    with pytest.raises(IngestJobFileNotFoundError):
+        uc.execute(job)
+
+
+def test_run_deleted_organization_raises():
+    storage = StorageSpy()
+    job = make_running_job(storage)
+    ingest = IngestDocumentSpy()
+    uc = RunIngestJob(org_repo=OrgRepoFake(None), job_repo=JobRepoSpy([job]), storage=storage, ingest_document=ingest)
+
+    with pytest.raises(OrganizationNotFoundError):
+        uc.execute(job)
+    assert ingest.calls == []
+
+
+def test_record_failure_permanent_error_fails_job():
+    storage = StorageSpy()
+    job = make_running_job(storage, attempts=1)
+    uc = RunIngestJob(org_repo=OrgRepoFake(None), job_repo=JobRepoSpy([job]), storage=storage, ingest_document=IngestDocumentSpy(), max_attempts=3)
+
+    result = uc.record_failure(job, ParsingError("Failed to parse PDF"))
+
+    assert result.status == "failed"
+    assert "parse" in result.error
+
+
+def test_record_failure_transient_error_requeues_until_max_attempts():
+    storage = StorageSpy()
+    uc = RunIngestJob(org_repo=OrgRepoFake(None), job_repo=JobRepoSpy(), storage=storage, ingest_document=IngestDocumentSpy(), max_attempts=2)
+
+    first = uc.record_failure(make_running_job(storage, attempts=1), Exception("embedding API 503"))
+    last = uc.record_failure(make_running_job(storage, attempts=2), Exception("embedding API 503"))
+
+    assert first.status == "queued"
+    assert first.error == "embedding API 503"
+    assert last.status == "failed"
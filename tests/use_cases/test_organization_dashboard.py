@@ -0,0 +1,180 @@
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.application.use_cases import GetOrganizationDashboard
+from app.application.services.pagination import decode_cursor, encode_cursor
+from app.application.exceptions import InvalidDashboardQueryError
+from app.domain.entities import Organization
+from app.domain.types import DailyUsage, DocumentSummary, QueryUsageSummary, UsageTotals
+
+
+FAKE_HASH = "a" * 64
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class DocRepoSpy:
+    def __init__(self, summaries):
+        self.summaries = summaries
+        self.calls = 0
+
+    def list_summaries_by_organization(self, organization_id, limit=None, after=None, since=None, until=None):
+        self.calls += 1
+        self.last_kwargs = dict(limit=limit, after=after, since=since, until=until)
+        rows = [d for d in self.summaries if after is None or (d.created_at, d.document_id) > (after.created_at, after.id)]
+        return rows[:limit] if limit is not None else rows
+
+
+class QueryRepoSpy:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def list_with_usage_by_organization(self, organization_id, limit=None, after=None, since=None, until=None):
+        self.calls += 1
+        return self.rows[:limit] if limit is not None else self.rows
+
+
+class UsageRepoSpy:
+    def __init__(self, totals):
+        self.totals = totals
+        self.calls = 0
+
+    def get_totals_by_organization(self, organization_id, since=None, until=None):
+        self.calls += 1
+        self.last_kwargs = dict(since=since, until=until)
+        return self.totals
+
+
+def test_dashboard_uses_one_call_per_section():
+    org = Organization(name="Acme", api_key_hash=FAKE_HASH)
+    docs = [DocumentSummary(document_id=uuid.uuid4(), title=f"doc-{i}.pdf", created_at=NOW, chunk_count=i) for i in range(50)]
+    rows = [
+        QueryUsageSummary(query_id=uuid.uuid4(), question="q1", created_at=NOW, cache_hit=False, model_name="gpt-4.1-mini", total_tokens=125, estimated_cost_usd=0.0012),
+        QueryUsageSummary(query_id=uuid.uuid4(), question="q2", created_at=NOW, cache_hit=True, model_name=None, total_tokens=0, estimated_cost_usd=0.0),
+    ]
+    totals = UsageTotals(request_count=2, prompt_tokens=100, completion_tokens=25, total_tokens=125, estimated_cost_usd=0.0012, models_used=["gpt-4.1-mini"])
+    doc_repo, query_repo, usage_repo = DocRepoSpy(docs), QueryRepoSpy(rows), UsageRepoSpy(totals)
+
+    uc = GetOrganizationDashboard(doc_repo=doc_repo, query_repo=query_repo, llm_usage_repo=usage_repo)
+    result = uc.execute(org, limit=50)
+
+    assert result.next_documents_cursor is None
+    assert (doc_repo.calls, query_repo.calls, usage_repo.calls) == (1, 1, 1)
+    assert len(result.documents) == 50
+    assert result.documents[3].chunks_created == 3
+    assert result.documents[3].filename == "doc-3.pdf"
+    assert result.queries[0].model_name == "gpt-4.1-mini"
+    assert result.queries[1].cache_hit is True
+    assert result.usage_summary.request_count == 2
+    assert result.usage_summary.total_tokens == 125
+    assert result.usage_summary.models_used == ["gpt-4.1-mini"]
+
+
+def make_dashboard(docs):
+    org = Organization(name="Acme", api_key_hash=FAKE_HASH)
+    totals = UsageTotals(request_count=0, prompt_tokens=0, completion_tokens=0, total_tokens=0, estimated_cost_usd=0.0, models_used=[])
+    doc_repo, usage_repo = DocRepoSpy(docs), UsageRepoSpy(totals)
+    uc = GetOrganizationDashboard(doc_repo=doc_repo, query_repo=QueryRepoSpy([]), llm_usage_repo=usage_repo)
+    return uc, org, doc_repo, usage_repo
+
+
+def test_dashboard_pages_documents_with_cursor():
+    docs = sorted(
+        [DocumentSummary(document_id=uuid.uuid4(), title=f"doc-{i}.pdf", created_at=NOW, chunk_count=1) for i in range(5)],
+        key=lambda d: (d.created_at, d.document_id),
+    )
+    uc, org, _, _ = make_dashboard(docs)
+
+    first = uc.execute(org, limit=2)
+    second = uc.execute(org, limit=2, documents_cursor=first.next_documents_cursor)
+    third = uc.execute(org, limit=2, documents_cursor=second.next_documents_cursor)
+
+    seen = [d.document_id for page in (first, second, third) for d in page.documents]
+    assert seen == [str(d.document_id) for d in docs]
+    assert first.next_documents_cursor is not None
+    assert third.next_documents_cursor is None
+    assert first.next_queries_cursor is None
+
+
+def test_dashboard_passes_time_window_to_repositories():
+    uc, org, doc_repo, usage_repo = make_dashboard([])
+    since, until = datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+    uc.execute(org, limit=10, since=since, until=until)
+
+    assert doc_repo.last_kwargs == dict(limit=11, after=None, since=since, until=until)
+    assert usage_repo.last_kwargs == dict(since=since, until=until)
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(limit=0),
+    dict(limit=1000),
+    dict(documents_cursor="not-a-cursor"),
+    dict(since=datetime(2026, 2, 1, tzinfo=timezone.utc), until=datetime(2026, 1, 1, tzinfo=timezone.utc)),
+])
+def test_dashboard_rejects_invalid_parameters(kwargs):
+    uc, org, _, _ = make_dashboard([])
+
+    with pytest.raises(InvalidDashboardQueryError):
+        uc.execute(org, **kwargs)
+
+
+def test_cursor_round_trip():
+    id = uuid.uuid4()
+
+    cursor = decode_cursor(encode_cursor(NOW, id))
+
+    assert (cursor.created_at, cursor.id) == (NOW, id)
+
+
+class RollupRepoSpy:
+    def __init__(self, totals, daily):
+        self.totals = totals
+        self.daily = daily
+        self.calls = []
+
+    def get_totals_by_organization(self, organization_id, since=None, until=None):
+        self.calls.append(("totals", since, until))
+        return self.totals
+
+    def list_daily_by_organization(self, organization_id, since=None, until=None):
+        self.calls.append(("daily", since, until))
+        return self.daily
+
+
+def make_dashboard_with_rollups():
+    org = Organization(name="Acme", api_key_hash=FAKE_HASH)
+    totals = UsageTotals(request_count=7, prompt_tokens=10, completion_tokens=5, total_tokens=15, estimated_cost_usd=0.5, models_used=["m"])
+    daily = [DailyUsage(day=date(2026, 1, 1), request_count=7, cache_hit_count=2, prompt_tokens=10, completion_tokens=5, total_tokens=15, estimated_cost_usd=0.5)]
+    rollup_repo, usage_repo = RollupRepoSpy(totals, daily), UsageRepoSpy(None)
+    uc = GetOrganizationDashboard(
+        doc_repo=DocRepoSpy([]), query_repo=QueryRepoSpy([]),
+        llm_usage_repo=usage_repo, usage_rollup_repo=rollup_repo,
+    )
+    return uc, org, rollup_repo, usage_repo
+
+
+def test_dashboard_summary_reads_rollups_for_day_aligned_windows():
+    uc, org, rollup_repo, usage_repo = make_dashboard_with_rollups()
+
+    result = uc.execute(org, since=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    assert usage_repo.calls == 0
+    assert rollup_repo.calls[0] == ("totals", date(2026, 1, 1), None)
+    assert result.usage_summary.request_count == 7
+    assert result.daily_usage[0].day == "2026-01-01"
+    assert result.daily_usage[0].cache_hit_count == 2
+
+
+def test_dashboard_summary_falls_back_to_usage_rows_for_partial_days():
+    uc, org, rollup_repo, usage_repo = make_dashboard_with_rollups()
+    usage_repo.totals = UsageTotals(request_count=1, prompt_tokens=0, completion_tokens=0, total_tokens=0, estimated_cost_usd=0.0, models_used=[])
+
+    result = uc.execute(org, since=datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc))
+
+    assert rollup_repo.calls == []
+    assert usage_repo.calls == 1
+    assert result.usage_summary.request_count == 1
+    assert result.daily_usage == []
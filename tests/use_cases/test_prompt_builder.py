@@ -0,0 +1,142 @@
+import uuid
+
+import pytest
+
+from app.application.services.chunker import ChunkingConfig, V1_Chunker
+from app.application.services.prompt_builder import Budgeted_PromptBuilder, Merging_PromptBuilder, V1_PromptBuilder
+from app.domain.types import RetrievedChunk
+
+
+class WordCounterSpy:
+    #one token per whitespace-separated word.
+    def __init__(self):
+        self.batches = []
+
+    def count(self, text):
+        return len(text.split())
+
+    def count_many(self, texts):
+        self.batches.append(list(texts))
+        return [len(t.split()) for t in texts]
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+class PromptBuilderSpy:
+    def __init__(self):
+        self.received = None
+
+    def build_prompt(self, question, retrieved_chunks):
+        self.received = retrieved_chunks
+        return "PROMPT"
+
+
+def make_chunk(content, score, chunk_index=0, document_id=None):
+    return RetrievedChunk(chunk_id=uuid.uuid4(), content=content, chunk_index=chunk_index, similarity_score=score, document_id=document_id)
+
+
+def words(n, word="w"):
+    return " ".join([word] * n)
+
+
+def test_chunks_are_packed_in_retrieval_order_and_the_last_one_is_trimmed():
+    counter = WordCounterSpy()
+    #each header "[Chunk i | chunk_index=.. | score=..]" counts 6 words.
+    builder = Budgeted_PromptBuilder(token_counter=counter, max_context_tokens=60, min_trimmed_tokens=5)
+    #ranked by the retriever (e.g. fused with full-text search): the best chunk can have the lowest cosine score.
+    chunks = [make_chunk(words(20, "high"), 0.5), make_chunk(words(30, "mid"), 0.9), make_chunk(words(30, "low"), 0.7)]
+
+    prompt = builder.build_prompt("What?", chunks)
+
+    assert prompt.index("high") < prompt.index("mid")
+    assert prompt.count("mid") == 60 - 26 - 6 #26 for the first chunk, the rest of the budget minus its header.
+    assert "low" not in prompt
+    assert len(counter.batches) == 1
+
+
+def test_best_chunk_is_kept_trimmed_even_when_it_exceeds_the_budget():
+    builder = Budgeted_PromptBuilder(token_counter=WordCounterSpy(), max_context_tokens=10, min_trimmed_tokens=5)
+
+    prompt = builder.build_prompt("What?", [make_chunk(words(100, "big"), 0.9)])
+
+    assert prompt.count("big") == 5
+
+
+def test_too_small_a_remainder_is_dropped_instead_of_trimmed():
+    builder = Budgeted_PromptBuilder(token_counter=WordCounterSpy(), max_context_tokens=30, min_trimmed_tokens=10)
+    chunks = [make_chunk(words(16, "first"), 0.9), make_chunk(words(40, "second"), 0.8)]
+
+    prompt = builder.build_prompt("What?", chunks)
+
+    assert prompt.count("first") == 16
+    assert "second" not in prompt
+
+
+def test_everything_fits_gives_the_v1_prompt():
+    chunks = [make_chunk("alpha beta", 0.9, chunk_index=3), make_chunk("gamma", 0.8, chunk_index=1)]
+    builder = Budgeted_PromptBuilder(token_counter=WordCounterSpy(), max_context_tokens=1000)
+
+    assert builder.build_prompt("What?", chunks) == V1_PromptBuilder().build_prompt("What?", chunks)
+
+
+def test_rejects_invalid_input():
+    with pytest.raises(ValueError):
+        Budgeted_PromptBuilder(token_counter=WordCounterSpy(), max_context_tokens=0)
+    builder = Budgeted_PromptBuilder(token_counter=WordCounterSpy(), max_context_tokens=100)
+    with pytest.raises(ValueError):
+        builder.build_prompt("  ", [make_chunk("alpha", 0.9)])
+    with pytest.raises(ValueError):
+        builder.build_prompt("What?", [])
+
+
+def test_adjacent_chunks_of_a_document_are_merged_without_the_overlap():
+    text = " ".join(f"sentence number {i} of the handbook." for i in range(60))
+    pieces = V1_Chunker(ChunkingConfig(chunk_size=400, overlap=100, min_chunk_size=1)).chunk_text(text)
+    document_id = uuid.uuid4()
+    chunks = [make_chunk(pieces[i], score, i, document_id) for i, score in [(2, 0.7), (1, 0.9), (4, 0.6)]]
+    inner = PromptBuilderSpy()
+
+    Merging_PromptBuilder(inner).build_prompt("What?", chunks)
+
+    merged, separate = inner.received
+    assert text.find(merged.content) != -1 #chunks 1 and 2 became one contiguous passage.
+    assert merged.content.startswith(pieces[1]) and merged.content.endswith(pieces[2])
+    assert (merged.chunk_index, merged.similarity_score, merged.chunk_id) == (1, 0.7, chunks[0].chunk_id) #its best-ranked chunk.
+    assert separate.content == pieces[4]
+
+
+def test_passages_keep_the_retrieval_order_not_the_cosine_order():
+    inner = PromptBuilderSpy()
+    #a full-text hit ranked first by a hybrid retriever despite its low cosine score.
+    chunks = [
+        make_chunk("error code E42 means the filter is clogged", 0.2, 9, uuid.uuid4()),
+        make_chunk("general maintenance advice for the device", 0.8, 0, uuid.uuid4()),
+    ]
+
+    Merging_PromptBuilder(inner).build_prompt("What is E42?", chunks)
+
+    assert [c.content for c in inner.received] == [chunks[0].content, chunks[1].content]
+
+
+def test_chunks_of_different_documents_are_not_merged():
+    inner = PromptBuilderSpy()
+    chunks = [make_chunk("alpha text of the first one", 0.9, 0, uuid.uuid4()), make_chunk("beta text of the second one", 0.8, 1, uuid.uuid4())]
+
+    Merging_PromptBuilder(inner).build_prompt("What?", chunks)
+
+    assert [c.content for c in inner.received] == ["alpha text of the first one", "beta text of the second one"]
+
+
+def test_near_duplicate_passages_are_dropped_keeping_the_best_one():
+    inner = PromptBuilderSpy()
+    boilerplate = "All rights reserved. No part of this manual may be reproduced without written permission from the publisher."
+    chunks = [
+        make_chunk(boilerplate, 0.8, 7, uuid.uuid4()),
+        make_chunk("Refunds are processed within fourteen days of the request.", 0.7, 3, uuid.uuid4()),
+        make_chunk(boilerplate + " Edition 2.", 0.9, 0, uuid.uuid4()),
+    ]
+
+    Merging_PromptBuilder(inner, duplicate_threshold=0.8).build_prompt("What?", chunks)
+
+    assert [c.similarity_score for c in inner.received] == [0.8, 0.7] #the best-ranked copy is kept, whatever its score.
@@ -0,0 +1,80 @@
+import pytest
+
+from app.application.services.chunker import SentenceChunkingConfig, Sentence_Chunker
+
+
+class WordCounterSpy:
+    #one token per whitespace-separated word.
+    def __init__(self):
+        self.batches = []
+
+    def count_many(self, texts):
+        self.batches.append(list(texts))
+        return [len(t.split()) for t in texts]
+
+
+def chunker(max_tokens, overlap_sentences=0, paragraph_break_ratio=1.0, token_counter=None):
+    config = SentenceChunkingConfig(max_tokens=max_tokens, overlap_sentences=overlap_sentences, paragraph_break_ratio=paragraph_break_ratio)
+    return Sentence_Chunker(config, token_counter or WordCounterSpy())
+
+
+def test_sentences_are_packed_whole_up_to_the_budget():
+    text = "  One two three. Four five six! Seven eight? \"Nine ten.\" Eleven.  "
+    token_counter = WordCounterSpy()
+
+    chunks = chunker(6, token_counter=token_counter).chunk_text(text)
+
+    assert chunks == ["One two three. Four five six!", "Seven eight? \"Nine ten.\" Eleven."]
+    assert len(token_counter.batches) == 1
+
+
+def test_consecutive_chunks_share_overlap_sentences():
+    text = "A a. B b. C c. D d. E e."
+
+    chunks = chunker(4, overlap_sentences=1).chunk_text(text)
+
+    assert chunks == ["A a. B b.", "B b. C c.", "C c. D d.", "D d. E e."]
+
+
+def test_overlap_larger_than_a_chunk_still_moves_forward():
+    chunks = chunker(2, overlap_sentences=5).chunk_text("A a. B b. C c.")
+
+    assert chunks == ["A a.", "B b.", "C c."]
+
+
+def test_paragraph_end_closes_a_chunk_that_is_full_enough():
+    text = "One two three. Four five.\n\nSix seven. Eight nine."
+
+    assert chunker(20, paragraph_break_ratio=0.2).chunk_text(text) == ["One two three. Four five.", "Six seven. Eight nine."]
+    assert chunker(20, paragraph_break_ratio=1.0).chunk_text(text) == [text]
+
+
+def test_decimal_points_and_single_newlines_do_not_end_sentences():
+    text = "Version 1.2 is out\nand stable. Next."
+
+    assert chunker(6).chunk_text(text) == ["Version 1.2 is out\nand stable.", "Next."]
+
+
+def test_sentence_longer_than_the_budget_is_split_at_whitespace():
+    chunks = chunker(3).chunk_text("w1 w2 w3 w4 w5 w6 w7 end. Short one.")
+
+    assert all(len(c.split()) <= 3 for c in chunks)
+    assert " ".join(chunks).split() == "w1 w2 w3 w4 w5 w6 w7 end. Short one.".split()
+
+
+def test_without_token_counter_four_chars_count_as_one_token():
+    text = ("x" * 39 + ". ") * 4
+
+    chunks = Sentence_Chunker(SentenceChunkingConfig(max_tokens=20, overlap_sentences=0)).chunk_text(text)
+
+    assert len(chunks) == 2
+
+
+def test_blank_content_gives_no_chunks_and_invalid_config_raises():
+    assert chunker(10).chunk_text(" \n\n ") == []
+    with pytest.raises(ValueError):
+        chunker(10).chunk_text(None)
+    with pytest.raises(ValueError):
+        Sentence_Chunker(SentenceChunkingConfig(max_tokens=0))
+    with pytest.raises(ValueError):
+        Sentence_Chunker(SentenceChunkingConfig(overlap_sentences=-1))
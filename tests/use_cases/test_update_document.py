@@ -0,0 +1,191 @@
+import hashlib
+import uuid
+
+import pytest
+
+from app.application.exceptions import ChunkPersistenceError, DocumentAlreadyExistsError, DocumentNotFoundError, DocumentPersistError
+from app.application.use_cases import chunk_content_hash, embedding_model_key
+from app.domain.entities import Chunk, Document
+from tests.use_cases.helpers import ChunkerFake, CommitSpy, DocRepoFake, EmbedderSpy, StorageSpy, build_update_document, make_org, make_upload
+
+
+class ChunkRepoSpy:
+    def __init__(self, chunks, fail_on_lookup=False, doc_repo=None):
+        self.chunks = list(chunks)
+        self.fail_on_lookup = fail_on_lookup
+        self.doc_repo = doc_repo
+        self.read_locked = []
+        self.diffs = []
+
+    def get_by_document(self, organization_id, document_id):
+        if self.doc_repo is not None:
+            self.read_locked.append(document_id in self.doc_repo.locked)
+        return sorted((c for c in self.chunks if c.document_id == document_id), key=lambda c: c.chunk_index)
+
+    def get_embeddings_by_content_hash(self, organization_id, content_hashes, embedding_model):
+        if self.fail_on_lookup:
+            raise Exception("db down on lookup")
+        return {}
+
+    def update_document_chunks(self, organization_id, document_id, added, deleted_ids, moved):
+        self.diffs.append({"added": added, "deleted_ids": deleted_ids, "moved": moved})
+
+
+def make_document(organization, content=b"v1"):
+    return Document(
+        organization_id=organization.id,
+        title="handbook.pdf",
+        source_type="pdf",
+        content="old text",
+        document_hash=hashlib.sha256(content).hexdigest(),
+    )
+
+
+def stored_chunks(document, texts, embedding_model="fake-embedding:2"):
+    return [
+        Chunk(
+            document_id=document.id,
+            organization_id=document.organization_id,
+            chunk_index=i,
+            content=text,
+            embedding=[0.0, 1.0],
+            token_count=1,
+            content_hash=chunk_content_hash(text),
+            embedding_model=embedding_model,
+        )
+        for i, text in enumerate(texts)
+    ]
+
+
+def build_use_case(doc_repo, chunk_repo, new_texts, embedder=None, storage=None, commit=None):
+    return build_update_document(doc_repo, chunk_repo, ChunkerFake(new_texts), embedder, storage, commit)
+
+
+def test_only_changed_chunks_are_embedded_and_written():
+    org = make_org()
+    document = make_document(org)
+    old = stored_chunks(document, ["intro", "chapter one, with a typo", "appendix"])
+    chunk_repo, embedder, storage = ChunkRepoSpy(old), EmbedderSpy(), StorageSpy()
+    uc = build_use_case(DocRepoFake([document]), chunk_repo, ["intro", "chapter one, fixed", "appendix"], embedder, storage)
+
+    result = uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert embedder.calls == [["chapter one, fixed"]]
+    diff = chunk_repo.diffs[0]
+    assert diff["deleted_ids"] == [old[1].id]
+    assert [(c.chunk_index, c.content) for c in diff["added"]] == [(1, "chapter one, fixed")]
+    assert diff["moved"] == {}
+    assert (result.chunks_total, result.chunks_unchanged, result.chunks_added, result.chunks_deleted) == (3, 2, 1, 1)
+    assert storage.saved == [document.id]
+
+
+def test_kept_chunks_shift_when_text_is_inserted_before_them():
+    org = make_org()
+    document = make_document(org)
+    old = stored_chunks(document, ["intro", "body"])
+    chunk_repo = ChunkRepoSpy(old)
+    uc = build_use_case(DocRepoFake([document]), chunk_repo, ["new preface", "intro", "body"])
+
+    result = uc.execute(org, document.id, make_upload(b"v2"))
+
+    diff = chunk_repo.diffs[0]
+    assert diff["moved"] == {old[0].id: 1, old[1].id: 2}
+    assert diff["deleted_ids"] == []
+    assert result.moved_chunk_ids == [old[0].id, old[1].id]
+
+
+def test_chunks_from_another_embedding_model_are_replaced():
+    org = make_org()
+    document = make_document(org)
+    old = stored_chunks(document, ["intro"], embedding_model="other-model:1536")
+    chunk_repo, embedder = ChunkRepoSpy(old), EmbedderSpy()
+    uc = build_use_case(DocRepoFake([document]), chunk_repo, ["intro"], embedder)
+
+    uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert embedder.calls == [["intro"]]
+    assert chunk_repo.diffs[0]["deleted_ids"] == [old[0].id]
+    assert chunk_repo.diffs[0]["added"][0].embedding_model == embedding_model_key(embedder)
+
+
+def test_identical_file_is_not_parsed_again():
+    org = make_org()
+    document = make_document(org, content=b"v1")
+    chunk_repo, embedder = ChunkRepoSpy(stored_chunks(document, ["intro", "body"])), EmbedderSpy()
+    doc_repo = DocRepoFake([document])
+    uc = build_use_case(doc_repo, chunk_repo, ["must not be used"], embedder)
+
+    result = uc.execute(org, document.id, make_upload(b"v1"), "handbook-v1.pdf")
+
+    assert (result.chunks_unchanged, result.chunks_added, result.chunks_deleted) == (2, 0, 0)
+    assert embedder.calls == [] and chunk_repo.diffs == []
+    assert doc_repo.updated[0].title == "handbook-v1.pdf"
+
+
+def test_unknown_document_raises():
+    org = make_org()
+    uc = build_use_case(DocRepoFake([]), ChunkRepoSpy([]), ["intro"])
+
+    with pytest.raises(DocumentNotFoundError):
+        uc.execute(org, uuid.uuid4(), make_upload(b"v2"))
+
+
+def test_content_of_another_document_is_rejected():
+    org = make_org()
+    document, other = make_document(org, content=b"v1"), make_document(org, content=b"other")
+    uc = build_use_case(DocRepoFake([document, other]), ChunkRepoSpy([]), ["intro"])
+
+    with pytest.raises(DocumentAlreadyExistsError):
+        uc.execute(org, document.id, make_upload(b"other"))
+
+
+def test_chunks_are_read_under_the_document_lock():
+    org = make_org()
+    document = make_document(org)
+    doc_repo = DocRepoFake([document])
+    chunk_repo = ChunkRepoSpy(stored_chunks(document, ["intro"]), doc_repo=doc_repo)
+    uc = build_use_case(doc_repo, chunk_repo, ["intro", "new chapter"])
+
+    uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert doc_repo.locked == [document.id]
+    assert chunk_repo.read_locked == [True]
+
+
+def test_hash_taken_concurrently_is_rejected_instead_of_failing_the_update():
+    org = make_org()
+    document = make_document(org)
+    chunk_repo, storage = ChunkRepoSpy(stored_chunks(document, ["intro"])), StorageSpy()
+    uc = build_use_case(DocRepoFake([document], hash_taken_on_update=True), chunk_repo, ["intro", "new chapter"], storage=storage)
+
+    with pytest.raises(DocumentAlreadyExistsError):
+        uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert chunk_repo.diffs == []
+    assert storage.saved == []
+
+
+def test_embedding_lookup_failure_is_reported_and_nothing_is_written():
+    org = make_org()
+    document = make_document(org)
+    chunk_repo, embedder = ChunkRepoSpy(stored_chunks(document, ["intro"]), fail_on_lookup=True), EmbedderSpy()
+    uc = build_use_case(DocRepoFake([document]), chunk_repo, ["intro", "new chapter"], embedder)
+
+    with pytest.raises(ChunkPersistenceError, match="db down on lookup"):
+        uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert embedder.calls == []
+    assert chunk_repo.diffs == []
+
+
+def test_failed_commit_keeps_the_previous_file():
+    org = make_org()
+    document = make_document(org)
+    storage, commit = StorageSpy(), CommitSpy(fail=True)
+    uc = build_use_case(DocRepoFake([document]), ChunkRepoSpy(stored_chunks(document, ["intro"])), ["intro", "new chapter"], storage=storage, commit=commit)
+
+    with pytest.raises(DocumentPersistError, match="db down on commit"):
+        uc.execute(org, document.id, make_upload(b"v2"))
+
+    assert commit.calls == 1
+    assert storage.saved == [] #the caller rolls back: old rows and old file still match.